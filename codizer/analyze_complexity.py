@@ -1,24 +1,51 @@
 import sys
 import os
 import re
-import json
+import inspect
 
 # Import the ComplexityAnalyzer from our Django app
 sys.path.append(os.path.join(os.path.dirname(__file__), 'python_backend'))
 from analyzer.complexity_analyzer import ComplexityAnalyzer
+from analyzer.line_structure import line_structure
+from analyzer.loop_bounds import loop_cost
+from analyzer.io_loops import io_in_loops
+from analyzer.async_calls import async_findings
+from analyzer.vectorization import vectorization_candidates
+from analyzer.cost_models import default_registry
+from analyzer.watch import write_json_atomic
+from analyzer.analysis_cache import AnalysisCache, content_hash, source_version
 
-def analyze_file(file_path):
-    """Analyze a Python file for time and space complexity, line by line."""
-    print(f"\n\033[1m🔍 Analyzing file: {file_path}\033[0m")
-    print("-" * 80)
+# Results for unchanged files come from the cache shared with the other analyzers and the server
+analysis_cache = AnalysisCache()
+ANALYZER_VERSION = source_version(
+    __file__, inspect.getfile(ComplexityAnalyzer), inspect.getfile(line_structure), inspect.getfile(loop_cost),
+    inspect.getfile(io_in_loops), inspect.getfile(async_findings), inspect.getfile(vectorization_candidates),
+    extra=default_registry.fingerprint()
+)
+
+def sidecar_path(file_path):
+    """Where the complexity data of file_path is saved for the VS Code extension."""
+    return os.path.join(os.path.dirname(file_path), f"{os.path.basename(file_path)}.complexity.json")
+
+def complexity_data(file_path, content):
+    """Overall, per-function and per-line complexity of a Python file's content."""
+    key = ('line-report', os.path.abspath(file_path), content_hash(content), ANALYZER_VERSION)
+    output_data = analysis_cache.get(*key)
+    if output_data is not None:
+        # JSON object keys are strings, the line lookups use ints
+        output_data['lines'] = {int(i): info for i, info in output_data['lines'].items()}
+        output_data['file'] = file_path
+        return output_data
     
+    output_data = analyze_content(file_path, content)
+    analysis_cache.put(*key, output_data)
+    return output_data
+
+def analyze_content(file_path, content):
+    """Run the analyzers over a file's content: overall, per function, per block and per line."""
     # Initialize the analyzer
     analyzer = ComplexityAnalyzer()
     
-    # Read the file
-    with open(file_path, 'r') as f:
-        content = f.read()
-    
     # Store the lines for context analysis
     lines = content.split('\n')
     
@@ -108,41 +135,19 @@ def analyze_file(file_path):
             'line': line.strip()
         }
     
-    # Now process blocks (loops, conditionals)
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        if not line.strip():
-            i += 1
-            continue
-            
-        # For loops, while loops, if statements, collect the block
-        if re.match(r'^\s*(for|while|if)\s+', line):
-            indentation = len(line) - len(line.lstrip())
-            block = [line]
-            block_start = i + 1
-            j = i + 1
-            
-            # Collect all lines in this block
-            while j < len(lines) and (not lines[j].strip() or len(lines[j]) - len(lines[j].lstrip()) > indentation):
-                block.append(lines[j])
-                j += 1
-                
-            # Analyze the block
-            block_code = '\n'.join(block)
-            result = analyzer.analyze_code(block_code, 'python')
-            
-            # Store complexity for all lines in this block (overrides function complexity)
-            for k in range(i+1, min(j+1, len(lines)+1)):
-                line_complexities[k] = {
-                    'time': result['time_complexity'],
-                    'space': result['space_complexity'],
-                    'block': True
-                }
-            
-            i = j
-        else:
-            i += 1
+    # Now process blocks (loops, conditionals), located for the whole file at once
+    for block_start, block_end in line_structure(content).blocks():
+        # Analyze the block
+        block_code = '\n'.join(lines[block_start:block_end])
+        result = analyzer.analyze_code(block_code, 'python')
+        
+        # Store complexity for all lines in this block (overrides function complexity)
+        for k in range(block_start + 1, min(block_end + 1, len(lines) + 1)):
+            line_complexities[k] = {
+                'time': result['time_complexity'],
+                'space': result['space_complexity'],
+                'block': True
+            }
     
     # Generate the output
     output_data = {
@@ -162,12 +167,55 @@ def analyze_file(file_path):
                     'space': line_info['space']
                 }
     
+    return output_data
+
+def analyze_file(file_path):
+    """Analyze a Python file for time and space complexity, line by line."""
+    print(f"\n\033[1m🔍 Analyzing file: {file_path}\033[0m")
+    print("-" * 80)
+    
+    # Read the file
+    with open(file_path, 'r') as f:
+        content = f.read()
+    
+    output_data = complexity_data(file_path, content)
+    lines = content.split('\n')
+    overall_result = output_data['overall']
+    line_hover_data = output_data['lines']
+    
     # Print summary information
     print(f"\033[1;36m📊 Overall complexity:\033[0m")
     print(f"  \033[1;33m⏱️  Time Complexity: {overall_result['time_complexity']}\033[0m")
     print(f"  \033[1;34m🧠 Space Complexity: {overall_result['space_complexity']}\033[0m")
     print("-" * 80)
     
+    # Queries, requests and file access repeated per loop iteration
+    if overall_result.get('io_in_loops'):
+        print(f"\033[1;31m⚠️  I/O inside loops:\033[0m")
+        for found in overall_result['io_in_loops']:
+            print(f"  line {found['line']}: {found['call']} ({found['kind']}) × {found['multiplier']}")
+            print(f"    {found['note']}; {found['suggestion']}")
+        print("-" * 80)
+    
+    # Waits that coroutines serialize or run on the event loop
+    if overall_result.get('async_findings'):
+        print(f"\033[1;31m⚠️  Async issues:\033[0m")
+        for found in overall_result['async_findings']:
+            print(f"  line {found['line']}: {found['call']} ({found['issue']}, {found['kind']})")
+            print(f"    {found['latency']}; {found['suggestion']}")
+        print("-" * 80)
+    
+    # Loops NumPy could run as whole-array operations, deepest and costliest first
+    if overall_result.get('vectorization'):
+        print(f"\033[1;32m🚀 Vectorization candidates:\033[0m")
+        for found in overall_result['vectorization']:
+            print(f"  line {found['line']}: {found['pattern']}, {found['loops']} loop(s), {found['complexity']}"
+                  f" ({found['speedup']}: {found['estimate']})")
+            print(f"    {found['equivalent']}")
+            if found['note']:
+                print(f"    {found['note']}")
+        print("-" * 80)
+    
     # Print function analysis
     print(f"\033[1;35m📝 Function Analysis:\033[0m")
     for func_name, func_info in output_data['functions'].items():
@@ -203,15 +251,40 @@ def analyze_file(file_path):
             print(f"{line_num} | {cleaned_line}")
     
     # Save the complexity data to a JSON file for the VS Code extension
-    output_file = os.path.join(os.path.dirname(file_path), f"{os.path.basename(file_path)}.complexity.json")
-    with open(output_file, 'w') as f:
-        json.dump(output_data, f, indent=2)
+    output_file = sidecar_path(file_path)
+    write_json_atomic(output_file, output_data, indent=2)
     
     print("-" * 80)
     print(f"\033[1;36m📊 Overall complexity: Time: {overall_result['time_complexity']}, Space: {overall_result['space_complexity']}\033[0m")
     print(f"Complexity data saved to: {output_file}")
 
+def update_sidecar(file_path, content):
+    """Watch mode callback: re-analyze a changed file and replace its saved data."""
+    write_json_atomic(sidecar_path(file_path), complexity_data(file_path, content), indent=2)
+
+def remove_sidecar(file_path):
+    """Watch mode callback: drop the saved data of a deleted file."""
+    try:
+        os.remove(sidecar_path(file_path))
+    except FileNotFoundError:
+        pass
+
 if __name__ == "__main__":
+    # Runtime tracing mode: python analyze_complexity.py trace <file> [options]
+    if len(sys.argv) > 1 and sys.argv[1] == 'trace':
+        from analyzer.line_tracer import main as trace_main
+        sys.exit(trace_main(sys.argv[2:]))
+    
+    # Space measurement mode: python analyze_complexity.py memory <file> --function <name> [options]
+    if len(sys.argv) > 1 and sys.argv[1] == 'memory':
+        from analyzer.memory_profile import main as memory_main
+        sys.exit(memory_main(sys.argv[2:]))
+    
+    # Watch mode: python analyze_complexity.py watch [directory] [--interval SECONDS] [--once]
+    if len(sys.argv) > 1 and sys.argv[1] == 'watch':
+        from analyzer.watch import main as watch_main
+        sys.exit(watch_main(sys.argv[2:], update_sidecar, remove_sidecar))
+    
     # Allow specifying a file as argument or use default
     if len(sys.argv) > 1:
         file_path = sys.argv[1]
@@ -0,0 +1,185 @@
+"""
+Persistent analysis results shared by the command-line analyzers and the server.
+
+One SQLite database in a per-user cache directory holds JSON results keyed
+by analyzer (namespace), path, content hash and analyzer version, so an
+unchanged file costs one indexed lookup whichever process asks for it.
+WAL journaling lets readers proceed while a writer commits, and writers
+queue on SQLite's lock with a busy timeout. Past max_bytes the least
+recently used results are evicted. The cache only saves work: a database
+error reads as a miss and a failed store is dropped.
+
+Only the standard library is used, so the CLIs can import this module
+without Django.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DATABASE_NAME = 'analysis-cache.sqlite3'
+
+# Default bound on the stored JSON, in bytes
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Eviction frees space down to this fraction of max_bytes, so it does not run on every store
+EVICT_TO = 0.9
+
+# Seconds to wait for another process's write to finish
+BUSY_TIMEOUT = 5.0
+
+# A hit refreshes its access time at most this often, so reads rarely write
+TOUCH_INTERVAL = 60.0
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    namespace TEXT NOT NULL,
+    path TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (namespace, path, content_hash, version)
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+INSERT OR IGNORE INTO usage VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS results_inserted AFTER INSERT ON results
+BEGIN UPDATE usage SET bytes = bytes + new.size; END;
+CREATE TRIGGER IF NOT EXISTS results_deleted AFTER DELETE ON results
+BEGIN UPDATE usage SET bytes = bytes - old.size; END;
+'''
+
+
+def default_cache_dir():
+    """$CODIZER_CACHE_DIR, else the platform's per-user cache directory."""
+    if os.environ.get('CODIZER_CACHE_DIR'):
+        return os.environ['CODIZER_CACHE_DIR']
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'codizer')
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+def source_version(*paths, extra=''):
+    """
+    Version tag for an analyzer: a hash of the source files it is built
+    from (and of extra, e.g. its settings), so editing the analyzer
+    invalidates its cached results.
+    """
+    digest = hashlib.sha256(extra.encode('utf-8'))
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class AnalysisCache:
+    """JSON results in SQLite, one connection per thread and process."""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or os.path.join(default_cache_dir(), DATABASE_NAME)
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def get(self, namespace, path, content_hash, version):
+        """The stored result, or None."""
+        try:
+            connection = self._connection()
+            row = connection.execute(
+                'SELECT rowid, result, accessed FROM results '
+                'WHERE namespace = ? AND path = ? AND content_hash = ? AND version = ?',
+                (namespace, path, content_hash, version)
+            ).fetchone()
+            if row is None:
+                return None
+            rowid, result, accessed = row
+            now = time.time()
+            if now - accessed > TOUCH_INTERVAL:
+                # Best effort: a busy database just leaves the old access time
+                with contextlib.suppress(sqlite3.Error):
+                    connection.execute('UPDATE results SET accessed = ? WHERE rowid = ?', (now, rowid))
+            return json.loads(result)
+        except (sqlite3.Error, OSError, ValueError):
+            return None
+
+    def put(self, namespace, path, content_hash, version, result):
+        """Store a JSON-serializable result, evicting least recently used ones past max_bytes."""
+        encoded = json.dumps(result, separators=(',', ':'))
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        try:
+            connection = self._connection()
+            with self._transaction(connection):
+                connection.execute(
+                    'DELETE FROM results WHERE namespace = ? AND path = ? AND content_hash = ? AND version = ?',
+                    (namespace, path, content_hash, version)
+                )
+                connection.execute(
+                    'INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (namespace, path, content_hash, version, encoded, size, time.time())
+                )
+                total = connection.execute('SELECT bytes FROM usage').fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(connection, total - int(self.max_bytes * EVICT_TO))
+        except (sqlite3.Error, OSError):
+            pass
+
+    def clear(self):
+        with contextlib.suppress(sqlite3.Error, OSError):
+            connection = self._connection()
+            with self._transaction(connection):
+                connection.execute('DELETE FROM results')
+
+    def _evict(self, connection, excess):
+        """Delete the least recently used rows holding at least excess bytes."""
+        doomed = []
+        for rowid, size in connection.execute('SELECT rowid, size FROM results ORDER BY accessed'):
+            if excess <= 0:
+                break
+            doomed.append((rowid,))
+            excess -= size
+        connection.executemany('DELETE FROM results WHERE rowid = ?', doomed)
+
+    @contextlib.contextmanager
+    def _transaction(self, connection):
+        # IMMEDIATE takes the write lock up front, so concurrent writers wait
+        # for it instead of failing on a read-to-write upgrade
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _connection(self):
+        # Connections must not cross threads, nor forked worker processes
+        cached = getattr(self._local, 'connection', None)
+        if cached is not None and cached[0] == os.getpid():
+            return cached[1]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        try:
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            # executescript commits any open transaction, so the script carries its own
+            connection.executescript(f'BEGIN IMMEDIATE;{SCHEMA}COMMIT;')
+        except BaseException:
+            connection.close()
+            raise
+        self._local.connection = (os.getpid(), connection)
+        return connection
@@ -0,0 +1,139 @@
+"""
+Views for the lean API profile (complexity_analyzer.api_settings).
+
+Same /api/analyze/ and /api/history/ contract as the DRF views, including
+status codes and error bodies, but with plain Django async views and
+direct JSON handling: no authentication, content negotiation or
+serializer machinery runs per request. Analysis runs in a worker thread
+so the event loop keeps accepting requests meanwhile.
+"""
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+
+from .parsers import load_json
+from .rollups import record_analysis
+from .service import (
+    analysis_record, analyze, document_key, recent_analyses, result_payload, superseded_payload
+)
+from .singleflight import Superseded
+
+# Request fields, mirroring CodeAnalysisRequestSerializer
+REQUIRED_STRINGS = ('code', 'language')
+OPTIONAL_STRINGS = ('client_id', 'document_id')
+INTEGRAL_SUFFIX = re.compile(r'\.0*\s*$')
+
+
+def _json(data, status=200):
+    """JsonResponse rendered compactly, byte-for-byte like DRF's JSONRenderer."""
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False})
+
+
+def _method_not_allowed(request, allowed):
+    response = _json({'detail': f'Method "{request.method}" not allowed.'}, 405)
+    response['Allow'] = ', '.join(allowed)
+    return response
+
+
+def _string(value):
+    """CharField coercion: strings and numbers (trimmed); None for anything else."""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return None
+    return str(value).strip()
+
+
+def validate_request(data):
+    """Return (validated_data, errors) with the same rules and messages as the DRF serializer."""
+    if not isinstance(data, dict):
+        return None, {'non_field_errors': [
+            f'Invalid data. Expected a dictionary, but got {type(data).__name__}.'
+        ]}
+
+    validated, errors = {}, {}
+    for field in REQUIRED_STRINGS + OPTIONAL_STRINGS:
+        if field not in data:
+            if field in REQUIRED_STRINGS:
+                errors[field] = ['This field is required.']
+            elif field == 'client_id':
+                validated[field] = ''
+            continue
+        value = data[field]
+        if value is None:
+            errors[field] = ['This field may not be null.']
+            continue
+        value = _string(value)
+        if value is None:
+            errors[field] = ['Not a valid string.']
+        elif not value and field != 'client_id':
+            errors[field] = ['This field may not be blank.']
+        else:
+            validated[field] = value
+
+    if data.get('version', 0) is None:
+        errors['version'] = ['This field may not be null.']
+    elif 'version' in data:
+        # IntegerField: ints, integral floats and their string forms
+        try:
+            validated['version'] = int(INTEGRAL_SUFFIX.sub('', str(data['version'])))
+        except ValueError:
+            errors['version'] = ['A valid integer is required.']
+
+    return (None, errors) if errors else (validated, None)
+
+
+def _isoformat(value):
+    """ISO 8601 with a Z suffix for UTC, as DRF's DateTimeField renders it."""
+    value = value.isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+async def analyze_code(request):
+    if request.method != 'POST':
+        return _method_not_allowed(request, ['OPTIONS', 'POST'])
+
+    if request.content_type != 'application/json':
+        return _json({'detail': f'Unsupported media type "{request.content_type}" in request.'}, 415)
+    try:
+        data = load_json(request, request.encoding or settings.DEFAULT_CHARSET, settings.DATA_UPLOAD_MAX_MEMORY_SIZE)
+    except ValueError as e:
+        return _json({'detail': f'JSON parse error - {e}'}, 400)
+
+    validated, errors = validate_request(data)
+    if errors:
+        return _json(errors, 400)
+
+    code = validated['code']
+    language = validated['language']
+    key = document_key(validated)
+    try:
+        result, shared = await sync_to_async(analyze, thread_sensitive=False)(
+            code, language, key, validated.get('version')
+        )
+    except Superseded:
+        return _json(superseded_payload(key), 409)
+
+    # Save to database once per computation
+    if not shared:
+        await sync_to_async(record_analysis)(analysis_record(code, language, result))
+
+    return _json(result_payload(result))
+
+
+async def get_analysis_history(request):
+    if request.method not in ('GET', 'HEAD'):
+        return _method_not_allowed(request, ['GET', 'OPTIONS'])
+
+    history = [
+        {
+            'id': analysis.id,
+            'code': analysis.code,
+            'language': analysis.language,
+            'time_complexity': analysis.time_complexity,
+            'space_complexity': analysis.space_complexity,
+            'analysis_date': _isoformat(analysis.analysis_date),
+        }
+        async for analysis in recent_analyses()
+    ]
+    return _json(history)
@@ -0,0 +1,258 @@
+"""
+Latency problems in coroutines.
+
+An async def only overlaps its waits with other work when it hands them
+to the event loop, and only as far as it lets them run at once.
+async_findings looks at the body of every async def for three issues:
+
+    sequential-await   awaits in a for loop, or in a comprehension, whose
+                       iterations do not depend on each other, so they
+                       could run concurrently with asyncio.gather
+    blocking-call      time.sleep, synchronous database, HTTP and file
+                       calls (the operations the cost models mark with
+                       'io'), and sorts or other superlinear library work
+                       on a non-constant input, which stall every
+                       coroutine on the loop while they run
+    unbounded-gather   asyncio.gather/wait over, or create_task per item
+                       of, a collection of non-constant size with no
+                       semaphore in the code to cap how many run at once
+
+Each finding estimates its latency impact from the multiplier (the trip
+counts of the loops around it, see loop_bounds) and a typical latency
+for the kind of wait.
+"""
+import ast
+
+from .loop_bounds import COMPREHENSIONS, MAX_CALL_TEXT, ONE, SCOPES, describe, dotted_name, scopes_of
+
+# Typical time one operation of each kind waits, for the latency estimates
+TYPICAL_LATENCY = {
+    'query': '~1 ms',
+    'network': '~50-200 ms',
+    'filesystem': '~0.1-10 ms',
+}
+
+# What to call instead of a blocking operation of each kind
+ASYNC_ALTERNATIVES = {
+    'query': "use the async ORM method (aget, acount, asave, ...) or await sync_to_async(...)",
+    'network': 'use an async client (httpx.AsyncClient, aiohttp) and await it',
+    'filesystem': 'await asyncio.to_thread(...) (or use aiofiles)',
+    'sleep': 'await asyncio.sleep(...)',
+    'cpu': 'move it off the event loop with await asyncio.to_thread(...) or loop.run_in_executor(...)',
+}
+
+BLOCKING_SLEEPS = {'time.sleep'}
+
+# Awaits that are serial on purpose (rate limiting, polling) or already concurrent
+SERIAL_AWAITS = {'asyncio.sleep', 'asyncio.gather', 'asyncio.wait', 'asyncio.wait_for', 'asyncio.shield'}
+
+FAN_OUT_CALLS = {'asyncio.gather', 'asyncio.wait', 'asyncio.as_completed'}
+TASK_CALLS = {'asyncio.create_task', 'asyncio.ensure_future'}
+TASK_METHODS = {'create_task', 'start_soon'}
+
+SEMAPHORES = {'Semaphore', 'BoundedSemaphore'}
+
+
+def async_findings(code, models=None, scopes=None):
+    """
+    [{'line', 'call', 'issue', 'kind', 'multiplier', 'latency',
+    'suggestion'}] in line order for the async defs in code. Empty if the
+    code does not parse. scopes are those of scopes_of(code, models) when
+    already built.
+    """
+    if scopes is None:
+        scopes = scopes_of(code, models)
+    if scopes is None:
+        return []
+    bounded = _uses_semaphore(scopes[0].body)
+    findings = {}
+    for scope in scopes:
+        if scope.coroutine:
+            _scan(scope, bounded, findings)
+    return [finding for _, finding in sorted(findings.items())]
+
+
+def _scan(scope, bounded, findings):
+    # (node, multiplier)
+    pending = [(statement, ONE) for statement in scope.body]
+    while pending:
+        node, multiplier = pending.pop()
+        if isinstance(node, SCOPES):
+            continue
+        if isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+            inner = scope.trip(node, multiplier)
+            if isinstance(node, ast.While):
+                pending.append((node.test, inner))
+            else:
+                pending.append((node.iter, multiplier))
+            # Only for loops gather; the bodies of while and async for loops wait in turn on purpose
+            if isinstance(node, ast.For):
+                _check_sequential(scope, node.body, inner, findings)
+            pending.extend((child, inner) for child in node.body)
+            pending.extend((child, multiplier) for child in node.orelse)
+            continue
+        if isinstance(node, COMPREHENSIONS):
+            inner = multiplier
+            for generator in node.generators:
+                pending.append((generator.iter, inner))
+                inner = scope.trip(generator, inner)
+                pending.extend((condition, inner) for condition in generator.ifs)
+            elements = (node.key, node.value) if isinstance(node, ast.DictComp) else (node.elt,)
+            if not any(generator.is_async for generator in node.generators):
+                _check_sequential(scope, elements, inner, findings)
+            pending.extend((element, inner) for element in elements)
+            continue
+        if isinstance(node, ast.Await):
+            # The awaited call itself is fine; its arguments are evaluated synchronously
+            value = node.value
+            if isinstance(value, ast.Call):
+                path = _path(scope, value)
+                if not bounded and path in FAN_OUT_CALLS:
+                    _check_fan_out(scope, value, path, findings)
+                pending.extend((child, multiplier) for child in value.args)
+                pending.extend((keyword.value, multiplier) for keyword in value.keywords)
+                if isinstance(value.func, ast.Attribute):
+                    pending.append((value.func.value, multiplier))
+            else:
+                pending.append((value, multiplier))
+            continue
+        if isinstance(node, ast.Call):
+            _check_call(scope, node, multiplier, bounded, findings)
+        pending.extend((child, multiplier) for child in ast.iter_child_nodes(node))
+
+
+def _check_sequential(scope, body, multiplier, findings):
+    """Report the awaits in a loop body when no iteration needs an earlier one's result."""
+    if multiplier == ONE:
+        return
+    awaits = []
+    carried = set()  # names assigned from awaited results inside the loop
+    for node in _walk(body):
+        if isinstance(node, ast.Await):
+            if _path(scope, node.value) not in SERIAL_AWAITS:
+                awaits.append(node)
+        elif isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign, ast.NamedExpr)) and node.value is not None \
+                and any(isinstance(child, ast.Await) for child in _walk([node.value])):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            carried.update(name.id for target in targets for name in ast.walk(target) if isinstance(name, ast.Name))
+    if not awaits:
+        return
+    for node in awaits:
+        if any(isinstance(name, ast.Name) and name.id in carried for name in ast.walk(node.value)):
+            # Each await needs the one before (cursor = await fetch(cursor)): gathering cannot help
+            return
+    first = min(awaits, key=lambda node: (node.lineno, node.col_offset))
+    per_iteration = f'{len(awaits)} awaits' if len(awaits) > 1 else 'one await'
+    size = describe(multiplier)
+    kind = _awaited_kind(scope, first.value)
+    _record(findings, first, 'sequential-await', kind, multiplier,
+            f'{size} iterations × {per_iteration} ({_typical(kind)} each) run one after another; '
+            f'gathered they overlap into about the slowest one',
+            'create the coroutines in the loop and await asyncio.gather(*coroutines) once after it')
+
+
+def _check_call(scope, call, multiplier, bounded, findings):
+    path = _path(scope, call)
+    repeats = '' if multiplier == ONE else f' × {describe(multiplier)}'
+
+    if path in BLOCKING_SLEEPS:
+        duration = call.args[0] if call.args else None
+        seconds = f'{duration.value} s' if isinstance(duration, ast.Constant) else 'the sleep'
+        _record(findings, call, 'blocking-call', 'sleep', multiplier,
+                f'blocks every coroutine for {seconds}{repeats}', ASYNC_ALTERNATIVES['sleep'])
+        return
+
+    if not bounded and multiplier != ONE and (path in TASK_CALLS or (
+            isinstance(call.func, ast.Attribute) and call.func.attr in TASK_METHODS)):
+        _record(findings, call, 'unbounded-gather', 'tasks', multiplier,
+                f'starts {describe(multiplier)} tasks at once; the slowest one and rate limits set the latency',
+                'cap the tasks in flight with an asyncio.Semaphore(k) acquired in each, or start them in chunks of k')
+        return
+
+    if not bounded and path in FAN_OUT_CALLS:
+        _check_fan_out(scope, call, path, findings)
+        return
+
+    rule = scope.call_rule(call)
+    if rule is None:
+        return
+    if rule.io:
+        _record(findings, call, 'blocking-call', rule.io, multiplier,
+                f'blocks every coroutine for one {rule.io} round trip ({TYPICAL_LATENCY[rule.io]}){repeats}',
+                ASYNC_ALTERNATIVES[rule.io])
+    elif rule.degree > 1 or (rule.degree == 1 and rule.logarithmic):
+        size = scope.call_size(call, rule)
+        if size != ONE:
+            _record(findings, call, 'blocking-call', 'cpu', multiplier,
+                    f'blocks every coroutine for {rule.complexity} work in n = {describe(size)}{repeats}',
+                    ASYNC_ALTERNATIVES['cpu'])
+
+
+def _check_fan_out(scope, call, path, findings):
+    """gather(*coroutines) and wait(tasks) over a collection whose size traces to the input."""
+    arguments = [arg.value for arg in call.args if isinstance(arg, ast.Starred)]
+    if path != 'asyncio.gather' and call.args:
+        arguments.append(call.args[0])
+    for argument in arguments:
+        # Untraceable sizes (tasks appended in a loop) are reported where the tasks start
+        size = scope.length(argument)
+        if size is not None and size != ONE:
+            _record(findings, call, 'unbounded-gather', 'tasks', size,
+                    f'runs {describe(size)} operations at once; the slowest one and rate limits set the latency',
+                    'cap the operations in flight with an asyncio.Semaphore(k) acquired in each, or gather in chunks of k')
+            return
+
+
+def _awaited_kind(scope, value):
+    """Kind of wait behind an awaited call when its cost model says, else 'await'."""
+    if isinstance(value, ast.Call):
+        rule = scope.call_rule(value)
+        if rule is not None and rule.io:
+            return rule.io
+    return 'await'
+
+
+def _typical(kind):
+    return TYPICAL_LATENCY.get(kind, 'one round trip')
+
+
+def _path(scope, node):
+    """Import path of a call's function or of a value, e.g. 'asyncio.gather'."""
+    if isinstance(node, ast.Call):
+        node = node.func
+    if not isinstance(node, (ast.Name, ast.Attribute)):
+        return None
+    return scope.type_of(node)
+
+
+def _record(findings, node, issue, kind, multiplier, latency, suggestion):
+    target = node.value if isinstance(node, ast.Await) else node
+    target = target.func if isinstance(target, ast.Call) else target
+    findings[(node.lineno, node.col_offset, issue)] = {
+        'line': node.lineno,
+        'call': dotted_name(target) or ast.unparse(target)[:MAX_CALL_TEXT],
+        'issue': issue,
+        'kind': kind,
+        'multiplier': describe(multiplier),
+        'latency': latency,
+        'suggestion': suggestion,
+    }
+
+
+def _walk(nodes):
+    """Nodes under nodes, outside nested scopes."""
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        yield node
+        if not isinstance(node, SCOPES):
+            pending.extend(ast.iter_child_nodes(node))
+
+
+def _uses_semaphore(body):
+    """Whether the code, nested functions included, uses a semaphore anywhere."""
+    return any(
+        (isinstance(node, ast.Name) and node.id in SEMAPHORES)
+        or (isinstance(node, ast.Attribute) and node.attr in SEMAPHORES)
+        for node in ast.walk(ast.Module(body, []))
+    )
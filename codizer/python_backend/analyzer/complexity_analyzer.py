@@ -1,8 +1,69 @@
-import ast
 import ast2json
 import re
+import time
 from big_o import big_o, complexities
 
+from .line_structure import line_structure
+from .async_calls import async_findings
+from .io_loops import io_in_loops
+from .loop_bounds import loop_cost, scopes_of
+from .vectorization import vectorization_candidates
+
+# Analysis tiers, from most to least work
+TIER_FULL = 'full'          # regex rules, structure and per-line analysis
+TIER_NO_LINES = 'no_lines'  # whole-code analysis only, callers skip per-line analysis
+TIER_NO_REGEX = 'no_regex'  # annotations, name hints and loop nesting only
+
+# Matched with _calls_itself rather than the regex engine, which backtracks
+# catastrophically on it once a file has a few dozen functions
+RECURSION_PATTERN = r'def\s+(\w+).*?\(\s*.*?\s*\).*?\1\s*\('
+
+# Linear-time building blocks for the recursion check
+DEF_NAME_RE = re.compile(r'\bdef\s+(\w+)')
+CALL_NAME_RE = re.compile(r'\b(\w+)\s*\(')
+
+# Rules about loop shape and halving, superseded by the loop-bound analysis when the code parses
+LOOP_RULE_RE = re.compile(r'\b(for|while)\b|//')
+
+# Factors of a Big-O label term, e.g. n^2 and m in 'n^2·m'; log factors are taken out first
+TERM_FACTOR_RE = re.compile(r'([a-z])(?:\^(\d+))?')
+LOG_FACTOR_RE = re.compile(r'log\s*\w*')
+
+
+class AnalysisCancelled(Exception):
+    """Raised when the caller's cancelled() check reports the result is no longer wanted."""
+
+
+class AnalysisBudget:
+    """
+    Limits for one analysis request. Inputs over a limit are analyzed at a
+    cheaper tier instead of being rejected, and the result is marked degraded.
+    """
+
+    def __init__(self, line_analysis_chars=100000, regex_chars=500000, max_line_chars=2000, time_limit=2.0):
+        self.line_analysis_chars = line_analysis_chars  # above this, skip per-line analysis
+        self.regex_chars = regex_chars                  # above this, also skip regex rules
+        self.max_line_chars = max_line_chars            # longer lines are kept out of regex rules
+        self.time_limit = time_limit                    # wall-clock seconds for one analysis
+
+    def tier_for(self, code):
+        if len(code) > self.regex_chars:
+            return TIER_NO_REGEX
+        if len(code) > self.line_analysis_chars:
+            return TIER_NO_LINES
+        return TIER_FULL
+
+    def deadline(self):
+        return time.monotonic() + self.time_limit
+
+    def clip_lines(self, code):
+        """Blank out over-long lines. Returns (code, whether anything was blanked)."""
+        lines = code.split('\n')
+        if all(len(line) <= self.max_line_chars for line in lines):
+            return code, False
+        return '\n'.join('' if len(line) > self.max_line_chars else line for line in lines), True
+
+
 class ComplexityAnalyzer:
     def __init__(self):
         self.time_complexity_patterns = {
@@ -12,13 +73,11 @@ class ComplexityAnalyzer:
                 r'^\s*print\s*\(',
                 r'^\s*[a-zA-Z_][a-zA-Z0-9_]*\s*[+\-*/]?=\s*\d+\s*$',  # Simple assignments: x = 5
                 r'^\s*if\s+.+:\s*$',  # Simple if statements without loops
-                r'^\s*constant_time\s*\(',  # Function name indicator
                 r'^#\s*Time\s*Complexity:\s*O\(1\)',  # Manual annotation
             ],
             'O(log n)': [
                 r'while.*\/=\s*2', 
                 r'while.*\*=\s*2',
-                r'binary_search',
                 r'^\s*[a-zA-Z_][a-zA-Z0-9_]*\s*=\s*[a-zA-Z_][a-zA-Z0-9_]*\s*//\s*2',  # x = n // 2
                 r'mid\s*=\s*\(.+\)\s*//\s*2',  # mid = (left + right) // 2
                 r'^#\s*Time\s*Complexity:\s*O\(log\s*n\)',  # Manual annotation
@@ -27,7 +86,6 @@ class ComplexityAnalyzer:
                 r'^\s*for\s+\w+\s+in\s+\w+:', 
                 r'^\s*for\s+\w+\s+in\s+range\(.+\):',
                 r'^\s*while\s+\w+\s*[<>=!]=?\s*\w+:',
-                r'linear_search',
                 r'\.count\(', 
                 r'\.index\(',
                 r'^#\s*Time\s*Complexity:\s*O\(n\)',  # Manual annotation
@@ -36,24 +94,17 @@ class ComplexityAnalyzer:
             'O(n log n)': [
                 r'\.sort\(\)', 
                 r'sorted\(',
-                r'merge_sort',
-                r'quick_sort',
-                r'heap_sort',
                 r'^#\s*Time\s*Complexity:\s*O\(n\s*log\s*n\)',  # Manual annotation
             ],
             'O(n^2)': [
                 r'^\s*for\s+\w+\s+in\s+\w+:.*for\s+\w+\s+in\s+\w+:',
                 r'^\s*for\s+\w+\s+in\s+range\(.+\):.*for\s+\w+\s+in\s+range\(.+\):',
-                r'bubble_sort',
-                r'insertion_sort',
-                r'selection_sort',
                 r'^#\s*Time\s*Complexity:\s*O\(n\^2\)',  # Manual annotation
                 r'^#\s*O\(n\^2\)',  # Simplified annotation
             ],
             'O(n^3)': [
                 r'^\s*for\s+\w+\s+in\s+\w+:.*for\s+\w+\s+in\s+\w+:.*for\s+\w+\s+in\s+\w+:',
                 r'^\s*for\s+\w+\s+in\s+range\(.+\):.*for\s+\w+\s+in\s+range\(.+\):.*for\s+\w+\s+in\s+range\(.+\):',
-                r'triple_nested_loop',
                 r'^#\s*Time\s*Complexity:\s*O\(n\^3\)',  # Manual annotation
             ],
             'O(n^4)': [
@@ -62,8 +113,7 @@ class ComplexityAnalyzer:
                 r'^#\s*Time\s*Complexity:\s*O\(n\^4\)',  # Manual annotation
             ],
             'O(2^n)': [
-                r'fibonacci',
-                r'def\s+(\w+).*?\(\s*.*?\s*\).*?\1\s*\(',  # Recursive function calling itself
+                RECURSION_PATTERN,  # Recursive function calling itself
                 r'^#\s*Time\s*Complexity:\s*O\(2\^n\)',  # Manual annotation
             ]
         }
@@ -77,17 +127,17 @@ class ComplexityAnalyzer:
                 r'^#\s*Space\s*Complexity:\s*O\(1\)',  # Manual annotation
             ],
             'O(log n)': [
-                r'binary_search',  # Binary search typically uses O(log n) stack space
                 r'^#\s*Space\s*Complexity:\s*O\(log\s*n\)',  # Manual annotation
             ],
             'O(n)': [
-                r'\w+\s*=\s*\[\]', 
-                r'\w+\s*=\s*list\(', 
-                r'\w+\s*=\s*dict\(', 
-                r'\w+\s*=\s*set\(',
+                r'\b\w+\s*=\s*\[\]', 
+                r'\b\w+\s*=\s*list\(', 
+                r'\b\w+\s*=\s*dict\(', 
+                r'\b\w+\s*=\s*set\(',
                 r'append\(',
                 r'extend\(',
                 r'result\s*=\s*\[\]',  # Common pattern in merge sort
+                r'\w\[[^\]\n]*:[^\]\n]*\]',  # Slices copy, e.g. arr[:mid]
                 r'\[\s*for\s+\w+\s+in\s+range\(\w+\)\s*\]',  # List comprehensions
                 r'\[\s*for\s+\w+\s+in\s+\w+\s*\]',
                 r'^#\s*Space\s*Complexity:\s*O\(n\)',  # Manual annotation
@@ -104,12 +154,16 @@ class ComplexityAnalyzer:
             ],
         }
 
-    def analyze_python_code(self, code):
+    def analyze_python_code(self, code, budget=None, cancelled=None):
         result = {
             'time_complexity': 'O(1)',  # Default
             'space_complexity': 'O(1)'  # Default
         }
         
+        tier = budget.tier_for(code) if budget else TIER_FULL
+        deadline = budget.deadline() if budget else None
+        clipped = False
+        
         # First check for explicit complexity annotations in comments
         lines = code.split('\n')
         for line in lines:
@@ -126,89 +180,39 @@ class ComplexityAnalyzer:
         # If we found explicit annotations, return them
         if (result['time_complexity'] != 'O(1)' or result['space_complexity'] != 'O(1)') and \
            ('Time Complexity:' in code or 'Space Complexity:' in code):
-            return result
+            return self._with_budget_info(result, budget, tier, clipped)
         
-        # Count the maximum nesting depth for loops
-        loop_depth = 0
-        max_loop_depth = 0
-        
-        # Count the nesting of for loops in code
-        # Starting indentation level
-        base_indent = None
-        current_indent = 0
-        indent_levels = []
-        
-        for line in lines:
-            if not line.strip():
-                continue
-                
-            # Calculate indentation level
-            indent = len(line) - len(line.lstrip())
-            
-            # Initialize base indent if not set
-            if base_indent is None and line.strip():
-                base_indent = indent
-                current_indent = 0
-                indent_levels = [indent]
-            elif line.strip():
-                # Adjust indentation level
-                if indent > indent_levels[-1]:
-                    indent_levels.append(indent)
-                    current_indent += 1
-                elif indent < indent_levels[-1]:
-                    while indent_levels and indent < indent_levels[-1]:
-                        indent_levels.pop()
-                        current_indent -= 1
-                    if not indent_levels:
-                        indent_levels = [indent]
-                        current_indent = 0
-            
-            # Check if line has a loop
-            if re.search(r'^\s*for\s+\w+\s+in\s+', line) or re.search(r'^\s*while\s+', line):
-                loop_depth = current_indent + 1  # +1 because we're counting the loops themselves
-                max_loop_depth = max(max_loop_depth, loop_depth)
-        
-        # Check for algorithm name indicators in function names or comments
-        if 'merge_sort' in code:
-            result['time_complexity'] = 'O(n log n)'
-            result['space_complexity'] = 'O(n)'
-        elif 'bubble_sort' in code or 'insertion_sort' in code or 'selection_sort' in code:
-            result['time_complexity'] = 'O(n^2)'
-            result['space_complexity'] = 'O(1)'
-        elif 'linear_search' in code:
-            result['time_complexity'] = 'O(n)'
-            result['space_complexity'] = 'O(1)'
-        elif 'binary_search' in code:
-            result['time_complexity'] = 'O(log n)'
-            result['space_complexity'] = 'O(1)'
-        elif 'triple_nested_loop' in code:
-            result['time_complexity'] = 'O(n^3)'
-            result['space_complexity'] = 'O(1)'
-        elif 'constant_time' in code:
-            result['time_complexity'] = 'O(1)'
-            result['space_complexity'] = 'O(1)'
-        
-        # Count actual loop nesting by direct pattern matching
-        code_no_whitespace = re.sub(r'\s+', ' ', code)
+        # Trace loop bounds to constants, parameters and their lengths (see
+        # loop_bounds); without an AST fall back to the indentation nesting of
+        # loop lines (computed in bulk, see line_structure). Each pass over the
+        # AST starts only while the deadline allows; once it has passed, the
+        # remaining passes are skipped and the result reports TIER_NO_REGEX.
+        scopes = None
+        if tier != TIER_NO_REGEX and not (deadline and time.monotonic() > deadline):
+            scopes = scopes_of(code)
+        bounds = loop_cost(code, scopes=scopes, deadline=deadline) if scopes is not None else None
+        self._check_cancelled(cancelled)
+        if bounds is not None:
+            max_loop_depth = bounds.degree
+        else:
+            max_loop_depth = line_structure(code).max_loop_depth()
         
-        # Count nested loops by pattern matching for better accuracy
-        nested_loops_count = 0
-        if re.search(r'for.*for.*for.*for.*for', code_no_whitespace, re.DOTALL):
-            nested_loops_count = 5
-        elif re.search(r'for.*for.*for.*for', code_no_whitespace, re.DOTALL):
-            nested_loops_count = 4
-        elif re.search(r'for.*for.*for', code_no_whitespace, re.DOTALL):
-            nested_loops_count = 3
-        elif re.search(r'for.*for', code_no_whitespace, re.DOTALL):
-            nested_loops_count = 2
-        elif re.search(r'for', code_no_whitespace, re.DOTALL):
-            nested_loops_count = 1
+        if bounds is None:
+            # Count nested loops by occurrences of 'for' (what the patterns
+            # for.*for.*... matched, without their backtracking on long inputs)
+            nested_loops_count = min(code.count('for'), 5)
             
-        # Use the maximum value between the two methods
-        max_loop_depth = max(max_loop_depth, nested_loops_count)
+            # Use the maximum value between the two methods
+            max_loop_depth = max(max_loop_depth, nested_loops_count)
         
         # Determine complexity based on loop nesting depth
-        if max_loop_depth == 1:
+        if bounds is not None and bounds.complexity != 'O(1)':
+            result['time_complexity'] = bounds.complexity
+            result['size_variables'] = bounds.size_variables
+            if bounds.library_calls:
+                # Library calls costed by their cost models (see cost_models)
+                result['library_calls'] = bounds.library_calls
+        elif max_loop_depth == 1:
             result['time_complexity'] = 'O(n)'
         elif max_loop_depth == 2:
             result['time_complexity'] = 'O(n^2)'
@@ -217,10 +221,44 @@ class ComplexityAnalyzer:
         elif max_loop_depth >= 4:
             result['time_complexity'] = f'O(n^{max_loop_depth})'
         
+        # Queries, requests and file access repeated per loop iteration (see io_loops)
+        if scopes is not None and not (deadline and time.monotonic() > deadline):
+            io_calls = io_in_loops(code, scopes=scopes)
+            if io_calls:
+                result['io_in_loops'] = io_calls
+            self._check_cancelled(cancelled)
+        
+        # Serialized awaits, blocking calls and unbounded fan-out in coroutines (see async_calls)
+        if scopes is not None and not (deadline and time.monotonic() > deadline):
+            coroutine_issues = async_findings(code, scopes=scopes)
+            if coroutine_issues:
+                result['async_findings'] = coroutine_issues
+            self._check_cancelled(cancelled)
+        
+        # Loops NumPy could run as whole-array operations (see vectorization)
+        if scopes is not None and not (deadline and time.monotonic() > deadline):
+            candidates = vectorization_candidates(code, scopes=scopes)
+            if candidates:
+                result['vectorization'] = candidates
+            self._check_cancelled(cancelled)
+        
+        if tier == TIER_NO_REGEX or (deadline and time.monotonic() > deadline):
+            return self._with_budget_info(result, budget, TIER_NO_REGEX, clipped)
+        
+        # Keep over-long lines away from the regex rules
+        regex_code = code
+        if budget:
+            regex_code, clipped = budget.clip_lines(code)
+        
         # Check for patterns that indicate time complexity
         for complexity, patterns in self.time_complexity_patterns.items():
+            if deadline and time.monotonic() > deadline:
+                return self._with_budget_info(result, budget, TIER_NO_REGEX, clipped)
+            self._check_cancelled(cancelled)
             for pattern in patterns:
-                if re.search(pattern, code, re.MULTILINE):
+                if bounds is not None and (pattern is RECURSION_PATTERN or LOOP_RULE_RE.search(pattern)):
+                    continue
+                if self._search(pattern, regex_code):
                     # Only update if the new complexity is higher than the current one
                     if self._is_higher_complexity(complexity, result['time_complexity']):
                         result['time_complexity'] = complexity
@@ -228,15 +266,20 @@ class ComplexityAnalyzer:
         
         # Check for patterns that indicate space complexity
         for complexity, patterns in self.space_complexity_patterns.items():
+            if deadline and time.monotonic() > deadline:
+                return self._with_budget_info(result, budget, TIER_NO_REGEX, clipped)
+            self._check_cancelled(cancelled)
             for pattern in patterns:
-                if re.search(pattern, code, re.MULTILINE):
+                if self._search(pattern, regex_code):
                     # Only update if the new complexity is higher than the current one
                     if self._is_higher_complexity(complexity, result['space_complexity']):
                         result['space_complexity'] = complexity
                         break
         
         # If we detect recursive calls, check for exponential complexity
-        if re.search(r'def\s+(\w+).*?\(\s*.*?\s*\).*?\1\s*\(', code, re.DOTALL) and not "memo" in code and not "cache" in code:
+        # (recursion on halved input is already costed by the loop bounds)
+        recursive = bounds.unresolved_recursion if bounds is not None else self._calls_itself(code)
+        if recursive and not "memo" in code and not "cache" in code:
             # Simple recursion detection, might be exponential
             if result['time_complexity'] == 'O(1)':
                 result['time_complexity'] = 'O(2^n)'  # Default for recursion
@@ -244,32 +287,38 @@ class ComplexityAnalyzer:
                 # If no loops but recursion, it's likely exponential
                 result['time_complexity'] = 'O(2^n)'
         
-        # Try to parse the code and analyze AST for more complex cases
-        try:
-            tree = ast.parse(code)
-            
-            # Check for binary search patterns in AST
-            is_binary_search = False
-            if (re.search(r'mid\s*=\s*\(.+\)\s*//\s*2', code, re.MULTILINE) and 
-                re.search(r'if\s+.+\s*==\s*.+:', code, re.MULTILINE) and
-                (re.search(r'while\s+.+\s*<=\s*.+:', code, re.MULTILINE) or 
-                 re.search(r'binary_search', code, re.MULTILINE))):
-                
-                is_binary_search = True
-                # Mark the entire code as logarithmic if it's a binary search
-                result['time_complexity'] = 'O(log n)'
-            
-            # If this is binary search, override the complexity of any loops inside
-            if is_binary_search or 'binary_search' in code:
-                result['time_complexity'] = 'O(log n)'
-                
-        except Exception as e:
-            # print(f"Error in AST analysis: {e}")
-            pass
-        
+        return self._with_budget_info(result, budget, tier, clipped)
+    
+    def _with_budget_info(self, result, budget, tier, clipped):
+        """Record which tier ran when the analysis had a budget."""
+        if budget:
+            result['tier'] = tier
+            result['degraded'] = tier != TIER_FULL or clipped
         return result
     
-    def analyze_single_line(self, line, context=None):
+    def _check_cancelled(self, cancelled):
+        """Stop between phases once the result is no longer wanted."""
+        if cancelled and cancelled():
+            raise AnalysisCancelled()
+    
+    def _search(self, pattern, text):
+        """re.search with re.MULTILINE, except RECURSION_PATTERN which is checked line by line in linear time."""
+        if pattern is RECURSION_PATTERN:
+            return any(self._calls_itself(line) for line in text.split('\n') if 'def' in line)
+        return re.search(pattern, text, re.MULTILINE)
+    
+    def _calls_itself(self, code):
+        """True if a function name defined in code is called after its def header (see RECURSION_PATTERN)."""
+        last_call = {}
+        for match in CALL_NAME_RE.finditer(code):
+            last_call[match.group(1)] = match.start()
+        for match in DEF_NAME_RE.finditer(code):
+            header_end = code.find(')', match.end())
+            if header_end != -1 and last_call.get(match.group(1), -1) > header_end:
+                return True
+        return False
+    
+    def analyze_single_line(self, line, context=None, budget=None):
         """Analyze a single line of code with optional context"""
         # Default complexity for single line
         result = {
@@ -308,10 +357,15 @@ class ComplexityAnalyzer:
             elif loop_count >= 4:
                 result['time_complexity'] = f'O(n^{loop_count})'
         
+        # Over-long lines only get the loop-nesting estimate
+        if budget and len(line) > budget.max_line_chars:
+            result['degraded'] = True
+            return result
+        
         # Direct pattern matching for the single line
         for complexity, patterns in self.time_complexity_patterns.items():
             for pattern in patterns:
-                if re.search(pattern, line, re.MULTILINE):
+                if self._search(pattern, line):
                     # Only update if the new complexity is higher
                     if self._is_higher_complexity(complexity, result['time_complexity']):
                         result['time_complexity'] = complexity
@@ -319,19 +373,19 @@ class ComplexityAnalyzer:
         # Check space complexity for the single line
         for complexity, patterns in self.space_complexity_patterns.items():
             for pattern in patterns:
-                if re.search(pattern, line, re.MULTILINE):
+                if self._search(pattern, line):
                     # Only update if the new complexity is higher
                     if self._is_higher_complexity(complexity, result['space_complexity']):
                         result['space_complexity'] = complexity
         
-        # Check for special cases on the line
-        if re.search(r'^\s*mid\s*=', line) or re.search(r'binary_search', line):
-            result['time_complexity'] = 'O(log n)'
-        
         return result
     
     def _is_higher_complexity(self, complexity1, complexity2):
         """Compare two complexity notations and return True if complexity1 is higher"""
+        return self._complexity_rank(complexity1) > self._complexity_rank(complexity2)
+    
+    def _complexity_rank(self, complexity):
+        """Position of a Big-O label in the order below, for multi-variable labels that of its highest-degree term"""
         # Define order of complexity from lowest to highest
         complexity_order = [
             'O(1)', 
@@ -344,34 +398,35 @@ class ComplexityAnalyzer:
             'O(n^5)',
             'O(2^n)'
         ]
+        if complexity in complexity_order:
+            return complexity_order.index(complexity)
+        if not complexity.startswith('O(') or '^n' in complexity:
+            return 0  # Default to lowest if not understood
         
-        # Handle custom n^x notation
-        if complexity1.startswith('O(n^') and complexity1 not in complexity_order:
-            power1 = int(complexity1.replace('O(n^', '').replace(')', ''))
-            idx1 = min(power1 + 2, len(complexity_order) - 1)  # +2 to account for O(1) and O(log n)
-        else:
-            try:
-                idx1 = complexity_order.index(complexity1)
-            except ValueError:
-                idx1 = 0  # Default to lowest if not found
-        
-        if complexity2.startswith('O(n^') and complexity2 not in complexity_order:
-            power2 = int(complexity2.replace('O(n^', '').replace(')', ''))
-            idx2 = min(power2 + 2, len(complexity_order) - 1)
-        else:
-            try:
-                idx2 = complexity_order.index(complexity2)
-            except ValueError:
-                idx2 = 0
-        
-        return idx1 > idx2
+        # Handle custom notation such as O(n^7), O(n·m) or O(n^2 + m log m):
+        # a term of degree d ranks with O(n^d), a log factor half a step higher
+        rank = 0
+        for term in complexity[2:-1].split(' + '):
+            logarithmic = 'log' in term
+            degree = sum(int(power or 1) for _, power in TERM_FACTOR_RE.findall(LOG_FACTOR_RE.sub('', term)))
+            if degree == 0:
+                term_rank = 1 if logarithmic else 0
+            elif degree == 1:
+                term_rank = 3 if logarithmic else 2  # +2 to account for O(1) and O(log n)
+            else:
+                term_rank = degree + 2 + (0.5 if logarithmic else 0)
+            rank = max(rank, min(term_rank, len(complexity_order) - 1))
+        return rank
         
-    def analyze_code(self, code, language):
+    def analyze_code(self, code, language, budget=None, cancelled=None):
         """
-        Analyze code for time and space complexity
+        Analyze code for time and space complexity. With an AnalysisBudget,
+        inputs over its limits are analyzed at a cheaper tier and the result
+        carries 'tier' and 'degraded'. cancelled() is checked between phases;
+        once it returns True the analysis raises AnalysisCancelled.
         """
         if language.lower() == 'python':
-            return self.analyze_python_code(code)
+            return self.analyze_python_code(code, budget, cancelled)
         
         # Default response for unsupported languages
         return {
@@ -0,0 +1,167 @@
+"""
+Cost models of library calls.
+
+Without them np.dot(a, b) or df.sort_values('t') look like any other
+call: constant time. A plugin describes what a library's calls cost as
+data, in a RULES list of dicts:
+
+    {'receiver': 'pandas.DataFrame', 'methods': ['sort_values', 'sort_index'],
+     'complexity': 'O(n log n)', 'note': 'Sorts all rows', 'returns': 'pandas.DataFrame'}
+
+receiver is a module path (the rule then covers functions: np.sort(a), or
+sort imported from numpy) or the dotted name of a type whose methods it
+covers. '*' covers methods of receivers whose type is unknown, for names
+only the library uses (df.iterrows()). complexity is a class in n, the
+receiver's length for methods and the first argument's for functions;
+'size': 'value' measures n by the first argument's value instead
+(np.zeros(n)). returns is the type of the result, so chained calls such
+as Model.objects.filter(...).count() resolve too, and 'same_length' marks
+results as long as n (for row in df.itertuples() runs n times). Calls
+that wait on a database, the network or the filesystem name that in 'io'
+('query', 'network' or 'filesystem'), with the batched alternative to
+suggest when they run once per loop iteration in 'batch'.
+
+Optional MODULES lists the module paths a plugin covers ('builtins' for
+functions such as open), ATTRIBUTES maps (receiver type, attribute) to
+the attribute's type (a model's objects is a Manager) and ELEMENTS maps a
+type to the type of its items (iterating a QuerySet yields models).
+
+A CostModelRegistry compiles the rules of its plugins into dicts keyed by
+(receiver, name), so costing a call is one or two dict lookups however
+many plugins are registered. Later plugins override earlier rules for the
+same key.
+"""
+import hashlib
+import importlib
+import json
+import re
+
+# Receiver of rules for methods on values of unknown type
+ANY_RECEIVER = '*'
+
+# Import paths of the plugins every registry starts with
+BUILTIN_PLUGINS = ('.builtin_costs', '.numpy_costs', '.pandas_costs', '.django_orm_costs', '.io_costs')
+
+SIZES = ('receiver', 'argument', 'value')
+
+# What an I/O call waits on
+IO_KINDS = ('query', 'network', 'filesystem')
+
+# O(1), O(log n), O(n^k) and O(n^k log n)
+COMPLEXITY_RE = re.compile(r'O\((?:1|(n)(?:\^(\d+))?( log n)?|(log n))\)$')
+
+
+class CostRule:
+    """What one library function or method costs, compiled from a plugin rule."""
+
+    __slots__ = ('receiver', 'name', 'complexity', 'note', 'returns', 'size', 'same_length', 'io', 'batch', 'degree',
+                 'logarithmic')
+
+    def __init__(self, receiver, name, complexity, note='', returns=None, size=None, same_length=False, io=None,
+                 batch='', module=False):
+        match = COMPLEXITY_RE.match(complexity)
+        if not match:
+            raise ValueError(f'{receiver}.{name}: unsupported complexity {complexity!r}; '
+                             "use O(1), O(log n), O(n^k) or O(n^k log n)")
+        size = size or ('argument' if module else 'receiver')
+        if size not in SIZES:
+            raise ValueError(f"{receiver}.{name}: size must be one of {', '.join(SIZES)}")
+        if io is not None and io not in IO_KINDS:
+            raise ValueError(f"{receiver}.{name}: io must be one of {', '.join(IO_KINDS)}")
+        self.receiver = receiver
+        self.name = name
+        self.complexity = complexity
+        self.note = note
+        self.returns = returns
+        self.size = size
+        self.same_length = same_length
+        self.io = io
+        self.batch = batch
+        linear, power, times_log, only_log = match.groups()
+        self.degree = int(power) if power else int(bool(linear))
+        self.logarithmic = bool(times_log or only_log)
+
+    @property
+    def constant(self):
+        return self.degree == 0 and not self.logarithmic
+
+    def as_data(self):
+        return [self.receiver, self.name, self.complexity, self.note, self.returns, self.size, self.same_length,
+                self.io, self.batch]
+
+
+class CostModelRegistry:
+    """Compiled lookup tables of the registered plugins."""
+
+    def __init__(self, plugins=BUILTIN_PLUGINS):
+        self.plugins = []
+        self.rules = {}        # (receiver, name) -> CostRule
+        self.attributes = {}   # (receiver, attribute) -> type
+        self.elements = {}     # type -> type of its items
+        self.modules = set()   # module paths; other receivers are types
+        self.types = set()
+        for plugin in plugins:
+            self.register(plugin)
+
+    def register(self, plugin):
+        """
+        Add a plugin: a module, the import path of one (relative paths are
+        relative to this package) or any object with RULES.
+        """
+        if isinstance(plugin, str):
+            plugin = importlib.import_module(plugin, __name__)
+        modules = set(getattr(plugin, 'MODULES', ()))
+        attributes = dict(getattr(plugin, 'ATTRIBUTES', {}))
+        elements = dict(getattr(plugin, 'ELEMENTS', {}))
+        rules = {}
+        for data in plugin.RULES:
+            receivers = data['receiver']
+            for receiver in [receivers] if isinstance(receivers, str) else receivers:
+                for name in data['methods']:
+                    rules[(receiver, name)] = CostRule(
+                        receiver, name, data['complexity'], data.get('note', ''), data.get('returns'),
+                        data.get('size'), data.get('same_length', False), data.get('io'), data.get('batch', ''),
+                        module=receiver in modules
+                    )
+        # Compile only once the whole plugin validated, so a bad one leaves the tables as they were
+        self.plugins.append(plugin)
+        self.modules |= modules
+        self.rules.update(rules)
+        self.attributes.update(attributes)
+        self.elements.update(elements)
+        self.types = (
+            {receiver for receiver, _ in self.rules} | {rule.returns for rule in self.rules.values()}
+            | set(self.attributes.values()) | set(self.elements) | set(self.elements.values())
+        ) - self.modules - {ANY_RECEIVER, None}
+
+    def call(self, receiver, name):
+        """Rule for calling name on a receiver type or module path (None: unknown type), or None."""
+        rule = self.rules.get((receiver, name))
+        if rule is None and receiver is None:
+            rule = self.rules.get((ANY_RECEIVER, name))
+        return rule
+
+    def attribute(self, receiver, name):
+        """Type of an attribute of a receiver type (None: unknown type), or None."""
+        found = self.attributes.get((receiver, name))
+        if found is None and receiver is None:
+            found = self.attributes.get((ANY_RECEIVER, name))
+        return found
+
+    def element(self, container):
+        """Type of the items of a container type, or None."""
+        return self.elements.get(container)
+
+    def fingerprint(self):
+        """Digest of the compiled tables, for cache keys of results computed with them."""
+        data = {
+            'rules': sorted(rule.as_data() for rule in self.rules.values()),
+            'attributes': sorted([*key, value] for key, value in self.attributes.items()),
+            'elements': sorted(self.elements.items()),
+            'modules': sorted(self.modules),
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+
+
+# The tables the analyzer consults; register site-specific plugins here
+default_registry = CostModelRegistry()
@@ -0,0 +1,12 @@
+"""Python builtins and list methods whose cost grows with their input."""
+
+MODULES = ['builtins', 'heapq']
+
+RULES = [
+    {'receiver': 'builtins', 'methods': ['sorted'],
+     'complexity': 'O(n log n)', 'note': 'Sorts a copy of the input'},
+    {'receiver': '*', 'methods': ['sort'],
+     'complexity': 'O(n log n)', 'note': 'Sorts the list in place'},
+    {'receiver': 'heapq', 'methods': ['heapify'],
+     'complexity': 'O(n)', 'note': 'Builds a heap in place'},
+]
@@ -0,0 +1,68 @@
+"""
+Django ORM cost model: n is the number of rows the query matches.
+
+Querysets are lazy, so building one is constant; the cost falls on the
+call that runs the query. Each such call is also a database round trip.
+"""
+
+MODULES = ['django.db.models']
+
+MANAGER = 'django.db.models.Manager'
+QUERYSET = 'django.db.models.QuerySet'
+MODEL = 'django.db.models.Model'
+BOTH = [MANAGER, QUERYSET]
+
+# Relation fields, by the loader that fetches them with the query instead of one query per object
+RELATION_FIELDS = {
+    'ForeignKey': 'select_related',
+    'OneToOneField': 'select_related',
+    'ManyToManyField': 'prefetch_related',
+}
+
+RULES = [
+    {'receiver': BOTH, 'methods': ['all', 'filter', 'exclude', 'order_by', 'select_related', 'prefetch_related',
+                                   'annotate', 'values', 'values_list', 'distinct', 'only', 'defer', 'using',
+                                   'select_for_update', 'none', 'reverse'],
+     'complexity': 'O(1)', 'note': 'Lazy: builds the query without running it', 'returns': QUERYSET,
+     'same_length': True},
+    {'receiver': BOTH, 'methods': ['get', 'first', 'last', 'latest', 'earliest'],
+     'complexity': 'O(log n)', 'note': 'One query, an index lookup when the filter is indexed', 'returns': MODEL,
+     'io': 'query', 'batch': 'fetch all the rows once before the loop with filter(pk__in=...) or in_bulk()'},
+    {'receiver': BOTH, 'methods': ['exists'],
+     'complexity': 'O(log n)', 'note': 'One query, an index lookup when the filter is indexed',
+     'io': 'query', 'batch': 'fetch the matching keys once before the loop with values_list(..., flat=True)'},
+    {'receiver': BOTH, 'methods': ['create', 'get_or_create', 'update_or_create'],
+     'complexity': 'O(log n)', 'note': 'One query per object', 'returns': MODEL,
+     'io': 'query', 'batch': 'build the objects in the loop and save them with one bulk_create()'},
+    {'receiver': BOTH, 'methods': ['count', 'aggregate'],
+     'complexity': 'O(n)', 'note': 'One query that scans the matching rows in the database',
+     'io': 'query', 'batch': 'count per group in one query with values(...).annotate(Count(...))'},
+    {'receiver': BOTH, 'methods': ['in_bulk'],
+     'complexity': 'O(n)', 'note': 'One query that fetches every matching row',
+     'io': 'query', 'batch': 'call in_bulk() once before the loop'},
+    {'receiver': BOTH, 'methods': ['update', 'delete'],
+     'complexity': 'O(n)', 'note': 'One query that writes every matching row',
+     'io': 'query', 'batch': 'update or delete all the rows in one query filtered with pk__in=...'},
+    {'receiver': BOTH, 'methods': ['iterator'],
+     'complexity': 'O(n)', 'note': 'Runs the query and streams every matching row', 'same_length': True,
+     'io': 'query', 'batch': 'run one query before the loop and group its rows in a dict'},
+    {'receiver': BOTH, 'methods': ['bulk_create', 'bulk_update'],
+     'complexity': 'O(n)', 'note': 'Writes the given objects in batches of queries', 'size': 'argument',
+     'io': 'query', 'batch': 'collect the objects across iterations and write them with one call after the loop'},
+    {'receiver': [MODEL, '*'], 'methods': ['save'],
+     'complexity': 'O(1)', 'note': 'One query per object',
+     'io': 'query', 'batch': 'collect the objects and write them with one bulk_create() or bulk_update()'},
+    {'receiver': MODEL, 'methods': ['delete', 'refresh_from_db'],
+     'complexity': 'O(1)', 'note': 'One query per object',
+     'io': 'query', 'batch': 'delete or reload all the objects with one query filtered with pk__in=...'},
+]
+
+ATTRIBUTES = {
+    # Model.objects, the default manager of any model class
+    ('*', 'objects'): MANAGER,
+}
+
+ELEMENTS = {
+    MANAGER: MODEL,
+    QUERYSET: MODEL,
+}
@@ -0,0 +1,47 @@
+"""
+Filesystem and network calls: constant work for the program, but each one
+waits on a disk or a remote server, which dominates once it runs per item.
+"""
+
+MODULES = ['builtins', 'os', 'os.path', 'shutil', 'pathlib', 'requests', 'httpx', 'urllib.request']
+
+PATH = 'pathlib.Path'
+SESSION = 'requests.Session'
+CLIENT = 'httpx.Client'
+
+READ_ONCE = 'read the data once before the loop, or gather the paths and process them in one pass'
+WRITE_ONCE = 'open the output once outside the loop and write every item to it'
+LIST_ONCE = 'list the directory once with os.scandir() and look entries up in the result'
+ONE_REQUEST = 'fetch everything in one request to a batch or list endpoint, or reuse one session concurrently'
+
+RULES = [
+    # Files
+    {'receiver': 'builtins', 'methods': ['open'],
+     'complexity': 'O(1)', 'note': 'Opens a file', 'io': 'filesystem', 'batch': READ_ONCE},
+    {'receiver': 'pathlib', 'methods': ['Path'],
+     'complexity': 'O(1)', 'note': 'Builds a path without touching the disk', 'returns': PATH},
+    {'receiver': PATH, 'methods': ['read_text', 'read_bytes', 'open'],
+     'complexity': 'O(1)', 'note': 'Reads a file', 'io': 'filesystem', 'batch': READ_ONCE},
+    {'receiver': PATH, 'methods': ['write_text', 'write_bytes', 'touch', 'unlink', 'mkdir', 'rename', 'replace'],
+     'complexity': 'O(1)', 'note': 'Writes to the filesystem', 'io': 'filesystem', 'batch': WRITE_ONCE},
+    {'receiver': PATH, 'methods': ['exists', 'is_file', 'is_dir', 'stat', 'iterdir', 'glob', 'rglob'],
+     'complexity': 'O(1)', 'note': 'Queries the filesystem', 'io': 'filesystem', 'batch': LIST_ONCE},
+    {'receiver': ['os', 'os.path'], 'methods': ['exists', 'isfile', 'isdir', 'getsize', 'getmtime', 'stat', 'listdir',
+                                                'scandir', 'walk'],
+     'complexity': 'O(1)', 'note': 'Queries the filesystem', 'io': 'filesystem', 'batch': LIST_ONCE},
+    {'receiver': 'os', 'methods': ['remove', 'unlink', 'rename', 'replace', 'makedirs', 'mkdir', 'rmdir'],
+     'complexity': 'O(1)', 'note': 'Writes to the filesystem', 'io': 'filesystem', 'batch': WRITE_ONCE},
+    {'receiver': 'shutil', 'methods': ['copy', 'copy2', 'copyfile', 'move', 'rmtree', 'copytree'],
+     'complexity': 'O(1)', 'note': 'Copies or removes files', 'io': 'filesystem', 'batch': WRITE_ONCE},
+
+    # HTTP
+    {'receiver': ['requests', 'httpx', SESSION, CLIENT], 'methods': ['get', 'post', 'put', 'patch', 'delete', 'head',
+                                                                     'options', 'request'],
+     'complexity': 'O(1)', 'note': 'One HTTP round trip', 'io': 'network', 'batch': ONE_REQUEST},
+    {'receiver': 'requests', 'methods': ['Session'],
+     'complexity': 'O(1)', 'note': 'Connection pool for repeated requests', 'returns': SESSION},
+    {'receiver': 'httpx', 'methods': ['Client'],
+     'complexity': 'O(1)', 'note': 'Connection pool for repeated requests', 'returns': CLIENT},
+    {'receiver': 'urllib.request', 'methods': ['urlopen', 'urlretrieve'],
+     'complexity': 'O(1)', 'note': 'One HTTP round trip', 'io': 'network', 'batch': ONE_REQUEST},
+]
@@ -0,0 +1,77 @@
+"""NumPy cost model: n is the number of array elements (the first array argument's for functions)."""
+
+MODULES = ['numpy', 'numpy.linalg', 'numpy.fft', 'numpy.random']
+
+ARRAY = 'numpy.ndarray'
+
+RULES = [
+    # Creating arrays
+    {'receiver': 'numpy', 'methods': ['array', 'asarray', 'copy', 'ascontiguousarray', 'frombuffer', 'fromiter'],
+     'complexity': 'O(n)', 'note': 'Copies every element into a new array', 'returns': ARRAY, 'same_length': True},
+    {'receiver': 'numpy', 'methods': ['zeros', 'ones', 'empty', 'full', 'arange', 'linspace', 'identity', 'eye'],
+     'complexity': 'O(n)', 'note': 'Allocates (and fills) n elements', 'returns': ARRAY, 'size': 'value',
+     'same_length': True},
+    {'receiver': 'numpy.random', 'methods': ['rand', 'randn', 'random', 'randint', 'permutation'],
+     'complexity': 'O(n)', 'note': 'Draws n random numbers', 'returns': ARRAY, 'size': 'value', 'same_length': True},
+    {'receiver': 'numpy', 'methods': ['zeros_like', 'ones_like', 'empty_like', 'full_like'],
+     'complexity': 'O(n)', 'note': 'Allocates an array as large as its argument', 'returns': ARRAY,
+     'same_length': True},
+
+    # Element-wise functions and reductions
+    {'receiver': 'numpy',
+     'methods': ['add', 'subtract', 'multiply', 'divide', 'power', 'sqrt', 'exp', 'log', 'abs', 'absolute', 'clip',
+                 'where', 'maximum', 'minimum', 'isnan', 'isin', 'round', 'cumsum', 'cumprod', 'diff', 'flip'],
+     'complexity': 'O(n)', 'note': 'Vectorized pass over every element', 'returns': ARRAY, 'same_length': True},
+    {'receiver': 'numpy',
+     'methods': ['sum', 'mean', 'std', 'var', 'min', 'max', 'amin', 'amax', 'argmin', 'argmax', 'prod', 'any', 'all',
+                 'count_nonzero', 'nonzero', 'argwhere', 'bincount', 'histogram', 'dot', 'vdot', 'inner'],
+     'complexity': 'O(n)', 'note': 'Vectorized pass over every element; dot of two matrices is a matrix product'},
+    {'receiver': 'numpy', 'methods': ['concatenate', 'stack', 'vstack', 'hstack', 'append', 'insert', 'delete', 'tile',
+                                      'repeat', 'pad'],
+     'complexity': 'O(n)',
+     'note': 'Copies every element into a new array; growing an array in a loop copies it each time',
+     'returns': ARRAY},
+    {'receiver': 'numpy', 'methods': ['reshape', 'transpose', 'ravel', 'squeeze', 'expand_dims'],
+     'complexity': 'O(1)', 'note': 'Returns a view, no copy (ravel copies non-contiguous arrays)', 'returns': ARRAY},
+
+    # Sorting and searching
+    {'receiver': 'numpy', 'methods': ['sort', 'argsort', 'unique', 'median', 'percentile', 'quantile', 'lexsort',
+                                      'intersect1d', 'union1d', 'setdiff1d'],
+     'complexity': 'O(n log n)', 'note': 'Sorts (a copy of) the array', 'returns': ARRAY},
+    {'receiver': 'numpy', 'methods': ['partition', 'argpartition'],
+     'complexity': 'O(n)', 'note': 'Introselect, linear on average', 'returns': ARRAY},
+    {'receiver': 'numpy', 'methods': ['searchsorted'],
+     'complexity': 'O(log n)', 'note': 'Binary search per query value'},
+
+    # Products and linear algebra, n the side of a square matrix
+    {'receiver': 'numpy', 'methods': ['outer', 'convolve', 'correlate'],
+     'complexity': 'O(n^2)', 'note': 'Pairs every element of one input with every element of the other',
+     'returns': ARRAY},
+    {'receiver': ['numpy', 'numpy.linalg'], 'methods': ['matmul', 'tensordot', 'einsum', 'kron', 'multi_dot'],
+     'complexity': 'O(n^3)', 'note': 'Matrix product: n^3 for two n x n matrices', 'returns': ARRAY},
+    {'receiver': 'numpy.linalg', 'methods': ['inv', 'solve', 'det', 'eig', 'eigh', 'svd', 'qr', 'cholesky', 'lstsq',
+                                             'pinv', 'matrix_rank', 'matrix_power'],
+     'complexity': 'O(n^3)', 'note': 'Dense factorization of an n x n matrix; cache it rather than repeat it'},
+    {'receiver': 'numpy.linalg', 'methods': ['norm'],
+     'complexity': 'O(n)', 'note': 'Vectorized pass over every element'},
+    {'receiver': 'numpy.fft', 'methods': ['fft', 'ifft', 'rfft', 'irfft', 'fft2', 'ifft2', 'fftn'],
+     'complexity': 'O(n log n)', 'note': 'Fast Fourier transform', 'returns': ARRAY},
+
+    # Array methods
+    {'receiver': ARRAY, 'methods': ['sum', 'mean', 'std', 'var', 'min', 'max', 'argmin', 'argmax', 'prod', 'any', 'all',
+                                    'cumsum', 'nonzero', 'dot', 'tolist', 'tobytes', 'fill', 'clip', 'round'],
+     'complexity': 'O(n)', 'note': 'Vectorized pass over every element'},
+    {'receiver': ARRAY, 'methods': ['copy', 'astype', 'flatten'],
+     'complexity': 'O(n)', 'note': 'Copies every element', 'returns': ARRAY, 'same_length': True},
+    {'receiver': ARRAY, 'methods': ['sort', 'argsort'],
+     'complexity': 'O(n log n)', 'note': 'Sorts the array', 'returns': ARRAY},
+    {'receiver': ARRAY, 'methods': ['reshape', 'transpose', 'view', 'ravel', 'squeeze', 'swapaxes'],
+     'complexity': 'O(1)', 'note': 'Returns a view, no copy', 'returns': ARRAY, 'same_length': True},
+    {'receiver': ARRAY, 'methods': ['searchsorted'],
+     'complexity': 'O(log n)', 'note': 'Binary search per query value'},
+]
+
+ATTRIBUTES = {
+    (ARRAY, 'T'): ARRAY,
+    (ARRAY, 'flat'): ARRAY,
+}
@@ -0,0 +1,77 @@
+"""pandas cost model: n is the number of rows (the first argument's for functions)."""
+
+MODULES = ['pandas']
+
+FRAME = 'pandas.DataFrame'
+SERIES = 'pandas.Series'
+GROUPBY = 'pandas.GroupBy'
+BOTH = [FRAME, SERIES]
+
+RULES = [
+    # Reading and building frames
+    {'receiver': 'pandas', 'methods': ['read_csv', 'read_json', 'read_parquet', 'read_excel', 'read_sql', 'read_table'],
+     'complexity': 'O(n)', 'note': 'Parses every row of the input', 'returns': FRAME, 'size': 'value'},
+    {'receiver': 'pandas', 'methods': ['DataFrame'],
+     'complexity': 'O(n)', 'note': 'Copies the data into columns; build once, not row by row', 'returns': FRAME,
+     'same_length': True},
+    {'receiver': 'pandas', 'methods': ['Series'],
+     'complexity': 'O(n)', 'note': 'Copies the data', 'returns': SERIES, 'same_length': True},
+    {'receiver': 'pandas', 'methods': ['concat'],
+     'complexity': 'O(n)',
+     'note': 'Copies every input frame; concatenating inside a loop is quadratic, collect and concat once',
+     'returns': FRAME},
+    {'receiver': 'pandas', 'methods': ['merge', 'merge_asof', 'crosstab', 'pivot_table', 'get_dummies', 'to_datetime',
+                                       'to_numeric', 'cut', 'qcut', 'factorize'],
+     'complexity': 'O(n)', 'note': 'Hash join or vectorized pass over every row', 'returns': FRAME},
+
+    # Row-by-row iteration and Python callbacks
+    {'receiver': BOTH + ['*'], 'methods': ['iterrows', 'itertuples'],
+     'complexity': 'O(n)', 'note': 'Builds a Python object per row; prefer vectorized column operations',
+     'same_length': True},
+    {'receiver': BOTH + [GROUPBY], 'methods': ['apply', 'applymap', 'map', 'transform', 'agg', 'aggregate'],
+     'complexity': 'O(n)', 'note': 'Calls a Python function per row or element; prefer vectorized operations'},
+    {'receiver': BOTH, 'methods': ['items', 'iteritems'],
+     'complexity': 'O(n)', 'note': 'Iterates column by column (Series: element by element)', 'same_length': True},
+
+    # Sorting and ranking
+    {'receiver': BOTH + ['*'], 'methods': ['sort_values', 'sort_index'],
+     'complexity': 'O(n log n)', 'note': 'Sorts all rows', 'returns': FRAME, 'same_length': True},
+    {'receiver': BOTH, 'methods': ['rank', 'quantile', 'median', 'describe'],
+     'complexity': 'O(n log n)', 'note': 'Sorts (a copy of) the values'},
+    {'receiver': BOTH, 'methods': ['nlargest', 'nsmallest'],
+     'complexity': 'O(n)', 'note': 'Partial sort, linear in the rows', 'returns': FRAME},
+
+    # Whole-frame operations
+    {'receiver': BOTH + ['*'], 'methods': ['drop_duplicates', 'value_counts', 'to_numpy', 'fillna', 'dropna'],
+     'complexity': 'O(n)', 'note': 'Vectorized pass over every row'},
+    {'receiver': BOTH, 'methods': ['to_dict', 'to_csv', 'to_records', 'isin', 'pivot', 'melt', 'explode'],
+     'complexity': 'O(n)', 'note': 'Vectorized pass over every row'},
+    {'receiver': BOTH, 'methods': ['copy', 'astype', 'reset_index', 'set_index', 'rename', 'drop', 'assign', 'replace',
+                                   'where', 'mask', 'cumsum', 'diff', 'shift', 'abs', 'round', 'clip'],
+     'complexity': 'O(n)', 'note': 'Copies or transforms every row', 'returns': FRAME, 'same_length': True},
+    {'receiver': BOTH, 'methods': ['sum', 'mean', 'std', 'var', 'min', 'max', 'count', 'nunique', 'unique', 'any',
+                                   'all', 'idxmin', 'idxmax', 'duplicated', 'isna', 'notna', 'tolist'],
+     'complexity': 'O(n)', 'note': 'Vectorized pass over every row'},
+    {'receiver': FRAME, 'methods': ['merge', 'join'],
+     'complexity': 'O(n)', 'note': 'Hash join on the key columns', 'returns': FRAME},
+    {'receiver': FRAME, 'methods': ['append'],
+     'complexity': 'O(n)',
+     'note': 'Copies the whole frame (removed in pandas 2); appending in a loop is quadratic, concat once',
+     'returns': FRAME},
+    {'receiver': BOTH, 'methods': ['groupby'],
+     'complexity': 'O(n)', 'note': 'Hashes every row into groups', 'returns': GROUPBY},
+    {'receiver': GROUPBY, 'methods': ['sum', 'mean', 'count', 'size', 'min', 'max', 'first', 'last', 'nunique'],
+     'complexity': 'O(n)', 'note': 'Vectorized aggregation over every row', 'returns': FRAME},
+    {'receiver': BOTH, 'methods': ['head', 'tail'],
+     'complexity': 'O(1)', 'note': 'Slices the first or last rows', 'returns': FRAME},
+]
+
+ATTRIBUTES = {
+    (FRAME, 'loc'): FRAME,
+    (FRAME, 'iloc'): FRAME,
+    (FRAME, 'T'): FRAME,
+    (FRAME, 'values'): 'numpy.ndarray',
+    (SERIES, 'values'): 'numpy.ndarray',
+    (SERIES, 'str'): SERIES,
+    (SERIES, 'dt'): SERIES,
+}
@@ -0,0 +1,33 @@
+"""
+The ComplexityVisitor-based analyzer shipped with the VS Code extension.
+
+It reports per-function metrics, including cyclomatic complexity, and is
+shared by the function index and the language server. The scripts live
+in vscode-extension/src and are loaded from there by file path.
+"""
+import importlib.util
+import os
+import sys
+
+EXTENSION_SRC = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'vscode-extension', 'src'
+)
+
+
+def _load_extension_module(name):
+    """
+    Import one of the extension's scripts by file path, under the bare name
+    the scripts import each other by, without adding their directory to
+    sys.path (where its modules would shadow installed ones).
+    """
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(EXTENSION_SRC, f'{name}.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+_load_extension_module('ast_traversal')  # imported by analyze_complexity
+analyze_complexity = _load_extension_module('analyze_complexity')
@@ -0,0 +1,157 @@
+"""
+Project-wide function complexity index.
+
+Walks a source tree and keeps one FunctionComplexity row per function,
+re-analyzing only files whose contents changed since the last run.
+Per-function metrics come from the AST analyzer shipped with the VS Code
+extension, which also computes cyclomatic complexity.
+"""
+import hashlib
+import os
+import sys
+
+from django.db import transaction
+
+from .extension_analyzer import analyze_complexity
+from .models import FunctionComplexity, IndexedFile
+
+# Directories never worth indexing
+SKIP_DIRS = {'.git', '.hg', '.svn', '__pycache__', 'node_modules', 'venv', '.venv', '.tox'}
+
+# Rows written per bulk_create call
+BATCH_SIZE = 1000
+
+
+def iter_python_files(root):
+    """Yield (relative_path, absolute_path, stat) for every .py file under root."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in filenames:
+            if filename.endswith('.py'):
+                absolute = os.path.join(dirpath, filename)
+                relative = os.path.relpath(absolute, root).replace(os.sep, '/')
+                yield relative, absolute, os.stat(absolute)
+
+
+def function_rows(root, path, source):
+    """Analyze one file's source and build unsaved FunctionComplexity rows."""
+    analysis = analyze_complexity.analyze_source(source, path, parallel_threshold=sys.maxsize)
+    lines = source.splitlines()
+
+    rows = []
+    for qualified_name, info in analysis['functions'].items():
+        body = '\n'.join(lines[info['lineno'] - 1:info['end_lineno']])
+        rows.append(FunctionComplexity(
+            root=root,
+            path=path,
+            qualified_name=qualified_name,
+            class_name=info['class'],
+            lineno=info['lineno'],
+            end_lineno=info['end_lineno'],
+            time_complexity=info['time_complexity'],
+            space_complexity=info['space_complexity'],
+            time_rank=analyze_complexity.complexity_rank(info['time_complexity']),
+            space_rank=analyze_complexity.complexity_rank(info['space_complexity']),
+            cyclomatic_complexity=info['cyclomatic_complexity'],
+            content_hash=hashlib.sha256(body.encode('utf-8')).hexdigest(),
+        ))
+    return rows
+
+
+@transaction.atomic
+def index_file(root, path, source, stat, content_hash):
+    """Replace the index rows for one file."""
+    try:
+        rows = function_rows(root, path, source)
+    except SyntaxError:
+        rows = []
+
+    existing = {
+        f.qualified_name: f for f in FunctionComplexity.objects.filter(root=root, path=path)
+    }
+    new_names = {row.qualified_name for row in rows}
+
+    # Drop functions that no longer exist, and rewrite only those that changed
+    stale = [f.pk for name, f in existing.items() if name not in new_names]
+    changed = []
+    for row in rows:
+        old = existing.get(row.qualified_name)
+        if old is None:
+            changed.append(row)
+        elif (old.content_hash, old.lineno, old.end_lineno) != (row.content_hash, row.lineno, row.end_lineno):
+            stale.append(old.pk)
+            changed.append(row)
+
+    if stale:
+        FunctionComplexity.objects.filter(pk__in=stale).delete()
+    FunctionComplexity.objects.bulk_create(changed, batch_size=BATCH_SIZE)
+
+    IndexedFile.objects.update_or_create(
+        root=root,
+        path=path,
+        defaults={'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'content_hash': content_hash},
+    )
+    return len(changed)
+
+
+def update_index(root, prune=True):
+    """
+    Bring the index up to date with the .py files under root. Files whose
+    size and mtime are unchanged are skipped without being read; files
+    whose content hash is unchanged are not re-analyzed. Rows are kept per
+    root, so indexing one project leaves the others' rows alone.
+    """
+    root = os.path.abspath(root)
+    if not os.path.isdir(root):
+        raise NotADirectoryError(f"Not a directory: {root}")
+    known = {f.path: f for f in IndexedFile.objects.filter(root=root)}
+    stats = {'scanned': 0, 'analyzed': 0, 'functions_written': 0, 'removed': 0}
+    seen = set()
+
+    for path, absolute, stat in iter_python_files(root):
+        stats['scanned'] += 1
+        seen.add(path)
+        indexed = known.get(path)
+        if indexed and indexed.size == stat.st_size and indexed.mtime_ns == stat.st_mtime_ns:
+            continue
+
+        with open(absolute, 'rb') as f:
+            data = f.read()
+        content_hash = hashlib.sha256(data).hexdigest()
+        if indexed and indexed.content_hash == content_hash:
+            IndexedFile.objects.filter(pk=indexed.pk).update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            continue
+
+        stats['analyzed'] += 1
+        stats['functions_written'] += index_file(root, path, data.decode('utf-8', 'replace'), stat, content_hash)
+
+    if prune:
+        removed = [path for path in known if path not in seen]
+        for start in range(0, len(removed), BATCH_SIZE):
+            batch = removed[start:start + BATCH_SIZE]
+            FunctionComplexity.objects.filter(root=root, path__in=batch).delete()
+            IndexedFile.objects.filter(root=root, path__in=batch).delete()
+        stats['removed'] = len(removed)
+
+    return stats
+
+
+def query_functions(min_time=None, min_space=None, path_prefix=None, class_name=None, root=None, limit=100):
+    """
+    Functions matching the filters, slowest first. min_time/min_space take
+    labels such as 'O(n^2)' and match that class or anything above it;
+    root limits the results to one indexed project.
+    """
+    queryset = FunctionComplexity.objects.all()
+    if root:
+        queryset = queryset.filter(root=os.path.abspath(root))
+    if min_time:
+        queryset = queryset.filter(time_rank__gte=analyze_complexity.complexity_rank(min_time))
+    if min_space:
+        queryset = queryset.filter(space_rank__gte=analyze_complexity.complexity_rank(min_space))
+    if path_prefix:
+        # A range instead of startswith (LIKE) so the path index can be used
+        queryset = queryset.filter(path__gte=path_prefix, path__lt=path_prefix + '\U0010ffff')
+    if class_name:
+        queryset = queryset.filter(class_name=class_name)
+    return queryset.order_by('-time_rank', 'path', 'lineno')[:limit]
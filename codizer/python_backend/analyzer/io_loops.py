@@ -0,0 +1,176 @@
+"""
+Database queries, network requests and filesystem calls inside loops.
+
+An ORM lookup, an HTTP request or an open() costs one round trip: constant
+work for the program, but waiting on another system dominates once it
+happens per item, the N+1 pattern. io_in_loops reports every such call
+made inside a loop or comprehension with its multiplier, the product of
+the enclosing loops' trip counts (see loop_bounds), and the batched
+alternative to use instead.
+
+Operations are what the cost models mark with 'io' (see cost_models):
+Model.objects.get(...), obj.save(), requests.get(...), open(...), ... On
+top of those it finds the lazy loads the Django ORM hides behind
+attribute access: book.author for a ForeignKey declared in the same code,
+and book.tags.all() or author.book_set.count() on any model instance,
+each one query per object unless the queryset the loop iterates uses
+select_related or prefetch_related for that relation. So does iterating
+a queryset in a nested loop.
+"""
+import ast
+
+from .cost_models.django_orm_costs import MANAGER, MODEL, RELATION_FIELDS
+from .loop_bounds import COMPREHENSIONS, MAX_CALL_TEXT, ONE, SCOPES, describe, dotted_name, scopes_of
+
+# Queryset methods naming relations to fetch along with the rows
+LOADERS = ('select_related', 'prefetch_related')
+
+RELATED_NOTE = 'Loads the related objects with one query per object'
+
+
+def io_in_loops(code, models=None, scopes=None):
+    """
+    [{'line', 'call', 'kind', 'operation', 'multiplier', 'loops', 'note',
+    'suggestion'}] in line order, one per I/O operation inside a loop;
+    kind is 'query', 'network' or 'filesystem'. Empty if the code does
+    not parse. scopes are those of scopes_of(code, models) when already
+    built.
+    """
+    if scopes is None:
+        scopes = scopes_of(code, models)
+    if scopes is None:
+        return []
+    relations = _relations(scopes[0].body)
+    findings = {}
+    for scope in scopes:
+        _scan(scope, relations, findings)
+    return [finding for _, finding in sorted(findings.items())]
+
+
+def _scan(scope, relations, findings):
+    """Record the operations in scope's own body (not nested functions) that run once per loop iteration."""
+    # (node, multiplier, loop depth, relations loaded by the enclosing loops' querysets)
+    pending = [(statement, ONE, 0, frozenset()) for statement in scope.body]
+    while pending:
+        node, multiplier, depth, loaded = pending.pop()
+        if isinstance(node, SCOPES):
+            continue
+        if isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+            outer = (multiplier, depth, loaded)
+            if isinstance(node, ast.While):
+                inner = (scope.trip(node, multiplier), depth + 1, loaded)
+                pending.append((node.test, *inner))
+            else:
+                inner = (scope.trip(node, multiplier), depth + 1, loaded | _loaded(node.iter))
+                pending.append((node.iter, *outer))
+                _check_iteration(scope, node.iter, outer, findings)
+            pending.extend((child, *inner) for child in node.body)
+            pending.extend((child, *outer) for child in node.orelse)
+            continue
+        if isinstance(node, COMPREHENSIONS):
+            context = (multiplier, depth, loaded)
+            for generator in node.generators:
+                pending.append((generator.iter, *context))
+                _check_iteration(scope, generator.iter, context, findings)
+                context = (scope.trip(generator, context[0]), context[1] + 1, context[2] | _loaded(generator.iter))
+                pending.extend((condition, *context) for condition in generator.ifs)
+            elements = (node.key, node.value) if isinstance(node, ast.DictComp) else (node.elt,)
+            pending.extend((element, *context) for element in elements)
+            continue
+        if multiplier != ONE:
+            operation = _operation(scope, node, relations, loaded)
+            if operation is not None:
+                _record(findings, node, (multiplier, depth), *operation)
+        pending.extend((child, multiplier, depth, loaded) for child in ast.iter_child_nodes(node))
+
+
+def _operation(scope, node, relations, loaded):
+    """(kind, operation, note, suggestion) if node waits on I/O, else None."""
+    if isinstance(node, ast.Call):
+        rule = scope.call_rule(node)
+        if rule is not None and rule.io:
+            return rule.io, f'{rule.receiver}.{rule.name}', rule.note, rule.batch
+        function = node.func
+        # book.tags.all(), author.book_set.count(): a related manager
+        if isinstance(function, ast.Attribute) and isinstance(function.value, ast.Attribute) \
+                and scope.models.call(MANAGER, function.attr) is not None:
+            relation = function.value.attr
+            if relation not in relations and relation not in loaded \
+                    and scope.type_of(function.value.value) == MODEL:
+                return 'query', f'{MODEL}.{relation}', RELATED_NOTE, _load_with('prefetch_related', relation)
+    elif isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Load):
+        # book.author for author = models.ForeignKey(...)
+        if node.attr in relations and node.attr not in loaded and scope.type_of(node.value) == MODEL:
+            return 'query', f'{MODEL}.{node.attr}', RELATED_NOTE, _load_with(relations[node.attr], node.attr)
+    return None
+
+
+def _check_iteration(scope, iterable, context, findings):
+    """Iterating a queryset runs its query: once per iteration of the loops around it."""
+    multiplier, depth, _ = context
+    if multiplier == ONE or scope.models.element(scope.type_of(iterable)) != MODEL:
+        return
+    _record(findings, iterable, (multiplier, depth), 'query', f'{MODEL}.__iter__',
+            'Runs the query each time the loop is entered',
+            'run one query before the outer loop, or prefetch_related() the relation, and group the rows in a dict')
+
+
+def _record(findings, node, context, kind, operation, note, suggestion):
+    multiplier, depth = context
+    target = node.func if isinstance(node, ast.Call) else node
+    findings[(node.lineno, node.col_offset)] = {
+        'line': node.lineno,
+        'call': dotted_name(target) or ast.unparse(target)[:MAX_CALL_TEXT],
+        'kind': kind,
+        'operation': operation,
+        'multiplier': describe(multiplier),
+        'loops': depth,
+        'note': note,
+        'suggestion': suggestion,
+    }
+
+
+def _load_with(loader, relation):
+    return f"add .{loader}('{relation}') to the queryset the loop iterates"
+
+
+def _loaded(iterable):
+    """Relations a queryset expression fetches along: select_related('author'), prefetch_related('tags__x')."""
+    loaded = set()
+    for node in ast.walk(iterable):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in LOADERS:
+            for argument in node.args:
+                # Prefetch('tags', queryset=...) names its relation first
+                for constant in ast.walk(argument):
+                    if isinstance(constant, ast.Constant) and isinstance(constant.value, str):
+                        loaded.add(constant.value.split('__')[0])
+                        break
+    return frozenset(loaded)
+
+
+def _relations(body):
+    """{relation field name: loader} for the relation fields of the model classes in body."""
+    relations = {}
+    pending = list(body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, ast.ClassDef):
+            for statement in node.body:
+                if isinstance(statement, (ast.Assign, ast.AnnAssign)) and isinstance(statement.value, ast.Call):
+                    function = statement.value.func
+                    field = function.attr if isinstance(function, ast.Attribute) else getattr(function, 'id', None)
+                    if field not in RELATION_FIELDS:
+                        continue
+                    targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+                    for target in targets:
+                        if isinstance(target, ast.Name):
+                            relations[target.id] = RELATION_FIELDS[field]
+                    for keyword in statement.value.keywords:
+                        # The reverse accessor, a manager on the other model
+                        if keyword.arg == 'related_name' and isinstance(keyword.value, ast.Constant) \
+                                and isinstance(keyword.value.value, str) and keyword.value.value != '+':
+                            relations[keyword.value.value] = 'prefetch_related'
+            pending.extend(node.body)
+        elif not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            pending.extend(ast.iter_child_nodes(node))
+    return relations
@@ -0,0 +1,280 @@
+"""
+Line structure of a source file computed for all lines at once: indentation
+widths, blank/comment/loop-header masks and the indentation nesting depth
+of every line, as NumPy arrays.
+
+The per-line loops this replaces (indentation tracking in
+ComplexityAnalyzer.analyze_python_code, block collection in
+analyze_complexity.analyze_file) are kept as _scan_python. It gives
+identical results and still handles small inputs, where NumPy's per-call
+overhead dominates, and the rare file whose indentation the vectorized
+pass cannot settle.
+"""
+from itertools import repeat
+import re
+
+import numpy as np
+
+# Below this many lines the pure-Python scan is faster
+VECTORIZE_MIN_LINES = 256
+
+# Rounds allowed to settle which rows pop the indentation stack
+MAX_POP_ROUNDS = 64
+
+# What the analyzers match per line
+LOOP_HEADER_RE = re.compile(r'^\s*for\s+\w+\s+in\s+|^\s*while\s+')
+BLOCK_HEADER_RE = re.compile(r'^\s*(for|while|if)\s+')
+HEADER_KEYWORDS = ('for', 'while', 'if')
+
+
+class LineStructure:
+    """
+    Per-line arrays for code.split('\\n'):
+
+    indent        leading whitespace width, len(line) - len(line.lstrip())
+    blank         line is empty or whitespace only
+    comment       first non-whitespace character is '#'
+    loop_header   line starts a for ... in / while loop
+    block_header  line starts a for / while / if block
+    depth         indentation nesting depth: 0 at the first non-blank
+                  line's level, +1 per deeper level still open (blank
+                  lines carry the depth of the line before them)
+    """
+
+    def __init__(self, indent, blank, comment, loop_header, block_header, depth):
+        self.indent = indent
+        self.blank = blank
+        self.comment = comment
+        self.loop_header = loop_header
+        self.block_header = block_header
+        self.depth = depth
+
+    def __len__(self):
+        return len(self.indent)
+
+    def max_loop_depth(self):
+        """Deepest loop nesting: depth + 1 of the deepest loop header, 0 without loops."""
+        if not self.loop_header.any():
+            return 0
+        return int(self.depth[self.loop_header].max()) + 1
+
+    def blocks(self):
+        """
+        (start, end) line index ranges of the top-most for/while/if blocks,
+        scanning down the way analyze_file does. A block runs up to the next
+        non-blank line indented no deeper than its header (trailing blank
+        lines included), and the scan resumes there, so headers nested
+        inside a block are not reported.
+        """
+        headers = np.flatnonzero(self.block_header)
+        if not len(headers):
+            return []
+        rows = np.flatnonzero(~self.blank)
+        # Closest earlier row no wider, over the reversed rows, is the closest later one
+        reversed_rows = len(rows) - 1 - np.searchsorted(rows, headers)
+        later = _previous_within(self.indent[rows][::-1], reversed_rows)
+        # None later (-1) runs to the end of the file
+        ends = np.append(rows, len(self))[len(rows) - 1 - later]
+
+        blocks = []
+        index = 0
+        while index < len(headers):
+            start, end = int(headers[index]), int(ends[index])
+            blocks.append((start, end))
+            index = np.searchsorted(headers, end)
+        return blocks
+
+
+def line_structure(code):
+    """LineStructure of code.split('\\n')."""
+    lines = code.split('\n')
+    if len(lines) >= VECTORIZE_MIN_LINES:
+        structure = _scan_numpy(lines)
+        if structure is not None:
+            return structure
+    return _scan_python(lines)
+
+
+def _scan_python(lines):
+    """Line-at-a-time scan with the analyzers' original indentation tracking."""
+    count = len(lines)
+    indent = np.zeros(count, dtype=np.int64)
+    blank = np.zeros(count, dtype=bool)
+    comment = np.zeros(count, dtype=bool)
+    loop_header = np.zeros(count, dtype=bool)
+    block_header = np.zeros(count, dtype=bool)
+    depth = np.zeros(count, dtype=np.int64)
+
+    current_indent = 0
+    indent_levels = []
+    for i, line in enumerate(lines):
+        stripped = line.lstrip()
+        indent[i] = len(line) - len(stripped)
+        if not stripped:
+            blank[i] = True
+            depth[i] = current_indent
+            continue
+        comment[i] = stripped.startswith('#')
+        loop_header[i] = LOOP_HEADER_RE.match(line) is not None
+        block_header[i] = BLOCK_HEADER_RE.match(line) is not None
+
+        width = indent[i]
+        if not indent_levels:
+            indent_levels = [width]
+            current_indent = 0
+        elif width > indent_levels[-1]:
+            indent_levels.append(width)
+            current_indent += 1
+        elif width < indent_levels[-1]:
+            while indent_levels and width < indent_levels[-1]:
+                indent_levels.pop()
+                current_indent -= 1
+            if not indent_levels:
+                indent_levels = [width]
+                current_indent = 0
+        depth[i] = current_indent
+
+    return LineStructure(indent, blank, comment, loop_header, block_header, depth)
+
+
+def _scan_numpy(lines):
+    """
+    Bulk scan: per-line string facts come from C-level str methods mapped
+    over all lines, everything else is array arithmetic. Returns None when
+    the indentation does not settle within MAX_POP_ROUNDS.
+    """
+    count = len(lines)
+    stripped = list(map(str.lstrip, lines))
+    stripped_length = np.fromiter(map(len, stripped), dtype=np.int64, count=count)
+    indent = np.fromiter(map(len, lines), dtype=np.int64, count=count) - stripped_length
+    blank = stripped_length == 0
+    comment = np.fromiter(map(str.startswith, stripped, repeat('#')), dtype=bool, count=count)
+
+    # Keyword prefilter; the few candidates are confirmed with the regexes
+    loop_header = np.zeros(count, dtype=bool)
+    block_header = np.zeros(count, dtype=bool)
+    keyword = np.fromiter(map(str.startswith, stripped, repeat(HEADER_KEYWORDS)), dtype=bool, count=count)
+    for i in np.flatnonzero(keyword).tolist():
+        line = lines[i]
+        loop_header[i] = LOOP_HEADER_RE.match(line) is not None
+        block_header[i] = BLOCK_HEADER_RE.match(line) is not None
+
+    depth = _nesting_depth(indent, blank)
+    if depth is None:
+        return None
+    return LineStructure(indent, blank, comment, loop_header, block_header, depth)
+
+
+def _nesting_depth(indent, blank):
+    """
+    Depth of every line as _scan_python's indentation stack computes it,
+    or None if the pops do not settle.
+
+    A row narrower than the stack top pops back to the stack state after
+    its closest earlier row no wider than it, keeping that row's depth and
+    top; an uneven dedent, landing between two open levels, leaves the
+    outer one on top, as the loop does. Any other row is one level deeper
+    than the row before it if it is wider than that row's top. Whether a
+    row pops depends on the tops before it, so the pops are found by
+    iterating to a fixed point. Between pops depths are a running sum;
+    each pop's starting depth comes from pointer jumping over the pops.
+    """
+    count = len(indent)
+    depth = np.zeros(count, dtype=np.int64)
+    rows = np.flatnonzero(~blank)
+    if not len(rows):
+        return depth
+    widths = indent[rows]
+    size = len(rows)
+    positions = np.arange(size)
+
+    # The stack top is never wider than the row before, so only rows
+    # narrower than it can pop; start by assuming they all do
+    narrower = np.concatenate(([False], widths[1:] < widths[:-1]))
+    # Closest earlier row no wider than each row (the row before, unless narrower)
+    within = positions - 1
+    candidates = np.flatnonzero(narrower)
+    within[candidates] = _previous_within(widths, candidates)
+
+    pops = narrower
+    for _ in range(MAX_POP_ROUNDS):
+        top = positions.copy()
+        inheriting = np.flatnonzero(pops & (within >= 0))
+        top[inheriting] = within[inheriting]
+        _follow(top, inheriting)
+        top_width = widths[top]
+        settled = narrower & np.concatenate(([False], widths[1:] < top_width[:-1]))
+        if np.array_equal(settled, pops):
+            break
+        pops = settled
+    else:
+        return None
+
+    # Levels added by each non-popping row, summed between pops
+    step = np.zeros(size, dtype=np.int64)
+    step[1:] = top_width[:-1] < widths[1:]
+    step[pops] = 0
+    total = np.cumsum(step)
+    segment = np.maximum.accumulate(np.where(pops, positions, 0))
+
+    # A pop's depth is its target's: the target's segment start depth plus
+    # the steps since. Chains of segment starts are summed by pointer jumping
+    start_depth = np.zeros(size, dtype=np.int64)
+    popping = np.flatnonzero(pops & (within >= 0))
+    link = np.full(size, -1, dtype=np.intp)
+    if len(popping):
+        target = within[popping]
+        start = segment[target]
+        start_depth[popping] = total[target] - total[start]
+        link[popping] = np.where(pops[start] & (within[start] >= 0), start, -1)
+        active = popping[link[popping] >= 0]
+        while len(active):
+            linked = link[active]
+            start_depth[active] += start_depth[linked]
+            link[active] = link[linked]
+            active = active[link[active] >= 0]
+
+    row_depth = start_depth[segment] + total - total[segment]
+
+    depth[rows] = row_depth
+    # Blank lines keep the depth of the last non-blank line before them
+    carried = np.maximum.accumulate(np.where(blank, -1, np.arange(count)))
+    has_previous = carried >= 0
+    depth[has_previous] = depth[carried[has_previous]]
+    return depth
+
+
+def _follow(pointers, rows):
+    """Point each of rows at the end of its pointer chain (chains end in self-loops), by pointer jumping."""
+    while len(rows):
+        jumped = pointers[pointers[rows]]
+        moved = jumped != pointers[rows]
+        pointers[rows] = jumped
+        rows = rows[moved]
+
+
+def _previous_within(widths, rows):
+    """
+    Index of the closest earlier row no wider than each of rows (-1 if none).
+
+    Each row steps back over the run of wider rows directly before it in
+    power-of-two strides, checked against a sparse table of range minima:
+    O(n log n) work in O(log n) array passes.
+    """
+    widths = widths.astype(np.int32)
+    # minima[k][j] = min(widths[j:j + 2**k])
+    minima = [widths]
+    while 2 ** len(minima) <= len(widths):
+        half = 2 ** (len(minima) - 1)
+        last = minima[-1]
+        minima.append(np.minimum(last[:-half], last[half:]))
+
+    target = widths[rows]
+    position = np.array(rows, dtype=np.intp)
+    for k in range(len(minima) - 1, -1, -1):
+        stride = 2 ** k
+        movable = np.flatnonzero(position >= stride)
+        starts = position[movable] - stride
+        wider = minima[k][starts] > target[movable]
+        position[movable[wider]] = starts[wider]
+    return position - 1
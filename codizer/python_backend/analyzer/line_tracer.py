@@ -0,0 +1,302 @@
+"""
+Runtime validation of per-line complexity.
+
+Runs a script or an entry function at increasing input sizes, counts how
+often every line of the target file executes, fits an empirical growth
+class per line and compares it with the tag from analyze_single_line.
+
+Counting uses sys.monitoring LINE events scoped to the target file's code
+objects where available (Python 3.12+), and falls back to sys.settrace
+with a local tracer installed only for frames from the target file.
+"""
+import argparse
+import contextlib
+import io
+import math
+import os
+import sys
+import types
+from collections import Counter
+
+from .complexity_analyzer import ComplexityAnalyzer
+
+# Candidate growth models, simplest first
+GROWTH_MODELS = [
+    ('O(1)', lambda n: 0.0),
+    ('O(log n)', lambda n: math.log2(n)),
+    ('O(n)', lambda n: float(n)),
+    ('O(n log n)', lambda n: n * math.log2(n)),
+    ('O(n^2)', lambda n: float(n) ** 2),
+    ('O(n^3)', lambda n: float(n) ** 3),
+]
+
+# A more complex model must beat the simplest good fit by this factor
+FIT_TOLERANCE = 1.05
+
+DEFAULT_SIZES = [8, 16, 32, 64]
+
+# Parameter names that usually hold a sequence / a size
+SEQUENCE_PARAMS = {'arr', 'array', 'lst', 'list', 'items', 'values', 'xs', 'data', 'nums', 'seq', 'left', 'right'}
+SIZE_PARAMS = {'n', 'size', 'count', 'k', 'm', 'length'}
+
+
+def _code_objects(code):
+    """A code object and every code object nested in it."""
+    stack = [code]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(c for c in current.co_consts if isinstance(c, types.CodeType))
+
+
+class LineCounter:
+    """Count line executions in one file while active."""
+
+    def __init__(self, filename):
+        self.filename = os.path.abspath(filename)
+        self.counts = Counter()
+        self.backend = None  # 'sys.monitoring' or 'sys.settrace', once counting
+        self._monitoring = getattr(sys, 'monitoring', None)
+
+    @contextlib.contextmanager
+    def counting(self, codes):
+        """Count lines executed by codes (and the code objects nested in them)."""
+        if self._monitoring is not None:
+            try:
+                self._monitoring.use_tool_id(self._monitoring.COVERAGE_ID, 'codizer')
+            except ValueError:
+                # Another tool (e.g. coverage.py) holds the id
+                self._monitoring = None
+        if self._monitoring is not None:
+            self.backend = 'sys.monitoring'
+            with self._counting_monitoring(codes):
+                yield
+        else:
+            self.backend = 'sys.settrace'
+            with self._counting_settrace():
+                yield
+
+    @contextlib.contextmanager
+    def _counting_monitoring(self, codes):
+        monitoring = self._monitoring
+        tool = monitoring.COVERAGE_ID
+        counts = self.counts
+
+        def on_line(code, line_number):
+            counts[line_number] += 1
+
+        monitoring.register_callback(tool, monitoring.events.LINE, on_line)
+        for code in codes:
+            for nested in _code_objects(code):
+                monitoring.set_local_events(tool, nested, monitoring.events.LINE)
+        try:
+            yield
+        finally:
+            for code in codes:
+                for nested in _code_objects(code):
+                    monitoring.set_local_events(tool, nested, 0)
+            monitoring.register_callback(tool, monitoring.events.LINE, None)
+            monitoring.free_tool_id(tool)
+
+    @contextlib.contextmanager
+    def _counting_settrace(self):
+        filename = self.filename
+        counts = self.counts
+
+        def local_trace(frame, event, arg):
+            if event == 'line':
+                counts[frame.f_lineno] += 1
+            return local_trace
+
+        def global_trace(frame, event, arg):
+            # Frames from other files get no local tracer, so they run untraced
+            if event == 'call' and os.path.abspath(frame.f_code.co_filename) == filename:
+                return local_trace
+            return None
+
+        previous = sys.gettrace()
+        sys.settrace(global_trace)
+        try:
+            yield
+        finally:
+            sys.settrace(previous)
+
+
+def fit_growth(sizes, counts):
+    """
+    Fit count = a * f(n) + b for each model and return the simplest label
+    whose residual is within FIT_TOLERANCE of the best fit.
+    """
+    if len(set(counts)) <= 1:
+        return 'O(1)'
+
+    errors = []
+    for label, f in GROWTH_MODELS:
+        xs = [f(n) for n in sizes]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(counts) / len(counts)
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        a = 0.0 if var_x == 0 else sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, counts)) / var_x
+        b = mean_y - a * mean_x
+        if a < 0:
+            # Decreasing work is not this kind of growth
+            a, b = 0.0, mean_y
+        error = math.sqrt(sum((a * x + b - y) ** 2 for x, y in zip(xs, counts)) / len(xs))
+        errors.append((label, error))
+
+    best = min(error for _, error in errors)
+    scale = max(abs(c) for c in counts) or 1
+    for label, error in errors:
+        if error <= best * FIT_TOLERANCE + 1e-9 * scale:
+            return label
+    return errors[-1][0]
+
+
+def default_arguments(function, n):
+    """Build call arguments from parameter names: sequences get a reversed range, sizes get n."""
+    code = function.__code__
+    names = code.co_varnames[:code.co_argcount]
+    args = []
+    for name in names:
+        if name in SEQUENCE_PARAMS or name.endswith('s'):
+            args.append(list(range(n, 0, -1)))
+        elif name in SIZE_PARAMS:
+            args.append(n)
+        else:
+            # Searches and lookups: a value that is never found
+            args.append(-1)
+    return args
+
+
+def _compile(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return compile(f.read(), os.path.abspath(path), 'exec')
+
+
+def load_module(path):
+    """Execute path as a module that is not __main__; returns (code, globals)."""
+    code = _compile(path)
+    module_globals = {'__name__': '__codizer_trace__', '__file__': path}
+    exec(code, module_globals)
+    return code, module_globals
+
+
+def call_arguments(function, module_globals, call, n):
+    """Arguments for one call at size n, from the --call expression or parameter names."""
+    if not call:
+        return default_arguments(function, n)
+    arguments = eval(call, dict(module_globals), {'n': n})
+    return arguments if isinstance(arguments, tuple) else (arguments,)
+
+
+def trace_function(path, function_name, sizes, call=None):
+    """(per-size line counts, tracing backends used) for calls to function_name defined in path."""
+    # Functions created from this module code share its nested code objects,
+    # so helpers called by the entry function are counted too
+    code, module_globals = load_module(path)
+    function = module_globals[function_name]
+
+    results = {}
+    backends = set()
+    for n in sizes:
+        counter = LineCounter(path)
+        args = call_arguments(function, module_globals, call, n)
+        with counter.counting([code]):
+            function(*args)
+        results[n] = counter.counts
+        backends.add(counter.backend)
+    return results, backends
+
+
+def trace_script(path, sizes, show_output=False):
+    """(per-size line counts, tracing backends used) for running path as __main__ with argv [path, n]."""
+    code = _compile(path)
+
+    results = {}
+    backends = set()
+    saved_argv = sys.argv
+    for n in sizes:
+        counter = LineCounter(path)
+        sys.argv = [path, str(n)]
+        output = contextlib.nullcontext() if show_output else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with output, counter.counting([code]):
+                exec(code, {'__name__': '__main__', '__file__': path})
+        except SystemExit:
+            pass
+        finally:
+            sys.argv = saved_argv
+        results[n] = counter.counts
+        backends.add(counter.backend)
+    return results, backends
+
+
+def compare_with_static(path, results):
+    """Per executed line: counts, empirical class and analyze_single_line's tag."""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().split('\n')
+
+    analyzer = ComplexityAnalyzer()
+    sizes = sorted(results)
+    executed = sorted(set().union(*(counts.keys() for counts in results.values())))
+
+    report = []
+    for lineno in executed:
+        if lineno < 1 or lineno > len(lines):
+            continue
+        line = lines[lineno - 1]
+        counts = [results[n][lineno] for n in sizes]
+        static = analyzer.analyze_single_line(line, {
+            'lines_above': lines[max(0, lineno - 11):lineno - 1],
+            'lines_below': lines[lineno:lineno + 10],
+        })['time_complexity']
+        empirical = fit_growth(sizes, counts)
+        report.append({
+            'line': lineno,
+            'code': line.strip(),
+            'counts': dict(zip(sizes, counts)),
+            'empirical': empirical,
+            'static': static,
+            'matches': empirical == static,
+        })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='analyze_complexity.py trace',
+        description='Count line executions at increasing input sizes and compare with static per-line tags.'
+    )
+    parser.add_argument('path', help='Python file to run')
+    parser.add_argument('--function', help='Entry function to call; without it the file is run as a script with argv [path, n]')
+    parser.add_argument('--call', help="Argument expression evaluated with n in the file's globals, e.g. \"list(range(n)), -1\"")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated input sizes (default: %(default)s)')
+    parser.add_argument('--show-output', action='store_true', help="Don't hide the script's stdout")
+    parser.add_argument('--mismatches', action='store_true', help='Only show lines whose tags disagree')
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    if len(sizes) < 3:
+        parser.error('at least three sizes are needed to fit a growth class')
+
+    if args.function:
+        results, backends = trace_function(args.path, args.function, sizes, args.call)
+    else:
+        results, backends = trace_script(args.path, sizes, args.show_output)
+
+    # sys.monitoring falls back to sys.settrace when another tool holds its id
+    print(f"Traced {args.path} with {' and '.join(sorted(backends))} at sizes {sizes}")
+    report = compare_with_static(args.path, results)
+    mismatches = 0
+    for entry in report:
+        if not entry['matches']:
+            mismatches += 1
+        elif args.mismatches:
+            continue
+        marker = '  ' if entry['matches'] else '!!'
+        counts = ' '.join(str(entry['counts'][n]) for n in sizes)
+        print(f"{marker} {entry['line']:4d} | {entry['code'][:50]:<50} "
+              f"static {entry['static']:<10} empirical {entry['empirical']:<10} [{counts}]")
+    print(f"{len(report)} executed lines, {mismatches} disagree with the static tag")
+    return 0
@@ -0,0 +1,1018 @@
+"""
+Symbolic loop bounds.
+
+Each loop's trip count is traced back to where it comes from: constants,
+parameters, len(parameter), locals assigned from those, and the variables
+of enclosing loops (so range(0, n - i - 1) inside `for i in range(n)` is
+bounded by n). Nested loops multiply and sequential ones add, giving every
+scope (the module and each function) a cost polynomial over named input
+sizes: `for a in xs: for b in ys` costs len(xs)·len(ys), two loops in a row
+len(xs) + len(ys). Constant-bounded loops contribute a factor of 1 and fold
+away. A loop whose bound cannot be traced counts as a factor of an
+unknown input size, as every loop used to.
+
+Loops whose counter is halved or doubled each iteration (n //= 2,
+i *= 2), or that bisect an interval (lo and hi both reassigned from
+mid = (lo + hi) // 2), run a logarithmic number of times. So do
+functions that recurse on half their input: with a recursive calls per
+invocation and work W outside them, T(n) = a·T(n/2) + W is solved by the
+master theorem for a = 1 and a = 2 (binary search: log n, merge sort:
+n log n). Everything is decided from the code's structure, not from the
+names of functions or variables.
+
+Library calls cost what their cost model says (see cost_models): the
+type of a receiver is traced through imports (import numpy as np),
+parameter annotations (df: pd.DataFrame) and the results of earlier calls
+(Model.objects.filter(...) is a QuerySet), so df.sort_values('t') inside
+`for x in xs` costs len(xs)·len(df) log len(df), not len(xs). The calls
+are also listed with their notes.
+
+Polynomials are frozensets of monomials, and a monomial is a sorted tuple
+of (source, power) pairs, with () the constant; a source 'log n' is the
+logarithm of source n. Only dominant monomials are kept: n is dropped
+next to n·m or n log n, n log n next to n^2, the constant next to anything.
+"""
+import ast
+import re
+import textwrap
+import threading
+import time
+
+from .cost_models import ANY_RECEIVER, default_registry
+
+# Expressions nested deeper than this are not traced (their bound is unknown),
+# so machine-generated code cannot exhaust the stack
+MAX_TRACE_DEPTH = 64
+
+# Largest constant exponent expanded in bounds such as n ** 2
+MAX_POWER = 8
+
+# Source of bounds that cannot be traced
+UNKNOWN = '?'
+
+# Prefix of logarithmic sources; never part of a name or len(...) source
+LOG_PREFIX = 'log '
+
+# Terms shown in a label, highest degree first, so labels stay short
+MAX_TERMS = 4
+
+# Longest call text reported for a library call
+MAX_CALL_TEXT = 80
+
+# Letters for size variables that are not themselves single-letter names
+SIZE_LETTERS = 'nmkpqrstuvw'
+
+# Calls whose result is as long as their first argument
+SAME_LENGTH_CALLS = {'sorted', 'list', 'tuple', 'set', 'frozenset', 'reversed', 'enumerate', 'iter', 'dict', 'zip'}
+SAME_LENGTH_METHODS = {'items', 'keys', 'values', 'copy', 'split', 'splitlines'}
+
+# In-place growth makes a collection's length untraceable
+GROWING_METHODS = {'append', 'extend', 'insert', 'add', 'update', 'appendleft', 'extendleft', 'setdefault'}
+
+COMPREHENSIONS = (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)
+SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)
+
+ONE = frozenset({()})
+ZERO = frozenset()
+
+SINGLE_NAME_RE = re.compile(r'[a-z]$')
+
+# CPython 3.11 and 3.12 keep ast.parse's recursion-depth bookkeeping per
+# interpreter, not per thread, so parses overlapping in a threaded server can
+# fail with "SystemError: AST constructor recursion depth mismatch". Parses
+# are short and CPU-bound under the GIL, so taking turns costs little.
+parse_lock = threading.Lock()
+
+
+def _base(source):
+    return source[len(LOG_PREFIX):] if source.startswith(LOG_PREFIX) else source
+
+
+def _growth(monomial):
+    """{base source: (power, log power)}; tuples compare as growth rates in that source do."""
+    growth = {}
+    for source, power in monomial:
+        polynomial, logarithmic = growth.get(_base(source), (0, 0))
+        if source.startswith(LOG_PREFIX):
+            growth[_base(source)] = (polynomial, logarithmic + power)
+        else:
+            growth[_base(source)] = (power, logarithmic)
+    return growth
+
+
+def _dominates(b, a):
+    """True if monomial b grows at least as fast as a in every source."""
+    growth_b = _growth(b)
+    return all(growth_b.get(source, (0, 0)) >= rate for source, rate in _growth(a).items())
+
+
+def _prune(monomials):
+    """Keep the monomials no other one dominates."""
+    monomials = set(monomials)
+    return frozenset(a for a in monomials if not any(b != a and _dominates(b, a) for b in monomials))
+
+
+def _add(p, q):
+    if p is None or q is None:
+        return None
+    return _prune(p | q)
+
+
+def _mul(p, q):
+    if p is None or q is None:
+        return None
+    products = set()
+    for a in p:
+        for b in q:
+            powers = dict(a)
+            for source, power in b:
+                powers[source] = powers.get(source, 0) + power
+            products.add(tuple(sorted(powers.items())))
+    return _prune(products)
+
+
+def _log(p):
+    """Bound on log(p): log(n·m + k) is within a constant of log n + log m + log k."""
+    if p is None:
+        return None
+    bases = {_base(source) for monomial in p for source, _ in monomial}
+    return _prune({((LOG_PREFIX + base, 1),) for base in bases}) or ONE
+
+
+def _degree(monomial):
+    return sum(power for source, power in monomial if not source.startswith(LOG_PREFIX))
+
+
+def _rank(monomial):
+    """(polynomial degree, logarithmic degree), to order terms by growth."""
+    return _degree(monomial), sum(power for source, power in monomial if source.startswith(LOG_PREFIX))
+
+
+class LoopCost:
+    """
+    Dominant cost terms of a scope's loops. Sources are named with letters:
+    single-letter parameters keep their own name, other sizes (len(xs),
+    longer parameter names, unknown bounds) get n, m, k, ... in the order
+    they were first met.
+    """
+
+    def __init__(self, terms, sources, unresolved_recursion=False, library_calls=()):
+        self.terms = terms
+        self.degree = max(_degree(term) for term in terms)
+        self.rank = max(_rank(term) for term in terms)
+        # A function calls itself in a way the master theorem cases above do not cover
+        self.unresolved_recursion = unresolved_recursion
+        # Costed library calls: [{'line', 'call', 'model', 'complexity', 'size', 'note'}]
+        self.library_calls = list(library_calls)
+        used = {_base(source) for term in terms for source, _ in term}
+        ordered = [source for source in sources if source in used]
+        self.names = {source: source for source in ordered if SINGLE_NAME_RE.match(source)}
+        free = (letter for letter in SIZE_LETTERS if letter not in self.names.values())
+        for source in ordered:
+            if source not in self.names:
+                self.names[source] = next(free, source)
+        self._order = {source: i for i, source in enumerate(ordered)}
+
+    @property
+    def complexity(self):
+        """Big-O label such as 'O(n)', 'O(n·m)', 'O(n log n)' or 'O(n^2 + m)'."""
+        if self.rank == (0, 0):
+            return 'O(1)'
+        terms = sorted(self.terms, key=lambda term: (
+            tuple(-r for r in _rank(term)), [self._order[_base(s)] for s, _ in term]
+        ))
+        rendered = []
+        for term in terms[:MAX_TERMS]:
+            factors = sorted(term, key=lambda factor: self._order[_base(factor[0])])
+            polynomial = '·'.join(
+                self.names[source] if power == 1 else f'{self.names[source]}^{power}'
+                for source, power in factors if not source.startswith(LOG_PREFIX)
+            )
+            logarithms = ' '.join(
+                f'log {self.names[_base(source)]}' if power == 1 else f'log^{power} {self.names[_base(source)]}'
+                for source, power in factors if source.startswith(LOG_PREFIX)
+            )
+            rendered.append(' '.join(part for part in (polynomial, logarithms) if part))
+        return f"O({' + '.join(rendered)})"
+
+    @property
+    def size_variables(self):
+        """{letter: what it measures}, e.g. {'n': 'len(arr)', 'k': 'k'}."""
+        return {
+            name: 'unknown' if source == UNKNOWN else source
+            for source, name in sorted(self.names.items(), key=lambda item: self._order[item[0]])
+        }
+
+
+def scopes_of(code, models=None):
+    """
+    Scopes of code, the module level first and then every function and
+    lambda by line, or None if the code does not parse, even dedented.
+    Library calls are costed by models, a CostModelRegistry
+    (default_registry if None). Passes over the same code can share them
+    instead of parsing again.
+    """
+    try:
+        with parse_lock:
+            tree = ast.parse(textwrap.dedent(code))
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return None
+
+    models = models or default_registry
+    sources = []
+    library_calls = {}
+    scopes = []
+    pending = [(tree, None)]
+    while pending:
+        node, parent = pending.pop()
+        if isinstance(node, ast.Module):
+            scope = _Scope(node.body, (), parent, sources, models=models, library_calls=library_calls)
+        elif isinstance(node[0], ast.Lambda):
+            node = node[0]
+            body = [ast.copy_location(ast.Return(node.body), node.body)]
+            scope = _Scope(body, _parameters(node.args), parent, sources, models=models, library_calls=library_calls)
+        else:
+            node, method = node
+            scope = _Scope(node.body, _parameters(node.args), parent, sources, node.name, method,
+                           _annotations(node.args), models, library_calls, isinstance(node, ast.AsyncFunctionDef))
+        scopes.append((getattr(node, 'lineno', 0), scope))
+        pending.extend((function, scope) for function in scope.functions)
+    return [scope for _, scope in sorted(scopes, key=lambda item: item[0])]
+
+
+def loop_cost(code, models=None, scopes=None, deadline=None):
+    """
+    LoopCost of the costliest scope in code (the module level or any
+    function), or None if the code does not parse or time.monotonic()
+    passes deadline before every scope is costed. scopes are those of
+    scopes_of(code, models) when already built.
+    """
+    if scopes is None:
+        scopes = scopes_of(code, models)
+    if scopes is None:
+        return None
+
+    best = None
+    unresolved_recursion = False
+    for scope in scopes:
+        if deadline and time.monotonic() > deadline:
+            return None
+        terms = scope.cost()
+        unresolved_recursion = unresolved_recursion or scope.unresolved_recursion
+        if best is None or max(map(_rank, terms)) > best.rank:
+            best = LoopCost(terms, scope.sources)
+    best.unresolved_recursion = unresolved_recursion
+    best.library_calls = [call for _, call in sorted(scopes[0].library_calls.items())]
+    return best
+
+
+def _parameters(args):
+    names = [arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs]
+    names += [arg.arg for arg in (args.vararg, args.kwarg) if arg]
+    return tuple(name for name in names if name not in ('self', 'cls'))
+
+
+def _annotations(args):
+    arguments = args.posonlyargs + args.args + args.kwonlyargs
+    return {arg.arg: arg.annotation for arg in arguments if arg.annotation is not None}
+
+
+class _Scope:
+    """Bindings and loop costs of one module or function body."""
+
+    def __init__(self, body, parameters, parent, sources, function=None, method=False, annotations=None,
+                 models=default_registry, library_calls=None, coroutine=False):
+        self.body = body
+        self.parameters = set(parameters)
+        self.annotations = annotations or {}
+        self.models = models
+        self.library_calls = {} if library_calls is None else library_calls  # (line, column) -> report
+        self.parent = parent
+        self.sources = sources
+        self.function = function  # name of the function this is the body of
+        self.method = method      # called as self.function(...) to recurse
+        self.coroutine = coroutine  # the body of an async def
+        self.bindings = {}      # name -> [(kind, payload, binding node)]
+        self.grown = set()      # names of collections grown in place
+        self.functions = []     # (function or lambda, is method) defined directly in this scope
+        self.unresolved_recursion = False
+        self._tracing = set()
+        self._collect()
+
+    # Bindings
+
+    def _collect(self):
+        pending = list(self.body)
+        while pending:
+            node = pending.pop()
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.functions.append((node, False))
+                self._bind_opaque(node.name, node)
+                continue
+            if isinstance(node, ast.ClassDef):
+                self._bind_opaque(node.name, node)
+                # Methods are scopes of their own; their names are not bound here
+                members = list(node.body)
+                while members:
+                    member = members.pop()
+                    if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        self.functions.append((member, True))
+                    elif isinstance(member, ast.ClassDef):
+                        members.extend(member.body)
+                continue
+            if isinstance(node, ast.Lambda):
+                # Costed as a scope of its own, whose body returns the expression
+                self.functions.append((node, False))
+                continue
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    # import a.b binds a, import a.b as c binds c to a.b
+                    path = alias.name if alias.asname else alias.name.split('.')[0]
+                    self.bindings.setdefault(alias.asname or path, []).append(('import', path, node))
+            elif isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    if alias.name != '*':
+                        path = f'{node.module}.{alias.name}' if node.module and not node.level else None
+                        self.bindings.setdefault(alias.asname or alias.name, []).append(('import', path, node))
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    self._bind(target, node.value, node)
+            elif isinstance(node, (ast.AnnAssign, ast.NamedExpr)) and node.value is not None:
+                self._bind(node.target, node.value, node)
+            elif isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name):
+                self.bindings.setdefault(node.target.id, []).append(('aug', node, node))
+            elif isinstance(node, (ast.For, ast.AsyncFor, ast.comprehension)):
+                self._bind_loop(node.target, node.iter, node)
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+                    and node.func.attr in GROWING_METHODS and isinstance(node.func.value, ast.Name):
+                self.grown.add(node.func.value.id)
+            elif isinstance(node, (ast.With, ast.AsyncWith)):
+                for item in node.items:
+                    if item.optional_vars is not None:
+                        self._bind_names_opaque(item.optional_vars, node)
+            pending.extend(ast.iter_child_nodes(node))
+
+    def _bind(self, target, value, node):
+        if isinstance(target, ast.Name):
+            self.bindings.setdefault(target.id, []).append(('value', value, node))
+        elif isinstance(target, (ast.Tuple, ast.List)) and isinstance(value, (ast.Tuple, ast.List)) \
+                and len(target.elts) == len(value.elts):
+            for sub_target, sub_value in zip(target.elts, value.elts):
+                self._bind(sub_target, sub_value, node)
+        else:
+            self._bind_names_opaque(target, node)
+
+    def _bind_loop(self, target, iterable, node):
+        if isinstance(target, ast.Name) and _is_call(iterable, 'range'):
+            self.bindings.setdefault(target.id, []).append(('range', iterable, node))
+        elif isinstance(target, ast.Tuple) and target.elts and isinstance(target.elts[0], ast.Name) \
+                and _is_call(iterable, 'enumerate') and iterable.args:
+            self.bindings.setdefault(target.elts[0].id, []).append(('index', iterable.args[0], node))
+            for element in target.elts[1:]:
+                self._bind_names_opaque(element, node)
+        elif isinstance(target, ast.Name):
+            # Opaque to bounds; its type is that of the iterable's items
+            self.bindings.setdefault(target.id, []).append(('element', iterable, node))
+        else:
+            self._bind_names_opaque(target, node)
+
+    def _bind_names_opaque(self, target, node):
+        for child in ast.walk(target):
+            # Names stored to, not those indexed into (arr[i] = ... leaves arr bound)
+            if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                self._bind_opaque(child.id, node)
+
+    def _bind_opaque(self, name, node):
+        self.bindings.setdefault(name, []).append(('opaque', None, node))
+
+    def _source(self, source):
+        if source not in self.sources:
+            self.sources.append(source)
+        return frozenset({((source, 1),)})
+
+    def _lookup(self, name):
+        """The scope that binds name, or None for parameters and free names."""
+        scope = self
+        while scope is not None:
+            if name in scope.parameters and name not in scope.bindings:
+                return None
+            if name in scope.bindings:
+                return scope
+            scope = scope.parent
+        return None
+
+    # Bounds
+
+    def magnitude(self, node, depth=0, exclude=()):
+        """Polynomial bounding the value of a numeric expression, None if untraceable."""
+        if depth > MAX_TRACE_DEPTH:
+            return None
+        depth += 1
+        if isinstance(node, ast.Constant):
+            return ONE if isinstance(node.value, (int, float)) else None
+        if isinstance(node, ast.Name):
+            return self._name_magnitude(node.id, depth, exclude)
+        if isinstance(node, ast.UnaryOp):
+            return ONE if isinstance(node.op, ast.Not) else self.magnitude(node.operand, depth)
+        if isinstance(node, ast.BinOp):
+            return self._binop_magnitude(node, depth)
+        if isinstance(node, ast.IfExp):
+            return _add(self.magnitude(node.body, depth), self.magnitude(node.orelse, depth))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.args:
+            function = node.func.id
+            if function == 'len':
+                return self.length(node.args[0], depth)
+            if function in ('abs', 'int', 'round', 'float'):
+                return self.magnitude(node.args[0], depth)
+            if function == 'min':
+                # Any argument bounds the minimum
+                for arg in node.args:
+                    bound = self.magnitude(arg, depth)
+                    if bound is not None:
+                        return bound
+                return None
+            if function == 'max':
+                bound = ZERO
+                for arg in node.args:
+                    bound = _add(bound, self.magnitude(arg, depth))
+                return bound
+        return None
+
+    def _binop_magnitude(self, node, depth):
+        op = node.op
+        left = self.magnitude(node.left, depth)
+        if isinstance(op, (ast.Sub, ast.FloorDiv, ast.Div, ast.RShift)):
+            # Never larger than the left operand for the non-negative sizes bounds are made of
+            return left
+        if isinstance(op, ast.Pow):
+            exponent = node.right
+            if isinstance(exponent, ast.Constant) and isinstance(exponent.value, int) \
+                    and 0 <= exponent.value <= MAX_POWER:
+                bound = ONE
+                for _ in range(exponent.value):
+                    bound = _mul(bound, left)
+                return bound
+            return None
+        right = self.magnitude(node.right, depth)
+        if isinstance(op, (ast.Add, ast.BitOr, ast.BitXor)):
+            return _add(left, right)
+        if isinstance(op, ast.Mult):
+            return _mul(left, right)
+        if isinstance(op, (ast.Mod, ast.BitAnd)):
+            return right if right is not None else left
+        return None
+
+    def _name_magnitude(self, name, depth, exclude=()):
+        scope = self._lookup(name)
+        if scope is None:
+            return self._source(name)
+        return scope._bound_of(name, depth, exclude, numeric=True)
+
+    def length(self, node, depth=0):
+        """Polynomial bounding the length of a collection expression, None if untraceable."""
+        if depth > MAX_TRACE_DEPTH:
+            return None
+        depth += 1
+        if isinstance(node, ast.Constant):
+            return ONE if isinstance(node.value, (str, bytes)) else None
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set, ast.Dict)):
+            elements = node.keys if isinstance(node, ast.Dict) else node.elts
+            return None if any(isinstance(e, ast.Starred) or e is None for e in elements) else ONE
+        if isinstance(node, ast.Name):
+            scope = self._lookup(node.id)
+            if scope is None:
+                return self._source(f'len({node.id})')
+            return scope._bound_of(node.id, depth, (), numeric=False)
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) \
+                and self._lookup(node.value.id) is None:
+            return self._source(f'len({node.value.id}.{node.attr})')
+        if isinstance(node, ast.Subscript):
+            return self.length(node.value, depth) if isinstance(node.slice, ast.Slice) else None
+        if isinstance(node, ast.BinOp):
+            if isinstance(node.op, ast.Add):
+                return _add(self.length(node.left, depth), self.length(node.right, depth))
+            if isinstance(node.op, ast.Mult):
+                if isinstance(node.left, (ast.List, ast.Tuple, ast.Constant)):
+                    return _mul(self.length(node.left, depth), self.magnitude(node.right, depth))
+                return _mul(self.magnitude(node.left, depth), self.length(node.right, depth))
+            return None
+        if isinstance(node, COMPREHENSIONS):
+            bound = ONE
+            for generator in node.generators:
+                bound = _mul(bound, self.length(generator.iter, depth))
+            return bound
+        if isinstance(node, ast.Call):
+            return self._call_length(node, depth)
+        return None
+
+    def _call_length(self, node, depth):
+        function = node.func
+        if isinstance(function, ast.Name):
+            if function.id == 'range' and node.args:
+                return self.range_extent(node, depth)
+            if function.id in SAME_LENGTH_CALLS:
+                return self.length(node.args[0], depth) if node.args else ONE
+            if function.id in ('map', 'filter') and len(node.args) > 1:
+                return self.length(node.args[1], depth)
+        elif isinstance(function, ast.Attribute) and function.attr in SAME_LENGTH_METHODS:
+            return self.length(function.value, depth)
+        rule = self.call_rule(node, depth)
+        if rule is not None and rule.same_length:
+            return self.call_size(node, rule, depth)
+        return None
+
+    def range_extent(self, call, depth=0):
+        """Bound on the number of values range(...) yields, and on the values themselves."""
+        args = call.args
+        if len(args) == 3:
+            step = args[2]
+            if isinstance(step, ast.UnaryOp) and isinstance(step.op, ast.USub):
+                # Counting down from start
+                return self.magnitude(args[0], depth)
+        return self.magnitude(args[1] if len(args) > 1 else args[0], depth)
+
+    def _bound_of(self, name, depth, exclude, numeric):
+        """Magnitude (numeric) or length of a name bound in this scope, over its bindings not in exclude."""
+        if not numeric and name in self.grown:
+            return None
+        key = (name, numeric)
+        if key in self._tracing:
+            # A cycle (i = i + 1, mid = (lo + hi) // 2) adds nothing beyond its other sources
+            return ZERO
+        self._tracing.add(key)
+        try:
+            bound = ZERO
+            for kind, payload, node in self.bindings[name]:
+                if any(node is excluded for excluded in exclude):
+                    continue
+                if kind == 'value':
+                    part = self.magnitude(payload, depth) if numeric else self.length(payload, depth)
+                elif kind == 'range' and numeric:
+                    part = self.range_extent(payload, depth)
+                elif kind == 'index' and numeric:
+                    part = self.length(payload, depth)
+                elif kind == 'aug':
+                    part = self._augmented(payload, depth, numeric)
+                else:
+                    part = None
+                bound = _add(bound, part)
+                if bound is None:
+                    return None
+            if name in self.parameters:
+                bound = _add(bound, self._source(name if numeric else f'len({name})'))
+            return bound or ONE
+        finally:
+            self._tracing.discard(key)
+
+    def _augmented(self, node, depth, numeric):
+        op = node.op
+        if isinstance(op, (ast.Sub, ast.FloorDiv, ast.Div, ast.RShift, ast.Mod)):
+            return ZERO
+        if isinstance(op, ast.Add):
+            if isinstance(node.value, ast.Constant):
+                # Counting steps; how far they go is the loop's trip count
+                return ZERO
+            return self.magnitude(node.value, depth) if numeric else self.length(node.value, depth)
+        return None
+
+    # Library types
+
+    def type_of(self, node, depth=0):
+        """Type or module path of an expression by the cost models, None if unknown."""
+        if depth > MAX_TRACE_DEPTH:
+            return None
+        depth += 1
+        if isinstance(node, ast.Name):
+            scope = self._lookup(node.id)
+            if scope is None:
+                return self._parameter_type(node.id, depth)
+            return scope._bound_type(node.id, depth)
+        if isinstance(node, ast.Attribute):
+            owner = self.type_of(node.value, depth)
+            if owner in self.models.types:
+                return self.models.attribute(owner, node.attr)
+            found = self.models.attribute(None, node.attr)
+            if found is None and owner is not None:
+                # Into a module: numpy.linalg, pandas.DataFrame, os.path
+                found = f'{owner}.{node.attr}'
+            return found
+        if isinstance(node, ast.Call):
+            rule = self.call_rule(node, depth)
+            return rule.returns if rule is not None else None
+        return None
+
+    def _bound_type(self, name, depth):
+        key = (name, 'type')
+        if key in self._tracing:
+            return None
+        self._tracing.add(key)
+        try:
+            for kind, payload, _ in self.bindings[name]:
+                if kind == 'import':
+                    found = payload
+                elif kind == 'value':
+                    found = self.type_of(payload, depth)
+                elif kind == 'element':
+                    found = self.models.element(self.type_of(payload, depth))
+                else:
+                    found = None
+                if found is not None:
+                    return found
+            return None
+        finally:
+            self._tracing.discard(key)
+
+    def _parameter_type(self, name, depth):
+        scope = self
+        while scope is not None:
+            if name in scope.parameters:
+                annotation = scope.annotations.get(name)
+                return scope.type_of(annotation, depth) if annotation is not None else None
+            scope = scope.parent
+        return None
+
+    def _is_parameter(self, name):
+        scope = self
+        while scope is not None:
+            if name in scope.parameters:
+                return True
+            scope = scope.parent
+        return False
+
+    def call_rule(self, call, depth=0):
+        """The cost model rule for a call, None if no plugin covers it."""
+        function = call.func
+        if isinstance(function, ast.Attribute):
+            return self.models.call(self.type_of(function.value, depth), function.attr)
+        if isinstance(function, ast.Name):
+            # sort imported from numpy, or open: neither bound nor a parameter, so a builtin
+            if self._lookup(function.id) is None and not self._is_parameter(function.id):
+                path = f'builtins.{function.id}'
+            else:
+                path = self.type_of(function, depth)
+            if path is not None and '.' in path:
+                module, _, name = path.rpartition('.')
+                return self.models.call(module, name)
+        return None
+
+    def call_size(self, call, rule, depth=0):
+        """The n of a library call's complexity: its receiver's length, first argument's length or value."""
+        if rule.size == 'receiver' and isinstance(call.func, ast.Attribute):
+            node = call.func.value
+        elif call.args:
+            node = call.args[0]
+        else:
+            return self._source(UNKNOWN)
+        if rule.size == 'value':
+            if isinstance(node, ast.Tuple):
+                # A shape: the product of its sides
+                size = ONE
+                for side in node.elts:
+                    size = _mul(size, self.magnitude(side, depth))
+                return size or self._source(UNKNOWN)
+            return self.magnitude(node, depth) or self._source(UNKNOWN)
+        size = self.length(node, depth)
+        if size is not None:
+            return size
+        # What a chain of calls starts from: df in df.groupby('k').sum()
+        while isinstance(node, ast.Subscript) or (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)):
+            node = node.value if isinstance(node, ast.Subscript) else node.func.value
+        size = self.length(node, depth)
+        if size is not None:
+            return size
+        name = dotted_name(node)
+        return self._source(f'len({name})' if name else UNKNOWN)
+
+    def _library_cost(self, call, rule):
+        size = self.call_size(call, rule)
+        cost = ONE
+        for _ in range(rule.degree):
+            cost = _mul(cost, size)
+        if rule.logarithmic:
+            cost = _mul(cost, _log(size))
+        if cost != ONE:
+            self.library_calls[(call.lineno, call.col_offset)] = {
+                'line': call.lineno,
+                'call': dotted_name(call.func) or ast.unparse(call.func)[:MAX_CALL_TEXT],
+                'model': rule.name if rule.receiver == ANY_RECEIVER else f'{rule.receiver}.{rule.name}',
+                'complexity': rule.complexity,
+                'size': describe(size),
+                'note': rule.note,
+            }
+        return cost
+
+    # Costs
+
+    def cost(self):
+        work = self._block_cost(self.body)
+        if self.function is None:
+            return work
+        calls = self._recursive_calls(self.body)
+        if calls == 0:
+            return work
+        halved = self._halved_arguments()
+        if calls is None or calls > 2 or halved is None:
+            self.unresolved_recursion = True
+            return work
+
+        # T(n) = calls·T(n/2) + work, with the copies made by halving slices
+        size, copied = halved
+        work = _add(work, copied)
+        degree = max(map(_degree, work))
+        if degree == 0:
+            size = size or self._source(UNKNOWN)
+            return _log(size) if calls == 1 else size
+        if calls == 2 and degree == 1:
+            return _mul(work, _log(work))
+        return work
+
+    def _recursive_calls(self, statements):
+        """Most recursive calls on one path through statements, None if a loop makes them."""
+        total = 0
+        returned = 0  # most calls on a path that already returned
+        for node in statements:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                calls = 0
+            elif isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+                calls = self._recursive_calls(node.body)
+                if calls != 0 or self._recursive_calls(node.orelse) is None:
+                    return None
+                calls = len(self._self_calls(node.iter if isinstance(node, (ast.For, ast.AsyncFor)) else node.test))
+            elif isinstance(node, ast.If):
+                test = len(self._self_calls(node.test))
+                branches = []
+                for block in (node.body, node.orelse):
+                    calls = self._recursive_calls(block)
+                    if calls is None:
+                        return None
+                    if block and isinstance(block[-1], (ast.Return, ast.Raise)):
+                        # The path through this branch ends here
+                        returned = max(returned, total + test + calls)
+                        calls = 0
+                    branches.append(calls)
+                calls = max(branches) + test
+            elif isinstance(node, (ast.With, ast.AsyncWith)):
+                calls = self._recursive_calls(node.body)
+            elif isinstance(node, ast.Try) or type(node).__name__ in ('TryStar', 'Match'):
+                blocks = [case.body for case in node.cases] if hasattr(node, 'cases') else \
+                    [node.body + node.orelse + node.finalbody] + [handler.body for handler in node.handlers]
+                branches = [self._recursive_calls(block) for block in blocks]
+                calls = None if None in branches else max(branches, default=0)
+            else:
+                found = self._self_calls(node)
+                # A call inside a comprehension runs once per element
+                calls = None if any(comprehended for _, comprehended in found) else len(found)
+            if calls is None:
+                return None
+            total += calls
+        return max(total, returned)
+
+    def _self_calls(self, node):
+        """Calls of this function in node, outside nested scopes."""
+        calls = []
+        pending = [(node, False)]
+        while pending:
+            child, comprehended = pending.pop()
+            if isinstance(child, ast.Call):
+                function = child.func
+                if (isinstance(function, ast.Name) and function.id == self.function and not self.method) or \
+                        (isinstance(function, ast.Attribute) and function.attr == self.function and self.method
+                         and isinstance(function.value, ast.Name) and function.value.id in ('self', 'cls')):
+                    calls.append((child, comprehended))
+            if not isinstance(child, SCOPES):
+                comprehended = comprehended or isinstance(child, COMPREHENSIONS)
+                pending.extend((grandchild, comprehended) for grandchild in ast.iter_child_nodes(child))
+        return calls
+
+    def _halved_arguments(self):
+        """
+        (size, copied) if every recursive call passes a halved argument:
+        the size that is halved, and the length of halving slices such as
+        arr[:mid], which copy. None if some call passes no halved argument.
+        """
+        size = ZERO
+        copied = ZERO
+        calls = [call for statement in self.body for call, _ in self._self_calls(statement)]
+        for call in calls:
+            halved = [arg for arg in call.args + [keyword.value for keyword in call.keywords] if self._halves(arg)]
+            if not halved:
+                return None
+            for arg in halved:
+                value = arg
+                if isinstance(arg, ast.Name) and self._lookup(arg.id) is self:
+                    # left = arr[:mid] passed as left
+                    values = [payload for kind, payload, _ in self.bindings[arg.id] if kind == 'value']
+                    value = values[0] if len(values) == 1 else arg
+                if isinstance(value, ast.Subscript) and isinstance(value.slice, ast.Slice):
+                    length = self.length(value.value) or self._source(UNKNOWN)
+                    size = _add(size, length)
+                    copied = _add(copied, length)
+                else:
+                    size = _add(size, self.magnitude(value) or self._source(UNKNOWN))
+        return size, copied
+
+    def _halves(self, node, depth=0):
+        """True if node is computed by halving: a // 2, a >> 1, a[:mid] with mid = len(a) // 2, ..."""
+        if depth > MAX_TRACE_DEPTH:
+            return False
+        pending = [node]
+        while pending:
+            child = pending.pop()
+            if isinstance(child, ast.BinOp) and _geometric_factor(child.op, child.right) \
+                    and isinstance(child.op, (ast.FloorDiv, ast.Div, ast.RShift)):
+                return True
+            if isinstance(child, ast.Name) and self._lookup(child.id) is self and (child.id, 'halves') not in self._tracing:
+                self._tracing.add((child.id, 'halves'))
+                try:
+                    if any(kind == 'value' and self._halves(payload, depth + 1)
+                           for kind, payload, _ in self.bindings[child.id]):
+                        return True
+                finally:
+                    self._tracing.discard((child.id, 'halves'))
+            if not isinstance(child, SCOPES):
+                pending.extend(ast.iter_child_nodes(child))
+        return False
+
+    def _geometric_update(self, update, name):
+        """True if update scales name by a constant factor (n //= 2, i *= 2) or bisects (lo = mid + 1)."""
+        if isinstance(update, ast.AugAssign):
+            return _geometric_factor(update.op, update.value)
+        if isinstance(update, ast.Assign) and len(update.targets) == 1 and isinstance(update.targets[0], ast.Name):
+            value = update.value
+            if isinstance(value, ast.BinOp) and isinstance(value.op, (ast.Mult, ast.LShift)):
+                scaled = [(value.left, value.right), (value.right, value.left)]
+                if any(isinstance(operand, ast.Name) and operand.id == name and _geometric_factor(value.op, factor)
+                       for operand, factor in scaled):
+                    return True
+            # Bisection assigns from the midpoint, never from the counter itself
+            return self._halves(value) and not any(
+                isinstance(child, ast.Name) and child.id == name for child in ast.walk(value)
+            )
+        return False
+
+    def _block_cost(self, statements):
+        total = ONE
+        for statement in statements:
+            total = _add(total, self._statement_cost(statement))
+        return total
+
+    def _statement_cost(self, node):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            return ONE
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            loop = _mul(self.trip(node), self._block_cost(node.body))
+            return _add(loop, _add(self._block_cost(node.orelse), self._expression_cost(node.iter)))
+        if isinstance(node, ast.While):
+            loop = _mul(self.trip(node), _add(self._block_cost(node.body), self._expression_cost(node.test)))
+            return _add(loop, self._block_cost(node.orelse))
+        if isinstance(node, ast.If):
+            branches = _add(self._block_cost(node.body), self._block_cost(node.orelse))
+            return _add(branches, self._expression_cost(node.test))
+        if isinstance(node, (ast.With, ast.AsyncWith)):
+            return self._block_cost(node.body)
+        if isinstance(node, ast.Try) or type(node).__name__ == 'TryStar':
+            total = _add(self._block_cost(node.body), self._block_cost(node.orelse))
+            total = _add(total, self._block_cost(node.finalbody))
+            for handler in node.handlers:
+                total = _add(total, self._block_cost(handler.body))
+            return total
+        if type(node).__name__ == 'Match':
+            total = self._expression_cost(node.subject)
+            for case in node.cases:
+                total = _add(total, self._block_cost(case.body))
+            return total
+        return self._expression_cost(node)
+
+    def _expression_cost(self, node, depth=0):
+        """Cost of the comprehensions and library calls in an expression (other expressions are constant)."""
+        total = ONE
+        pending = [node]
+        while pending:
+            child = pending.pop()
+            if isinstance(child, COMPREHENSIONS):
+                total = _add(total, self._comprehension_cost(child, depth))
+            elif not isinstance(child, SCOPES):
+                if isinstance(child, ast.Call):
+                    rule = self.call_rule(child)
+                    if rule is not None and not rule.constant:
+                        total = _add(total, self._library_cost(child, rule))
+                pending.extend(ast.iter_child_nodes(child))
+        return total
+
+    def _comprehension_cost(self, node, depth):
+        if depth > MAX_TRACE_DEPTH:
+            return self._source(UNKNOWN)
+        trip = ONE
+        inner = ONE
+        for generator in node.generators:
+            trip = _mul(trip, self.trip(generator))
+            for condition in generator.ifs:
+                inner = _add(inner, self._expression_cost(condition, depth + 1))
+        for element in (node.key, node.value) if isinstance(node, ast.DictComp) else (node.elt,):
+            inner = _add(inner, self._expression_cost(element, depth + 1))
+        return _mul(trip, inner)
+
+    def trip(self, loop, outer=ONE):
+        """
+        Bound on how many times a for or while loop, or a comprehension's
+        generator, iterates, times outer (how often the loops around it run it).
+        """
+        if isinstance(loop, ast.While):
+            return _mul(outer, self._while_trip(loop))
+        return _mul(outer, self.size_of(loop.iter))
+
+    def size_of(self, node):
+        """Length of a collection expression, an unknown size if it cannot be traced."""
+        return self.length(node) or self._source(UNKNOWN)
+
+    def _while_trip(self, node):
+        """
+        Trip count of a while loop from the counters in its condition: a
+        name compared in the test and reassigned in the body runs at most
+        from its value before the loop to the other side of the comparison.
+        With several counters each iteration moves at least one, so their
+        ranges add up. A counter that is only ever scaled by a constant
+        factor or bisected crosses that range in logarithmically many
+        steps. Conditions without a counter (while True, a worklist emptied
+        through method calls) are unknown.
+        """
+        updated = {}
+        pending = list(node.body)
+        while pending:
+            child = pending.pop()
+            if isinstance(child, SCOPES):
+                continue
+            targets = ()
+            if isinstance(child, ast.Assign):
+                targets = child.targets
+            elif isinstance(child, (ast.AugAssign, ast.AnnAssign, ast.NamedExpr, ast.For, ast.AsyncFor)):
+                targets = (child.target,)
+            for target in targets:
+                for name in ast.walk(target):
+                    if isinstance(name, ast.Name) and isinstance(name.ctx, ast.Store):
+                        updated.setdefault(name.id, []).append(child)
+            pending.extend(ast.iter_child_nodes(child))
+
+        trip = ZERO
+        for side, other in _compared_pairs(node.test):
+            for counter, limit in ((side, other), (other, side)):
+                if not (isinstance(counter, ast.Name) and counter.id in updated):
+                    continue
+                start = self.magnitude(counter, exclude=updated[counter.id])
+                extent = _add(start, self.magnitude(limit))
+                if extent is None:
+                    return self._source(UNKNOWN)
+                if all(self._geometric_update(update, counter.id) for update in updated[counter.id]):
+                    extent = _log(extent)
+                trip = _add(trip, extent)
+        return trip or self._source(UNKNOWN)
+
+
+def _compared_pairs(test):
+    """(left, right) operand pairs of the comparisons a loop condition is made of."""
+    pairs = []
+    pending = [test]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, ast.BoolOp):
+            pending.extend(reversed(node.values))
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            pending.append(node.operand)
+        elif isinstance(node, ast.Compare):
+            operands = [node.left] + node.comparators
+            pairs.extend(zip(operands, operands[1:]))
+    return pairs
+
+
+def _geometric_factor(op, factor):
+    """True if op with the constant factor scales a value: // 2, * 3, >> 1, ..."""
+    if not (isinstance(factor, ast.Constant) and isinstance(factor.value, (int, float))
+            and not isinstance(factor.value, bool)):
+        return False
+    if isinstance(op, (ast.RShift, ast.LShift)):
+        return factor.value >= 1
+    return isinstance(op, (ast.FloorDiv, ast.Div, ast.Mult)) and factor.value >= 2
+
+
+def dotted_name(node):
+    """'a.b.c' for a chain of attributes on a name, else None."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    return '.'.join([node.id] + parts[::-1])
+
+
+def describe(polynomial):
+    """'len(df)', 'n·m + k', ... for a polynomial of sources."""
+    return ' + '.join(sorted(
+        '·'.join(('unknown' if source == UNKNOWN else source) + ('' if power == 1 else f'^{power}')
+                 for source, power in monomial) or '1'
+        for monomial in polynomial
+    ))
+
+
+def _is_call(node, name):
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == name
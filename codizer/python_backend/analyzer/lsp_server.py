@@ -0,0 +1,542 @@
+"""
+Language Server Protocol front end for the complexity analyzer.
+
+The server speaks JSON-RPC over stdio and keeps every open document and
+its per-line results in memory, so editors get hover, inlay hints and
+diagnostics from one warm process instead of an HTTP round trip or a
+new Python process per event.
+
+Run it from the python_backend directory:
+
+    python -m analyzer.lsp_server
+"""
+import ast
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+
+from .complexity_analyzer import TIER_FULL, AnalysisBudget, ComplexityAnalyzer
+from .extension_analyzer import analyze_complexity
+
+# JSON-RPC / LSP error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+REQUEST_CANCELLED = -32800
+
+# LSP enums
+TEXT_DOCUMENT_SYNC_INCREMENTAL = 2
+DIAGNOSTIC_SEVERITY_INFORMATION = 3
+MARKUP_KIND_MARKDOWN = 'markdown'
+
+# Seconds of inactivity after an edit before diagnostics are recomputed
+DIAGNOSTICS_DELAY = 0.25
+
+# Number of lines above a line that analyze_single_line looks at
+CONTEXT_LINES = 10
+
+# How often (in lines) long-running handlers check for cancellation
+CANCEL_CHECK_INTERVAL = 256
+
+
+class RequestCancelled(Exception):
+    """Raised inside a handler when the client cancelled its request."""
+
+
+class LRUCache:
+    """Small bounded mapping used for per-line and per-function results."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+
+def _utf16_length(text):
+    """Length of text in UTF-16 code units, as used by LSP positions."""
+    if text.isascii():
+        return len(text)
+    return sum(2 if ord(ch) > 0xFFFF else 1 for ch in text)
+
+
+def _utf16_to_index(text, character):
+    """Convert an LSP (UTF-16) character offset into a str index."""
+    if text.isascii():
+        return min(character, len(text))
+    units = 0
+    for index, ch in enumerate(text):
+        if units >= character:
+            return index
+        units += 2 if ord(ch) > 0xFFFF else 1
+    return len(text)
+
+
+class Document:
+    """An open text document kept as a list of lines."""
+
+    def __init__(self, uri, text, version=None, language_id='python'):
+        self.uri = uri
+        self.version = version
+        self.language_id = language_id
+        self.lines = text.split('\n')
+        # Results derived from the whole document, reset on every edit
+        self.overall = None
+        self.functions = None
+        self.file_metrics = None
+
+    def source(self):
+        return '\n'.join(self.lines)
+
+    def apply_change(self, change):
+        """Apply one TextDocumentContentChangeEvent (full or ranged)."""
+        self.overall = None
+        self.functions = None
+        self.file_metrics = None
+
+        if 'range' not in change:
+            self.lines = change['text'].split('\n')
+            return
+
+        start = change['range']['start']
+        end = change['range']['end']
+        start_line = min(start['line'], len(self.lines) - 1)
+        end_line = min(end['line'], len(self.lines) - 1)
+
+        first = self.lines[start_line]
+        last = self.lines[end_line]
+        prefix = first[:_utf16_to_index(first, start['character'])]
+        suffix = last[_utf16_to_index(last, end['character']):]
+
+        replacement = (prefix + change['text'] + suffix).split('\n')
+        self.lines[start_line:end_line + 1] = replacement
+
+    def line_text(self, index):
+        """Line without its trailing carriage return, as the analyzer expects."""
+        return self.lines[index].rstrip('\r')
+
+
+class ComplexityLanguageServer:
+    """Minimal stdio language server built around ComplexityAnalyzer."""
+
+    def __init__(self, reader=None, writer=None, analyzer=None, budget=None):
+        self.reader = reader or sys.stdin.buffer
+        self.writer = writer or sys.stdout.buffer
+        self.analyzer = analyzer or ComplexityAnalyzer()
+        self.budget = budget or AnalysisBudget()
+
+        self.documents = {}
+        self.line_cache = LRUCache(100000)
+        self.function_cache = LRUCache(10000)
+        self.diagnostic_threshold = 'O(n^2)'
+
+        self._incoming = queue.Queue()
+        self._pending = set()    # ids of requests queued or being handled
+        self._cancelled = set()  # the subset of _pending the client cancelled
+        self._cancel_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = set()
+        self._running = True
+        self._shutdown_requested = False
+        self._current_request = None
+
+        self.handlers = {
+            'initialize': self.initialize,
+            'initialized': lambda params: None,
+            'shutdown': self.shutdown,
+            'exit': self.exit,
+            'textDocument/didOpen': self.did_open,
+            'textDocument/didChange': self.did_change,
+            'textDocument/didClose': self.did_close,
+            'textDocument/hover': self.hover,
+            'textDocument/inlayHint': self.inlay_hint,
+            'codizer/lineComplexity': self.line_complexity_request,
+            'codizer/documentComplexity': self.document_complexity_request,
+            'codizer/fileMetrics': self.file_metrics_request,
+        }
+
+    # ------------------------------------------------------------------
+    # Transport
+    # ------------------------------------------------------------------
+
+    def read_message(self):
+        """Read one Content-Length framed JSON-RPC message, or None on EOF."""
+        content_length = None
+        while True:
+            header = self.reader.readline()
+            if not header:
+                return None
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.decode('ascii').partition(':')
+            if name.lower() == 'content-length':
+                content_length = int(value.strip())
+
+        if content_length is None:
+            return None
+        body = self.reader.read(content_length)
+        return json.loads(body.decode('utf-8'))
+
+    def send(self, message):
+        message['jsonrpc'] = '2.0'
+        body = json.dumps(message, separators=(',', ':')).encode('utf-8')
+        with self._write_lock:
+            self.writer.write(f'Content-Length: {len(body)}\r\n\r\n'.encode('ascii'))
+            self.writer.write(body)
+            self.writer.flush()
+
+    def notify(self, method, params):
+        self.send({'method': method, 'params': params})
+
+    def _read_loop(self):
+        """Reader thread: queue messages, but record cancellations immediately."""
+        while True:
+            try:
+                message = self.read_message()
+            except (ValueError, UnicodeDecodeError):
+                self.send({'id': None, 'error': {'code': PARSE_ERROR, 'message': 'Invalid message'}})
+                continue
+            if message is None:
+                self._incoming.put({'method': 'exit'})
+                return
+            if message.get('method') == '$/cancelRequest':
+                with self._cancel_lock:
+                    # Cancels for requests already answered (or never sent) are ignored
+                    if message['params']['id'] in self._pending:
+                        self._cancelled.add(message['params']['id'])
+                continue
+            if message.get('id') is not None and 'method' in message:
+                with self._cancel_lock:
+                    self._pending.add(message['id'])
+            self._incoming.put(message)
+
+    def _is_cancelled(self, request_id):
+        with self._cancel_lock:
+            return request_id in self._cancelled
+
+    def serve(self):
+        """Process messages until the client sends exit or closes stdin."""
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+        while self._running:
+            try:
+                timeout = DIAGNOSTICS_DELAY if self._dirty else None
+                message = self._incoming.get(timeout=timeout)
+            except queue.Empty:
+                # The editor went quiet: refresh diagnostics for edited documents
+                self.publish_pending_diagnostics()
+                continue
+            self.dispatch(message)
+
+    def dispatch(self, message):
+        method = message.get('method')
+        request_id = message.get('id')
+        handler = self.handlers.get(method)
+
+        if request_id is None:
+            # Notification: no response expected
+            if handler:
+                try:
+                    handler(message.get('params') or {})
+                except Exception as e:
+                    sys.stderr.write(f"codizer: error handling {method}: {e}\n")
+            return
+
+        try:
+            if handler is None:
+                self.send({'id': request_id, 'error': {'code': METHOD_NOT_FOUND, 'message': f'Unknown method: {method}'}})
+                return
+            if self._is_cancelled(request_id):
+                raise RequestCancelled()
+            self._current_request = request_id
+            result = handler(message.get('params') or {})
+            self.send({'id': request_id, 'result': result})
+        except RequestCancelled:
+            self.send({'id': request_id, 'error': {'code': REQUEST_CANCELLED, 'message': 'Request cancelled'}})
+        except Exception as e:
+            self.send({'id': request_id, 'error': {'code': INTERNAL_ERROR, 'message': str(e)}})
+        finally:
+            self._current_request = None
+            with self._cancel_lock:
+                self._pending.discard(request_id)
+                self._cancelled.discard(request_id)
+
+    def check_cancelled(self):
+        """Abort the request being handled if the client cancelled it."""
+        request_id = self._current_request
+        if request_id is not None and self._is_cancelled(request_id):
+            raise RequestCancelled()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def initialize(self, params):
+        options = params.get('initializationOptions') or {}
+        self.diagnostic_threshold = options.get('diagnosticThreshold', self.diagnostic_threshold)
+        return {
+            'capabilities': {
+                'textDocumentSync': {
+                    'openClose': True,
+                    'change': TEXT_DOCUMENT_SYNC_INCREMENTAL,
+                },
+                'hoverProvider': True,
+                'inlayHintProvider': True,
+            },
+            'serverInfo': {'name': 'codizer'},
+        }
+
+    def shutdown(self, params):
+        self._shutdown_requested = True
+        return None
+
+    def exit(self, params):
+        self._running = False
+
+    # ------------------------------------------------------------------
+    # Document synchronisation
+    # ------------------------------------------------------------------
+
+    def did_open(self, params):
+        item = params['textDocument']
+        self.documents[item['uri']] = Document(
+            item['uri'], item['text'], item.get('version'), item.get('languageId', 'python')
+        )
+        self._dirty.add(item['uri'])
+
+    def did_change(self, params):
+        identifier = params['textDocument']
+        document = self.documents.get(identifier['uri'])
+        if document is None:
+            return
+        for change in params['contentChanges']:
+            document.apply_change(change)
+        document.version = identifier.get('version')
+        self._dirty.add(document.uri)
+
+    def did_close(self, params):
+        uri = params['textDocument']['uri']
+        self.documents.pop(uri, None)
+        self._dirty.discard(uri)
+        self.notify('textDocument/publishDiagnostics', {'uri': uri, 'diagnostics': []})
+
+    # ------------------------------------------------------------------
+    # Analysis (cached)
+    # ------------------------------------------------------------------
+
+    def line_complexity(self, document, index):
+        """Per-line complexity, identical to analyze_file's hover data."""
+        line = document.line_text(index)
+        above = tuple(
+            document.line_text(i) for i in range(max(0, index - CONTEXT_LINES), index)
+        )
+        key = (line, above)
+        result = self.line_cache.get(key)
+        if result is None:
+            result = self.analyzer.analyze_single_line(line, {'lines_above': list(above)}, self.budget)
+            self.line_cache.put(key, result)
+        return result
+
+    def document_complexity(self, document):
+        if document.overall is None:
+            document.overall = self.analyzer.analyze_code(document.source(), document.language_id, self.budget)
+        return document.overall
+
+    def function_complexities(self, document):
+        """
+        Analyze each function in the document separately. Returns None when
+        the document does not currently parse (e.g. in the middle of an edit).
+        """
+        if document.functions is not None:
+            return document.functions
+
+        try:
+            tree = ast.parse(document.source())
+        except (SyntaxError, RecursionError, MemoryError):
+            # Invalid, or nested too deeply for the parser to build a tree
+            return None
+
+        functions = []
+        for node in ast.walk(tree):
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            end = getattr(node, 'end_lineno', node.lineno)
+            code = '\n'.join(document.line_text(i) for i in range(node.lineno - 1, end))
+            result = self.function_cache.get(code)
+            if result is None:
+                result = self.analyzer.analyze_code(code, document.language_id, self.budget)
+                self.function_cache.put(code, result)
+            functions.append({
+                'name': node.name,
+                'start': node.lineno - 1,
+                'end': end - 1,
+                'time_complexity': result['time_complexity'],
+                'space_complexity': result['space_complexity'],
+            })
+
+        document.functions = functions
+        return functions
+
+    def file_metrics(self, document):
+        """
+        Per-function cyclomatic, time and space complexity from the
+        extension's ComplexityVisitor, in the shape its CLI prints.
+        """
+        if document.file_metrics is None:
+            path = unquote(urlparse(document.uri).path)
+            try:
+                document.file_metrics = analyze_complexity.analyze_source(document.source(), path)
+            except SyntaxError as e:
+                document.file_metrics = {'error': True, 'message': f'Syntax error: {e}'}
+        return document.file_metrics
+
+    def _enclosing_function(self, document, index):
+        functions = self.function_complexities(document) or []
+        innermost = None
+        for function in functions:
+            if function['start'] <= index <= function['end']:
+                if innermost is None or function['start'] >= innermost['start']:
+                    innermost = function
+        return innermost
+
+    # ------------------------------------------------------------------
+    # Diagnostics
+    # ------------------------------------------------------------------
+
+    def publish_pending_diagnostics(self):
+        while self._dirty:
+            uri = self._dirty.pop()
+            document = self.documents.get(uri)
+            if document is None:
+                continue
+            functions = self.function_complexities(document)
+            if functions is None:
+                # Keep the previous diagnostics until the code parses again
+                continue
+            self.notify('textDocument/publishDiagnostics', {
+                'uri': uri,
+                'version': document.version,
+                'diagnostics': self.diagnostics(document, functions),
+            })
+
+    def diagnostics(self, document, functions):
+        threshold = self.diagnostic_threshold
+        diagnostics = []
+        for function in functions:
+            time_complexity = function['time_complexity']
+            if time_complexity != threshold and not self.analyzer._is_higher_complexity(time_complexity, threshold):
+                continue
+            line = document.line_text(function['start'])
+            diagnostics.append({
+                'range': {
+                    'start': {'line': function['start'], 'character': 0},
+                    'end': {'line': function['start'], 'character': _utf16_length(line)},
+                },
+                'severity': DIAGNOSTIC_SEVERITY_INFORMATION,
+                'source': 'codizer',
+                'message': (
+                    f"'{function['name']}' is estimated at {time_complexity} time, "
+                    f"{function['space_complexity']} space"
+                ),
+            })
+        return diagnostics
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _document(self, params):
+        document = self.documents.get(params['textDocument']['uri'])
+        if document is None:
+            raise ValueError(f"Document not open: {params['textDocument']['uri']}")
+        return document
+
+    def hover(self, params):
+        document = self._document(params)
+        index = params['position']['line']
+        if index >= len(document.lines) or not document.line_text(index).strip():
+            return None
+
+        result = self.line_complexity(document, index)
+        parts = [
+            f"**Line** - Time: `{result['time_complexity']}` | Space: `{result['space_complexity']}`"
+        ]
+        function = self._enclosing_function(document, index)
+        if function:
+            parts.append(
+                f"**{function['name']}** - Time: `{function['time_complexity']}` | "
+                f"Space: `{function['space_complexity']}`"
+            )
+        return {'contents': {'kind': MARKUP_KIND_MARKDOWN, 'value': '\n\n'.join(parts)}}
+
+    def inlay_hint(self, params):
+        document = self._document(params)
+        start = params['range']['start']['line']
+        end = min(params['range']['end']['line'], len(document.lines) - 1)
+
+        # Documents over the budget get no per-line analysis
+        if self.document_complexity(document).get('tier', TIER_FULL) != TIER_FULL:
+            return []
+
+        hints = []
+        deadline = self.budget.deadline()
+        for index in range(start, end + 1):
+            if (index - start) % CANCEL_CHECK_INTERVAL == 0:
+                self.check_cancelled()
+                if time.monotonic() > deadline:
+                    # Out of time: return the hints computed so far
+                    break
+            line = document.line_text(index)
+            if not line.strip():
+                continue
+            result = self.line_complexity(document, index)
+            # Same rule as the CLI output: skip lines that are O(1) in both
+            if result['time_complexity'] == 'O(1)' and result['space_complexity'] == 'O(1)':
+                continue
+            hints.append({
+                'position': {'line': index, 'character': _utf16_length(line)},
+                'label': f"Time: {result['time_complexity']} | Space: {result['space_complexity']}",
+                'paddingLeft': True,
+            })
+        return hints
+
+    def line_complexity_request(self, params):
+        document = self._document(params)
+        index = params['line']
+        if index >= len(document.lines) or not document.line_text(index).strip():
+            return None
+        return self.line_complexity(document, index)
+
+    def document_complexity_request(self, params):
+        return self.document_complexity(self._document(params))
+
+    def file_metrics_request(self, params):
+        return self.file_metrics(self._document(params))
+
+
+def main():
+    server = ComplexityLanguageServer()
+    server.serve()
+    sys.stdout.flush()
+    # The reader thread may still be blocked on stdin, so skip interpreter teardown
+    os._exit(0 if server._shutdown_requested else 1)
+
+
+if __name__ == '__main__':
+    main()
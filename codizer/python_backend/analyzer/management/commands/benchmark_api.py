@@ -0,0 +1,157 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Settings module and in-process client for each profile
+PROFILES = {
+    'full': ('complexity_analyzer.settings', 'wsgi'),
+    'lean': ('complexity_analyzer.api_settings', 'asgi'),
+}
+
+SAMPLE_CODE = '''def find_pairs(items, target):
+    seen = set()
+    pairs = []
+    for item in items:
+        if target - item in seen:
+            pairs.append((item, target - item))
+        seen.add(item)
+    return pairs
+'''
+
+
+def percentiles(samples):
+    """p50/p95/p99 and mean of latencies in seconds, reported in milliseconds."""
+    ordered = sorted(samples)
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        'p50': at(0.50),
+        'p95': at(0.95),
+        'p99': at(0.99),
+        'mean': statistics.fmean(ordered) * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = ('Compare request latency of the full DRF stack and the lean API profile '
+            '(complexity_analyzer.api_settings), or of a running server with --url')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=50, help='Untimed requests per endpoint first')
+        parser.add_argument('--profile', action='append', choices=sorted(PROFILES),
+                            help='Profile to benchmark (repeatable, default: all)')
+        parser.add_argument('--code-file', help='Analyze this file instead of a small sample function')
+        parser.add_argument('--url', help='Benchmark a running server at this base URL, e.g. http://localhost:8000')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+        parser.add_argument('--worker', action='store_true', help='Internal: run one profile in-process')
+
+    def handle(self, *args, **options):
+        code = SAMPLE_CODE
+        if options['code_file']:
+            with open(options['code_file'], encoding='utf-8') as f:
+                code = f.read()
+        payload = json.dumps({'code': code, 'language': 'python'}).encode('utf-8')
+
+        if options['worker']:
+            self.stdout.write(json.dumps(self._run_in_process(payload, options)))
+            return
+
+        if options['url']:
+            results = {options['url']: self._run_http(options['url'].rstrip('/'), payload, options)}
+        else:
+            results = {name: self._spawn(name, options) for name in options['profile'] or sorted(PROFILES)}
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{'profile':<24} {'endpoint':<9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+        for name, endpoints in results.items():
+            for endpoint, stats in endpoints.items():
+                self.stdout.write(
+                    f"{name:<24} {endpoint:<9} {stats['p50']:>8.2f} {stats['p95']:>8.2f} "
+                    f"{stats['p99']:>8.2f} {stats['mean']:>8.2f}"
+                )
+
+    def _spawn(self, name, options):
+        """
+        Run one profile in a fresh interpreter: settings are fixed at startup,
+        so each profile needs its own process.
+        """
+        command = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_api', '--worker',
+                   '--requests', str(options['requests']), '--warmup', str(options['warmup'])]
+        if options['code_file']:
+            command += ['--code-file', os.path.abspath(options['code_file'])]
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=PROFILES[name][0])
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f'{name} profile failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def _run_in_process(self, payload, options):
+        """Drive the current settings' handler in-process against a throwaway test database."""
+        import asyncio
+
+        from django.test import AsyncClient, Client
+        from django.test.utils import setup_databases, setup_test_environment, teardown_databases
+
+        handler = next(kind for module, kind in PROFILES.values() if module == os.environ['DJANGO_SETTINGS_MODULE'])
+        setup_test_environment()
+        databases = setup_databases(verbosity=0, interactive=False)
+        try:
+            if handler == 'asgi':
+                client = AsyncClient(HTTP_HOST='localhost')
+                # One loop for the whole run, as a server would have
+                loop = asyncio.new_event_loop()
+
+                def request(path, body=None):
+                    if body is None:
+                        return loop.run_until_complete(client.get(path))
+                    return loop.run_until_complete(client.post(path, body, content_type='application/json'))
+            else:
+                client = Client(HTTP_HOST='localhost')
+
+                def request(path, body=None):
+                    if body is None:
+                        return client.get(path)
+                    return client.post(path, body, content_type='application/json')
+
+            return self._measure(request, payload, options)
+        finally:
+            teardown_databases(databases, verbosity=0)
+
+    def _run_http(self, base_url, payload, options):
+        def request(path, body=None):
+            req = urllib.request.Request(base_url + path, data=body,
+                                         headers={'Content-Type': 'application/json'} if body else {})
+            with urllib.request.urlopen(req) as response:
+                response.read()
+                return response
+
+        return self._measure(request, payload, options)
+
+    def _measure(self, request, payload, options):
+        results = {}
+        for endpoint, path, body in (('analyze', '/api/analyze/', payload), ('history', '/api/history/', None)):
+            for _ in range(options['warmup']):
+                request(path, body)
+            samples = []
+            for _ in range(options['requests']):
+                start = time.perf_counter()
+                response = request(path, body)
+                samples.append(time.perf_counter() - start)
+                status = getattr(response, 'status_code', None) or response.status
+                if status != 200:
+                    raise CommandError(f'{path} returned {status}')
+            results[endpoint] = percentiles(samples)
+        return results
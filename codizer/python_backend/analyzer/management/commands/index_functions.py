@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analyzer.function_index import update_index
+
+
+class Command(BaseCommand):
+    help = 'Incrementally index the complexity of every function under a source tree'
+
+    def add_arguments(self, parser):
+        parser.add_argument('root', help='Project root; indexed paths are stored relative to it, and rows of other roots are kept')
+        parser.add_argument('--no-prune', action='store_true',
+                            help='Keep index rows for files that no longer exist')
+
+    def handle(self, *args, **options):
+        try:
+            stats = update_index(options['root'], prune=not options['no_prune'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {stats['scanned']} files, analyzed {stats['analyzed']}, "
+            f"wrote {stats['functions_written']} functions, removed {stats['removed']} files"
+        ))
@@ -0,0 +1,525 @@
+import argparse
+import gzip
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchmark_api import PROFILES, percentiles
+
+# Request bodies over this size are gzipped, as the extension does
+COMPRESS_THRESHOLD_BYTES = 8 * 1024
+
+# Seconds to wait for a spawned server to accept connections
+STARTUP_TIMEOUT = 30.0
+
+# Seconds between server RSS samples
+RSS_INTERVAL = 0.25
+
+DEFAULT_MIX = 'document=6,line=3,history=1'
+
+# Building blocks of the generated documents. The corpus depends only on the
+# seed, never on the code under test, so runs on different commits post the
+# same bytes.
+TEMPLATES = [
+    '''def {name}(items):
+    total = 0
+    for item in items:
+        total += item
+    return total
+''',
+    '''def {name}(matrix):
+    rows = len(matrix)
+    for i in range(rows):
+        for j in range(i + 1, rows):
+            if matrix[i][j] != matrix[j][i]:
+                return False
+    return True
+''',
+    '''def {name}(arr, target):
+    lo, hi = 0, len(arr) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if arr[mid] == target:
+            return mid
+        if arr[mid] < target:
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return -1
+''',
+    '''def {name}(words):
+    counts = {{}}
+    for word in words:
+        counts[word] = counts.get(word, 0) + 1
+    return sorted(counts.items(), key=lambda pair: -pair[1])
+''',
+    '''def {name}(arr):
+    if len(arr) <= 1:
+        return arr
+    mid = len(arr) // 2
+    left = {name}(arr[:mid])
+    right = {name}(arr[mid:])
+    merged = []
+    while left and right:
+        merged.append(left.pop(0) if left[0] < right[0] else right.pop(0))
+    return merged + left + right
+''',
+    '''class {title}:
+    def __init__(self, size):
+        self.grid = [[0] * size for _ in range(size)]
+
+    def fill(self, value):
+        for row in self.grid:
+            for k in range(len(row)):
+                row[k] = value
+''',
+    '''def {name}(n):
+    steps = 0
+    while n > 1:
+        n //= 2
+        steps += 1
+    return steps
+''',
+    '''def {name}(pairs, limit):
+    # Keep the pairs whose sum stays under the limit
+    return [(a, b) for a, b in pairs if a + b < limit]
+''',
+]
+
+
+def generate_document(rng, size_bytes, serial):
+    """Python source of about size_bytes, built from TEMPLATES with seeded names."""
+    parts = []
+    length = 0
+    while length < size_bytes:
+        template = rng.choice(TEMPLATES)
+        name = f'{rng.choice(("find", "count", "merge", "scan", "build", "check"))}_{serial}_{len(parts)}'
+        part = template.format(name=name, title=name.title().replace('_', '')) + '\n\n'
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts)
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        kind, _, weight = item.partition('=')
+        if kind not in ('document', 'line', 'history') or not weight.isdigit():
+            raise CommandError(f'Bad --mix entry {item!r}; expected e.g. {DEFAULT_MIX}')
+        mix[kind] = int(weight)
+    if not any(mix.values()):
+        raise CommandError('--mix needs a positive weight')
+    return mix
+
+
+def server_rss(pid):
+    """Resident set size of a process in bytes, or None if it cannot be read."""
+    try:
+        with open(f'/proc/{pid}/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        output = subprocess.run(['ps', '-o', 'rss=', '-p', str(pid)], capture_output=True, text=True).stdout
+        return int(output.strip()) * 1024
+    except (OSError, ValueError):
+        return None
+
+
+class RssSampler(threading.Thread):
+    """Samples a process's RSS in the background: first, peak and last value."""
+
+    def __init__(self, pid):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.samples = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            rss = server_rss(self.pid)
+            if rss is not None:
+                self.samples.append(rss)
+            self.stopped.wait(RSS_INTERVAL)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        rss = server_rss(self.pid)
+        if rss is not None:
+            self.samples.append(rss)
+        if not self.samples:
+            return None
+        return {'start_mb': self.samples[0] / 2 ** 20, 'peak_mb': max(self.samples) / 2 ** 20,
+                'end_mb': self.samples[-1] / 2 ** 20}
+
+
+class Traffic:
+    """
+    Deterministic request sequence: whole-document posts of the configured
+    sizes, single-line posts and history reads, in --mix proportions. Every
+    document post carries a fresh revision comment, like a user editing,
+    so requests miss the server's result cache unless told otherwise.
+    """
+
+    def __init__(self, seed, mix, sizes_kb, documents_per_size, unique):
+        rng = random.Random(seed)
+        self.documents = {
+            size: [generate_document(rng, size * 1024, f'{size}k{i}') for i in range(documents_per_size)]
+            for size in sizes_kb
+        }
+        self.lines = [
+            line for documents in self.documents.values() for document in documents
+            for line in document.split('\n') if line.strip()
+        ]
+        self.kinds = [kind for kind, weight in mix.items() for _ in range(weight)]
+        self.sizes_kb = list(sizes_kb)
+        self.unique = unique
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.serial = 0
+
+    def next_request(self):
+        """(label, method, path, JSON body or None), the same sequence for the same seed."""
+        with self.lock:
+            serial = self.serial
+            self.serial += 1
+        rng = random.Random(self.seed * 1000003 + serial)
+        kind = rng.choice(self.kinds)
+        if kind == 'history':
+            return 'history', 'GET', '/api/history/', None
+        if kind == 'line':
+            body = {'code': rng.choice(self.lines).strip(), 'language': 'python'}
+            return 'line', 'POST', '/api/analyze/', body
+        size = rng.choice(self.sizes_kb)
+        code = rng.choice(self.documents[size])
+        if self.unique:
+            code += f'\n# revision {serial}\n'
+        return f'document {size}k', 'POST', '/api/analyze/', {'code': code, 'language': 'python'}
+
+
+class Client:
+    """One keep-alive connection, reopened after errors."""
+
+    def __init__(self, base_url, timeout):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.prefix = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body):
+        """Returns the response status; raises OSError or http.client.HTTPException on failure."""
+        headers = {'Accept-Encoding': 'gzip'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+            if len(data) > COMPRESS_THRESHOLD_BYTES:
+                data = gzip.compress(data)
+                headers['Content-Encoding'] = 'gzip'
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            self.connection.request(method, self.prefix + path, body=data, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+        if response.will_close:
+            self.close()
+        return response.status
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Command(BaseCommand):
+    help = ('Load-test the analyze and history API with concurrent, realistic traffic: report throughput, '
+            'latency percentiles, error rates and server RSS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='full',
+                            help='Settings profile of the server started for the run (default: %(default)s)')
+        parser.add_argument('--url', help='Load-test a running server at this base URL instead of starting one')
+        parser.add_argument('--server-pid', type=int, help='With --url, sample the RSS of this process')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients (default: %(default)s)')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds of timed load (default: %(default)s)')
+        parser.add_argument('--requests', type=int, help='Stop after this many timed requests instead')
+        parser.add_argument('--warmup', type=float, default=3.0, help='Untimed seconds first (default: %(default)s)')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help='Request weights (default: %(default)s)')
+        parser.add_argument('--sizes', default='1,8,64', help='Document sizes in KB (default: %(default)s)')
+        parser.add_argument('--seed', type=int, default=0, help='Traffic seed; equal seeds replay equal traffic')
+        parser.add_argument('--repeat-documents', action='store_true',
+                            help='Post documents unchanged, so repeated ones hit the result cache')
+        parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds')
+        parser.add_argument('--output', help='Also write the results as JSON to this file')
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+        parser.add_argument('--serve', action='store_true', help='Internal: serve the current settings on --port')
+        parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['serve']:
+            self._serve(options['port'])
+            return
+
+        try:
+            mix = parse_mix(options['mix'])
+            sizes_kb = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError(f"Bad --sizes {options['sizes']!r}; expected e.g. 1,8,64")
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
+        traffic = Traffic(options['seed'], mix, sizes_kb, documents_per_size=8,
+                          unique=not options['repeat_documents'])
+
+        if options['url']:
+            results = self._run(options['url'], options['server_pid'], traffic, options)
+        else:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                process, base_url = self._start_server(options['profile'], cache_dir)
+                try:
+                    results = self._run(base_url, process.pid, traffic, options)
+                finally:
+                    process.terminate()
+                    try:
+                        process.wait(timeout=10)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+                        process.wait()
+
+        report = {'run': self._metadata(options), 'results': results}
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read --compare file: {e}")
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(results, baseline)
+
+    # Server
+
+    def _start_server(self, profile, cache_dir):
+        """Start this command with --serve in a fresh interpreter; returns (process, base URL)."""
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        command = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'loadtest_api',
+                   '--serve', '--port', str(port)]
+        # A cold, private result cache, so earlier runs do not answer for this one
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=PROFILES[profile][0], CODIZER_CACHE_DIR=cache_dir)
+        # The server logs every request; a file, unlike a pipe nobody reads, never fills up
+        log_path = os.path.join(cache_dir, 'server.log')
+        with open(log_path, 'wb') as log:
+            process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                with open(log_path, encoding='utf-8', errors='replace') as log:
+                    raise CommandError(f'{profile} server exited:\n{log.read()}')
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                    return process, f'http://127.0.0.1:{port}'
+            except OSError:
+                time.sleep(0.1)
+        process.kill()
+        raise CommandError(f'{profile} server did not start within {STARTUP_TIMEOUT:.0f}s')
+
+    def _serve(self, port):
+        """Serve the current settings against a throwaway test database until terminated."""
+        import signal
+
+        from django.test.utils import setup_databases, teardown_databases
+
+        from django.db import connections
+
+        handler = next(kind for module, kind in PROFILES.values() if module == os.environ['DJANGO_SETTINGS_MODULE'])
+        database = connections['default'].settings_dict
+        if database['ENGINE'] == 'django.db.backends.sqlite3':
+            # SQLite test databases are in memory with a shared cache by default,
+            # where concurrent writers fail with "database table is locked"
+            # instead of waiting as they do on a file
+            # (--serve runs with the private directory _start_server made)
+            database['TEST']['NAME'] = os.path.join(os.environ['CODIZER_CACHE_DIR'], 'loadtest.sqlite3')
+        databases = setup_databases(verbosity=0, interactive=False)
+        # Turn terminate() into a normal exit so the test database is removed
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            if handler == 'asgi':
+                try:
+                    import uvicorn
+                except ImportError:
+                    raise CommandError('The lean profile is served with uvicorn: pip install uvicorn')
+                from complexity_analyzer.api_asgi import application
+                uvicorn.run(application, host='127.0.0.1', port=port, log_level='warning')
+            else:
+                from django.core.servers.basehttp import run
+                from django.core.wsgi import get_wsgi_application
+
+                # The threaded server runserver uses, without its autoreloader
+                run('127.0.0.1', port, get_wsgi_application(), threading=True)
+        finally:
+            teardown_databases(databases, verbosity=0)
+
+    # Load
+
+    def _run(self, base_url, pid, traffic, options):
+        timed = threading.Event()    # warmup over, requests started from now on are recorded
+        stopped = threading.Event()
+        lock = threading.Lock()
+        samples = {}     # label -> latencies of successful requests
+        errors = {}      # label -> failed requests
+        issued = [0]
+        limit = options['requests']
+
+        def worker():
+            client = Client(base_url, options['timeout'])
+            try:
+                while not stopped.is_set():
+                    recording = timed.is_set()
+                    if recording and limit is not None:
+                        with lock:
+                            if issued[0] >= limit:
+                                return
+                            issued[0] += 1
+                    label, method, path, body = traffic.next_request()
+                    started = time.perf_counter()
+                    try:
+                        failed = client.request(method, path, body) != 200
+                    except (OSError, http.client.HTTPException):
+                        failed = True
+                    elapsed = time.perf_counter() - started
+                    if recording:
+                        with lock:
+                            if failed:
+                                errors[label] = errors.get(label, 0) + 1
+                            else:
+                                samples.setdefault(label, []).append(elapsed)
+            finally:
+                client.close()
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['warmup'])
+
+        sampler = RssSampler(pid) if pid else None
+        if sampler:
+            sampler.start()
+        started = time.monotonic()
+        timed.set()
+        if limit is None:
+            stopped.wait(options['duration'])
+            stopped.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        rss = sampler.stop() if sampler else None
+
+        endpoints = {}
+        for label in sorted(set(samples) | set(errors), key=_label_order):
+            latencies = samples.get(label, [])
+            failed = errors.get(label, 0)
+            stats = percentiles(latencies) if latencies else {}
+            stats.update(
+                requests=len(latencies) + failed,
+                throughput=(len(latencies) + failed) / elapsed,
+                error_rate=failed / (len(latencies) + failed),
+            )
+            endpoints[label] = stats
+        total = sum(stats['requests'] for stats in endpoints.values())
+        failed = sum(errors.values())
+        return {
+            'elapsed': elapsed,
+            'requests': total,
+            'throughput': total / elapsed if elapsed else 0.0,
+            'error_rate': failed / total if total else 0.0,
+            'endpoints': endpoints,
+            'server_rss': rss,
+        }
+
+    # Reporting
+
+    def _metadata(self, options):
+        try:
+            commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                                    capture_output=True, text=True).stdout.strip() or None
+            dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                        cwd=settings.BASE_DIR, capture_output=True, text=True).stdout.strip())
+        except OSError:
+            commit, dirty = None, None
+        return {
+            'commit': commit,
+            'uncommitted_changes': dirty,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'target': options['url'] or options['profile'],
+            **{key: options[key] for key in ('concurrency', 'duration', 'requests', 'warmup', 'mix', 'sizes',
+                                             'seed', 'repeat_documents')},
+        }
+
+    def _print(self, results, baseline):
+        previous = (baseline or {}).get('results', {}).get('endpoints', {})
+        self.stdout.write(
+            f"{'endpoint':<14} {'requests':>9} {'req/s':>8} {'errors':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8}"
+            + (f" {'Δ req/s':>9} {'Δ p99':>8}" if baseline else '')
+        )
+        for label, stats in results['endpoints'].items():
+            line = (
+                f"{label:<14} {stats['requests']:>9} {stats['throughput']:>8.1f} {stats['error_rate']:>7.1%} "
+                + ' '.join(f"{stats[key]:>8.2f}" if key in stats else f"{'-':>8}"
+                           for key in ('p50', 'p95', 'p99', 'mean'))
+            )
+            if baseline:
+                line += ' ' + _change(stats, previous.get(label), 'throughput') + ' ' + \
+                    _change(stats, previous.get(label), 'p99')
+            self.stdout.write(line)
+
+        summary = (f"{results['requests']} requests in {results['elapsed']:.1f}s: "
+                   f"{results['throughput']:.1f} req/s, {results['error_rate']:.1%} errors")
+        rss = results['server_rss']
+        if rss:
+            summary += f"; server RSS {rss['start_mb']:.0f} MB -> {rss['end_mb']:.0f} MB (peak {rss['peak_mb']:.0f} MB)"
+        self.stdout.write(summary)
+
+
+def _label_order(label):
+    kind, _, size = label.partition(' ')
+    return ('document', 'line', 'history').index(kind), int(size[:-1]) if size else 0
+
+
+def _change(stats, before, key):
+    if not before or key not in stats or not before.get(key):
+        return f"{'-':>9}" if key == 'throughput' else f"{'-':>8}"
+    width = 9 if key == 'throughput' else 8
+    return f"{(stats[key] - before[key]) / before[key]:>+{width}.1%}"
+
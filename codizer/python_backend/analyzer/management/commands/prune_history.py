@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analyzer.models import CodeAnalysis
+from analyzer.rollups import DEFAULT_CHUNK_SIZE, prune_history
+
+
+class Command(BaseCommand):
+    help = ('Delete (or compact) analysis history older than the retention period, in chunks; '
+            'the rollup counts are kept. Defaults come from ANALYSIS_RETENTION')
+
+    def add_arguments(self, parser):
+        retention = getattr(settings, 'ANALYSIS_RETENTION', {})
+        parser.add_argument('--days', type=float, default=retention.get('days', 90),
+                            help='Keep this many days of raw history (default: %(default)s)')
+        parser.add_argument('--compact', action='store_true', default=retention.get('compact', False),
+                            help='Blank the code of old rows instead of deleting them')
+        parser.add_argument('--chunk-size', type=int, default=retention.get('chunk_size', DEFAULT_CHUNK_SIZE),
+                            help='Rows per transaction (default: %(default)s)')
+        parser.add_argument('--pause', type=float, default=retention.get('pause', 0.0),
+                            help='Seconds to sleep between chunks (default: %(default)s)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be pruned')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0 or options['chunk_size'] < 1:
+            raise CommandError('--days must not be negative and --chunk-size must be positive')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            stale = CodeAnalysis.objects.filter(analysis_date__lt=cutoff)
+            if options['compact']:
+                stale = stale.exclude(code='')
+            self.stdout.write(f"{stale.count()} analyses saved before {cutoff:%Y-%m-%d %H:%M} would be pruned")
+            return
+
+        pruned = prune_history(cutoff, compact=options['compact'], chunk_size=options['chunk_size'],
+                               pause=options['pause'])
+        action = 'Compacted' if options['compact'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f"{action} {pruned} analyses saved before {cutoff:%Y-%m-%d %H:%M}"))
@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from analyzer.function_index import query_functions
+
+
+class Command(BaseCommand):
+    help = 'Query the function complexity index, e.g. --min-time "O(n^2)" --path services/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-time', help='Minimum time complexity class, e.g. "O(n^2)"')
+        parser.add_argument('--min-space', help='Minimum space complexity class')
+        parser.add_argument('--root', help='Only functions of the project indexed from this root')
+        parser.add_argument('--path', help='Only functions under this path prefix')
+        parser.add_argument('--class-name', help='Only methods of this class')
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    def handle(self, *args, **options):
+        functions = query_functions(
+            min_time=options['min_time'],
+            min_space=options['min_space'],
+            path_prefix=options['path'],
+            class_name=options['class_name'],
+            root=options['root'],
+            limit=options['limit'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps([
+                {
+                    'root': f.root,
+                    'path': f.path,
+                    'qualified_name': f.qualified_name,
+                    'lineno': f.lineno,
+                    'end_lineno': f.end_lineno,
+                    'time_complexity': f.time_complexity,
+                    'space_complexity': f.space_complexity,
+                    'cyclomatic_complexity': f.cyclomatic_complexity,
+                }
+                for f in functions
+            ], indent=2))
+            return
+
+        for f in functions:
+            self.stdout.write(
+                f"{f.path}:{f.lineno}-{f.end_lineno} {f.qualified_name}  "
+                f"time {f.time_complexity}, space {f.space_complexity}, cc {f.cyclomatic_complexity}"
+            )
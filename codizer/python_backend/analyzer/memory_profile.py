@@ -0,0 +1,155 @@
+"""
+Empirical space complexity.
+
+Calls an entry function at increasing input sizes under tracemalloc and
+fits a growth class to the peak and retained allocations. Every size runs
+in a fresh spawned worker process, so allocations from earlier runs, the
+analyzer itself or a previous size's caches never show up in the numbers,
+and a runaway function can be stopped with a timeout.
+
+Arguments are built before tracing starts: the measurement is the space
+the function allocates on top of its input.
+"""
+import argparse
+import linecache
+import multiprocessing
+import os
+import sys
+import tracemalloc
+from collections import defaultdict
+
+from .line_tracer import call_arguments, fit_growth, load_module
+
+DEFAULT_SIZES = [256, 512, 1024, 2048]
+
+# Peak differences below this many bytes are allocator noise, not growth
+NOISE_BYTES = 1024
+
+# Frames kept per allocation so allocations made in library code can be
+# attributed to the line of the target file that caused them
+TRACE_FRAMES = 32
+
+
+def _site(traceback, filename):
+    """The most recent frame of traceback inside filename, else the most recent frame."""
+    for frame in reversed(traceback):
+        if os.path.abspath(frame.filename) == filename:
+            return frame.filename, frame.lineno
+    frame = traceback[-1]
+    return frame.filename, frame.lineno
+
+
+def measure(path, function_name, call, n, top=5):
+    """Worker entry point: one call at size n under tracemalloc."""
+    _, module_globals = load_module(path)
+    function = module_globals[function_name]
+    args = call_arguments(function, module_globals, call, n)
+
+    tracemalloc.start(TRACE_FRAMES)
+    try:
+        result = function(*args)
+        retained, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ])
+    finally:
+        tracemalloc.stop()
+    del result
+
+    # Group what is still alive after the call by the target-file line that allocated it
+    filename = os.path.abspath(path)
+    sites = defaultdict(lambda: [0, 0])
+    for stat in snapshot.statistics('traceback'):
+        site = sites[_site(stat.traceback, filename)]
+        site[0] += stat.size
+        site[1] += stat.count
+    ranked = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[:top]
+
+    return {
+        'n': n,
+        'peak': peak,
+        'retained': retained,
+        'sites': [
+            {
+                'file': site_file,
+                'line': lineno,
+                'code': linecache.getline(site_file, lineno).strip(),
+                'size': size,
+                'count': count,
+            }
+            for (site_file, lineno), (size, count) in ranked
+        ],
+    }
+
+
+def fit_space(sizes, values):
+    """Growth class of byte counts, treating differences below NOISE_BYTES as constant."""
+    if max(values) - min(values) < NOISE_BYTES:
+        return 'O(1)'
+    return fit_growth(sizes, values)
+
+
+def profile_function(path, function_name, sizes, call=None, timeout=60, top=5):
+    """Measure every size in its own worker and fit peak and retained growth."""
+    context = multiprocessing.get_context('spawn')
+    measurements = []
+    for n in sizes:
+        with context.Pool(1) as pool:
+            pending = pool.apply_async(measure, (os.path.abspath(path), function_name, call, n, top))
+            measurements.append(pending.get(timeout))
+
+    return {
+        'function': function_name,
+        'sizes': sizes,
+        'measurements': measurements,
+        'peak_complexity': fit_space(sizes, [m['peak'] for m in measurements]),
+        'retained_complexity': fit_space(sizes, [m['retained'] for m in measurements]),
+    }
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='analyze_complexity.py memory',
+        description='Measure allocations of a function at increasing input sizes and fit its space complexity.'
+    )
+    parser.add_argument('path', help='Python file defining the function')
+    parser.add_argument('--function', required=True, help='Function to call')
+    parser.add_argument('--call', help="Argument expression evaluated with n in the file's globals, e.g. \"list(range(n))\"")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated input sizes (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds allowed per size (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=5, help='Allocation sites to show (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    if len(sizes) < 3:
+        parser.error('at least three sizes are needed to fit a growth class')
+
+    try:
+        report = profile_function(args.path, args.function, sizes, args.call, args.timeout, args.top)
+    except multiprocessing.TimeoutError:
+        print(f"Error: a call did not finish within {args.timeout}s", file=sys.stderr)
+        return 2
+
+    print(f"Memory profile of {args.function} in {args.path}")
+    print(f"{'n':>8}  {'peak':>12}  {'retained':>12}")
+    for m in report['measurements']:
+        print(f"{m['n']:>8}  {_format_bytes(m['peak']):>12}  {_format_bytes(m['retained']):>12}")
+    print(f"Peak space: {report['peak_complexity']}   Retained space: {report['retained_complexity']}")
+
+    largest = report['measurements'][-1]
+    if largest['sites']:
+        print(f"Top allocation sites still alive after the call at n={largest['n']}:")
+        for site in largest['sites']:
+            print(f"  {_format_bytes(site['size']):>10}  {site['count']:>7} blocks  "
+                  f"{os.path.basename(site['file'])}:{site['line']}  {site['code']}")
+    return 0
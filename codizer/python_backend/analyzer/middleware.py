@@ -0,0 +1,91 @@
+import gzip
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import BadRequest, RequestDataTooBig
+from django.http import HttpResponse
+from django.middleware.gzip import GZipMiddleware
+
+
+class _DecompressedStream:
+    """
+    File-like view of a gzip request body, decompressed as it is read and
+    capped at DATA_UPLOAD_MAX_MEMORY_SIZE bytes of decompressed data.
+    """
+
+    def __init__(self, stream, limit):
+        self._gzip = gzip.GzipFile(fileobj=stream, mode='rb')
+        self._limit = limit
+        self._read = 0
+
+    def _count(self, data):
+        self._read += len(data)
+        if self._limit is not None and self._read > self._limit:
+            raise RequestDataTooBig('Decompressed request body exceeded settings.DATA_UPLOAD_MAX_MEMORY_SIZE.')
+        return data
+
+    def _guard(self, method, *args):
+        try:
+            return self._count(method(*args))
+        except (OSError, EOFError, zlib.error) as e:
+            raise BadRequest(f'Malformed gzip request body: {e}')
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            # Read in bounded chunks so the size limit is checked before everything is inflated
+            chunks = []
+            while True:
+                chunk = self._guard(self._gzip.read, 64 * 1024)
+                if not chunk:
+                    return b''.join(chunks)
+                chunks.append(chunk)
+        return self._guard(self._gzip.read, size)
+
+    def readline(self, size=-1):
+        return self._guard(self._gzip.readline, size)
+
+    def close(self):
+        self._gzip.close()
+
+
+class DecompressRequestMiddleware:
+    """Accept gzip-encoded request bodies (Content-Encoding: gzip)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Stay async under ASGI so async views are not pushed through a thread
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _rejection(self, request):
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '').strip().lower()
+        if encoding in ('gzip', 'x-gzip'):
+            # The body has not been read yet, so parsers will pull from the decompressing stream
+            request._stream = _DecompressedStream(request._stream, settings.DATA_UPLOAD_MAX_MEMORY_SIZE)
+            del request.META['HTTP_CONTENT_ENCODING']
+        elif encoding and encoding != 'identity':
+            return HttpResponse(f'Unsupported Content-Encoding: {encoding}', status=415)
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._rejection(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self._rejection(request) or await self.get_response(request)
+
+
+class CompressResponseMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware, except for event streams: gzip buffers its output, which
+    would hold back progressive events until the stream ends.
+    """
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('root', models.CharField(max_length=1024)),
+                ('path', models.CharField(max_length=1024)),
+                ('size', models.BigIntegerField()),
+                ('mtime_ns', models.BigIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('root', 'path'), name='unique_indexed_file_per_root')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FunctionComplexity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('root', models.CharField(max_length=1024)),
+                ('path', models.CharField(max_length=1024)),
+                ('qualified_name', models.CharField(max_length=512)),
+                ('class_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('lineno', models.IntegerField()),
+                ('end_lineno', models.IntegerField()),
+                ('time_complexity', models.CharField(max_length=50)),
+                ('space_complexity', models.CharField(max_length=50)),
+                ('time_rank', models.IntegerField()),
+                ('space_rank', models.IntegerField()),
+                ('cyclomatic_complexity', models.IntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['time_rank', 'path'], name='function_time_path_idx'), models.Index(fields=['space_rank', 'path'], name='function_space_path_idx'), models.Index(fields=['class_name'], name='function_class_idx')],
+                'constraints': [models.UniqueConstraint(fields=('root', 'path', 'qualified_name'), name='unique_function_per_path')],
+            },
+        ),
+    ]
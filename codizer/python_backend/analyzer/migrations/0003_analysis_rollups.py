@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:59
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+
+def backfill_rollups(apps, schema_editor):
+    """Count the analyses saved before rollups existed."""
+    CodeAnalysis = apps.get_model('analyzer', 'CodeAnalysis')
+    AnalysisRollup = apps.get_model('analyzer', 'AnalysisRollup')
+    buckets = (
+        CodeAnalysis.objects
+        .annotate(bucket=TruncHour('analysis_date'))
+        .values('bucket', 'language', 'time_complexity', 'space_complexity')
+        .annotate(total=Count('id'))
+    )
+    AnalysisRollup.objects.bulk_create(
+        (
+            AnalysisRollup(
+                bucket_start=row['bucket'], language=row['language'], time_complexity=row['time_complexity'],
+                space_complexity=row['space_complexity'], count=row['total']
+            )
+            for row in buckets.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0002_function_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('language', models.CharField(max_length=50)),
+                ('time_complexity', models.CharField(max_length=50)),
+                ('space_complexity', models.CharField(max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='codeanalysis',
+            index=models.Index(fields=['analysis_date'], name='analysis_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='analysisrollup',
+            constraint=models.UniqueConstraint(fields=('bucket_start', 'language', 'time_complexity', 'space_complexity'), name='unique_rollup_bucket'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
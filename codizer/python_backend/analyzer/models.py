@@ -9,5 +9,80 @@ class CodeAnalysis(models.Model):
     space_complexity = models.CharField(max_length=50)
     analysis_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves the history endpoint and the retention job's age scans
+            models.Index(fields=['analysis_date'], name='analysis_date_idx'),
+        ]
+
     def __str__(self):
         return f"Analysis of {self.language} code on {self.analysis_date}"
+
+
+class AnalysisRollup(models.Model):
+    """Number of analyses per hour, language, time class and space class, kept current as they are saved."""
+    bucket_start = models.DateTimeField()
+    language = models.CharField(max_length=50)
+    time_complexity = models.CharField(max_length=50)
+    space_complexity = models.CharField(max_length=50)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bucket_start', 'language', 'time_complexity', 'space_complexity'],
+                name='unique_rollup_bucket'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.bucket_start} {self.language} {self.time_complexity}/{self.space_complexity}: {self.count}"
+
+
+class IndexedFile(models.Model):
+    """A source file in the function index, used to skip unchanged files."""
+    # Absolute project root the file was indexed under; path is relative to it
+    root = models.CharField(max_length=1024)
+    path = models.CharField(max_length=1024)
+    size = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    content_hash = models.CharField(max_length=64)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['root', 'path'], name='unique_indexed_file_per_root'),
+        ]
+
+    def __str__(self):
+        return self.path
+
+
+class FunctionComplexity(models.Model):
+    """One row per function in the project-wide complexity index."""
+    root = models.CharField(max_length=1024)
+    path = models.CharField(max_length=1024)
+    qualified_name = models.CharField(max_length=512)
+    class_name = models.CharField(max_length=255, null=True, blank=True)
+    lineno = models.IntegerField()
+    end_lineno = models.IntegerField()
+    time_complexity = models.CharField(max_length=50)
+    space_complexity = models.CharField(max_length=50)
+    # Sortable forms of the complexity classes, see complexity_rank()
+    time_rank = models.IntegerField()
+    space_rank = models.IntegerField()
+    cyclomatic_complexity = models.IntegerField()
+    content_hash = models.CharField(max_length=64)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['root', 'path', 'qualified_name'], name='unique_function_per_path'),
+        ]
+        indexes = [
+            models.Index(fields=['time_rank', 'path'], name='function_time_path_idx'),
+            models.Index(fields=['space_rank', 'path'], name='function_space_path_idx'),
+            models.Index(fields=['class_name'], name='function_class_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.path}:{self.qualified_name} {self.time_complexity}"
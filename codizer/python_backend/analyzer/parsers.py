@@ -0,0 +1,53 @@
+import codecs
+
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import json
+
+# Bytes read from the request stream at a time
+CHUNK_SIZE = 64 * 1024
+
+
+def load_json(stream, encoding, limit=None, strict=True):
+    """
+    Read, decode and parse JSON from a file-like stream, raising
+    RequestDataTooBig as soon as more than limit bytes have been read and
+    ValueError on invalid JSON. The decoded text is parsed in one piece.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = []
+    size = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if limit is not None and size > limit:
+            raise RequestDataTooBig('Request body exceeded settings.DATA_UPLOAD_MAX_MEMORY_SIZE.')
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b'', final=True))
+    return json.loads(''.join(parts), parse_constant=json.strict_constant if strict else None)
+
+
+class SizeLimitedJSONParser(BaseParser):
+    """
+    JSONParser with a size limit. DRF's JSONParser reads the whole request
+    stream whatever its length, since Django only checks
+    DATA_UPLOAD_MAX_MEMORY_SIZE when request.body is accessed; this parser
+    reads in chunks and stops with RequestDataTooBig once the body (or,
+    under DecompressRequestMiddleware, the inflated body) passes the limit.
+    """
+    media_type = 'application/json'
+    renderer_class = JSONRenderer
+    strict = True
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            return load_json(stream, encoding, settings.DATA_UPLOAD_MAX_MEMORY_SIZE, self.strict)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
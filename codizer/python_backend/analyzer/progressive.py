@@ -0,0 +1,126 @@
+"""
+Progressive analysis for the streaming analyze endpoint.
+
+progressive_analysis yields (event, data) pairs in order of cost, so a
+client can render something within milliseconds and refine it as the
+rest arrives:
+
+    coarse    outline and loop-nesting estimate, no regex rules
+    function  one per function, as each finishes
+    lines     per-line results, LINES_PER_EVENT lines at a time
+    complete  the full analysis, identical to /api/analyze/
+"""
+import ast
+import time
+
+from .complexity_analyzer import TIER_FULL, AnalysisBudget
+from .loop_bounds import parse_lock
+
+# Forces the cheapest tier: annotations, name hints and loop nesting only
+COARSE_BUDGET = AnalysisBudget(line_analysis_chars=0, regex_chars=0)
+
+# Per-line results sent per 'lines' event
+LINES_PER_EVENT = 200
+
+# Number of lines above a line that analyze_single_line looks at, as in the CLI
+CONTEXT_LINES = 10
+
+
+def _complexities(result):
+    complexities = {
+        'time_complexity': result['time_complexity'],
+        'space_complexity': result['space_complexity'],
+    }
+    if 'size_variables' in result:
+        complexities['size_variables'] = result['size_variables']
+    if 'library_calls' in result:
+        complexities['library_calls'] = result['library_calls']
+    if 'io_in_loops' in result:
+        complexities['io_in_loops'] = result['io_in_loops']
+    if 'async_findings' in result:
+        complexities['async_findings'] = result['async_findings']
+    if 'vectorization' in result:
+        complexities['vectorization'] = result['vectorization']
+    return complexities
+
+
+def _shift_lines(complexities, offset):
+    """Move the 'line' of every finding by offset, e.g. from a function's own lines to the file's."""
+    for key, value in complexities.items():
+        if isinstance(value, list):
+            complexities[key] = [dict(item, line=item['line'] + offset) if 'line' in item else item for item in value]
+    return complexities
+
+
+def outline(tree):
+    """Top-level classes and functions with their 1-based line spans."""
+    items = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            items.append({
+                'kind': 'class' if isinstance(node, ast.ClassDef) else 'function',
+                'name': node.name,
+                'lineno': node.lineno,
+                'end_lineno': node.end_lineno,
+            })
+    return items
+
+
+def progressive_analysis(analyzer, code, language, budget=None):
+    """Yield (event, data) pairs, cheapest first, ending with ('complete', result)."""
+    budget = budget or AnalysisBudget()
+    deadline = budget.deadline()
+    degraded = False
+
+    try:
+        with parse_lock:
+            tree = ast.parse(code) if language.lower() == 'python' else None
+    except (SyntaxError, RecursionError, MemoryError):
+        # Invalid, or nested too deeply for the parser to build a tree
+        tree = None
+
+    coarse = analyzer.analyze_code(code, language, COARSE_BUDGET)
+    yield 'coarse', dict(_complexities(coarse), outline=outline(tree) if tree else None)
+
+    lines = code.split('\n')
+    if tree is not None:
+        functions = [
+            node for node in ast.walk(tree)
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        ]
+        functions.sort(key=lambda node: node.lineno)
+        for node in functions:
+            if time.monotonic() > deadline:
+                degraded = True
+                break
+            function_code = '\n'.join(lines[node.lineno - 1:node.end_lineno])
+            result = analyzer.analyze_code(function_code, language, budget)
+            degraded = degraded or result.get('degraded', False)
+            # The function was analyzed on its own, so its findings count lines from its def
+            yield 'function', dict(
+                _shift_lines(_complexities(result), node.lineno - 1),
+                name=node.name, lineno=node.lineno, end_lineno=node.end_lineno,
+            )
+
+    if language.lower() == 'python' and budget.tier_for(code) == TIER_FULL:
+        batch = []
+        for i, line in enumerate(lines, 1):
+            if time.monotonic() > deadline:
+                degraded = True
+                break
+            if not line.strip():
+                continue
+            context = {'lines_above': lines[max(0, i - 1 - CONTEXT_LINES):i - 1]}
+            result = analyzer.analyze_single_line(line, context, budget)
+            degraded = degraded or result.get('degraded', False)
+            batch.append(dict(_complexities(result), line=i))
+            if len(batch) == LINES_PER_EVENT:
+                yield 'lines', {'lines': batch}
+                batch = []
+        if batch:
+            yield 'lines', {'lines': batch}
+    elif language.lower() == 'python':
+        degraded = True
+
+    result = analyzer.analyze_code(code, language, budget)
+    yield 'complete', dict(_complexities(result), degraded=degraded or result.get('degraded', False))
@@ -0,0 +1,21 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+def format_event(event, data):
+    """One Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode('utf-8')
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets views negotiate text/event-stream. Successful responses stream
+    their own events; this only renders error responses, as an 'error' event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event('error', data)
@@ -0,0 +1,104 @@
+"""
+Rollups and retention for the analysis history.
+
+AnalysisRollup holds one row per hour, language, time class and space
+class with the number of analyses saved in it. record_analysis saves a
+CodeAnalysis and counts it in the same transaction, so questions such as
+"O(n^2) submissions per language per day" read a few rollup rows instead
+of scanning the history. prune_history bounds the raw table: it deletes
+(or compacts, dropping the code) rows older than a cutoff, a chunk at a
+time in short transactions so writers are never held up for long. Pruned
+rows stay counted in the rollups.
+"""
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMonth
+
+from .models import AnalysisRollup, CodeAnalysis
+
+# Granularities the rollup endpoint can group by
+PERIODS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+    'month': TruncMonth,
+}
+
+# Raw rows deleted or compacted per transaction
+DEFAULT_CHUNK_SIZE = 500
+
+
+def bucket_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def record_analysis(analysis):
+    """Save an unsaved CodeAnalysis and count it in its rollup bucket."""
+    with transaction.atomic():
+        analysis.save()
+        key = {
+            'bucket_start': bucket_start(analysis.analysis_date),
+            'language': analysis.language,
+            'time_complexity': analysis.time_complexity,
+            'space_complexity': analysis.space_complexity,
+        }
+        if AnalysisRollup.objects.filter(**key).update(count=F('count') + 1):
+            return
+        try:
+            # Savepoint, so a lost race does not abort the outer transaction
+            with transaction.atomic():
+                AnalysisRollup.objects.create(count=1, **key)
+        except IntegrityError:
+            # Another request created the bucket first
+            AnalysisRollup.objects.filter(**key).update(count=F('count') + 1)
+
+
+def rollup_counts(period='day', language=None, time_complexity=None, since=None, until=None):
+    """
+    Analysis counts grouped by period bucket, language, time and space
+    class, oldest bucket first. since/until bound the bucket start
+    (inclusive/exclusive).
+    """
+    queryset = AnalysisRollup.objects.all()
+    if language:
+        queryset = queryset.filter(language=language)
+    if time_complexity:
+        queryset = queryset.filter(time_complexity=time_complexity)
+    if since:
+        queryset = queryset.filter(bucket_start__gte=since)
+    if until:
+        queryset = queryset.filter(bucket_start__lt=until)
+    return (
+        queryset
+        .annotate(bucket=PERIODS[period]('bucket_start'))
+        .values('bucket', 'language', 'time_complexity', 'space_complexity')
+        .annotate(count=Sum('count'))
+        .order_by('bucket', 'language', 'time_complexity', 'space_complexity')
+    )
+
+
+def prune_history(cutoff, compact=False, chunk_size=DEFAULT_CHUNK_SIZE, pause=0.0):
+    """
+    Delete history rows saved before cutoff, or with compact blank their
+    code and keep the rest. Works through chunk_size rows per transaction,
+    sleeping pause seconds between chunks so other writers get the lock.
+    Returns the number of rows pruned.
+    """
+    stale = CodeAnalysis.objects.filter(analysis_date__lt=cutoff)
+    if compact:
+        stale = stale.exclude(code='')
+    pruned = 0
+    while True:
+        ids = list(stale.order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return pruned
+        with transaction.atomic():
+            chunk = CodeAnalysis.objects.filter(id__in=ids)
+            if compact:
+                chunk.update(code='')
+            else:
+                chunk.delete()
+        pruned += len(ids)
+        if pause:
+            time.sleep(pause)
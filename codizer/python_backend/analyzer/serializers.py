@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import CodeAnalysis
+from .models import CodeAnalysis, FunctionComplexity
 
 class CodeAnalysisSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,4 +8,28 @@ class CodeAnalysisSerializer(serializers.ModelSerializer):
 
 class CodeAnalysisRequestSerializer(serializers.Serializer):
     code = serializers.CharField(required=True)
-    language = serializers.CharField(required=True) 
\ No newline at end of file
+    language = serializers.CharField(required=True)
+    # Optional: identify the editor document so superseded versions can be dropped
+    client_id = serializers.CharField(required=False, allow_blank=True, default='')
+    document_id = serializers.CharField(required=False)
+    version = serializers.IntegerField(required=False)
+
+class RollupQuerySerializer(serializers.Serializer):
+    period = serializers.ChoiceField(choices=['hour', 'day', 'month'], required=False, default='day')
+    language = serializers.CharField(required=False)
+    time_complexity = serializers.CharField(required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+class AnalysisRollupSerializer(serializers.Serializer):
+    bucket = serializers.DateTimeField()
+    language = serializers.CharField()
+    time_complexity = serializers.CharField()
+    space_complexity = serializers.CharField()
+    count = serializers.IntegerField()
+
+class FunctionComplexitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FunctionComplexity
+        fields = ['root', 'path', 'qualified_name', 'class_name', 'lineno', 'end_lineno', 'time_complexity',
+                  'space_complexity', 'cyclomatic_complexity', 'content_hash']
@@ -0,0 +1,137 @@
+"""
+Analyze-request handling shared by the DRF views and the lean API views.
+
+Both front ends validate and serialize on their own but go through these
+helpers, so they coalesce identical requests, drop superseded document
+versions, apply the analysis budget and consult the persistent analysis
+cache in exactly the same way.
+"""
+import inspect
+import json
+
+from django.conf import settings
+
+from .analysis_cache import AnalysisCache, content_hash, source_version
+from .async_calls import async_findings
+from .complexity_analyzer import AnalysisBudget, AnalysisCancelled, ComplexityAnalyzer
+from .cost_models import default_registry
+from .io_loops import io_in_loops
+from .line_structure import line_structure
+from .loop_bounds import loop_cost
+from .models import CodeAnalysis
+from .singleflight import DocumentVersions, SingleFlight, Superseded
+from .vectorization import vectorization_candidates
+
+# Site-specific library cost models, on top of the built-in ones
+for plugin in getattr(settings, 'COST_MODEL_PLUGINS', ()):
+    default_registry.register(plugin)
+
+# Initialize the analyzer
+complexity_analyzer = ComplexityAnalyzer()
+analysis_budget = AnalysisBudget(**getattr(settings, 'ANALYSIS_BUDGET', {}))
+
+# Identical in-flight analyses share one computation; older document versions are dropped
+analysis_flight = SingleFlight()
+document_versions = DocumentVersions()
+
+# Results of code analyzed before, by this or another process, are a lookup away
+analysis_cache = AnalysisCache(**getattr(settings, 'ANALYSIS_CACHE', {}))
+ANALYZER_VERSION = source_version(
+    inspect.getfile(ComplexityAnalyzer), inspect.getfile(line_structure), inspect.getfile(loop_cost),
+    inspect.getfile(io_in_loops), inspect.getfile(async_findings), inspect.getfile(vectorization_candidates),
+    extra=json.dumps([vars(analysis_budget), default_registry.fingerprint()], sort_keys=True)
+)
+
+# Entries returned by the history endpoint
+HISTORY_LIMIT = 20
+
+
+def document_key(validated_data):
+    """(client, document) key when the request identifies an editor document, else None."""
+    if validated_data.get('document_id') is None or validated_data.get('version') is None:
+        return None
+    return (validated_data['client_id'], validated_data['document_id'])
+
+
+def superseded_payload(key):
+    return {
+        'detail': 'Superseded by a newer version of this document',
+        'latest_version': document_versions.latest(key)
+    }
+
+
+def analyze(code, language, key=None, version=None):
+    """
+    Return (result, shared). Raises Superseded when a newer version of the
+    document was submitted before or while this one was analyzed.
+    """
+    # Latest wins: drop requests for a version older than one already seen
+    if key is not None and not document_versions.claim(key, version):
+        raise Superseded()
+
+    def is_superseded():
+        return key is not None and document_versions.is_superseded(key, version)
+
+    # Share the work with identical requests in flight; it stops early once all of them are superseded
+    flight_key = (language.lower(), content_hash(code))
+    result, shared = analysis_flight.do(
+        flight_key,
+        lambda cancelled: cached_analysis(code, language, flight_key, cancelled),
+        abandon=is_superseded
+    )
+    if is_superseded():
+        raise Superseded()
+    return result, shared
+
+
+def cached_analysis(code, language, flight_key, cancelled=None):
+    """
+    Analyze code, or return the cached result of an earlier identical
+    analysis. Raises Superseded if cancelled() turns True while analyzing.
+    """
+    namespace = f'api:{flight_key[0]}'
+    result = analysis_cache.get(namespace, '', flight_key[1], ANALYZER_VERSION)
+    if result is not None:
+        return result
+    try:
+        result = complexity_analyzer.analyze_code(code, language, analysis_budget, cancelled)
+    except AnalysisCancelled:
+        raise Superseded()
+    # Degraded results depend on how long this run took; only full ones are kept
+    if not result.get('degraded'):
+        analysis_cache.put(namespace, '', flight_key[1], ANALYZER_VERSION, result)
+    return result
+
+
+def analysis_record(code, language, result):
+    """Unsaved history row for a computed result."""
+    return CodeAnalysis(
+        code=code,
+        language=language,
+        time_complexity=result['time_complexity'],
+        space_complexity=result['space_complexity']
+    )
+
+
+def result_payload(result):
+    payload = {
+        'time_complexity': result['time_complexity'],
+        'space_complexity': result['space_complexity'],
+        'degraded': result.get('degraded', False)
+    }
+    if 'size_variables' in result:
+        # What each variable in time_complexity measures, e.g. {'n': 'len(arr)'}
+        payload['size_variables'] = result['size_variables']
+    if 'library_calls' in result:
+        payload['library_calls'] = result['library_calls']
+    if 'io_in_loops' in result:
+        payload['io_in_loops'] = result['io_in_loops']
+    if 'async_findings' in result:
+        payload['async_findings'] = result['async_findings']
+    if 'vectorization' in result:
+        payload['vectorization'] = result['vectorization']
+    return payload
+
+
+def recent_analyses():
+    return CodeAnalysis.objects.all().order_by('-analysis_date')[:HISTORY_LIMIT]
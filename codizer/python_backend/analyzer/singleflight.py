@@ -0,0 +1,111 @@
+"""
+Request coalescing for the analyze API.
+
+SingleFlight runs one computation per key and hands the result to every
+caller that asks for the same key while it is in flight, and lets the
+computation stop early once every one of them has been superseded.
+DocumentVersions remembers the newest version seen for each client
+document so that requests made obsolete by a later edit can be dropped.
+"""
+import threading
+from collections import OrderedDict
+
+
+class Superseded(Exception):
+    """Raised when a newer version of the same document has been submitted."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandons = []  # abandon() of each caller still waiting, None if it never abandons
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key."""
+
+    # How often a waiting caller re-checks whether it has been superseded
+    POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, abandon=None):
+        """
+        Return (result, shared). The first caller for a key runs
+        fn(cancelled); callers arriving while it runs wait for that result
+        and get shared=True. A waiting caller whose abandon() returns True
+        stops waiting and gets Superseded instead. cancelled() is True once
+        every caller, the one running fn included, would abandon, so fn can
+        stop early by raising Superseded.
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _Call()
+                    self._calls[key] = call
+                call.abandons.append(abandon)
+
+            if leader:
+                break
+            while not call.done.wait(self.POLL_INTERVAL):
+                if abandon and abandon():
+                    with self._lock:
+                        call.abandons.remove(abandon)
+                    raise Superseded()
+            if isinstance(call.error, Superseded) and not (abandon and abandon()):
+                # Cancelled for the callers before this one; run it again
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        def cancelled():
+            with self._lock:
+                abandons = list(call.abandons)
+            return all(abandon is not None and abandon() for abandon in abandons)
+
+        try:
+            call.result = fn(cancelled)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class DocumentVersions:
+    """Track the latest version submitted for each (client, document) pair."""
+
+    def __init__(self, max_documents=10000):
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        self._latest = OrderedDict()
+
+    def claim(self, key, version):
+        """Record version for key. Returns False if a newer one was already seen."""
+        with self._lock:
+            latest = self._latest.get(key)
+            if latest is not None and version < latest:
+                return False
+            self._latest[key] = version
+            self._latest.move_to_end(key)
+            if len(self._latest) > self.max_documents:
+                self._latest.popitem(last=False)
+            return True
+
+    def latest(self, key):
+        with self._lock:
+            return self._latest.get(key)
+
+    def is_superseded(self, key, version):
+        latest = self.latest(key)
+        return latest is not None and version < latest
@@ -0,0 +1,6 @@
+import textwrap
+
+
+def snippet(code):
+    """Dedent a triple-quoted code sample and end it with a single newline."""
+    return textwrap.dedent(code).strip() + '\n'
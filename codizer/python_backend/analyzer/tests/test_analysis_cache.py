@@ -0,0 +1,122 @@
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import service
+from ..analysis_cache import AnalysisCache, content_hash, source_version
+from . import snippet
+
+
+class AnalysisCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.cache = AnalysisCache(os.path.join(self.dir, 'cache', 'results.sqlite3'))
+
+    def test_round_trip(self):
+        self.assertIsNone(self.cache.get('cli', 'a.py', 'h1', 'v1'))
+        self.cache.put('cli', 'a.py', 'h1', 'v1', {'time_complexity': 'O(n)'})
+        self.assertEqual(self.cache.get('cli', 'a.py', 'h1', 'v1'), {'time_complexity': 'O(n)'})
+        # Every key part counts
+        for key in (('api', 'a.py', 'h1', 'v1'), ('cli', 'b.py', 'h1', 'v1'),
+                    ('cli', 'a.py', 'h2', 'v1'), ('cli', 'a.py', 'h1', 'v2')):
+            self.assertIsNone(self.cache.get(*key))
+
+    def test_put_replaces(self):
+        self.cache.put('cli', 'a.py', 'h1', 'v1', {'n': 1})
+        self.cache.put('cli', 'a.py', 'h1', 'v1', {'n': 2})
+        self.assertEqual(self.cache.get('cli', 'a.py', 'h1', 'v1'), {'n': 2})
+
+    def test_shared_between_instances(self):
+        self.cache.put('cli', 'a.py', 'h1', 'v1', [1, 2])
+        self.assertEqual(AnalysisCache(self.cache.path).get('cli', 'a.py', 'h1', 'v1'), [1, 2])
+
+    def test_evicts_least_recently_used(self):
+        cache = AnalysisCache(self.cache.path, max_bytes=100)
+        for name, accessed in (('old', 1.0), ('new', 2.0)):
+            with mock.patch('time.time', return_value=accessed):
+                cache.put('cli', name, 'h', 'v', 'x' * 40)
+        with mock.patch('time.time', return_value=3.0):
+            cache.put('cli', 'newest', 'h', 'v', 'x' * 40)
+        self.assertIsNone(cache.get('cli', 'old', 'h', 'v'))
+        self.assertEqual(cache.get('cli', 'new', 'h', 'v'), 'x' * 40)
+        self.assertEqual(cache.get('cli', 'newest', 'h', 'v'), 'x' * 40)
+
+    def test_oversized_results_are_not_stored(self):
+        cache = AnalysisCache(self.cache.path, max_bytes=10)
+        cache.put('cli', 'a.py', 'h', 'v', 'x' * 20)
+        self.assertIsNone(cache.get('cli', 'a.py', 'h', 'v'))
+
+    def test_unusable_database_is_a_miss(self):
+        # The database path is a directory
+        cache = AnalysisCache(self.dir)
+        cache.put('cli', 'a.py', 'h', 'v', 1)
+        self.assertIsNone(cache.get('cli', 'a.py', 'h', 'v'))
+        cache.clear()
+
+    def test_concurrent_writers(self):
+        def write(worker):
+            cache = AnalysisCache(self.cache.path)
+            for i in range(20):
+                cache.put('cli', f'{worker}/{i}.py', 'h', 'v', i)
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([self.cache.get('cli', f'3/{i}.py', 'h', 'v') for i in range(20)], list(range(20)))
+
+    def test_clear(self):
+        self.cache.put('cli', 'a.py', 'h', 'v', 1)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('cli', 'a.py', 'h', 'v'))
+
+    def test_source_version(self):
+        path = os.path.join(self.dir, 'analyzer.py')
+        with open(path, 'w') as f:
+            f.write('x = 1\n')
+        version = source_version(path)
+        self.assertEqual(source_version(path), version)
+        self.assertNotEqual(source_version(path, extra='budget'), version)
+        with open(path, 'w') as f:
+            f.write('x = 2\n')
+        self.assertNotEqual(source_version(path), version)
+
+    def test_content_hash_accepts_lone_surrogates(self):
+        self.assertNotEqual(content_hash('\udc80'), content_hash(''))
+
+
+class CachedAnalysisTests(SimpleTestCase):
+    CODE = snippet("""
+        def total(xs):
+            s = 0
+            for x in xs:
+                s += x
+            return s
+        """)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.object(service, 'analysis_cache', AnalysisCache(os.path.join(tmp.name, 'cache.sqlite3')))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_second_analysis_is_a_lookup(self):
+        flight_key = ('python', content_hash(self.CODE))
+        first = service.cached_analysis(self.CODE, 'python', flight_key)
+        with mock.patch.object(service.complexity_analyzer, 'analyze_code') as analyze_code:
+            self.assertEqual(service.cached_analysis(self.CODE, 'python', flight_key), first)
+        analyze_code.assert_not_called()
+
+    def test_degraded_results_are_not_stored(self):
+        flight_key = ('python', content_hash(self.CODE))
+        degraded = {'time_complexity': 'O(1)', 'space_complexity': 'O(1)', 'degraded': True}
+        with mock.patch.object(service.complexity_analyzer, 'analyze_code', return_value=degraded):
+            service.cached_analysis(self.CODE, 'python', flight_key)
+        self.assertIsNone(service.analysis_cache.get('api:python', '', flight_key[1], service.ANALYZER_VERSION))
@@ -0,0 +1,84 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..api_views import validate_request
+from ..management.commands.benchmark_api import percentiles
+from ..serializers import CodeAnalysisRequestSerializer
+from . import snippet
+
+CODE = snippet("""
+    def total(xs):
+        s = 0
+        for x in xs:
+            s += x
+        return s
+    """)
+
+
+class ValidateRequestTests(SimpleTestCase):
+    def test_matches_serializer(self):
+        cases = [
+            {'code': CODE, 'language': 'python'},
+            {'code': CODE, 'language': 'python', 'client_id': 'editor', 'document_id': 'a.py', 'version': '3'},
+            {'code': ' x ', 'language': 'python', 'version': 2.0},
+            {'language': 'python'},
+            {'code': '', 'language': None},
+            {'code': CODE, 'language': 'python', 'version': 'two'},
+            {'code': CODE, 'language': 'python', 'version': None},
+            {'code': ['x'], 'language': True},
+            ['not', 'a', 'dict'],
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                serializer = CodeAnalysisRequestSerializer(data=data)
+                validated, errors = validate_request(data)
+                if serializer.is_valid():
+                    self.assertEqual(validated, dict(serializer.validated_data))
+                else:
+                    self.assertEqual(errors, json.loads(json.dumps(serializer.errors)))
+
+
+class LeanProfileTests(TestCase):
+    def post(self, body, **extra):
+        return self.client.post('/api/analyze/', body, content_type='application/json', **extra)
+
+    def responses(self, method, *args, **extra):
+        """The same request to the DRF views and to the lean views."""
+        full = getattr(self.client, method)(*args, **extra)
+        with override_settings(ROOT_URLCONF='complexity_analyzer.api_urls'):
+            lean = getattr(self.client, method)(*args, **extra)
+        return full, lean
+
+    def test_same_responses(self):
+        for body in (json.dumps({'code': CODE, 'language': 'python'}), json.dumps({'language': 'python'}), '{"code":'):
+            with self.subTest(body=body):
+                full, lean = self.responses('post', '/api/analyze/', body, content_type='application/json')
+                self.assertEqual(lean.status_code, full.status_code)
+                self.assertEqual(lean.content, full.content)
+
+    def test_history(self):
+        self.post(json.dumps({'code': CODE, 'language': 'python'}))
+        full, lean = self.responses('get', '/api/history/')
+        self.assertEqual(lean.content, full.content)
+
+    def test_method_not_allowed(self):
+        full, lean = self.responses('get', '/api/analyze/')
+        self.assertEqual(lean.status_code, 405)
+        # DRF lists the allowed methods in set order
+        self.assertEqual(set(lean['Allow'].split(', ')), set(full['Allow'].split(', ')))
+
+
+class BenchmarkTests(SimpleTestCase):
+    def test_percentiles(self):
+        stats = percentiles([i / 1000 for i in range(1, 101)])
+        self.assertEqual((stats['p50'], stats['p99']), (51, 100))
+        self.assertAlmostEqual(stats['mean'], 50.5)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('benchmark_api', '--profile', 'lean', '--requests', '3', '--warmup', '1', '--json', stdout=out)
+        results = json.loads(out.getvalue())
+        self.assertEqual(set(results['lean']), {'analyze', 'history'})
@@ -0,0 +1,84 @@
+from django.test import SimpleTestCase, TestCase
+
+from ..async_calls import async_findings
+from . import snippet
+
+
+class AsyncFindingsTests(SimpleTestCase):
+    # (code, [(line, issue, call)])
+    CASES = [
+        ("""
+            async def fetch_all(client, urls):
+                results = []
+                for url in urls:
+                    results.append(await client.get(url))
+                return results
+            """, [(4, 'sequential-await', 'client.get')]),
+        ("""
+            import time
+
+            async def wait():
+                time.sleep(1)
+            """, [(4, 'blocking-call', 'time.sleep')]),
+        ("""
+            import asyncio
+
+            async def fetch_all(client, urls):
+                return await asyncio.gather(*[client.get(url) for url in urls])
+            """, [(4, 'unbounded-gather', 'asyncio.gather')]),
+        # A semaphore caps the fan-out
+        ("""
+            import asyncio
+
+            async def fetch_all(client, urls):
+                limit = asyncio.Semaphore(10)
+
+                async def one(url):
+                    async with limit:
+                        return await client.get(url)
+
+                return await asyncio.gather(*[one(url) for url in urls])
+            """, []),
+        # Each request needs the previous page's cursor
+        ("""
+            async def pages(client, count):
+                cursor = None
+                for _ in range(count):
+                    cursor = await client.get(cursor)
+                return cursor
+            """, []),
+        # Sorting a parameter stalls the loop, sorting a constant does not
+        ("""
+            async def ranked(scores):
+                return sorted(scores), sorted([3, 1, 2])
+            """, [(2, 'blocking-call', 'sorted')]),
+        # Only coroutines are checked
+        ("""
+            import time
+
+            def wait():
+                time.sleep(1)
+            """, []),
+    ]
+
+    def test_findings(self):
+        for code, expected in self.CASES:
+            with self.subTest(code=code):
+                found = async_findings(snippet(code))
+                self.assertEqual([(item['line'], item['issue'], item['call']) for item in found], expected)
+
+    def test_estimates_latency(self):
+        [found] = async_findings(snippet(self.CASES[0][0]))
+        self.assertEqual((found['kind'], found['multiplier']), ('await', 'len(urls)'))
+        self.assertTrue(found['latency'])
+        self.assertIn('gather', found['suggestion'])
+
+
+class AsyncFindingsResponseTests(TestCase):
+    def test_api_reports_async_findings(self):
+        code = snippet(AsyncFindingsTests.CASES[1][0])
+        response = self.client.post('/api/analyze/', {'code': code, 'language': 'python'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        [found] = response.json()['async_findings']
+        self.assertEqual((found['line'], found['issue']), (4, 'blocking-call'))
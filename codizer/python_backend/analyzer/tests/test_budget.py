@@ -0,0 +1,121 @@
+import json
+import time
+
+from django.test import SimpleTestCase, TestCase
+
+from ..complexity_analyzer import (
+    TIER_FULL, TIER_NO_LINES, TIER_NO_REGEX, AnalysisBudget, ComplexityAnalyzer
+)
+from . import snippet
+
+
+class BudgetTests(SimpleTestCase):
+    CODE = snippet("""
+        def fact(n):
+            if n < 2:
+                return 1
+            return n * fact(n - 1)
+        """)
+
+    def analyze(self, budget):
+        return ComplexityAnalyzer().analyze_code(self.CODE, 'python', budget)
+
+    def test_tier_for(self):
+        budget = AnalysisBudget(line_analysis_chars=10, regex_chars=20)
+        self.assertEqual(budget.tier_for('x' * 10), TIER_FULL)
+        self.assertEqual(budget.tier_for('x' * 11), TIER_NO_LINES)
+        self.assertEqual(budget.tier_for('x' * 21), TIER_NO_REGEX)
+
+    def test_clip_lines(self):
+        budget = AnalysisBudget(max_line_chars=3)
+        self.assertEqual(budget.clip_lines('abc\nd'), ('abc\nd', False))
+        self.assertEqual(budget.clip_lines('abcd\nd'), ('\nd', True))
+
+    def test_without_budget(self):
+        result = ComplexityAnalyzer().analyze_code(self.CODE, 'python')
+        self.assertNotIn('tier', result)
+        self.assertNotIn('degraded', result)
+
+    def test_within_budget(self):
+        full = self.analyze(AnalysisBudget())
+        self.assertEqual((full['tier'], full['degraded']), (TIER_FULL, False))
+        # Skipping per-line analysis leaves the whole-code result unchanged
+        partial = self.analyze(AnalysisBudget(line_analysis_chars=10))
+        self.assertEqual((partial['tier'], partial['degraded']), (TIER_NO_LINES, True))
+        self.assertEqual(partial['time_complexity'], full['time_complexity'])
+
+    def test_degraded_tiers(self):
+        for budget in (AnalysisBudget(line_analysis_chars=10, regex_chars=10), AnalysisBudget(time_limit=-1)):
+            result = self.analyze(budget)
+            self.assertEqual((result['tier'], result['degraded']), (TIER_NO_REGEX, True))
+
+    def test_clipped_lines_degrade(self):
+        code = self.CODE + 'x = "' + 'a' * 50 + '"\n'
+        result = ComplexityAnalyzer().analyze_code(code, 'python', AnalysisBudget(max_line_chars=40))
+        self.assertEqual((result['tier'], result['degraded']), (TIER_FULL, True))
+
+
+class DeadlineTests(SimpleTestCase):
+    # Results of the passes that run after loop_cost, each found in CODE
+    FINDINGS = ('io_in_loops', 'async_findings', 'vectorization')
+
+    CODE = snippet("""
+        import time
+
+        import requests
+
+        def fetch(hosts, paths):
+            for host in hosts:
+                for path in paths:
+                    requests.get(host + path)
+
+        async def pause():
+            time.sleep(1)
+
+        def total(xs):
+            s = 0
+            for x in xs:
+                s += x
+            return s
+        """)
+
+    def analyze(self, budget):
+        return ComplexityAnalyzer().analyze_code(self.CODE, 'python', budget)
+
+    def test_passes_run_within_the_deadline(self):
+        result = self.analyze(AnalysisBudget())
+        self.assertEqual((result['tier'], result['degraded']), (TIER_FULL, False))
+        self.assertEqual(result['time_complexity'], 'O(n·m)')
+        for key in self.FINDINGS:
+            self.assertIn(key, result)
+
+    def test_passes_stop_at_the_deadline(self):
+        result = self.analyze(AnalysisBudget(time_limit=-1))
+        self.assertEqual((result['tier'], result['degraded']), (TIER_NO_REGEX, True))
+        # Loop nesting from the line structure instead of traced bounds
+        self.assertNotIn('size_variables', result)
+        for key in self.FINDINGS:
+            self.assertNotIn(key, result)
+
+
+class RecursionCheckTests(SimpleTestCase):
+    def test_calls_itself(self):
+        analyzer = ComplexityAnalyzer()
+        self.assertTrue(analyzer._calls_itself('def walk(node): return walk(node.left)'))
+        self.assertFalse(analyzer._calls_itself('def walk(node): return node'))
+        # The backreference pattern also matched a name's one-letter prefix
+        self.assertFalse(analyzer._calls_itself('def send(x): return dumps(x)'))
+
+    def test_many_functions_stay_fast(self):
+        code = ''.join(f'def f{i}(x): return g(x, {i})\n' for i in range(100))
+        start = time.monotonic()
+        ComplexityAnalyzer().analyze_code(code, 'python', AnalysisBudget())
+        self.assertLess(time.monotonic() - start, 2)
+
+
+class DegradedResponseTests(TestCase):
+    def test_response_reports_degraded(self):
+        body = {'code': BudgetTests.CODE, 'language': 'python'}
+        response = self.client.post('/api/analyze/', json.dumps(body), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.json()['degraded'], False)
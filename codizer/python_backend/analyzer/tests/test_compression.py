@@ -0,0 +1,61 @@
+import gzip
+import json
+
+from django.test import TestCase, override_settings
+
+from . import snippet
+
+CODE = snippet("""
+    def pairs(xs):
+        for a in xs:
+            for b in xs:
+                print(a, b)
+    """)
+
+
+class CompressionTests(TestCase):
+    def post(self, path, body, **headers):
+        return self.client.post(path, body, content_type='application/json', **headers)
+
+    def test_gzip_request_body(self):
+        body = gzip.compress(json.dumps({'code': CODE, 'language': 'python'}).encode('utf-8'))
+        response = self.post('/api/analyze/', body, HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        plain = self.post('/api/analyze/', json.dumps({'code': CODE, 'language': 'python'}))
+        self.assertEqual(response.json(), plain.json())
+
+    def test_malformed_gzip(self):
+        response = self.post('/api/analyze/', b'not gzip', HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_json(self):
+        response = self.post('/api/analyze/', b'{"code": ')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+    def test_unsupported_encoding(self):
+        response = self.post('/api/analyze/', b'{}', HTTP_CONTENT_ENCODING='br')
+        self.assertEqual(response.status_code, 415)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_size_limit(self):
+        body = json.dumps({'code': CODE + '#' * 2048, 'language': 'python'}).encode('utf-8')
+        self.assertEqual(self.post('/api/analyze/', body).status_code, 400)
+        small = json.dumps({'code': CODE, 'language': 'python'}).encode('utf-8')
+        self.assertEqual(self.post('/api/analyze/', small).status_code, 200)
+        # The limit applies to the inflated size of a gzip body
+        response = self.post('/api/analyze/', gzip.compress(body), HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 400)
+
+    def test_compressed_response(self):
+        self.post('/api/analyze/', json.dumps({'code': CODE * 10, 'language': 'python'}))
+        response = self.client.get('/api/history/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))[0]['code'], (CODE * 10).strip())
+
+    def test_event_stream_is_not_compressed(self):
+        body = json.dumps({'code': CODE, 'language': 'python'})
+        response = self.post('/api/analyze/stream/', body, HTTP_ACCEPT='text/event-stream',
+                             HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn(b'event: complete', b''.join(response.streaming_content))
@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, TestCase
+
+from ..cost_models import CostModelRegistry
+from ..loop_bounds import loop_cost
+from . import snippet
+
+CASES = [
+    ('O(n log n)', 'pandas.DataFrame.sort_values', 'len(df)', """
+        import pandas as pd
+
+        def latest(df: pd.DataFrame):
+            return df.sort_values('t')
+        """),
+    ('O(n^3)', 'numpy.linalg.inv', 'len(m)', """
+        import numpy as np
+
+        def solve(m):
+            return np.linalg.inv(m)
+        """),
+    ('O(n log n)', 'numpy.sort', 'len(values)', """
+        from numpy import sort
+
+        def ordered(values):
+            return sort(values)
+        """),
+    ('O(n)', 'numpy.zeros', 'n', """
+        import numpy as np
+
+        def blank(n):
+            return np.zeros(n)
+        """),
+    # Chained through Model.objects and the lazy filter()
+    ('O(n)', 'django.db.models.QuerySet.count', 'len(Order.objects)', """
+        def pending(Order):
+            return Order.objects.filter(state='pending').count()
+        """),
+]
+
+
+class LibraryCallTests(SimpleTestCase):
+    def test_builtin_models(self):
+        for expected, model, size, code in CASES:
+            with self.subTest(model):
+                bounds = loop_cost(snippet(code))
+                self.assertEqual(bounds.complexity, expected)
+                [call] = bounds.library_calls
+                self.assertEqual((call['model'], call['complexity'], call['size']), (model, expected, size))
+
+    def test_calls_inside_loops(self):
+        bounds = loop_cost(snippet("""
+            def report(groups, df):
+                for group in groups:
+                    for row in df.iterrows():
+                        print(group, row)
+            """))
+        self.assertEqual(bounds.complexity, 'O(n·m)')
+
+    def test_unknown_calls_are_constant(self):
+        bounds = loop_cost(snippet("""
+            def latest(records):
+                return records.sort_by('t')
+            """))
+        self.assertEqual((bounds.complexity, bounds.library_calls), ('O(1)', []))
+
+
+class RegistryTests(SimpleTestCase):
+    def plugin(self, complexity='O(n^2)'):
+        return SimpleNamespace(MODULES=['geometry'], RULES=[
+            {'receiver': 'geometry', 'methods': ['hull'], 'complexity': complexity, 'note': 'Pairwise'},
+        ])
+
+    def test_plugin(self):
+        registry = CostModelRegistry()
+        before = registry.fingerprint()
+        registry.register(self.plugin())
+        self.assertNotEqual(registry.fingerprint(), before)
+        self.assertEqual(registry.call('geometry', 'hull').degree, 2)
+        bounds = loop_cost(snippet("""
+            import geometry
+
+            def outline(points):
+                return geometry.hull(points)
+            """), registry)
+        self.assertEqual(bounds.complexity, 'O(n^2)')
+        self.assertEqual(bounds.library_calls[0]['note'], 'Pairwise')
+
+    def test_invalid_plugin_leaves_tables_unchanged(self):
+        registry = CostModelRegistry(plugins=())
+        with self.assertRaises(ValueError):
+            registry.register(self.plugin('O(2^n)'))
+        self.assertEqual((registry.rules, registry.plugins), ({}, []))
+
+    def test_unknown_receivers(self):
+        registry = CostModelRegistry()
+        # '*' rules only answer for receivers of unknown type
+        self.assertIsNotNone(registry.call(None, 'iterrows'))
+        self.assertIsNone(registry.call('numpy.ndarray', 'iterrows'))
+        self.assertEqual(registry.attribute(None, 'objects'), 'django.db.models.Manager')
+
+
+class LibraryCallResponseTests(TestCase):
+    def test_api_reports_library_calls(self):
+        response = self.client.post('/api/analyze/', {'code': snippet(CASES[0][3]), 'language': 'python'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        [call] = response.json()['library_calls']
+        self.assertEqual((call['line'], call['call']), (4, 'df.sort_values'))
@@ -0,0 +1,115 @@
+import os
+import sys
+import tempfile
+
+from django.test import TestCase
+
+from ..extension_analyzer import EXTENSION_SRC
+from ..function_index import query_functions, update_index
+from ..models import FunctionComplexity, IndexedFile
+from . import snippet
+
+
+class FunctionIndexTests(TestCase):
+    def _project(self, files):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        for path, code in files.items():
+            with open(os.path.join(root.name, path), 'w') as f:
+                f.write(snippet(code))
+        return root.name
+
+    def test_roots_are_indexed_and_pruned_separately(self):
+        first = self._project({'app.py': """
+            def scan(xs):
+                for x in xs:
+                    print(x)
+            """})
+        second = self._project({'app.py': """
+            def pairs(xs):
+                for a in xs:
+                    for b in xs:
+                        print(a, b)
+            """})
+        update_index(first)
+        update_index(second)
+        # The same relative path in both projects
+        self.assertEqual(IndexedFile.objects.filter(path='app.py').count(), 2)
+        self.assertEqual([f.qualified_name for f in query_functions(root=first)], ['scan'])
+        self.assertEqual([f.qualified_name for f in query_functions(root=second)], ['pairs'])
+
+        os.remove(os.path.join(second, 'app.py'))
+        self.assertEqual(update_index(second)['removed'], 1)
+        self.assertEqual([f.qualified_name for f in FunctionComplexity.objects.all()], ['scan'])
+
+    def test_qualified_names(self):
+        root = self._project({'app.py': """
+            class Outer:
+                def method(self):
+                    return 1
+
+                class Inner:
+                    def method(self):
+                        return 2
+
+            def f(xs):
+                def g():
+                    return [x for x in xs]
+                return g
+
+            async def fetch(client, urls):
+                for url in urls:
+                    await client.get(url)
+            """})
+        update_index(root)
+        self.assertEqual(
+            [(f.qualified_name, f.class_name, f.time_complexity) for f in FunctionComplexity.objects.order_by('lineno')],
+            [
+                ('Outer.method', 'Outer', 'O(1)'),
+                ('Outer.Inner.method', 'Inner', 'O(1)'),
+                ('f', None, 'O(1)'),
+                ('f.<locals>.g', None, 'O(1)'),
+                ('fetch', None, 'O(n)'),
+            ],
+        )
+
+    def test_only_changed_files_are_analyzed(self):
+        root = self._project({'a.py': 'def a():\n    return 1\n', 'b.py': 'def b():\n    return 2\n'})
+        self.assertEqual(update_index(root), {'scanned': 2, 'analyzed': 2, 'functions_written': 2, 'removed': 0})
+        self.assertEqual(update_index(root)['analyzed'], 0)
+
+        with open(os.path.join(root, 'b.py'), 'w') as f:
+            f.write(snippet("""
+                def b(xs):
+                    for a in xs:
+                        for b in xs:
+                            print(a, b)
+                """))
+        stats = update_index(root)
+        self.assertEqual((stats['analyzed'], stats['functions_written']), (1, 1))
+        self.assertEqual(FunctionComplexity.objects.get(qualified_name='b').time_complexity, 'O(n²)')
+
+    def test_queries(self):
+        root = self._project({'app.py': """
+            def scan(xs):
+                for x in xs:
+                    print(x)
+
+            def pairs(xs):
+                for a in xs:
+                    for b in xs:
+                        print(a, b)
+
+            def first(xs):
+                return xs[0]
+            """})
+        update_index(root)
+        # Slowest first, and min_time matches that class or anything above it
+        self.assertEqual([f.qualified_name for f in query_functions()], ['pairs', 'scan', 'first'])
+        self.assertEqual([f.qualified_name for f in query_functions(min_time='O(n)')], ['pairs', 'scan'])
+        response = self.client.get('/api/functions/', {'min_time': 'O(n^2)'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([f['qualified_name'] for f in response.json()], ['pairs'])
+
+    def test_extension_sources_stay_off_sys_path(self):
+        self.assertNotIn(EXTENSION_SRC, sys.path)
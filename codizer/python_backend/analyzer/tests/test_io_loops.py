@@ -0,0 +1,79 @@
+from django.test import SimpleTestCase, TestCase
+
+from ..io_loops import io_in_loops
+from . import snippet
+
+
+MODELS = snippet("""
+    from django.db import models
+
+    class Author(models.Model):
+        name = models.CharField(max_length=100)
+
+    class Book(models.Model):
+        author = models.ForeignKey(Author, on_delete=models.CASCADE)
+    """)
+
+
+class IOInLoopsTests(SimpleTestCase):
+    # (code, [(line, kind, operation, multiplier)])
+    CASES = [
+        (MODELS + '\n' + snippet("""
+            def titles():
+                for book in Book.objects.all():
+                    print(book.author.name)
+            """), [(11, 'query', 'django.db.models.Model.author', 'len(Book.objects)')]),
+        # The relation comes with the rows
+        (MODELS + '\n' + snippet("""
+            def titles():
+                for book in Book.objects.select_related('author'):
+                    print(book.author.name)
+            """), []),
+        ("""
+            def load(ids):
+                for i in ids:
+                    Book.objects.get(pk=i)
+            """, [(3, 'query', 'django.db.models.Manager.get', 'len(ids)')]),
+        ("""
+            import requests
+
+            def fetch(urls):
+                return [requests.get(url) for url in urls]
+            """, [(4, 'network', 'requests.get', 'len(urls)')]),
+        # Once, outside any loop
+        ("""
+            def load(pk):
+                return Book.objects.get(pk=pk)
+            """, []),
+    ]
+
+    def test_findings(self):
+        for code, expected in self.CASES:
+            with self.subTest(code=code):
+                found = io_in_loops(snippet(code))
+                self.assertEqual([(item['line'], item['kind'], item['operation'], item['multiplier'])
+                                  for item in found], expected)
+
+    def test_filesystem_and_multiplier(self):
+        [found] = io_in_loops(snippet("""
+            def sizes(folders, names):
+                for folder in folders:
+                    for name in names:
+                        with open(folder + name) as f:
+                            f.read()
+            """))
+        self.assertEqual((found['line'], found['kind'], found['multiplier']), (4, 'filesystem', 'len(folders)·len(names)'))
+        self.assertTrue(found['suggestion'])
+
+    def test_unparsable_code(self):
+        self.assertEqual(io_in_loops('def broken(:'), [])
+
+
+class IOInLoopsResponseTests(TestCase):
+    def test_api_reports_io_in_loops(self):
+        code = snippet(IOInLoopsTests.CASES[3][0])
+        response = self.client.post('/api/analyze/', {'code': code, 'language': 'python'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        [found] = response.json()['io_in_loops']
+        self.assertEqual((found['line'], found['call']), (4, 'requests.get'))
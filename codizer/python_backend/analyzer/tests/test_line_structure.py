@@ -0,0 +1,53 @@
+import random
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..line_structure import VECTORIZE_MIN_LINES, _scan_numpy, _scan_python, line_structure
+from . import snippet
+
+
+class LineStructureTests(SimpleTestCase):
+    CODE = snippet("""
+        def f(xs):
+            for x in xs:
+                # note
+
+                while x:
+                    x -= 1
+            if xs:
+                return 1
+        """)
+
+    def test_structure(self):
+        structure = line_structure(self.CODE)
+        self.assertEqual(structure.depth.tolist(), [0, 1, 2, 2, 2, 3, 1, 2, 2])
+        self.assertEqual(np.flatnonzero(structure.loop_header).tolist(), [1, 4])
+        self.assertEqual(np.flatnonzero(structure.comment).tolist(), [2])
+        self.assertEqual(structure.max_loop_depth(), 3)
+        self.assertEqual(structure.blocks(), [(1, 6), (6, 9)])
+
+    def test_vectorized_scan_matches(self):
+        lines = (self.CODE * (VECTORIZE_MIN_LINES // 8)).split('\n')
+        expected, vectorized = _scan_python(lines), _scan_numpy(lines)
+        self.assertIsNotNone(vectorized)
+        for field in ('indent', 'blank', 'comment', 'loop_header', 'block_header', 'depth'):
+            with self.subTest(field=field):
+                self.assertEqual(getattr(vectorized, field).tolist(), getattr(expected, field).tolist())
+        self.assertEqual(vectorized.blocks(), expected.blocks())
+
+    def test_uneven_indentation_matches(self):
+        # Dedents that land between open levels, as in continuation lines and docstrings
+        rng = random.Random(7)
+        for _ in range(20):
+            lines = [' ' * rng.choice((0, 1, 2, 3, 4, 6, 8, 12)) + rng.choice(('x', 'for x in y:', 'if x:', ''))
+                     for _ in range(VECTORIZE_MIN_LINES)]
+            expected, vectorized = _scan_python(lines), _scan_numpy(lines)
+            self.assertIsNotNone(vectorized)
+            self.assertEqual(vectorized.depth.tolist(), expected.depth.tolist())
+            self.assertEqual(vectorized.blocks(), expected.blocks())
+
+    def test_blank_code(self):
+        structure = line_structure('\n\n')
+        self.assertEqual(structure.depth.tolist(), [0, 0, 0])
+        self.assertEqual((structure.max_loop_depth(), structure.blocks()), (0, []))
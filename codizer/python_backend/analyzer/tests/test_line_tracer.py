@@ -0,0 +1,77 @@
+import math
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..line_tracer import compare_with_static, default_arguments, fit_growth, trace_function, trace_script
+from . import snippet
+
+SIZES = [8, 16, 32, 64]
+
+CODE = snippet("""
+    import sys
+
+
+    def pairs(xs):
+        total = 0
+        for a in xs:
+            for b in xs:
+                total += a * b
+        return total
+
+
+    if __name__ == '__main__':
+        pairs(list(range(int(sys.argv[1]))))
+    """)
+
+
+class FitGrowthTests(SimpleTestCase):
+    def test_models(self):
+        cases = [
+            ('O(1)', lambda n: 3),
+            ('O(log n)', lambda n: 2 * math.log2(n) + 1),
+            ('O(n)', lambda n: n + 1),
+            ('O(n log n)', lambda n: n * math.log2(n)),
+            ('O(n^2)', lambda n: n * n + n),
+            ('O(n^3)', lambda n: n ** 3),
+        ]
+        for expected, count in cases:
+            with self.subTest(expected):
+                self.assertEqual(fit_growth(SIZES, [count(n) for n in SIZES]), expected)
+
+    def test_default_arguments(self):
+        def search(items, target, n):
+            pass
+        self.assertEqual(default_arguments(search, 3), [[3, 2, 1], -1, 3])
+
+
+class TraceTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'workload.py')
+        with open(self.path, 'w') as f:
+            f.write(CODE)
+
+    def test_trace_function(self):
+        results, backends = trace_function(self.path, 'pairs', SIZES)
+        self.assertLessEqual(backends, {'sys.monitoring', 'sys.settrace'})
+        self.assertEqual(len(backends), 1)
+        # The innermost statement runs n^2 times, the return once
+        self.assertEqual([results[n][8] for n in SIZES], [n * n for n in SIZES])
+        self.assertEqual([results[n][9] for n in SIZES], [1] * len(SIZES))
+
+        report = {entry['line']: entry for entry in compare_with_static(self.path, results)}
+        self.assertEqual(report[8]['empirical'], 'O(n^2)')
+        self.assertEqual(report[6]['empirical'], 'O(n)')
+        self.assertEqual(report[9]['empirical'], 'O(1)')
+        self.assertEqual(report[8]['matches'], report[8]['static'] == 'O(n^2)')
+
+    def test_trace_function_with_call(self):
+        results, _ = trace_function(self.path, 'pairs', SIZES, call='list(range(2 * n))')
+        self.assertEqual([results[n][8] for n in SIZES], [4 * n * n for n in SIZES])
+
+    def test_trace_script(self):
+        results, _ = trace_script(self.path, SIZES)
+        self.assertEqual([results[n][8] for n in SIZES], [n * n for n in SIZES])
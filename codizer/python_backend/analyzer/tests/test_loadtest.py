@@ -0,0 +1,76 @@
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from ..management.commands.loadtest_api import Traffic, generate_document, parse_mix
+
+MIX = {'document': 6, 'line': 3, 'history': 1}
+
+
+class TrafficTests(SimpleTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('document=6,line=3,history=1'), MIX)
+        for text in ('document=6,upload=1', 'document=x', 'document=0,line=0'):
+            with self.subTest(text), self.assertRaises(CommandError):
+                parse_mix(text)
+
+    def test_documents_are_valid_python_of_about_the_size(self):
+        document = generate_document(random.Random(0), 8 * 1024, 'x')
+        compile(document, 'document.py', 'exec')
+        self.assertGreaterEqual(len(document), 8 * 1024)
+        self.assertLess(len(document), 9 * 1024)
+
+    def test_equal_seeds_replay_equal_traffic(self):
+        def requests(seed):
+            traffic = Traffic(seed, MIX, [1, 8], documents_per_size=2, unique=True)
+            return [traffic.next_request() for _ in range(50)]
+
+        self.assertEqual(requests(3), requests(3))
+        self.assertNotEqual(requests(3), requests(4))
+        labels = {label for label, *_ in requests(3)}
+        self.assertEqual(labels, {'document 1k', 'document 8k', 'line', 'history'})
+
+    def test_unique_documents(self):
+        def bodies(unique):
+            traffic = Traffic(0, {'document': 1}, [1], documents_per_size=1, unique=unique)
+            return [traffic.next_request()[3]['code'] for _ in range(3)]
+
+        self.assertEqual(len(set(bodies(True))), 3)
+        self.assertEqual(len(set(bodies(False))), 1)
+
+
+class LoadTestCommandTests(SimpleTestCase):
+    def test_bad_options(self):
+        with self.assertRaises(CommandError):
+            call_command('loadtest_api', '--sizes', '1,big', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('loadtest_api', '--concurrency', '0', stdout=StringIO())
+
+    def test_run_and_compare(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'run.json')
+            options = ['--profile', 'full', '--requests', '6', '--warmup', '0', '--concurrency', '2',
+                       '--sizes', '1']
+            out = StringIO()
+            call_command('loadtest_api', *options, '--json', '--output', output, stdout=out)
+            report = json.loads(out.getvalue())
+            with open(output) as f:
+                self.assertEqual(json.load(f), report)
+
+            results = report['results']
+            self.assertEqual(results['requests'], 6)
+            self.assertEqual(results['error_rate'], 0.0)
+            self.assertEqual(sum(stats['requests'] for stats in results['endpoints'].values()), 6)
+            self.assertEqual(report['run']['seed'], 0)
+
+            out = StringIO()
+            call_command('loadtest_api', *options, '--compare', output, stdout=out)
+            header, *_, summary = out.getvalue().splitlines()
+            self.assertIn('Δ p99', header)
+            self.assertTrue(summary.startswith('6 requests in '))
@@ -0,0 +1,207 @@
+import json
+import time
+
+from django.test import SimpleTestCase, TestCase
+
+from ..complexity_analyzer import AnalysisBudget, ComplexityAnalyzer
+from ..loop_bounds import loop_cost
+from . import snippet
+
+
+class LoopBoundsTests(SimpleTestCase):
+    # (code, complexity)
+    CASES = [
+        # Constant trip counts fold away
+        ("""
+            def f(xs):
+                for i in range(6):
+                    print(i)
+            """, 'O(1)'),
+        ("""
+            def f(xs):
+                for x in xs:
+                    print(x)
+            """, 'O(n)'),
+        # Independent sizes stay apart
+        ("""
+            def f(xs, ys):
+                for a in xs:
+                    for b in ys:
+                        print(a, b)
+            """, 'O(n·m)'),
+        ("""
+            def f(xs, ys):
+                for a in xs:
+                    print(a)
+                for b in ys:
+                    print(b)
+            """, 'O(n + m)'),
+        # Triangular: the inner bound depends on the outer loop variable
+        ("""
+            def bubble_sort(arr):
+                n = len(arr)
+                for i in range(n):
+                    for j in range(0, n - i - 1):
+                        if arr[j] > arr[j + 1]:
+                            arr[j], arr[j + 1] = arr[j + 1], arr[j]
+            """, 'O(n^2)'),
+        # Comprehensions are loops too
+        ("""
+            def f(xs):
+                return [(a, b) for a in xs for b in xs]
+            """, 'O(n^2)'),
+        # A bound that cannot be traced is still one factor of unknown size
+        ("""
+            def f(k):
+                for i in range(k):
+                    for x in fetch():
+                        print(i, x)
+            """, 'O(k·n)'),
+        # A counter scaled by a constant, or a bisected range, takes log steps
+        ("""
+            def f(n):
+                while n > 1:
+                    n //= 2
+            """, 'O(log n)'),
+        ("""
+            def f(n):
+                i = 1
+                while i < n:
+                    i *= 2
+            """, 'O(log n)'),
+        ("""
+            def binary_search(arr, target):
+                lo, hi = 0, len(arr) - 1
+                while lo <= hi:
+                    mid = (lo + hi) // 2
+                    if arr[mid] == target:
+                        return mid
+                    if arr[mid] < target:
+                        lo = mid + 1
+                    else:
+                        hi = mid - 1
+                return -1
+            """, 'O(log n)'),
+        ("""
+            def f(xs):
+                for x in xs:
+                    i = len(xs)
+                    while i > 0:
+                        i //= 2
+            """, 'O(n log n)'),
+        # Recursion on a halved argument: T(n) = a·T(n/2) + W
+        ("""
+            def depth(n):
+                if n <= 1:
+                    return 0
+                return depth(n // 2) + 1
+            """, 'O(log n)'),
+        ("""
+            def first(xs):
+                if len(xs) <= 1:
+                    return xs
+                return first(xs[:len(xs) // 2])
+            """, 'O(n)'),
+        ("""
+            def merge_sort(arr):
+                if len(arr) <= 1:
+                    return arr
+                mid = len(arr) // 2
+                left = merge_sort(arr[:mid])
+                right = merge_sort(arr[mid:])
+                return merge(left, right)
+
+            def merge(left, right):
+                result = []
+                i = j = 0
+                while i < len(left) and j < len(right):
+                    if left[i] < right[j]:
+                        result.append(left[i])
+                        i += 1
+                    else:
+                        result.append(right[j])
+                        j += 1
+                return result
+            """, 'O(n log n)'),
+        # A lambda's body is costed as a scope of its own
+        ("""
+            pairs = lambda xs: [x for x in xs for y in xs]
+            """, 'O(n^2)'),
+        ("""
+            def f(xs):
+                g = lambda: [x for x in xs]
+                return g
+            """, 'O(n)'),
+    ]
+
+    def test_complexity(self):
+        for code, expected in self.CASES:
+            with self.subTest(code=code):
+                self.assertEqual(loop_cost(snippet(code)).complexity, expected)
+
+    def test_size_variables(self):
+        cost = loop_cost(snippet(self.CASES[2][0]))
+        self.assertEqual(cost.size_variables, {'n': 'len(xs)', 'm': 'len(ys)'})
+
+    def test_unresolved_recursion(self):
+        cost = loop_cost(snippet("""
+            def count(n):
+                if n == 0:
+                    return 0
+                return count(n - 1) + 1
+            """))
+        self.assertTrue(cost.unresolved_recursion)
+
+    def test_unparsable_code(self):
+        self.assertIsNone(loop_cost('for x in:\n'))
+
+    def test_deadline(self):
+        self.assertIsNone(loop_cost(snippet(self.CASES[1][0]), deadline=time.monotonic() - 1))
+
+
+class AnalyzerLoopBoundsTests(SimpleTestCase):
+    CODE = snippet(LoopBoundsTests.CASES[2][0])
+
+    def test_result(self):
+        result = ComplexityAnalyzer().analyze_code(self.CODE, 'python', AnalysisBudget())
+        self.assertEqual(result['time_complexity'], 'O(n·m)')
+        self.assertEqual(result['size_variables'], {'n': 'len(xs)', 'm': 'len(ys)'})
+
+    def test_no_name_overrides(self):
+        # Names no longer decide the result; the code does
+        analyzer = ComplexityAnalyzer()
+        code = snippet(LoopBoundsTests.CASES[2][0]).replace('def f(', 'def binary_search(')
+        self.assertEqual(analyzer.analyze_code(code, 'python')['time_complexity'], 'O(n·m)')
+        merge_sort = next(code for code, expected in LoopBoundsTests.CASES if 'merge_sort' in code)
+        result = analyzer.analyze_code(snippet(merge_sort).replace('merge_sort', 'sort_items'), 'python')
+        self.assertEqual((result['time_complexity'], result['space_complexity']), ('O(n log n)', 'O(n)'))
+
+    def test_unresolved_recursion_is_exponential(self):
+        code = snippet("""
+            def count(n):
+                if n == 0:
+                    return 0
+                return count(n - 1) + 1
+            """)
+        self.assertEqual(ComplexityAnalyzer().analyze_code(code, 'python')['time_complexity'], 'O(2^n)')
+
+    def test_out_of_time(self):
+        # Without the AST pass there are no traced bounds to report
+        result = ComplexityAnalyzer().analyze_code(self.CODE, 'python', AnalysisBudget(time_limit=-1))
+        self.assertTrue(result['degraded'])
+        self.assertNotIn('size_variables', result)
+
+    def test_higher_complexity(self):
+        # Labels rank by their highest-degree term
+        analyzer = ComplexityAnalyzer()
+        self.assertTrue(analyzer._is_higher_complexity('O(n·m)', 'O(n + m)'))
+        self.assertTrue(analyzer._is_higher_complexity('O(n^3)', 'O(n·m)'))
+        self.assertFalse(analyzer._is_higher_complexity('O(n^2)', 'O(n·m)'))
+        self.assertFalse(analyzer._is_higher_complexity('O(n·m)', 'O(n^2)'))
+
+
+class SizeVariablesResponseTests(TestCase):
+    def test_api_returns_size_variables(self):
+        body = {'code': AnalyzerLoopBoundsTests.CODE, 'language': 'python'}
+        response = self.client.post('/api/analyze/', json.dumps(body), content_type='application/json')
+        self.assertEqual(response.json()['size_variables'], {'n': 'len(xs)', 'm': 'len(ys)'})
@@ -0,0 +1,204 @@
+import contextlib
+import importlib.util
+import io
+import json
+import os
+
+from django.test import SimpleTestCase
+
+from ..complexity_analyzer import AnalysisBudget, ComplexityAnalyzer
+from ..extension_analyzer import EXTENSION_SRC
+from ..lsp_server import REQUEST_CANCELLED, ComplexityLanguageServer
+from . import snippet
+
+URI = 'file:///project/app.py'
+
+CODE = snippet("""
+    def pairs(xs):
+        for a in xs:
+            for b in xs:
+                print(a, b)
+    """)
+
+
+def time_complexity(code):
+    """What the analyzer reports for code on its own, which the server should pass through."""
+    return ComplexityAnalyzer().analyze_code(code, 'python')['time_complexity']
+
+
+def frame(*messages):
+    """Content-Length framed JSON-RPC messages, as a client sends them."""
+    data = b''
+    for message in messages:
+        body = json.dumps(dict(message, jsonrpc='2.0')).encode('utf-8')
+        data += b'Content-Length: %d\r\n\r\n' % len(body) + body
+    return data
+
+
+def unframe(data):
+    messages = []
+    while data:
+        header, _, data = data.partition(b'\r\n\r\n')
+        length = int(header.split(b':')[1])
+        messages.append(json.loads(data[:length]))
+        data = data[length:]
+    return messages
+
+
+def request(request_id, method, params):
+    return {'id': request_id, 'method': method, 'params': params}
+
+
+def notification(method, params):
+    return {'method': method, 'params': params}
+
+
+def did_open(text=CODE):
+    return notification('textDocument/didOpen', {
+        'textDocument': {'uri': URI, 'languageId': 'python', 'version': 1, 'text': text},
+    })
+
+
+class LanguageServerTests(SimpleTestCase):
+    def serve(self, *messages):
+        """Run a server over the messages until stdin ends; returns (server, responses by id)."""
+        output = io.BytesIO()
+        server = ComplexityLanguageServer(io.BytesIO(frame(*messages)), output)
+        server.serve()
+        sent = unframe(output.getvalue())
+        return server, {message['id']: message for message in sent if 'id' in message}
+
+    def test_requests(self):
+        _, responses = self.serve(
+            request(1, 'initialize', {'capabilities': {}}),
+            notification('initialized', {}),
+            did_open(),
+            request(2, 'textDocument/hover', {'textDocument': {'uri': URI}, 'position': {'line': 3, 'character': 0}}),
+            request(3, 'codizer/documentComplexity', {'textDocument': {'uri': URI}}),
+            request(4, 'codizer/unknown', {}),
+            request(5, 'shutdown', None),
+            notification('exit', None),
+        )
+        capabilities = responses[1]['result']['capabilities']
+        self.assertTrue(capabilities['hoverProvider'])
+        self.assertIn(f'**pairs** - Time: `{time_complexity(CODE)}`', responses[2]['result']['contents']['value'])
+        self.assertEqual(responses[3]['result']['time_complexity'], time_complexity(CODE))
+        self.assertEqual(responses[4]['error']['code'], -32601)
+        self.assertIsNone(responses[5]['result'])
+
+    def test_incremental_changes(self):
+        server = ComplexityLanguageServer(io.BytesIO(), io.BytesIO())
+        server.did_open(did_open()['params'])
+        # Replace the inner loop with a constant-time call
+        server.did_change({
+            'textDocument': {'uri': URI, 'version': 2},
+            'contentChanges': [{
+                'range': {'start': {'line': 2, 'character': 8}, 'end': {'line': 3, 'character': 23}},
+                'text': 'print(a)',
+            }],
+        })
+        document = server.documents[URI]
+        source = 'def pairs(xs):\n    for a in xs:\n        print(a)\n'
+        self.assertEqual(document.source(), source)
+        self.assertEqual(server.document_complexity(document)['time_complexity'], time_complexity(source))
+
+    def test_diagnostics(self):
+        output = io.BytesIO()
+        server = ComplexityLanguageServer(io.BytesIO(), output)
+        server.diagnostic_threshold = 'O(1)'
+        server.did_open(did_open()['params'])
+        server.publish_pending_diagnostics()
+        [published] = unframe(output.getvalue())
+        self.assertEqual(published['method'], 'textDocument/publishDiagnostics')
+        [diagnostic] = published['params']['diagnostics']
+        self.assertEqual(diagnostic['range']['start']['line'], 0)
+        self.assertIn(f"'pairs' is estimated at {time_complexity(CODE)} time", diagnostic['message'])
+
+    def test_importing_the_extension_analyzer_writes_nothing_to_stdout(self):
+        # stdout carries the protocol; anything else written there corrupts it
+        path = os.path.join(EXTENSION_SRC, 'analyze_complexity.py')
+        spec = importlib.util.spec_from_file_location('stdout_check', path)
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            spec.loader.exec_module(importlib.util.module_from_spec(spec))
+        self.assertEqual(stdout.getvalue(), '')
+
+    def test_file_metrics(self):
+        server = ComplexityLanguageServer(io.BytesIO(), io.BytesIO())
+        server.did_open(did_open()['params'])
+        metrics = server.file_metrics_request({'textDocument': {'uri': URI}})
+        self.assertEqual((metrics['file_name'], metrics['num_functions']), ('app.py', 1))
+        self.assertEqual(metrics['functions']['pairs']['time_complexity'], 'O(n²)')
+        self.assertEqual(metrics['functions']['pairs']['lineno'], 1)
+
+        server.did_change({'textDocument': {'uri': URI, 'version': 2}, 'contentChanges': [{'text': 'def broken(:\n'}]})
+        self.assertTrue(server.file_metrics_request({'textDocument': {'uri': URI}})['error'])
+
+    def test_inlay_hints(self):
+        server = ComplexityLanguageServer(io.BytesIO(), io.BytesIO())
+        server.did_open(did_open()['params'])
+        hints = server.inlay_hint({
+            'textDocument': {'uri': URI},
+            'range': {'start': {'line': 0, 'character': 0}, 'end': {'line': 4, 'character': 0}},
+        })
+        self.assertTrue(hints)
+        self.assertTrue(all(hint['label'].startswith('Time: ') for hint in hints))
+
+    def test_too_deep_to_parse(self):
+        # Treated like a syntax error: no per-function results, and file metrics report an error
+        server = ComplexityLanguageServer(io.BytesIO(), io.BytesIO())
+        server.did_open(did_open('x = ' + '-' * 100000 + '1\n')['params'])
+        document = server._document({'textDocument': {'uri': URI}})
+        self.assertIsNone(server.function_complexities(document))
+        self.assertTrue(server.file_metrics_request({'textDocument': {'uri': URI}})['error'])
+
+    def test_inlay_hints_over_budget(self):
+        # Documents past the per-line analysis limit get no hints
+        server = ComplexityLanguageServer(io.BytesIO(), io.BytesIO(), budget=AnalysisBudget(line_analysis_chars=10))
+        server.did_open(did_open()['params'])
+        hints = server.inlay_hint({
+            'textDocument': {'uri': URI},
+            'range': {'start': {'line': 0, 'character': 0}, 'end': {'line': 4, 'character': 0}},
+        })
+        self.assertEqual(hints, [])
+
+
+class CancellationTests(SimpleTestCase):
+    HOVER = {'textDocument': {'uri': URI}, 'position': {'line': 0, 'character': 0}}
+
+    def server(self, *messages):
+        """A server whose reader has already queued messages, without dispatching them."""
+        output = io.BytesIO()
+        server = ComplexityLanguageServer(io.BytesIO(frame(*messages)), output)
+        server._read_loop()
+        return server, output
+
+    def dispatch_all(self, server, output):
+        while True:
+            message = server._incoming.get_nowait()
+            if message.get('method') == 'exit':
+                break
+            server.dispatch(message)
+        return {message['id']: message for message in unframe(output.getvalue()) if 'id' in message}
+
+    def test_cancelled_request(self):
+        server, output = self.server(
+            did_open(),
+            request(7, 'textDocument/hover', self.HOVER),
+            notification('$/cancelRequest', {'id': 7}),
+        )
+        responses = self.dispatch_all(server, output)
+        self.assertEqual(responses[7]['error']['code'], REQUEST_CANCELLED)
+        self.assertEqual((server._pending, server._cancelled), (set(), set()))
+
+    def test_cancel_for_unknown_request_is_ignored(self):
+        server, output = self.server(
+            did_open(),
+            # Arrives before the request it names, or names one never sent
+            notification('$/cancelRequest', {'id': 8}),
+            notification('$/cancelRequest', {'id': 99}),
+            request(8, 'textDocument/hover', self.HOVER),
+        )
+        responses = self.dispatch_all(server, output)
+        self.assertIn('result', responses[8])
+        self.assertEqual((server._pending, server._cancelled), (set(), set()))
@@ -0,0 +1,48 @@
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..memory_profile import NOISE_BYTES, fit_space, measure, profile_function
+from . import snippet
+
+SIZES = [1000, 2000, 4000, 8000]
+
+CODE = snippet("""
+    def build(n):
+        return [i * 2 for i in range(n)]
+
+
+    def total(n):
+        values = [i * 2 for i in range(n)]
+        return sum(values)
+    """)
+
+
+class MemoryProfileTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'workload.py')
+        with open(self.path, 'w') as f:
+            f.write(CODE)
+
+    def test_fit_space(self):
+        # Differences within NOISE_BYTES are allocator noise
+        self.assertEqual(fit_space(SIZES, [5000, 5000 + NOISE_BYTES - 1, 5000, 5200]), 'O(1)')
+        self.assertEqual(fit_space(SIZES, [100 + 8 * n for n in SIZES]), 'O(n)')
+
+    def test_measure_attributes_retained_memory_to_lines(self):
+        result = measure(self.path, 'build', None, 4000)
+        self.assertEqual(result['n'], 4000)
+        self.assertGreaterEqual(result['peak'], result['retained'])
+        [site] = [site for site in result['sites'] if site['file'] == self.path]
+        self.assertEqual((site['line'], site['code']), (2, 'return [i * 2 for i in range(n)]'))
+
+    def test_profile_function(self):
+        # Each size runs in a fresh worker process
+        report = profile_function(self.path, 'total', SIZES, timeout=60)
+        self.assertEqual([m['n'] for m in report['measurements']], SIZES)
+        # The list exists only during the call
+        self.assertEqual(report['peak_complexity'], 'O(n)')
+        self.assertEqual(report['retained_complexity'], 'O(1)')
@@ -0,0 +1,108 @@
+import json
+
+from django.test import SimpleTestCase, TestCase
+
+from ..complexity_analyzer import AnalysisBudget, ComplexityAnalyzer
+from ..progressive import _shift_lines, progressive_analysis
+from ..renderers import format_event
+from . import snippet
+
+CODE = snippet("""
+    def first(xs):
+        return xs[0]
+
+
+    def dot(a, b):
+        total = 0
+        for i in range(len(a)):
+            total += a[i] * b[i]
+        return total
+    """)
+
+
+def parse_events(data):
+    """(event, data) pairs from a text/event-stream body."""
+    events = []
+    for message in data.decode('utf-8').split('\n\n'):
+        if message:
+            event, payload = message.split('\n')
+            events.append((event[len('event: '):], json.loads(payload[len('data: '):])))
+    return events
+
+
+class ProgressiveAnalysisTests(SimpleTestCase):
+    def events(self):
+        return list(progressive_analysis(ComplexityAnalyzer(), CODE, 'python'))
+
+    def test_event_order(self):
+        names = [event for event, _ in self.events()]
+        self.assertEqual(names, ['coarse', 'function', 'function', 'lines', 'complete'])
+
+    def test_coarse_outline(self):
+        _, coarse = self.events()[0]
+        self.assertEqual([(item['name'], item['lineno'], item['end_lineno']) for item in coarse['outline']],
+                         [('first', 1, 2), ('dot', 5, 9)])
+
+    def test_function_events(self):
+        functions = [data for event, data in self.events() if event == 'function']
+        self.assertEqual([(f['name'], f['lineno'], f['end_lineno']) for f in functions],
+                         [('first', 1, 2), ('dot', 5, 9)])
+        # Findings in a function count lines from the start of the file
+        self.assertEqual([item['line'] for item in functions[1]['vectorization']], [7])
+
+    def test_lines_skip_blank_lines(self):
+        [lines] = [data['lines'] for event, data in self.events() if event == 'lines']
+        self.assertEqual([item['line'] for item in lines], [1, 2, 5, 6, 7, 8, 9])
+
+    def test_complete_matches_analyze_code(self):
+        event, data = self.events()[-1]
+        expected = ComplexityAnalyzer().analyze_code(CODE, 'python', AnalysisBudget())
+        self.assertEqual(event, 'complete')
+        self.assertEqual(data['time_complexity'], expected['time_complexity'])
+        self.assertIs(data['degraded'], False)
+        self.assertEqual([item['line'] for item in data['vectorization']], [7])
+
+    def test_out_of_time(self):
+        events = list(progressive_analysis(ComplexityAnalyzer(), CODE, 'python', AnalysisBudget(time_limit=-1)))
+        self.assertEqual([event for event, _ in events], ['coarse', 'complete'])
+        self.assertIs(events[-1][1]['degraded'], True)
+
+    def test_too_deep_to_parse(self):
+        # The parser overflows; the outline and function events are skipped as for a syntax error
+        code = 'x = ' + '-' * 100000 + '1\n'
+        events = list(progressive_analysis(ComplexityAnalyzer(), code, 'python'))
+        self.assertIsNone(events[0][1]['outline'])
+        self.assertEqual(events[-1][0], 'complete')
+        self.assertNotIn('function', [event for event, _ in events])
+
+    def test_shift_lines(self):
+        shifted = _shift_lines({'time_complexity': 'O(n)', 'findings': [{'line': 2}, {'name': 'x'}]}, 4)
+        self.assertEqual(shifted['findings'], [{'line': 6}, {'name': 'x'}])
+
+    def test_format_event(self):
+        self.assertEqual(format_event('lines', {'a': [1, 2]}), b'event: lines\ndata: {"a":[1,2]}\n\n')
+
+
+class StreamEndpointTests(TestCase):
+    def post(self, body):
+        return self.client.post('/api/analyze/stream/', json.dumps(body), content_type='application/json',
+                                HTTP_ACCEPT='text/event-stream')
+
+    def test_stream(self):
+        response = self.post({'code': CODE, 'language': 'python'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = parse_events(b''.join(response.streaming_content))
+        self.assertEqual([event for event, _ in events][-1], 'complete')
+
+    def test_invalid_request(self):
+        response = self.post({'language': 'python'})
+        self.assertEqual(response.status_code, 400)
+        [(event, data)] = parse_events(response.content)
+        self.assertEqual(event, 'error')
+        self.assertIn('code', data)
+
+    def test_older_version_is_superseded(self):
+        document = {'code': CODE, 'language': 'python', 'client_id': 'editor', 'document_id': 'app.py'}
+        self.client.post('/api/analyze/', json.dumps(dict(document, version=2)), content_type='application/json')
+        response = self.post(dict(document, version=1))
+        self.assertEqual(response.status_code, 409)
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import AnalysisRollup, CodeAnalysis
+from ..rollups import prune_history, record_analysis, rollup_counts
+from . import snippet
+
+CODE = snippet("""
+    def pairs(xs):
+        for a in xs:
+            for b in xs:
+                print(a, b)
+    """)
+
+
+def analysis(language='python', time_complexity='O(n^2)', space_complexity='O(1)'):
+    return CodeAnalysis(code=CODE, language=language, time_complexity=time_complexity,
+                        space_complexity=space_complexity)
+
+
+class RollupTests(TestCase):
+    def test_record_analysis_counts_per_bucket(self):
+        for _ in range(3):
+            record_analysis(analysis())
+        record_analysis(analysis(time_complexity='O(n)'))
+        self.assertEqual(CodeAnalysis.objects.count(), 4)
+        counts = {row.time_complexity: row.count for row in AnalysisRollup.objects.all()}
+        self.assertEqual(counts, {'O(n^2)': 3, 'O(n)': 1})
+        [row] = AnalysisRollup.objects.filter(time_complexity='O(n)')
+        self.assertEqual((row.bucket_start.minute, row.bucket_start.second), (0, 0))
+
+    def test_rollup_counts(self):
+        hours = [datetime(2026, 3, 1, 9, tzinfo=dt_timezone.utc), datetime(2026, 3, 1, 17, tzinfo=dt_timezone.utc),
+                 datetime(2026, 3, 2, 9, tzinfo=dt_timezone.utc)]
+        for hour, language in zip(hours, ['python', 'python', 'javascript']):
+            AnalysisRollup.objects.create(bucket_start=hour, language=language, time_complexity='O(n)',
+                                          space_complexity='O(1)', count=2)
+        by_day = [(row['bucket'].day, row['language'], row['count']) for row in rollup_counts('day')]
+        self.assertEqual(by_day, [(1, 'python', 4), (2, 'javascript', 2)])
+        self.assertEqual(len(rollup_counts('hour')), 3)
+        self.assertEqual([row['count'] for row in rollup_counts('month', language='python')], [4])
+        self.assertEqual(len(rollup_counts(since=hours[2])), 1)
+        self.assertEqual(len(rollup_counts(until=hours[1])), 1)
+        self.assertEqual(len(rollup_counts(time_complexity='O(n^2)')), 0)
+
+    def test_api_saves_into_rollups(self):
+        for _ in range(2):
+            response = self.client.post('/api/analyze/', {'code': CODE, 'language': 'python'},
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get('/api/rollups/', {'period': 'day', 'language': 'python'})
+        self.assertEqual(response.status_code, 200)
+        [row] = response.json()
+        self.assertEqual((row['language'], row['time_complexity'], row['count']), ('python', 'O(n^2)', 2))
+
+    def test_api_rejects_bad_queries(self):
+        self.assertEqual(self.client.get('/api/rollups/', {'period': 'week'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/rollups/', {'since': 'yesterday'}).status_code, 400)
+
+
+class PruneHistoryTests(TestCase):
+    def setUp(self):
+        for _ in range(5):
+            record_analysis(analysis())
+        self.old = list(CodeAnalysis.objects.order_by('id').values_list('id', flat=True)[:3])
+        CodeAnalysis.objects.filter(id__in=self.old).update(analysis_date=timezone.now() - timedelta(days=100))
+        self.cutoff = timezone.now() - timedelta(days=90)
+
+    def test_delete_in_chunks(self):
+        self.assertEqual(prune_history(self.cutoff, chunk_size=2), 3)
+        self.assertFalse(CodeAnalysis.objects.filter(id__in=self.old).exists())
+        self.assertEqual(CodeAnalysis.objects.count(), 2)
+        # Pruned rows stay counted
+        self.assertEqual(AnalysisRollup.objects.get().count, 5)
+
+    def test_compact(self):
+        self.assertEqual(prune_history(self.cutoff, compact=True, chunk_size=2), 3)
+        self.assertEqual(CodeAnalysis.objects.count(), 5)
+        self.assertEqual(set(CodeAnalysis.objects.filter(id__in=self.old).values_list('code', flat=True)), {''})
+        # Compacted rows are not compacted again
+        self.assertEqual(prune_history(self.cutoff, compact=True), 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('prune_history', '--days', '90', '--dry-run', stdout=out)
+        self.assertTrue(out.getvalue().startswith('3 analyses saved before'))
+        self.assertEqual(CodeAnalysis.objects.count(), 5)
+        out = StringIO()
+        call_command('prune_history', '--days', '90', '--pause', '0', stdout=out)
+        self.assertIn('Deleted 3 analyses', out.getvalue())
+        self.assertEqual(CodeAnalysis.objects.count(), 2)
@@ -0,0 +1,117 @@
+import json
+import threading
+
+from django.test import SimpleTestCase, TestCase
+
+from ..complexity_analyzer import AnalysisCancelled, ComplexityAnalyzer
+from ..singleflight import DocumentVersions, SingleFlight, Superseded
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_callers_share_one_run(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        runs = []
+
+        def work(cancelled):
+            runs.append(1)
+            started.set()
+            release.wait()
+            return 'result'
+
+        def waiting():
+            # Asked while the waiter polls for the leader's result
+            release.set()
+            return False
+
+        outcome = {}
+        leader = threading.Thread(target=lambda: outcome.update(leader=flight.do('key', work)))
+        leader.start()
+        started.wait()
+        waiter = threading.Thread(target=lambda: outcome.update(waiter=flight.do('key', work, abandon=waiting)))
+        waiter.start()
+        leader.join()
+        waiter.join()
+        self.assertEqual(outcome, {'leader': ('result', False), 'waiter': ('result', True)})
+        self.assertEqual(len(runs), 1)
+        # Nothing is kept once the run is over
+        self.assertEqual(flight.do('key', lambda cancelled: 'again'), ('again', False))
+
+    def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+        with self.assertRaises(ZeroDivisionError):
+            flight.do('key', lambda cancelled: 1 / 0)
+
+    # (leader abandons, waiter abandons, whether the leader's run sees cancelled())
+    CASES = [
+        (True, True, True),
+        (True, False, False),
+        (False, True, False),
+    ]
+
+    def test_cancelled_once_every_caller_abandons(self):
+        for leader_abandons, waiter_abandons, expected in self.CASES:
+            with self.subTest(leader_abandons=leader_abandons, waiter_abandons=waiter_abandons):
+                flight = SingleFlight()
+                started, joined = threading.Event(), threading.Event()
+                outcome = {}
+
+                def work(cancelled):
+                    started.set()
+                    joined.wait()
+                    return cancelled()
+
+                def lead():
+                    outcome['cancelled'] = flight.do('key', work, abandon=lambda: leader_abandons)[0]
+
+                def wait():
+                    # Asked once the waiter is registered
+                    joined.set()
+                    return waiter_abandons
+
+                leader = threading.Thread(target=lead)
+                leader.start()
+                started.wait()
+                try:
+                    result, shared = flight.do('key', work, abandon=wait)
+                    self.assertEqual((result, shared), (expected, True))
+                except Superseded:
+                    self.assertTrue(waiter_abandons)
+                leader.join()
+                self.assertEqual(outcome['cancelled'], expected)
+
+
+class DocumentVersionsTests(SimpleTestCase):
+    def test_latest_version_wins(self):
+        versions = DocumentVersions()
+        self.assertTrue(versions.claim('doc', 2))
+        self.assertTrue(versions.claim('doc', 2))
+        self.assertFalse(versions.claim('doc', 1))
+        self.assertTrue(versions.is_superseded('doc', 1))
+        self.assertFalse(versions.is_superseded('other', 1))
+        self.assertEqual(versions.latest('doc'), 2)
+
+    def test_oldest_documents_are_forgotten(self):
+        versions = DocumentVersions(max_documents=2)
+        for document in ('a', 'b', 'c'):
+            versions.claim(document, 1)
+        self.assertIsNone(versions.latest('a'))
+        self.assertEqual(versions.latest('c'), 1)
+
+
+class AnalysisCancellationTests(SimpleTestCase):
+    def test_cancelled_analysis_raises(self):
+        with self.assertRaises(AnalysisCancelled):
+            ComplexityAnalyzer().analyze_code('for x in xs:\n    print(x)\n', 'python', cancelled=lambda: True)
+
+
+class SupersededRequestTests(TestCase):
+    def post(self, version, code='print(1)\n'):
+        body = {'code': code, 'language': 'python', 'client_id': 'tests', 'document_id': 'superseded.py', 'version': version}
+        return self.client.post('/api/analyze/', json.dumps(body), content_type='application/json')
+
+    def test_older_version_is_superseded(self):
+        self.assertEqual(self.post(2).status_code, 200)
+        response = self.post(1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['latest_version'], 2)
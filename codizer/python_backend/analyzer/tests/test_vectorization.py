@@ -0,0 +1,120 @@
+from django.test import SimpleTestCase, TestCase
+
+from ..vectorization import vectorization_candidates
+from . import snippet
+
+
+class VectorizationTests(SimpleTestCase):
+    # (code, [(line, pattern, NumPy equivalent, speedup)])
+    CASES = [
+        ("""
+            def dot(a, b):
+                total = 0
+                for i in range(len(a)):
+                    total += a[i] * b[i]
+                return total
+            """, [(3, 'reduction', 'total += np.dot(a, b[:len(a)])', 'high')]),
+        ("""
+            def add(a, b, out):
+                for i in range(len(a)):
+                    out[i] = a[i] + b[i]
+            """, [(2, 'element-wise', 'out[:len(a)] = a + b[:len(a)]', 'high')]),
+        ("""
+            def matmul(a, b, c, n):
+                for i in range(n):
+                    for j in range(n):
+                        for k in range(n):
+                            c[i][j] += a[i][k] * b[k][j]
+            """, [(2, 'index-accumulation', 'c[:n, :n] += a[:n, :n] @ b[:n, :n]', 'blas')]),
+        ("""
+            def squares(xs):
+                return sum(x * x for x in xs)
+            """, [(2, 'reduction', 'np.dot(xs, xs)', 'high')]),
+        ("""
+            def largest(xs):
+                best = 0
+                for x in xs:
+                    best = max(best, x)
+                return best
+            """, [(3, 'reduction', 'best = max(best, np.max(xs))', 'high')]),
+        ("""
+            def doubled(xs):
+                out = []
+                for x in xs:
+                    if x > 0:
+                        out.append(x * 2)
+                return out
+            """, [(3, 'element-wise', 'out = (xs * 2)[xs > 0]', 'high')]),
+        # Nothing to compute
+        ("""
+            def show(xs):
+                for x in xs:
+                    print(x)
+            """, []),
+    ]
+
+    # (code, [(line, NumPy equivalent)])
+    APPENDS = [
+        ("""
+            def f(xs):
+                out = []
+                for x in xs:
+                    out.append(x * 2)
+                return out
+            """, [(3, 'out = xs * 2')]),
+        # The second loop appends to what the first one collected
+        ("""
+            def f(xs, ys):
+                out = []
+                for x in xs:
+                    out.append(x * 2)
+                for y in ys:
+                    out.append(y * 3)
+                return out
+            """, [(3, 'out = xs * 2'), (5, 'out.extend(ys * 3)')]),
+        # Every outer iteration appends to the same list
+        ("""
+            def f(xs, t):
+                res = []
+                for k in range(t):
+                    print(k)
+                    for x in xs:
+                        res.append(x * 2)
+                return res
+            """, [(5, 'res.extend(xs * 2)')]),
+        # Two appends per iteration interleave
+        ("""
+            def f(xs):
+                out = []
+                for x in xs:
+                    out.append(x * 2)
+                    out.append(x * 3)
+                return out
+            """, []),
+    ]
+
+    def test_append(self):
+        for code, expected in self.APPENDS:
+            with self.subTest(code=code):
+                found = vectorization_candidates(snippet(code))
+                self.assertEqual([(item['line'], item['equivalent']) for item in found], expected)
+
+    def test_candidates(self):
+        for code, expected in self.CASES:
+            with self.subTest(code=code):
+                found = vectorization_candidates(snippet(code))
+                self.assertEqual([(item['line'], item['pattern'], item['equivalent'], item['speedup'])
+                                  for item in found], expected)
+
+    def test_unparsable_code(self):
+        self.assertEqual(vectorization_candidates('def broken(:'), [])
+
+
+class VectorizationResponseTests(TestCase):
+    def test_api_reports_vectorization(self):
+        code = snippet(VectorizationTests.CASES[0][0])
+        response = self.client.post('/api/analyze/', {'code': code, 'language': 'python'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        [found] = response.json()['vectorization']
+        self.assertEqual((found['line'], found['pattern']), (3, 'reduction'))
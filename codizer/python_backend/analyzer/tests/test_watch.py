@@ -0,0 +1,93 @@
+import json
+import os
+import stat
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import watch
+from ..watch import FILE_MODE, Watcher, write_json_atomic
+
+
+class WatcherTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        self.changed = []
+        self.removed = []
+
+    def watcher(self):
+        return Watcher(self.root, lambda path, source: self.changed.append((path, source)), self.removed.append)
+
+    def write(self, relative, text):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', newline='') as f:
+            f.write(text)
+        return path
+
+    def test_changes_and_removals(self):
+        first = self.write('a.py', 'x = 1\r\n')
+        second = self.write('pkg/b.py', 'y = 2\n')
+        self.write('notes.txt', 'ignored')
+        watcher = self.watcher()
+
+        self.assertEqual(watcher.poll(), (['a.py', 'pkg/b.py'], []))
+        # Sources arrive with universal newlines
+        self.assertEqual(sorted(self.changed), [(first, 'x = 1\n'), (second, 'y = 2\n')])
+
+        # Rewriting the same content is not a change
+        self.write('a.py', 'x = 1\r\n')
+        self.assertEqual(watcher.poll(), ([], []))
+
+        self.write('a.py', 'x = 3\n')
+        os.remove(second)
+        self.assertEqual(watcher.poll(), (['a.py'], ['pkg/b.py']))
+        self.assertEqual(self.removed, [second])
+
+    def test_index_survives_restarts(self):
+        self.write('a.py', 'x = 1\n')
+        self.watcher().poll()
+        self.changed.clear()
+        self.assertEqual(self.watcher().poll(), ([], []))
+        self.assertEqual(self.changed, [])
+
+    def test_skipped_directories(self):
+        self.write('pkg/__pycache__/c.py', 'z = 3\n')
+        self.write('.git/hooks/d.py', 'w = 4\n')
+        self.assertEqual(self.watcher().poll(), ([], []))
+
+    def test_settled_directories_are_not_listed_again(self):
+        self.write('pkg/b.py', 'y = 2\n')
+        # Stamps recorded more than RACY_WINDOW_NS after the mtime are trusted
+        for path in ('pkg/b.py', 'pkg', ''):
+            os.utime(os.path.join(self.root, path), (0, 0))
+        index = tempfile.TemporaryDirectory()
+        self.addCleanup(index.cleanup)
+        watcher = Watcher(self.root, lambda path, source: self.changed.append((path, source)),
+                          index_path=os.path.join(index.name, 'index.json'))
+        self.assertEqual(watcher.poll(), (['pkg/b.py'], []))
+        with mock.patch.object(watch.os, 'scandir', wraps=os.scandir) as scandir:
+            self.assertEqual(watcher.poll(), ([], []))
+        scandir.assert_not_called()
+
+
+class WriteJSONAtomicTests(SimpleTestCase):
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'result.json')
+            write_json_atomic(path, {'a': 1})
+            write_json_atomic(path, {'a': 2})
+            with open(path) as f:
+                self.assertEqual(json.load(f), {'a': 2})
+            # No temporary files are left behind
+            self.assertEqual(os.listdir(root), ['result.json'])
+
+    def test_mode_follows_umask(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'result.json')
+            write_json_atomic(path, {})
+            # What open() would have created, not mkstemp's 0600
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), FILE_MODE)
@@ -3,5 +3,8 @@ from . import views
 
 urlpatterns = [
     path('analyze/', views.analyze_code, name='analyze_code'),
+    path('analyze/stream/', views.analyze_code_stream, name='analyze_code_stream'),
     path('history/', views.get_analysis_history, name='analysis_history'),
+    path('rollups/', views.get_analysis_rollups, name='analysis_rollups'),
+    path('functions/', views.query_function_index, name='function_index'),
 ] 
\ No newline at end of file
@@ -0,0 +1,937 @@
+"""
+Loops that NumPy can run as whole-array operations.
+
+A Python loop pays the interpreter for every iteration; the same
+arithmetic on whole arrays runs in one compiled pass.
+vectorization_candidates looks for loop nests (perfect nests of for loops,
+and comprehensions) whose bodies are made only of:
+
+    element-wise        out[i] = a[i] * b[i] + c, out.append(f(x)),
+                        [math.sqrt(x) for x in xs]
+    reduction           total += a[i] * w[i], best = max(best, x),
+                        sum(x * x for x in xs)
+    index-accumulation  row_sums[i] += m[i][j], c[i][j] += a[i][k] * b[k][j],
+                        counts[x] += 1
+
+with an optional `if` masking them (np.where, boolean masks). Each loop
+variable becomes an array axis: range(start, stop) indexes a slice of the
+arrays it subscripts (a[i + 1] is a[start + 1:stop + 1]), `for x in xs`
+stands for xs itself, and arrays indexed by different loop variables
+broadcast against each other. The rewrite is shown as NumPy code, with a
+speedup class:
+
+    asymptotic  the body does not depend on the loop variables: a closed
+                form replaces the loop (result += n * n * n)
+    blas        matrix products: one BLAS call replaces the multiply-adds
+    high        one compiled pass over the data replaces the iterations
+    moderate    np.add.at, which still handles one index at a time
+
+Anything else in the body (calls the rewrite cannot map, breaks, returns,
+stores an iteration reads back, bounds that depend on an outer loop
+variable) rules the loop out; an inner nest is still considered on its
+own. Candidates are ranked by loop depth, then by static cost (the trip
+counts of the nest and the loops around it, see loop_bounds).
+"""
+import ast
+import copy
+
+from .cost_models.numpy_costs import ARRAY
+from .loop_bounds import COMPREHENSIONS, ONE, SCOPES, LoopCost, describe, dotted_name, scopes_of
+
+SPEEDUPS = {
+    'asymptotic': 'removes the loop: the cost no longer grows with its iterations',
+    'blas': '~100-1000x: one BLAS call instead of interpreted multiply-adds',
+    'high': '~10-100x: one compiled pass over the data instead of interpreted iterations',
+    'moderate': '~2-10x: np.add.at still handles repeated indices one at a time',
+}
+# The weakest class of its statements is the loop's
+SPEEDUP_ORDER = ('asymptotic', 'blas', 'high', 'moderate')
+
+# Letters of the axes in einsum specifications
+AXIS_LETTERS = 'ijklmnopqrstuvwxyz'
+
+ARITHMETIC = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow,
+              ast.BitAnd, ast.BitOr, ast.BitXor, ast.LShift, ast.RShift)
+
+# Builtins with an element-wise NumPy counterpart (min and max of two values)
+BUILTIN_UFUNCS = {'abs': 'abs', 'round': 'round', 'pow': 'power', 'min': 'minimum', 'max': 'maximum'}
+MATH_UFUNCS = {
+    'sqrt': 'sqrt', 'exp': 'exp', 'expm1': 'expm1', 'log': 'log', 'log2': 'log2', 'log10': 'log10',
+    'log1p': 'log1p', 'sin': 'sin', 'cos': 'cos', 'tan': 'tan', 'asin': 'arcsin', 'acos': 'arccos',
+    'atan': 'arctan', 'atan2': 'arctan2', 'sinh': 'sinh', 'cosh': 'cosh', 'tanh': 'tanh', 'floor': 'floor',
+    'ceil': 'ceil', 'trunc': 'trunc', 'fabs': 'abs', 'hypot': 'hypot', 'pow': 'power', 'isnan': 'isnan',
+    'isinf': 'isinf', 'isfinite': 'isfinite', 'copysign': 'copysign', 'degrees': 'degrees', 'radians': 'radians',
+}
+NUMPY_UFUNCS = set(MATH_UFUNCS.values()) | {
+    'absolute', 'minimum', 'maximum', 'fmin', 'fmax', 'where', 'clip', 'sign', 'square', 'cbrt', 'exp2',
+    'add', 'subtract', 'multiply', 'divide', 'true_divide', 'floor_divide', 'mod', 'remainder', 'negative',
+    'reciprocal', 'rint', 'around',
+}
+# Invariant calls that can be evaluated once instead of per iteration
+PURE_BUILTINS = set(BUILTIN_UFUNCS) | {'len', 'int', 'float', 'bool'}
+
+REDUCTIONS = ('sum', 'max', 'min', 'any', 'all')
+
+
+class _NotVectorizable(Exception):
+    """Raised while rewriting a loop nest that has no whole-array form."""
+
+
+def vectorization_candidates(code, models=None, scopes=None):
+    """
+    [{'line', 'loops', 'pattern', 'iterations', 'complexity', 'equivalent',
+    'speedup', 'estimate', 'note'}], deepest loop nests first and then the
+    costliest. Empty if the code does not parse. scopes are those of
+    scopes_of(code, models) when already built.
+    """
+    if scopes is None:
+        scopes = scopes_of(code, models)
+    if scopes is None:
+        return []
+    numpy = _numpy_alias(scopes[0])
+    candidates = []
+    for scope in scopes:
+        _scan(scope, numpy, candidates)
+    candidates.sort(key=lambda item: (-item[0][0], tuple(-r for r in item[0][1]), item[1]['line']))
+    return [candidate for _, candidate in candidates]
+
+
+def _scan(scope, numpy, candidates):
+    # (node, multiplier)
+    pending = [(statement, ONE) for statement in scope.body]
+    while pending:
+        node, multiplier = pending.pop()
+        if isinstance(node, SCOPES):
+            continue
+        if isinstance(node, ast.For):
+            found = _rewrite(scope, numpy, _perfect_nest(node), multiplier, _loop_statements, node)
+            if found is not None:
+                candidates.append(found)
+                continue
+            pending.append((node.iter, multiplier))
+            pending.extend((child, scope.trip(node, multiplier)) for child in node.body)
+            pending.extend((child, multiplier) for child in node.orelse)
+            continue
+        if isinstance(node, (ast.AsyncFor, ast.While)):
+            inner = scope.trip(node, multiplier)
+            pending.append((node.iter if isinstance(node, ast.AsyncFor) else node.test, multiplier))
+            pending.extend((child, inner) for child in node.body)
+            pending.extend((child, multiplier) for child in node.orelse)
+            continue
+        comprehension = _reduced_comprehension(node) or (node if isinstance(node, ast.ListComp) else None)
+        if comprehension is not None:
+            found = _rewrite(scope, numpy, comprehension.generators, multiplier, _comprehension_statements, node)
+            if found is not None:
+                candidates.append(found)
+                continue
+        if isinstance(node, COMPREHENSIONS):
+            inner = multiplier
+            for generator in node.generators:
+                pending.append((generator.iter, inner))
+                inner = scope.trip(generator, inner)
+                pending.extend((condition, inner) for condition in generator.ifs)
+            elements = (node.key, node.value) if isinstance(node, ast.DictComp) else (node.elt,)
+            pending.extend((element, inner) for element in elements)
+            continue
+        pending.extend((child, multiplier) for child in ast.iter_child_nodes(node))
+
+
+def _perfect_nest(loop):
+    """The for loops of a perfect nest starting at loop: each one's body is only the next."""
+    loops = [loop]
+    while len(loop.body) == 1 and isinstance(loop.body[0], ast.For) and not loop.orelse:
+        loop = loop.body[0]
+        loops.append(loop)
+    return loops
+
+
+def _reduced_comprehension(node):
+    """The comprehension in sum(x * x for x in xs), max(...), any(...), else None."""
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in REDUCTIONS \
+            and len(node.args) == 1 and not node.keywords \
+            and isinstance(node.args[0], (ast.GeneratorExp, ast.ListComp)):
+        return node.args[0]
+    return None
+
+
+def _rewrite(scope, numpy, loops, multiplier, statements, node):
+    """The candidate for a loop nest (for loops or comprehension generators), None if it has no whole-array form."""
+    if any(getattr(loop, 'orelse', None) or getattr(loop, 'is_async', False) for loop in loops):
+        return None
+    trip = ONE
+    cost = multiplier
+    for loop in loops:
+        trip = scope.trip(loop, trip)
+        cost = scope.trip(loop, cost)
+    if trip == ONE:
+        # Constant-bounded: nothing to gain
+        return None
+    nest = _Nest(scope, numpy, node, multiplier)
+    try:
+        for loop in loops:
+            nest.bind(loop.target, loop.iter)
+        rewritten = statements(nest, node)
+    except (_NotVectorizable, RecursionError):
+        return None
+    patterns = []
+    for pattern, _, _ in rewritten:
+        if pattern is not None and pattern not in patterns:
+            patterns.append(pattern)
+    if not patterns:
+        # Only temporaries
+        return None
+    speedup = max((speedup for _, speedup, _ in rewritten if speedup is not None), key=SPEEDUP_ORDER.index)
+    cost = LoopCost(cost, scope.sources)
+    arrays = sorted(nest.arrays - nest.typed)
+    return (len(loops), cost.rank), {
+        'line': node.lineno,
+        'loops': len(loops),
+        'pattern': ', '.join(patterns),
+        'iterations': describe(trip),
+        'complexity': cost.complexity,
+        'equivalent': '; '.join(ast.unparse(ast.fix_missing_locations(equivalent)) for _, _, equivalent in rewritten),
+        'speedup': speedup,
+        'estimate': SPEEDUPS[speedup],
+        'note': f"assumes {', '.join(arrays)} {'is a NumPy array' if len(arrays) == 1 else 'are NumPy arrays'} "
+                f"(convert once with {numpy}.asarray)" if arrays else '',
+    }
+
+
+def _loop_statements(nest, loop):
+    """Rewritten statements of the innermost body of the for loop nest starting at loop."""
+    body = _perfect_nest(loop)[-1].body
+    nest.collect_writes(body)
+    rewritten = []
+    for statement in body:
+        if isinstance(statement, ast.If) and not statement.orelse:
+            mask = nest.term(statement.test)
+            for masked in statement.body:
+                rewritten.extend(nest.statement(masked, mask))
+        else:
+            rewritten.extend(nest.statement(statement, None))
+    return rewritten
+
+
+def _comprehension_statements(nest, node):
+    """The rewritten expression of a list comprehension, or of a reduction over one."""
+    comprehension = _reduced_comprehension(node)
+    generators = (comprehension or node).generators
+    mask = None
+    for generator in generators:
+        for condition in generator.ifs:
+            term = nest.term(condition)
+            mask = term if mask is None else nest.combine(ast.BitAnd(), mask, term)
+    element = (comprehension or node).elt
+    if comprehension is None:
+        return [('element-wise', 'high', nest.collected(element, mask))]
+    reduction = node.func.id
+    if reduction == 'sum':
+        reduced, speedup = nest.total(element, mask)
+        return [('reduction', speedup, reduced)]
+    if mask is not None:
+        raise _NotVectorizable
+    value, axes = nest.term(element)
+    if not axes:
+        raise _NotVectorizable
+    return [('reduction', 'high', nest.call(reduction, value))]
+
+
+class _Nest:
+    """
+    The loop variables of one nest as array axes, numbered outermost first,
+    and the rewriting of expressions over them into terms: (expression,
+    axes) pairs, an array expression whose dimensions are those axes in
+    order, or a scalar for no axes.
+    """
+
+    def __init__(self, scope, numpy, node, multiplier):
+        self.scope = scope
+        self.numpy = numpy
+        self.node = node              # the outermost loop, or the comprehension
+        self.multiplier = multiplier  # trip count of the loops around it
+        self.lengths = []        # per axis: expression for its trip count, None if it varies
+        self.variables = {}      # name -> ('index', axis, start, stop, step) | ('element', term)
+        self.temporaries = {}    # name -> its term, for names assigned earlier in the body
+        self.computed = set()    # temporaries whose value is arithmetic on the loop variables
+        self.arithmetic = False  # whether the last term rewritten computes anything (not just copies)
+        self.written = set()     # names the body assigns
+        self.stored = set()      # names of the arrays the body stores into
+        self.arrays = set()      # names of the arrays the rewrite operates on
+        self.typed = set()       # those known to be NumPy arrays already
+        self.appended = set()    # names of the lists the body appends to
+
+    # Loop variables
+
+    def bind(self, target, iterable):
+        axis = len(self.lengths)
+        if isinstance(target, ast.Name) and _is_call(iterable, 'range') and 1 <= len(iterable.args) <= 3 \
+                and not iterable.keywords:
+            args = iterable.args
+            start, stop = (ast.Constant(0), args[0]) if len(args) == 1 else args[:2]
+            step = args[2] if len(args) == 3 else None
+            if step is not None:
+                if not (isinstance(step, ast.Constant) and type(step.value) is int and step.value > 0):
+                    raise _NotVectorizable
+                step = None if step.value == 1 else step
+            if not self.invariant(start):
+                raise _NotVectorizable
+            stop = self._rectangular(stop)
+            self.variables[target.id] = ('index', axis, start, stop, step)
+            if step is not None:
+                length = self.call('len', ast.Call(ast.Name('range'), [start, stop, step], []), numpy=False)
+            elif isinstance(start, ast.Constant) and start.value == 0:
+                length = stop
+            else:
+                length = _shifted(stop, -start.value) if isinstance(start, ast.Constant) \
+                    else ast.BinOp(stop, ast.Sub(), start)
+            self.lengths.append(length)
+        elif isinstance(target, ast.Name):
+            self.variables[target.id] = ('element', self._elements(iterable, axis))
+            self.lengths.append(self.call('len', iterable, numpy=False) if self.invariant(iterable) else None)
+        elif isinstance(target, ast.Tuple) and all(isinstance(name, ast.Name) for name in target.elts) \
+                and isinstance(iterable, ast.Call) and not iterable.keywords \
+                and isinstance(iterable.func, ast.Name) and iterable.func.id in ('enumerate', 'zip') \
+                and self.scope.type_of(iterable.func) is None:
+            names = target.elts
+            if iterable.func.id == 'enumerate':
+                if len(iterable.args) != 1 or len(names) != 2 or not self.invariant(iterable.args[0]):
+                    raise _NotVectorizable
+                sequence = iterable.args[0]
+                length = self.call('len', sequence, numpy=False)
+                self.variables[names[0].id] = ('index', axis, ast.Constant(0), length, None)
+                self.variables[names[1].id] = ('element', self._elements(sequence, axis))
+            else:
+                if len(iterable.args) != len(names) or not iterable.args:
+                    raise _NotVectorizable
+                for name, sequence in zip(names, iterable.args):
+                    self.variables[name.id] = ('element', self._elements(sequence, axis))
+                sequence = iterable.args[0]
+                length = self.call('len', sequence, numpy=False) if self.invariant(sequence) else None
+            self.lengths.append(length)
+        else:
+            raise _NotVectorizable
+
+    def _elements(self, iterable, axis):
+        """Term of the items of iterable along a new axis."""
+        node, axes = self.term(iterable)
+        if isinstance(node, (ast.Constant, ast.List, ast.Tuple, ast.Set, ast.Dict)):
+            raise _NotVectorizable
+        return node, axes + (axis,)
+
+    def _rectangular(self, stop):
+        """
+        stop without the loop variables of outer loops: range(len(m[i]))
+        runs the same for every row of a rectangular m, so it is len(m[0]).
+        """
+        if self.invariant(stop):
+            return stop
+        rows = self._first_row(stop)
+        if not self.invariant(rows):
+            # range(i): a triangle, not a rectangle
+            raise _NotVectorizable
+        return rows
+
+    def _first_row(self, node):
+        """node at the first value of the outer loop variables: m[i] is m[0], row (for row in m) is m[0]."""
+        def first(child):
+            if isinstance(child, ast.Name) and self.variables.get(child.id, ('',))[0] == 'element':
+                element, axes = self.variables[child.id][1]
+                zeros = [ast.Constant(0) for _ in axes]
+                return ast.Subscript(element, zeros[0] if len(zeros) == 1 else ast.Tuple(zeros))
+            return child
+
+        node = first(copy.deepcopy(node))
+        for child in ast.walk(node):
+            if isinstance(child, ast.Subscript):
+                if isinstance(child.slice, ast.Name) and self.variables.get(child.slice.id, ('',))[0] == 'index':
+                    child.slice = ast.Constant(0)
+                child.value = first(child.value)
+        return node
+
+    # Terms
+
+    def invariant(self, node):
+        """True if node has the same value in every iteration and is safe to evaluate once."""
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name) and (child.id in self.variables or child.id in self.temporaries
+                                                or child.id in self.written or child.id in self.stored):
+                return False
+            if isinstance(child, ast.Call) and not self._pure(child):
+                return False
+            if isinstance(child, (ast.Await, ast.Yield, ast.YieldFrom, ast.NamedExpr, ast.Lambda) + COMPREHENSIONS):
+                return False
+        return True
+
+    def _pure(self, call):
+        function = call.func
+        if isinstance(function, ast.Name) and self.scope.type_of(function) is None:
+            return function.id in PURE_BUILTINS
+        path = self.scope.type_of(function) if isinstance(function, (ast.Name, ast.Attribute)) else None
+        if path is None:
+            return False
+        module, _, name = path.rpartition('.')
+        return (module == 'math' and name in MATH_UFUNCS) or (module == 'numpy' and name in NUMPY_UFUNCS)
+
+    def term(self, node):
+        if self.invariant(node):
+            if self._textual(node):
+                raise _NotVectorizable
+            if isinstance(node, (ast.Name, ast.Attribute)) and self.scope.type_of(node) == ARRAY:
+                self.typed.add(dotted_name(node))
+            return node, ()
+        if isinstance(node, ast.Name):
+            if node.id in self.temporaries:
+                self.arithmetic = self.arithmetic or node.id in self.computed
+                return self.temporaries[node.id]
+            variable = self.variables.get(node.id)
+            if variable is None:
+                raise _NotVectorizable
+            if variable[0] == 'element':
+                self._array(variable[1][0])
+                return variable[1]
+            _, axis, start, stop, step = variable
+            bounds = [stop] if isinstance(start, ast.Constant) and start.value == 0 and step is None \
+                else [start, stop] + ([step] if step is not None else [])
+            return self.call('arange', *bounds), (axis,)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ARITHMETIC):
+            self.arithmetic = True
+            return self.combine(node.op, self.term(node.left), self.term(node.right))
+        if isinstance(node, ast.UnaryOp):
+            value, axes = self.term(node.operand)
+            op = ast.Invert() if isinstance(node.op, ast.Not) else node.op
+            self.arithmetic = self.arithmetic or isinstance(op, ast.USub)
+            return ast.UnaryOp(op, value), axes
+        if isinstance(node, ast.Subscript):
+            value, axes, _ = self.subscript(node)
+            return value, axes
+        if isinstance(node, ast.Call):
+            return self._call_term(node)
+        if isinstance(node, ast.IfExp):
+            return self._elementwise('where', [node.test, node.body, node.orelse])
+        if isinstance(node, ast.Compare):
+            operands = [self.term(operand) for operand in [node.left] + node.comparators]
+            result = None
+            for op, left, right in zip(node.ops, operands, operands[1:]):
+                if isinstance(op, (ast.Is, ast.IsNot, ast.In, ast.NotIn)):
+                    raise _NotVectorizable
+                axes = _union(left[1], right[1])
+                comparison = ast.Compare(self.expand(left, axes), [op], [self.expand(right, axes)]), axes
+                # 0 < x < 5 is (0 < x) & (x < 5) on arrays
+                result = comparison if result is None else self.combine(ast.BitAnd(), result, comparison)
+            return result
+        if isinstance(node, ast.BoolOp):
+            op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+            result = self.term(node.values[0])
+            for value in node.values[1:]:
+                result = self.combine(op, result, self.term(value))
+            return result
+        raise _NotVectorizable
+
+    def combine(self, op, left, right):
+        axes = _union(left[1], right[1])
+        return ast.BinOp(self.expand(left, axes), op, self.expand(right, axes)), axes
+
+    def expand(self, term, axes):
+        """A term's expression broadcast to axes: a[:, None] for a along the first of two."""
+        value, own = term
+        if not own or tuple(own) == tuple(axes[len(axes) - len(own):]):
+            # Broadcasting aligns trailing dimensions by itself
+            return value
+        index = [ast.Slice() if axis in own else ast.Constant(None) for axis in axes[axes.index(own[0]):]]
+        return ast.Subscript(value, ast.Tuple(index))
+
+    def subscript(self, node, store=False):
+        """
+        (expression, axes, gathered) for a subscript, the target of a store
+        if store; gathered is True for an index that is itself an array
+        (table[codes[i]]).
+        """
+        indices = []
+        while isinstance(node, ast.Subscript):
+            dimensions = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+            indices[:0] = [(index, node.value if i == 0 else None) for i, index in enumerate(dimensions)]
+            node = node.value
+        if store:
+            if dotted_name(node) is None:
+                raise _NotVectorizable
+            base, axes = node, ()
+        else:
+            base, axes = self.term(node)
+        self._array(base)
+        parts = [ast.Slice() for _ in axes]
+        axes = list(axes)
+        for index, prefix in indices:
+            if isinstance(index, ast.Slice):
+                raise _NotVectorizable
+            lane = self._lane(index)
+            if lane is not None:
+                parts.append(self._slice(*lane, prefix))
+                axes.append(lane[0][1])
+            elif self.invariant(index) and not self._textual(index):
+                parts.append(index)
+            elif len(indices) == 1 and not axes:
+                key, key_axes = self.term(index)
+                return ast.Subscript(base, key), key_axes, True
+            else:
+                raise _NotVectorizable
+        while parts and _is_whole(parts[-1]):
+            parts.pop()
+        value = ast.Subscript(base, parts[0] if len(parts) == 1 else ast.Tuple(parts)) if parts else base
+        if axes != sorted(set(axes)):
+            if len(axes) != 2 or axes[0] <= axes[1]:
+                raise _NotVectorizable
+            value, axes = ast.Attribute(value, 'T'), axes[::-1]
+        return value, tuple(axes), False
+
+    def _lane(self, index):
+        """(index variable, offset) for i, i + 1, i - 2, else None."""
+        offset = 0
+        if isinstance(index, ast.BinOp) and isinstance(index.op, (ast.Add, ast.Sub)) \
+                and isinstance(index.right, ast.Constant) and type(index.right.value) is int:
+            offset = index.right.value if isinstance(index.op, ast.Add) else -index.right.value
+            index = index.left
+        if isinstance(index, ast.Name) and self.variables.get(index.id, ('',))[0] == 'index':
+            return self.variables[index.id], offset
+        return None
+
+    def _slice(self, variable, offset, prefix):
+        """The slice a[i + offset] covers over the loop: a[start + offset:stop + offset:step]."""
+        _, _, start, stop, step = variable
+        lower = _shifted(start, offset)
+        if isinstance(lower, ast.Constant) and lower.value < 0:
+            # a[i - 1] at i = 0 wraps around to the last element
+            raise _NotVectorizable
+        lower = None if isinstance(lower, ast.Constant) and lower.value == 0 else lower
+        upper = _shifted(stop, offset)
+        if offset == 0 and prefix is not None and _is_call(stop, 'len') \
+                and ast.unparse(stop.args[0]) == ast.unparse(self._first_row(prefix)):
+            # range(len(a)) covers all of a
+            upper = None
+        return ast.Slice(lower, upper, step)
+
+    def _call_term(self, call):
+        function = call.func
+        if isinstance(function, ast.Name) and self.scope.type_of(function) is None \
+                and function.id in BUILTIN_UFUNCS:
+            name = BUILTIN_UFUNCS[function.id]
+            if name in ('minimum', 'maximum') and len(call.args) != 2:
+                raise _NotVectorizable
+            return self._elementwise(name, call.args, call.keywords)
+        path = self.scope.type_of(function) if isinstance(function, (ast.Name, ast.Attribute)) else None
+        module, _, name = (path or '').rpartition('.')
+        if module == 'math' and name in MATH_UFUNCS:
+            return self._elementwise(MATH_UFUNCS[name], call.args, call.keywords)
+        if module == 'numpy' and name in NUMPY_UFUNCS:
+            return self._elementwise(name, call.args, call.keywords)
+        raise _NotVectorizable
+
+    def _elementwise(self, name, args, keywords=()):
+        if keywords or any(isinstance(arg, ast.Starred) for arg in args):
+            raise _NotVectorizable
+        terms = [self.term(arg) for arg in args]
+        self.arithmetic = self.arithmetic or name != 'where'
+        axes = ()
+        for term in terms:
+            axes = _union(axes, term[1])
+        return self.call(name, *(self.expand(term, axes) for term in terms)), axes
+
+    def call(self, name, *args, numpy=True):
+        function = ast.Attribute(ast.Name(self.numpy), name) if numpy else ast.Name(name)
+        return ast.Call(function, list(args), [])
+
+    def _array(self, node):
+        name = dotted_name(node)
+        if name is not None:
+            self.arrays.add(name)
+            if self.scope.type_of(node) == ARRAY:
+                self.typed.add(name)
+
+    def _length(self, axes):
+        """Product of the trip counts of axes, None for none."""
+        product = None
+        for axis in axes:
+            if self.lengths[axis] is None:
+                raise _NotVectorizable
+            product = self.lengths[axis] if product is None else ast.BinOp(product, ast.Mult(), self.lengths[axis])
+        return product
+
+    def _all(self):
+        return tuple(range(len(self.lengths)))
+
+    # Statements
+
+    def collect_writes(self, body):
+        for node in ast.walk(ast.Module(body, [])):
+            targets = ()
+            if isinstance(node, ast.Assign):
+                targets = node.targets
+            elif isinstance(node, (ast.AugAssign, ast.AnnAssign)):
+                targets = (node.target,)
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'append':
+                targets = (node.func.value,)
+            for target in targets:
+                names = self.written
+                if isinstance(target, ast.Subscript):
+                    names = self.stored
+                    while isinstance(target, ast.Subscript):
+                        target = target.value
+                if isinstance(target, ast.Attribute):
+                    # self.total += x: attributes are written through the object they belong to
+                    target = dotted_name(target)
+                    if target is None:
+                        raise _NotVectorizable
+                    names.add(target.split('.')[0])
+                    continue
+                if not isinstance(target, ast.Name) or target.id in self.variables:
+                    raise _NotVectorizable
+                names.add(target.id)
+
+    def statement(self, node, mask):
+        """[(pattern, speedup, rewritten statement)] for one statement of the body."""
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target, value = node.targets[0], node.value
+            if isinstance(value, ast.BinOp) and isinstance(value.op, (ast.Add, ast.Sub, ast.Mult)) \
+                    and _same(value.left, target):
+                return self.accumulate(target, value.op, value.right, mask)
+            if isinstance(value, ast.BinOp) and isinstance(value.op, (ast.Add, ast.Mult)) \
+                    and _same(value.right, target):
+                return self.accumulate(target, value.op, value.left, mask)
+            if isinstance(target, ast.Name) and isinstance(value, ast.Call) and isinstance(value.func, ast.Name) \
+                    and value.func.id in ('max', 'min') and len(value.args) == 2 and not value.keywords \
+                    and self.scope.type_of(value.func) is None:
+                for own, other in (value.args, value.args[::-1]):
+                    if _same(own, target):
+                        return self.extreme(target, value.func.id, other, mask)
+            if isinstance(target, ast.Name):
+                if mask is not None:
+                    raise _NotVectorizable
+                # A temporary: the array of its values in every iteration, for later statements
+                self.arithmetic = False
+                node, axes = self.term(value)
+                if self.arithmetic:
+                    self.computed.add(target.id)
+                self.temporaries[target.id] = ast.Name(target.id), axes
+                return [(None, None, ast.Assign([ast.Name(target.id)], node))]
+            if isinstance(target, ast.Subscript):
+                return [self.store(target, value, mask)]
+        elif isinstance(node, ast.AugAssign):
+            return self.accumulate(node.target, node.op, node.value, mask)
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call) \
+                and isinstance(node.value.func, ast.Attribute) and node.value.func.attr == 'append' \
+                and isinstance(node.value.func.value, ast.Name) and len(node.value.args) == 1:
+            return [self.append(node.value.func.value, node.value.args[0], mask)]
+        elif isinstance(node, ast.Pass):
+            return []
+        raise _NotVectorizable
+
+    def accumulate(self, target, op, value, mask):
+        if isinstance(target, ast.Name):
+            if not isinstance(op, (ast.Add, ast.Sub, ast.Mult)) or not self._numeric(target.id) \
+                    or target.id in self.temporaries:
+                raise _NotVectorizable
+            if isinstance(op, ast.Mult):
+                product, speedup = self._product(value, mask)
+                return [('reduction', speedup, ast.AugAssign(target, op, product))]
+            reduced, speedup = self.total(value, mask)
+            return [('reduction', speedup, ast.AugAssign(target, op, reduced))]
+        if not isinstance(target, ast.Subscript):
+            raise _NotVectorizable
+        stored, axes, gathered = self.subscript(target, store=True)
+        if gathered:
+            return [self._scatter(target, op, value, mask)]
+        every = self._all()
+        if axes == every:
+            # In place, element by element
+            term = self.term(value)
+            if mask is not None:
+                identity = {ast.Add: 0, ast.Sub: 0, ast.Mult: 1, ast.Div: 1}.get(type(op))
+                if identity is None:
+                    raise _NotVectorizable
+                term = self._elementwise_masked(mask, term, ast.Constant(identity))
+            return [('element-wise', 'high', ast.AugAssign(stored, op, self.expand(term, every)))]
+        if not isinstance(op, (ast.Add, ast.Sub)):
+            raise _NotVectorizable
+        reduced, speedup = self._partial(value, axes, mask)
+        return [('index-accumulation', speedup, ast.AugAssign(stored, op, reduced))]
+
+    def total(self, value, mask):
+        """(sum of value over every iteration, speedup class)."""
+        every = self._all()
+        if mask is not None and isinstance(value, ast.Constant) and value.value == 1:
+            # Counting: if cond: count += 1
+            condition, axes = mask
+            return _times_node(self.call('count_nonzero', condition), self._length(_missing(every, axes))), 'high'
+        if mask is None and isinstance(value, ast.BinOp) and isinstance(value.op, ast.Mult):
+            left, right = self.term(value.left), self.term(value.right)
+            if len(left[1]) == 1 and left[1] == right[1]:
+                return _times_node(self.call('dot', left[0], right[0]), self._length(_missing(every, left[1]))), \
+                    'high'
+        term = self.term(value)
+        if mask is not None:
+            term = self._elementwise_masked(mask, term, ast.Constant(0))
+        node, axes = term
+        if axes:
+            node = self.call('sum', node)
+        return _times_node(node, self._length(_missing(every, axes))), 'high' if axes else 'asymptotic'
+
+    def _product(self, value, mask):
+        term = self.term(value)
+        if mask is not None:
+            term = self._elementwise_masked(mask, term, ast.Constant(1))
+        node, axes = term
+        if axes:
+            node = self.call('prod', node)
+        repeats = self._length(_missing(self._all(), axes))
+        return (ast.BinOp(node, ast.Pow(), repeats) if repeats is not None else node), \
+            'high' if axes else 'asymptotic'
+
+    def extreme(self, target, function, value, mask):
+        """best = max(best, x): the largest x of every iteration."""
+        if mask is not None or not self._numeric(target.id) or target.id in self.temporaries:
+            raise _NotVectorizable
+        node, axes = self.term(value)
+        if axes:
+            node = self.call(function, node)
+        best = ast.Call(ast.Name(function), [target, node], [])
+        return [('reduction', 'high' if axes else 'asymptotic', ast.Assign([target], best))]
+
+    def store(self, target, value, mask):
+        """out[i] = ...: the whole slice at once, if every iteration writes its own element."""
+        stored, axes, gathered = self.subscript(target, store=True)
+        if gathered or axes != self._all():
+            # Later iterations overwrite earlier ones
+            raise _NotVectorizable
+        term = self._computed(value)
+        if mask is not None:
+            term = self._elementwise_masked(mask, term, stored)
+        return 'element-wise', 'high', ast.Assign([stored], self.expand(term, axes))
+
+    def append(self, target, value, mask):
+        """
+        out.append(...) into a list: the array of every iteration's value.
+        It replaces the list only when the loop runs once, right after
+        out = [], and extends it otherwise.
+        """
+        if not self._empty_list(target.id) or target.id in self.appended:
+            # Two appends per iteration interleave their values
+            raise _NotVectorizable
+        self.appended.add(target.id)
+        collected = self.collected(value, mask)
+        if self.multiplier == ONE and self._starts_empty(target.id):
+            return 'element-wise', 'high', ast.Assign([target], collected)
+        return 'element-wise', 'high', ast.Expr(ast.Call(ast.Attribute(target, 'extend'), [collected], []))
+
+    def collected(self, value, mask):
+        """The values of every iteration in loop order, those where mask holds if given."""
+        every = self._all()
+        node, axes = self._computed(value)
+        if axes != every:
+            raise _NotVectorizable
+        if mask is not None:
+            if mask[1] != every:
+                raise _NotVectorizable
+            # Boolean masks flatten in loop order
+            return ast.Subscript(node, mask[0])
+        return ast.Call(ast.Attribute(node, 'ravel'), [], []) if len(every) > 1 else node
+
+    def _computed(self, value):
+        """Term of a value stored per iteration; copies and lookups (out[i] = a[i], [t[x] for x in xs]) do not count."""
+        self.arithmetic = False
+        term = self.term(value)
+        if not self.arithmetic:
+            raise _NotVectorizable
+        return term
+
+    def _partial(self, value, axes, mask):
+        """Sum of value over the axes not in axes (row_sums[i] += m[i][j]), broadcast to axes."""
+        reduced = _missing(self._all(), axes)
+        if mask is None:
+            product = self._contraction(value, axes, reduced)
+            if product is not None:
+                return product
+        term = self.term(value)
+        if mask is not None:
+            term = self._elementwise_masked(mask, term, ast.Constant(0))
+        node, own = term
+        summed = [own.index(axis) for axis in reduced if axis in own]
+        if len(summed) == len(own):
+            node = self.call('sum', node) if own else node
+        elif summed:
+            axis = ast.Constant(summed[0]) if len(summed) == 1 else ast.Tuple([ast.Constant(a) for a in summed])
+            node = ast.Call(ast.Attribute(ast.Name(self.numpy), 'sum'), [node], [ast.keyword('axis', axis)])
+        remaining = tuple(axis for axis in own if axis not in reduced)
+        node = _times_node(node, self._length([axis for axis in reduced if axis not in own]))
+        return self.expand((node, remaining), axes), 'high'
+
+    def _contraction(self, value, axes, reduced):
+        """A product of arrays summed over reduced axes: a @ b, or np.einsum(...)."""
+        factors = []
+        pending = [value]
+        while pending:
+            node = pending.pop()
+            if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult):
+                pending.extend((node.right, node.left))
+            else:
+                factors.append(node)
+        terms = [self.term(factor) for factor in factors]
+        scalars = [node for node, own in terms if not own]
+        arrays = [(node, own) for node, own in terms if own]
+        if len(arrays) < 2 or not set(reduced) <= {axis for _, own in arrays for axis in own}:
+            return None
+        matrix = _matmul(arrays, axes, reduced)
+        if matrix is not None:
+            result, speedup = matrix, 'blas'
+        else:
+            spec = ','.join(''.join(AXIS_LETTERS[axis] for axis in own) for _, own in arrays)
+            spec += '->' + ''.join(AXIS_LETTERS[axis] for axis in axes)
+            result, speedup = self.call('einsum', ast.Constant(spec), *(node for node, _ in arrays)), 'high'
+        for scalar in scalars:
+            result = ast.BinOp(scalar, ast.Mult(), result)
+        return result, speedup
+
+    def _scatter(self, target, op, value, mask):
+        """counts[x] += 1: np.bincount; totals[k[i]] += w[i]: np.add.at."""
+        every = self._all()
+        base, key = target.value, target.slice
+        key, key_axes = self.term(key)
+        if mask is not None or not isinstance(op, (ast.Add, ast.Sub)) or key_axes != every:
+            raise _NotVectorizable
+        flat = ast.Call(ast.Attribute(key, 'ravel'), [], []) if len(every) > 1 else key
+        if isinstance(op, ast.Add) and isinstance(value, ast.Constant) and value.value == 1:
+            counts = ast.Call(ast.Attribute(ast.Name(self.numpy), 'bincount'), [flat],
+                              [ast.keyword('minlength', self.call('len', base, numpy=False))])
+            return 'index-accumulation', 'high', ast.AugAssign(base, ast.Add(), counts)
+        term = self.term(value)
+        if not set(term[1]) <= set(every):
+            raise _NotVectorizable
+        ufunc = 'add' if isinstance(op, ast.Add) else 'subtract'
+        scatter = ast.Call(ast.Attribute(ast.Attribute(ast.Name(self.numpy), ufunc), 'at'),
+                           [base, key, self.expand(term, every)], [])
+        return 'index-accumulation', 'moderate', ast.Expr(scatter)
+
+    def _elementwise_masked(self, mask, term, otherwise):
+        axes = _union(mask[1], term[1])
+        return self.call('where', self.expand(mask, axes), self.expand(term, axes), otherwise), axes
+
+    def _numeric(self, name):
+        """False if name starts out as a string, a container or another non-number."""
+        for kind, value, _ in self.scope.bindings.get(name, ()):
+            if kind == 'value' and not (isinstance(value, ast.Constant) and type(value.value) in (int, float, complex)):
+                if isinstance(value, (ast.Constant, ast.JoinedStr, ast.List, ast.Tuple, ast.Set, ast.Dict)
+                              + COMPREHENSIONS):
+                    return False
+        return True
+
+    def _textual(self, node):
+        """True if node involves strings or lists: concatenating them and lookups by key are not arithmetic."""
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name):
+                if any(kind == 'value' and _literal(value) for kind, value, _ in self.scope.bindings.get(child.id, ())):
+                    return True
+            elif _literal(child) and not isinstance(child, (ast.List, ast.Tuple)):
+                return True
+        return False
+
+    def _empty_list(self, name):
+        return any(kind == 'value' and isinstance(value, ast.List) and not value.elts
+                   for kind, value, _ in self.scope.bindings.get(name, ()))
+
+    def _starts_empty(self, name):
+        """Whether the last statement before the loop, in its own block, to mention name is name = []."""
+        for statement in reversed(_preceding(self.scope.body, self.node)):
+            if any(isinstance(child, ast.Name) and child.id == name for child in ast.walk(statement)):
+                return isinstance(statement, ast.Assign) and len(statement.targets) == 1 \
+                    and isinstance(statement.targets[0], ast.Name) \
+                    and isinstance(statement.value, ast.List) and not statement.value.elts
+        return False
+
+
+def _matmul(arrays, axes, reduced):
+    """x @ y for two arrays contracted over one axis into the remaining ones, else None."""
+    if len(arrays) != 2 or len(reduced) != 1:
+        return None
+    shared = reduced[0]
+    for (x, x_axes), (y, y_axes) in (arrays, arrays[::-1]):
+        # x varies along (rows, shared) or (shared,), y along (shared, columns) or (shared,)
+        if not x_axes or x_axes[-1] != shared or len(x_axes) > 2 or len(y_axes) > 2 or shared not in y_axes:
+            continue
+        if len(y_axes) == 2 and y_axes[0] != shared:
+            y = y.value if isinstance(y, ast.Attribute) and y.attr == 'T' else ast.Attribute(y, 'T')
+        outer = tuple(x_axes[:-1]) + tuple(axis for axis in y_axes if axis != shared)
+        if outer == tuple(axes):
+            return ast.BinOp(x, ast.MatMult(), y)
+    return None
+
+
+def _union(a, b):
+    return tuple(sorted(set(a) | set(b)))
+
+
+def _missing(every, axes):
+    return [axis for axis in every if axis not in axes]
+
+
+def _times_node(node, factor):
+    if factor is None:
+        return node
+    if isinstance(node, ast.Constant) and node.value == 1:
+        return factor
+    return ast.BinOp(node, ast.Mult(), factor)
+
+
+def _shifted(node, offset):
+    """node + offset, folding constants: n - 1 shifted by 1 is n."""
+    if offset == 0:
+        return node
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return ast.Constant(node.value + offset)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub)) \
+            and isinstance(node.right, ast.Constant) and type(node.right.value) is int:
+        offset += node.right.value if isinstance(node.op, ast.Add) else -node.right.value
+        node = node.left
+        if offset == 0:
+            return node
+    return ast.BinOp(node, ast.Add() if offset > 0 else ast.Sub(), ast.Constant(abs(offset)))
+
+
+def _preceding(body, statement):
+    """The statements before statement in the block that holds it, searching body and the blocks nested in it."""
+    pending = [body]
+    while pending:
+        block = pending.pop()
+        for index, node in enumerate(block):
+            if node is statement:
+                return block[:index]
+            if isinstance(node, SCOPES):
+                continue
+            for field in ('body', 'orelse', 'finalbody', 'handlers', 'cases'):
+                nested = getattr(node, field, None)
+                if isinstance(nested, list):
+                    pending.append(nested)
+    return []
+
+
+def _literal(node):
+    return isinstance(node, (ast.JoinedStr, ast.List, ast.Tuple)) \
+        or (isinstance(node, ast.Constant) and isinstance(node.value, (str, bytes)))
+
+
+def _is_whole(part):
+    return isinstance(part, ast.Slice) and part.lower is None and part.upper is None and part.step is None
+
+
+def _same(a, b):
+    return ast.dump(a, annotate_fields=False).replace('Store()', 'Load()') \
+        == ast.dump(b, annotate_fields=False).replace('Store()', 'Load()')
+
+
+def _numpy_alias(module):
+    """The name the module imports numpy as, np if it does not."""
+    for name, bindings in module.bindings.items():
+        if any(kind == 'import' and payload == 'numpy' for kind, payload, _ in bindings):
+            return name
+    return 'np'
+
+
+def _is_call(node, name):
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == name
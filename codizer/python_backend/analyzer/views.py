@@ -1,13 +1,26 @@
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from .models import CodeAnalysis
-from .serializers import CodeAnalysisSerializer, CodeAnalysisRequestSerializer
-from .complexity_analyzer import ComplexityAnalyzer
+from .serializers import (
+    AnalysisRollupSerializer, CodeAnalysisSerializer, CodeAnalysisRequestSerializer, FunctionComplexitySerializer,
+    RollupQuerySerializer
+)
+from .function_index import query_functions
+from .progressive import progressive_analysis
+from .renderers import EventStreamRenderer, format_event
+from .rollups import record_analysis, rollup_counts
+from .service import (
+    analysis_budget, analysis_record, analyze, complexity_analyzer, document_key, document_versions,
+    recent_analyses, result_payload, superseded_payload
+)
+from .singleflight import Superseded
 
-# Initialize the analyzer
-complexity_analyzer = ComplexityAnalyzer()
+
+def _superseded_response(key):
+    return Response(superseded_payload(key), status=status.HTTP_409_CONFLICT)
 
 @api_view(['POST'])
 def analyze_code(request):
@@ -19,32 +32,97 @@ def analyze_code(request):
     if serializer.is_valid():
         code = serializer.validated_data['code']
         language = serializer.validated_data['language']
+        key = document_key(serializer.validated_data)
         
-        # Analyze the code
-        result = complexity_analyzer.analyze_code(code, language)
+        # Analyze the code, sharing the work with identical requests in flight
+        try:
+            result, shared = analyze(code, language, key, serializer.validated_data.get('version'))
+        except Superseded:
+            return _superseded_response(key)
         
-        # Save to database
-        analysis = CodeAnalysis(
-            code=code,
-            language=language,
-            time_complexity=result['time_complexity'],
-            space_complexity=result['space_complexity']
-        )
-        analysis.save()
+        # Save to database once per computation
+        if not shared:
+            record_analysis(analysis_record(code, language, result))
         
         # Return the result
-        return Response({
-            'time_complexity': result['time_complexity'],
-            'space_complexity': result['space_complexity']
-        }, status=status.HTTP_200_OK)
+        return Response(result_payload(result), status=status.HTTP_200_OK)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def analyze_code_stream(request):
+    """
+    Analyze code progressively as Server-Sent Events: 'coarse' first, then
+    one 'function' event per function, 'lines' batches of per-line results
+    and finally 'complete' with the same result as analyze_code
+    """
+    serializer = CodeAnalysisRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    code = serializer.validated_data['code']
+    language = serializer.validated_data['language']
+    version = serializer.validated_data.get('version')
+    key = document_key(serializer.validated_data)
+    if key is not None and not document_versions.claim(key, version):
+        return _superseded_response(key)
+    
+    def events():
+        for event, data in progressive_analysis(complexity_analyzer, code, language, analysis_budget):
+            # Stop streaming for a document the editor has already changed again
+            if key is not None and document_versions.is_superseded(key, version):
+                yield format_event('superseded', {'latest_version': document_versions.latest(key)})
+                return
+            if event == 'complete':
+                record_analysis(analysis_record(code, language, data))
+            yield format_event(event, data)
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @api_view(['GET'])
 def get_analysis_history(request):
     """
     Get the analysis history
     """
-    analyses = CodeAnalysis.objects.all().order_by('-analysis_date')[:20]  # Get the last 20 analyses
-    serializer = CodeAnalysisSerializer(analyses, many=True)
+    serializer = CodeAnalysisSerializer(recent_analyses(), many=True)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+def get_analysis_rollups(request):
+    """
+    Analysis counts per period, language, time and space class, from the
+    rollup table, e.g. /api/rollups/?period=day&language=python&since=2026-01-01T00:00Z
+    """
+    query = RollupQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = AnalysisRollupSerializer(rollup_counts(**query.validated_data), many=True)
+    return Response(serializer.data, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+def query_function_index(request):
+    """
+    Query the function complexity index, e.g.
+    /api/functions/?min_time=O(n^2)&path=services/
+    """
+    try:
+        limit = min(int(request.query_params.get('limit', 100)), 1000)
+    except ValueError:
+        return Response({'limit': ['A valid integer is required.']}, status=status.HTTP_400_BAD_REQUEST)
+    
+    functions = query_functions(
+        min_time=request.query_params.get('min_time'),
+        min_space=request.query_params.get('min_space'),
+        path_prefix=request.query_params.get('path'),
+        class_name=request.query_params.get('class_name'),
+        root=request.query_params.get('root'),
+        limit=limit
+    )
+    serializer = FunctionComplexitySerializer(functions, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,239 @@
+"""
+Keep per-file results for a source tree current by polling.
+
+The tree index records path, mtime, size and content hash for every
+watched file, plus the mtime and entry list of every directory. A poll
+stats directories and files but lists only directories whose mtime
+changed (an entry was added, removed or renamed), so unchanged subtrees
+are not walked again. Files whose mtime or size changed are hashed, and
+only a new hash reaches the update callback. Results and the index
+itself are written atomically. Only the standard library is used, no
+native file-watching API.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Directories never worth watching
+SKIP_DIRS = {'.git', '.hg', '.svn', '__pycache__', 'node_modules', 'venv', '.venv', '.tox'}
+
+# Index file kept in the watched root
+INDEX_NAME = '.complexity-index.json'
+INDEX_VERSION = 1
+
+# A file or directory changed again within the same mtime tick keeps its
+# mtime, so stamps recorded this soon after their mtime are not trusted:
+# such files are hashed and such directories listed again on every poll
+# until a recording happens later than this
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+
+def _file_mode():
+    """Mode open() gives new files under the process umask (mkstemp always uses 0600)."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Read once: changing the umask is process-wide, so it is not done per write
+FILE_MODE = _file_mode()
+
+
+def write_json_atomic(path, data, **dump_options):
+    """Write JSON to a temporary file beside path, then rename it over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **dump_options)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temporary, FILE_MODE)
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temporary)
+        raise
+
+
+class TreeIndex:
+    """
+    {path: [mtime_ns, size, sha256, recorded_ns]} for watched files and
+    {path: [mtime_ns, subdirectories, file names, recorded_ns]} for
+    directories, with paths relative to root.
+    """
+
+    def __init__(self, root, suffixes=('.py',)):
+        self.root = os.path.abspath(root)
+        self.suffixes = tuple(suffixes)
+        self.files = {}
+        self.dirs = {}
+
+    def load(self, path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION and data.get('suffixes') == list(self.suffixes):
+            self.files = data.get('files', {})
+            self.dirs = data.get('dirs', {})
+
+    def save(self, path):
+        write_json_atomic(path, {
+            'version': INDEX_VERSION,
+            'suffixes': list(self.suffixes),
+            'files': self.files,
+            'dirs': self.dirs,
+        })
+
+    def scan(self):
+        """
+        Return (candidates, removed): files whose stat no longer matches
+        the index (or whose stamp is too recent to trust), and indexed files
+        that are gone.
+        """
+        candidates = []
+        seen_files = set()
+        seen_dirs = set()
+        pending = ['']
+        while pending:
+            relative = pending.pop()
+            listing = self._listing(relative)
+            if listing is None:
+                continue
+            seen_dirs.add(relative)
+            subdirectories, names = listing
+            for name in names:
+                path = f'{relative}/{name}' if relative else name
+                try:
+                    stat = os.stat(os.path.join(self.root, path))
+                except OSError:
+                    continue
+                seen_files.add(path)
+                entry = self.files.get(path)
+                if (entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size
+                        or entry[3] - entry[0] < RACY_WINDOW_NS):
+                    candidates.append((path, stat))
+            pending.extend(f'{relative}/{name}' if relative else name for name in subdirectories)
+
+        for relative in set(self.dirs) - seen_dirs:
+            del self.dirs[relative]
+        removed = [path for path in self.files if path not in seen_files]
+        return candidates, removed
+
+    def _listing(self, relative):
+        """(subdirectories, watched file names) of a directory, listed again only if its mtime changed."""
+        directory = os.path.join(self.root, relative)
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        cached = self.dirs.get(relative)
+        if cached is not None and cached[0] == mtime_ns and cached[3] - mtime_ns >= RACY_WINDOW_NS:
+            return cached[1], cached[2]
+
+        subdirectories, names = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            subdirectories.append(entry.name)
+                    elif entry.name.endswith(self.suffixes) and entry.is_file():
+                        names.append(entry.name)
+        except OSError:
+            return None
+        subdirectories.sort()
+        names.sort()
+        self.dirs[relative] = [mtime_ns, subdirectories, names, time.time_ns()]
+        return subdirectories, names
+
+    def record(self, path, stat, content_hash):
+        self.files[path] = [stat.st_mtime_ns, stat.st_size, content_hash, time.time_ns()]
+
+
+class Watcher:
+    """
+    Polls a tree and calls on_change(absolute_path, source) for files whose
+    content hash changed, on_remove(absolute_path) for deleted ones.
+    """
+
+    def __init__(self, root, on_change, on_remove=None, index_path=None, suffixes=('.py',)):
+        self.index = TreeIndex(root, suffixes)
+        self.on_change = on_change
+        self.on_remove = on_remove
+        self.index_path = index_path or os.path.join(self.index.root, INDEX_NAME)
+        self.index.load(self.index_path)
+
+    def poll(self):
+        """One pass over the tree. Returns (updated paths, removed paths)."""
+        candidates, removed = self.index.scan()
+        updated = []
+        for path, stat in candidates:
+            absolute = os.path.join(self.index.root, path)
+            try:
+                with open(absolute, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            content_hash = hashlib.sha256(data).hexdigest()
+            entry = self.index.files.get(path)
+            if entry is None or entry[2] != content_hash:
+                # Universal newlines, as a file opened in text mode reads
+                source = data.decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+                try:
+                    self.on_change(absolute, source)
+                    updated.append(path)
+                except Exception as e:
+                    # Keep watching; the file is retried once it changes again
+                    print(f"Error analyzing {path}: {e}", file=sys.stderr)
+            self.index.record(path, stat, content_hash)
+
+        for path in removed:
+            del self.index.files[path]
+            if self.on_remove:
+                self.on_remove(os.path.join(self.index.root, path))
+
+        if candidates or removed or not os.path.exists(self.index_path):
+            self.index.save(self.index_path)
+        return updated, removed
+
+    def run(self, interval=1.0, once=False):
+        while True:
+            started = time.monotonic()
+            updated, removed = self.poll()
+            for path in updated:
+                print(f"Updated {path}")
+            for path in removed:
+                print(f"Removed {path}")
+            if once:
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def main(argv, on_change, on_remove=None):
+    parser = argparse.ArgumentParser(
+        prog='analyze_complexity.py watch',
+        description='Watch a directory and re-analyze Python files whose contents change.'
+    )
+    parser.add_argument('root', nargs='?', default='.', help='Directory to watch (default: current directory)')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls (default: %(default)s)')
+    parser.add_argument('--index', help=f'Index file (default: <root>/{INDEX_NAME})')
+    parser.add_argument('--once', action='store_true', help='Poll once and exit')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        parser.error(f'not a directory: {args.root}')
+
+    watcher = Watcher(args.root, on_change, on_remove, args.index)
+    try:
+        watcher.run(args.interval, args.once)
+    except KeyboardInterrupt:
+        pass
+    return 0
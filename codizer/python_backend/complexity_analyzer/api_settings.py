@@ -0,0 +1,25 @@
+"""
+Settings for the lean API profile: only /api/analyze/ and /api/history/,
+served by the async views in analyzer.api_views under ASGI.
+
+Everything else comes from the full settings, but the admin, sessions,
+auth, CSRF, templates and Django REST framework are left out, so a
+request passes through nothing except the gzip middlewares and its view.
+Run it with any ASGI server, e.g.:
+
+    uvicorn complexity_analyzer.api_asgi:application
+"""
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'analyzer',
+]
+
+MIDDLEWARE = [
+    'analyzer.middleware.CompressResponseMiddleware',
+    'analyzer.middleware.DecompressRequestMiddleware',
+]
+
+ROOT_URLCONF = 'complexity_analyzer.api_urls'
+
+TEMPLATES = []
@@ -0,0 +1,11 @@
+"""
+URL configuration for the lean API profile (complexity_analyzer.api_settings).
+"""
+from django.urls import path
+
+from analyzer import api_views
+
+urlpatterns = [
+    path('api/analyze/', api_views.analyze_code, name='analyze_code'),
+    path('api/history/', api_views.get_analysis_history, name='analysis_history'),
+]
@@ -42,6 +42,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Compress responses for clients that send Accept-Encoding: gzip
+    'analyzer.middleware.CompressResponseMiddleware',
+    # Accept Content-Encoding: gzip request bodies
+    'analyzer.middleware.DecompressRequestMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -130,5 +134,41 @@ CORS_ALLOW_ALL_ORIGINS = True
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'analyzer.parsers.SizeLimitedJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Per-request analysis limits; larger or slower inputs are analyzed at a
+# cheaper tier and reported as degraded (see analyzer.complexity_analyzer.AnalysisBudget)
+ANALYSIS_BUDGET = {
+    'line_analysis_chars': 100000,
+    'regex_chars': 500000,
+    'max_line_chars': 2000,
+    'time_limit': 2.0,
+}
+
+# Persistent result cache shared with the command-line analyzers
+# (see analyzer.analysis_cache.AnalysisCache); path None means
+# analysis-cache.sqlite3 in $CODIZER_CACHE_DIR or the per-user cache directory
+ANALYSIS_CACHE = {
+    'path': None,
+    'max_bytes': 256 * 1024 * 1024,
+}
+
+# Import paths of extra library cost model plugins (see analyzer.cost_models);
+# the NumPy, pandas and Django ORM models are always registered
+COST_MODEL_PLUGINS = []
+
+# Retention of the raw analysis history, applied by `manage.py prune_history`
+# (see analyzer.rollups.prune_history); counts stay in the rollup table.
+# With compact, old rows keep their metadata and only lose their code.
+ANALYSIS_RETENTION = {
+    'days': 90,
+    'compact': False,
+    'chunk_size': 500,
+    'pause': 0.05,
 }
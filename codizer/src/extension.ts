@@ -2,13 +2,24 @@
 // Import the module and reference it with the alias vscode in your code below
 import * as vscode from 'vscode';
 import * as http from 'http';
+import * as zlib from 'zlib';
 import * as fs from 'fs';
 import * as path from 'path';
 import * as child_process from 'child_process';
+import { LanguageClient, LanguageClientOptions, ServerOptions, TransportKind } from 'vscode-languageclient/node';
 
 // Initialize Django server process
 let serverProcess: child_process.ChildProcess | null = null;
 
+// Language server used for Python documents
+let languageClient: LanguageClient | null = null;
+
+// Reuse connections to the backend instead of opening one per request
+const backendAgent = new http.Agent({ keepAlive: true, maxSockets: 4 });
+
+// Request bodies larger than this are sent gzip-compressed
+const COMPRESS_THRESHOLD_BYTES = 8 * 1024;
+
 // This method is called when your extension is activated
 // Your extension is activated the very first time the command is executed
 export function activate(context: vscode.ExtensionContext) {
@@ -20,6 +31,10 @@ export function activate(context: vscode.ExtensionContext) {
 	// Start Django server
 	startDjangoServer(context.extensionPath);
 
+	// Python documents are analyzed by the language server, which keeps the
+	// parsed state warm and provides hover, inlay hints and diagnostics
+	void startLanguageServer(context.extensionPath);
+
 	// Register code analyzer command
 	const analyzeDisposable = vscode.commands.registerCommand('codizer.analyzeComplexity', async () => {
 		await analyzeCurrentDocument();
@@ -66,7 +81,16 @@ export function activate(context: vscode.ExtensionContext) {
 			if (line.trim().length > 0) {
 				// Analyze just this line
 				const language = document.languageId;
-				const result = await analyzeCode(line, language);
+				const result = isLanguageServerDocument(document) ?
+					await languageClient!.sendRequest<{time_complexity: string, space_complexity: string} | null>(
+						'codizer/lineComplexity',
+						{ textDocument: { uri: document.uri.toString() }, line: lineNumber }
+					) :
+					await analyzeCode(line, language);
+
+				if (!result) {
+					return;
+				}
 				
 				// Update status bar
 				statusBarItem.text = `Time: ${result.time_complexity} | Space: ${result.space_complexity}`;
@@ -91,10 +115,22 @@ export function activate(context: vscode.ExtensionContext) {
 		}
 
 		try {
-			const result = await analyzeCode(code, language);
+			const result = isLanguageServerDocument(document) ?
+				await languageClient!.sendRequest<{time_complexity: string, space_complexity: string, degraded?: boolean}>(
+					'codizer/documentComplexity',
+					{ textDocument: { uri: document.uri.toString() } }
+				) :
+				await analyzeCode(code, language, document);
+
+			// A newer edit of this document is already being analyzed
+			if (!result) {
+				return;
+			}
 			
 			// Show complexity in status bar
-			statusBarItem.text = `Overall - Time: ${result.time_complexity} | Space: ${result.space_complexity}`;
+			// Degraded results come from a cheaper analysis tier (input over the server's budget)
+			statusBarItem.text = `Overall - Time: ${result.time_complexity} | Space: ${result.space_complexity}` +
+				(result.degraded ? ' (partial)' : '');
 			statusBarItem.show();
 			
 			// Optionally show in an information message
@@ -105,8 +141,9 @@ export function activate(context: vscode.ExtensionContext) {
 		}
 	}
 
-	// Send code to backend for analysis
-	async function analyzeCode(code: string, language: string): Promise<{time_complexity: string, space_complexity: string}> {
+	// Send code to backend for analysis. When a document is given, its URI and
+	// version are sent so the server can drop superseded requests; those resolve to null.
+	async function analyzeCode(code: string, language: string, document?: vscode.TextDocument): Promise<{time_complexity: string, space_complexity: string, degraded?: boolean} | null> {
 		return new Promise((resolve, reject) => {
 			// Default result if analysis fails
 			const defaultResult = {
@@ -115,30 +152,52 @@ export function activate(context: vscode.ExtensionContext) {
 			};
 
 			try {
-				const postData = JSON.stringify({
+				const postData = Buffer.from(JSON.stringify({
 					code: code,
-					language: language
-				});
+					language: language,
+					...(document && {
+						client_id: vscode.env.sessionId,
+						document_id: document.uri.toString(),
+						version: document.version
+					})
+				}));
+				const compress = postData.length > COMPRESS_THRESHOLD_BYTES;
+				const body = compress ? zlib.gzipSync(postData) : postData;
 
 				const options = {
 					hostname: 'localhost',
 					port: 8000,
 					path: '/api/analyze/',
 					method: 'POST',
+					agent: backendAgent,
 					headers: {
 						'Content-Type': 'application/json',
-						'Content-Length': Buffer.byteLength(postData)
+						'Content-Length': body.length,
+						'Accept-Encoding': 'gzip',
+						...(compress ? { 'Content-Encoding': 'gzip' } : {})
 					}
 				};
 
 				const req = http.request(options, (res) => {
-					let data = '';
+					const chunks: Buffer[] = [];
+					const stream: NodeJS.ReadableStream = res.headers['content-encoding'] === 'gzip' ?
+						res.pipe(zlib.createGunzip()) : res;
+
+					stream.on('data', (chunk: Buffer) => {
+						chunks.push(chunk);
+					});
 
-					res.on('data', (chunk) => {
-						data += chunk;
+					stream.on('error', (error) => {
+						console.error('Error reading response:', error);
+						resolve(defaultResult);
 					});
 
-					res.on('end', () => {
+					stream.on('end', () => {
+						if (res.statusCode === 409) {
+							resolve(null);
+							return;
+						}
+
 						if (res.statusCode !== 200) {
 							console.error(`HTTP Error: ${res.statusCode}`);
 							resolve(defaultResult);
@@ -146,7 +205,7 @@ export function activate(context: vscode.ExtensionContext) {
 						}
 
 						try {
-							const result = JSON.parse(data);
+							const result = JSON.parse(Buffer.concat(chunks).toString('utf8'));
 							resolve(result);
 						} catch (e) {
 							console.error('Error parsing response:', e);
@@ -160,7 +219,7 @@ export function activate(context: vscode.ExtensionContext) {
 					resolve(defaultResult);
 				});
 
-				req.write(postData);
+				req.write(body);
 				req.end();
 			} catch (error) {
 				console.error('Error in analysis:', error);
@@ -170,6 +229,43 @@ export function activate(context: vscode.ExtensionContext) {
 	}
 }
 
+// Documents handled by the language server instead of the HTTP backend
+function isLanguageServerDocument(document: vscode.TextDocument): boolean {
+	return languageClient !== null && document.languageId === 'python' && document.uri.scheme === 'file';
+}
+
+// Sets languageClient while the server starts; a failed start puts Python documents back on the HTTP backend
+async function startLanguageServer(extensionPath: string): Promise<void> {
+	const pythonBackendPath = path.join(extensionPath, '..', 'python_backend');
+	const pythonPath = process.platform === 'win32' ?
+		path.join(pythonBackendPath, 'venv', 'Scripts', 'python.exe') :
+		path.join(pythonBackendPath, 'venv', 'bin', 'python');
+
+	const serverOptions: ServerOptions = {
+		command: pythonPath,
+		args: ['-m', 'analyzer.lsp_server'],
+		transport: TransportKind.stdio,
+		options: { cwd: pythonBackendPath }
+	};
+
+	const clientOptions: LanguageClientOptions = {
+		documentSelector: [{ scheme: 'file', language: 'python' }]
+	};
+
+	let client: LanguageClient | null = null;
+	try {
+		client = new LanguageClient('codizer', 'Codizer Complexity', serverOptions, clientOptions);
+		languageClient = client;
+		await client.start();
+	} catch (error) {
+		// e.g. no Python in the backend's venv
+		console.error('Failed to start Codizer language server:', error);
+		if (languageClient === client) {
+			languageClient = null;
+		}
+	}
+}
+
 function startDjangoServer(extensionPath: string) {
 	// Path to the Django project
 	const pythonBackendPath = path.join(extensionPath, '..', 'python_backend');
@@ -204,10 +300,15 @@ function startDjangoServer(extensionPath: string) {
 }
 
 // This method is called when your extension is deactivated
-export function deactivate() {
+export function deactivate(): Thenable<void> | undefined {
+	const stopped = languageClient?.stop();
+	languageClient = null;
+	backendAgent.destroy();
+
 	// Stop the Django server
 	if (serverProcess) {
 		serverProcess.kill();
 		console.log('Django server stopped');
 	}
+	return stopped;
 }
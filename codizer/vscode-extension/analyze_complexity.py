@@ -3,16 +3,117 @@
 Analyze Python code for time and space complexity.
 This script parses Python code, extracts functions and methods,
 and estimates their time and space complexity.
+
+Results stay compact so a whole project's can be held at once: the loops,
+calls, conditionals and awaits of a file are rows in column-wise RecordTables
+(machine ints and interned names) and each function is a __slots__
+FunctionRecord. They become the JSON dicts only when written out,
+through json.dump(..., default=record_to_json).
 """
 
 import ast
 import json
 import sys
 import os
+from array import array
 from typing import Dict, List, Tuple, Any, Optional
 
+# Recursion-free traversal shared with the analyzers in src/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from ast_traversal import IterativeNodeVisitor, parse
+
+
+class RecordTable:
+    """
+    One kind of record (loops, calls, conditionals or awaits) for a whole file,
+    stored column-wise: an array of machine ints per integer field, a list
+    of interned strings per name field, and the index of the function each
+    row belongs to. A row costs a few bytes instead of a dict.
+    """
+    
+    def __init__(self, int_fields: Tuple[str, ...], name_fields: Tuple[str, ...] = ()):
+        self.owners = array('i')
+        self.columns: Dict[str, Any] = {field: array('i') for field in int_fields}
+        self.columns.update((field, []) for field in name_fields)
+        self._rows_by_owner: Optional[Dict[int, List[int]]] = None
+    
+    def __len__(self):
+        return len(self.owners)
+    
+    def append(self, owner: int, **values: Any) -> None:
+        self.owners.append(owner)
+        for field, column in self.columns.items():
+            value = values[field]
+            column.append(sys.intern(value) if isinstance(value, str) else value)
+        self._rows_by_owner = None
+    
+    def rows_since(self, owner: int, start: int) -> List[int]:
+        """The owner's rows added from row start on."""
+        owners = self.owners
+        return [row for row in range(start, len(owners)) if owners[row] == owner]
+    
+    def rows(self, owner: int) -> List[int]:
+        """All of the owner's rows, in the order they were added."""
+        if self._rows_by_owner is None:
+            # Grouped once, when the results are written out
+            self._rows_by_owner = {}
+            for row, row_owner in enumerate(self.owners):
+                self._rows_by_owner.setdefault(row_owner, []).append(row)
+        return self._rows_by_owner.get(owner, [])
+    
+    def row(self, row: int) -> Dict[str, Any]:
+        return {field: column[row] for field, column in self.columns.items()}
+
+
+class FunctionRecord:
+    """A function's span and estimated complexity; what its body contains is in the file's tables."""
+    __slots__ = ('tables', 'index', 'name', 'line_start', 'line_end',
+                 'time_complexity', 'space_complexity', 'has_recursion', 'is_async')
+    
+    def __init__(self, tables: Tuple[RecordTable, RecordTable, RecordTable, RecordTable], index: int,
+                 name: str, line_start: int, line_end: int, is_async: bool = False):
+        self.tables = tables  # (loops, calls, conditionals, awaits)
+        self.index = index
+        self.name = sys.intern(name)
+        self.line_start = line_start
+        self.line_end = line_end
+        self.time_complexity = 'O(1)'  # Default
+        self.space_complexity = 'O(1)'  # Default
+        self.has_recursion = False
+        self.is_async = is_async
+    
+    def to_json(self) -> Dict[str, Any]:
+        loops, calls, conditionals, awaits = self.tables
+        return {
+            'name': self.name,
+            'line_start': self.line_start,
+            'line_end': self.line_end,
+            'loops': [_loop_json(loops.row(row)) for row in loops.rows(self.index)],
+            'calls': [calls.row(row) for row in calls.rows(self.index)],
+            'conditionals': [conditionals.row(row) for row in conditionals.rows(self.index)],
+            'time_complexity': self.time_complexity,
+            'space_complexity': self.space_complexity,
+            'has_recursion': self.has_recursion,
+            'is_async': self.is_async,
+            # Awaits with the loop depth they run at; any depth above 0 waits once per iteration
+            'awaits': [awaits.row(row) for row in awaits.rows(self.index)]
+        }
+
+
+def _loop_json(loop: Dict[str, Any]) -> Dict[str, Any]:
+    if loop['comprehension']:
+        return {'line': loop['line'], 'depth': loop['depth'], 'nested_in': None, 'type': 'comprehension'}
+    return {'line': loop['line'], 'depth': loop['depth'], 'nested_in': loop['depth'] - 1}
+
 
-class ComplexityVisitor(ast.NodeVisitor):
+def record_to_json(value: Any) -> Dict[str, Any]:
+    """json.dump default= hook turning FunctionRecords into their output dicts."""
+    if isinstance(value, FunctionRecord):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ComplexityVisitor(IterativeNodeVisitor):
     """AST visitor that analyzes code complexity."""
     
     def __init__(self):
@@ -20,66 +121,63 @@ class ComplexityVisitor(ast.NodeVisitor):
         self.current_function = None
         self.loop_depth = 0
         self.conditional_depth = 0
+        self.loops = RecordTable(('line', 'depth', 'comprehension'))
+        self.calls = RecordTable(('line',), ('name',))
+        self.conditionals = RecordTable(('line', 'depth'))
+        self.awaits = RecordTable(('line', 'loop_depth'))
+        self.function_count = 0
         
     def visit_FunctionDef(self, node):
         """Visit a function definition."""
+        yield from self._visit_function(node, is_async=False)
+    
+    def visit_AsyncFunctionDef(self, node):
+        """Visit a coroutine definition; its awaits are recorded with their loop depth."""
+        yield from self._visit_function(node, is_async=True)
+    
+    def _visit_function(self, node, is_async):
         prev_function = self.current_function
-        function_info = {
-            'name': node.name,
-            'line_start': node.lineno,
-            'line_end': self._get_last_line(node),
-            'loops': [],
-            'calls': [],
-            'conditionals': [],
-            'time_complexity': 'O(1)',  # Default
-            'space_complexity': 'O(1)',  # Default
-            'has_recursion': False
-        }
-        
-        self.current_function = function_info
+        prev_loop_depth = self.loop_depth
+        self.current_function = FunctionRecord(
+            (self.loops, self.calls, self.conditionals, self.awaits), self.function_count,
+            node.name, node.lineno, node.end_lineno, is_async
+        )
+        # Loops around a nested definition do not run its body
+        self.loop_depth = 0
+        self.function_count += 1
+        first_loop = len(self.loops)
         
         # Process the function body
-        self.generic_visit(node)
+        yield from self.generic_visit(node)
         
         # Calculate complexity based on collected data
-        self._calculate_complexity()
+        self._calculate_complexity(first_loop)
         
         # Add to functions dictionary
         self.functions[node.name] = self.current_function
         self.current_function = prev_function
-    
-    visit_AsyncFunctionDef = visit_FunctionDef  # Handle async functions too
+        self.loop_depth = prev_loop_depth
     
     def visit_ClassDef(self, node):
         """Visit a class definition to extract methods."""
-        self.generic_visit(node)
+        yield from self.generic_visit(node)
     
     def visit_For(self, node):
         """Visit a for loop."""
         if self.current_function:
             self.loop_depth += 1
-            loop_info = {
-                'line': node.lineno,
-                'depth': self.loop_depth,
-                'nested_in': self.loop_depth - 1 if self.loop_depth > 0 else None
-            }
-            self.current_function['loops'].append(loop_info)
-            self.generic_visit(node)
+            self.loops.append(self.current_function.index, line=node.lineno, depth=self.loop_depth, comprehension=0)
+            yield from self.generic_visit(node)
             self.loop_depth -= 1
     
     visit_While = visit_For  # Handle while loops similarly
+    visit_AsyncFor = visit_For  # async for iterates the same way
     
     def visit_ListComp(self, node):
         """Visit a list comprehension (counts as a loop)."""
         if self.current_function:
-            loop_info = {
-                'line': node.lineno,
-                'depth': 1,
-                'nested_in': None,
-                'type': 'comprehension'
-            }
-            self.current_function['loops'].append(loop_info)
-        self.generic_visit(node)
+            self.loops.append(self.current_function.index, line=node.lineno, depth=1, comprehension=1)
+        yield from self.generic_visit(node)
     
     visit_DictComp = visit_ListComp  # Dict comprehensions are similar
     visit_SetComp = visit_ListComp   # Set comprehensions are similar
@@ -88,29 +186,27 @@ class ComplexityVisitor(ast.NodeVisitor):
         """Visit an if statement."""
         if self.current_function:
             self.conditional_depth += 1
-            conditional_info = {
-                'line': node.lineno,
-                'depth': self.conditional_depth
-            }
-            self.current_function['conditionals'].append(conditional_info)
-            self.generic_visit(node)
+            self.conditionals.append(self.current_function.index, line=node.lineno, depth=self.conditional_depth)
+            yield from self.generic_visit(node)
             self.conditional_depth -= 1
     
+    def visit_Await(self, node):
+        """Visit an await; inside a loop it waits once per iteration."""
+        if self.current_function:
+            self.awaits.append(self.current_function.index, line=node.lineno, loop_depth=self.loop_depth)
+        yield from self.generic_visit(node)
+    
     def visit_Call(self, node):
         """Visit a function call."""
         if self.current_function:
             func_name = self._get_call_name(node)
             if func_name:
                 # Check for recursive calls
-                if func_name == self.current_function['name']:
-                    self.current_function['has_recursion'] = True
+                if func_name == self.current_function.name:
+                    self.current_function.has_recursion = True
                 
-                call_info = {
-                    'line': node.lineno,
-                    'name': func_name
-                }
-                self.current_function['calls'].append(call_info)
-        self.generic_visit(node)
+                self.calls.append(self.current_function.index, line=node.lineno, name=func_name)
+        yield from self.generic_visit(node)
     
     def _get_call_name(self, node):
         """Extract the name of a function being called."""
@@ -120,44 +216,36 @@ class ComplexityVisitor(ast.NodeVisitor):
             return node.func.attr
         return None
     
-    def _get_last_line(self, node):
-        """Find the last line of a node."""
-        last_line = node.lineno
-        for child in ast.iter_child_nodes(node):
-            if hasattr(child, 'lineno'):
-                last_line = max(last_line, child.lineno)
-            # Recursively check children
-            child_last_line = self._get_last_line(child)
-            last_line = max(last_line, child_last_line)
-        return last_line
-    
-    def _calculate_complexity(self):
-        """Calculate time and space complexity based on collected data."""
+    def _calculate_complexity(self, first_loop=0):
+        """Calculate time and space complexity based on collected data (loops from row first_loop on)."""
         if not self.current_function:
             return
         
+        loop_rows = self.loops.rows_since(self.current_function.index, first_loop)
+        
         # Time complexity analysis
-        if self.current_function['has_recursion']:
-            self.current_function['time_complexity'] = 'O(2^n)'  # Simplistic approximation
-        elif not self.current_function['loops']:
-            self.current_function['time_complexity'] = 'O(1)'
+        if self.current_function.has_recursion:
+            self.current_function.time_complexity = 'O(2^n)'  # Simplistic approximation
+        elif not loop_rows:
+            self.current_function.time_complexity = 'O(1)'
         else:
             # Find max nested loop depth
+            depths = self.loops.columns['depth']
             max_depth = 0
-            for loop in self.current_function['loops']:
-                max_depth = max(max_depth, loop['depth'])
+            for row in loop_rows:
+                max_depth = max(max_depth, depths[row])
             
             if max_depth == 1:
-                self.current_function['time_complexity'] = 'O(n)'
+                self.current_function.time_complexity = 'O(n)'
             elif max_depth == 2:
-                self.current_function['time_complexity'] = 'O(n²)'
+                self.current_function.time_complexity = 'O(n²)'
             elif max_depth == 3:
-                self.current_function['time_complexity'] = 'O(n³)'
+                self.current_function.time_complexity = 'O(n³)'
             else:
-                self.current_function['time_complexity'] = f'O(n^{max_depth})'
+                self.current_function.time_complexity = sys.intern(f'O(n^{max_depth})')
         
         # Space complexity analysis - simplified
-        self.current_function['space_complexity'] = 'O(n)'  # Default assumption
+        self.current_function.space_complexity = 'O(n)'  # Default assumption
 
 
 def analyze_file(file_path: str) -> Dict[str, Any]:
@@ -168,13 +256,14 @@ def analyze_file(file_path: str) -> Dict[str, Any]:
         file_path: Path to the Python file
         
     Returns:
-        Dictionary with analysis results
+        Dictionary with analysis results; 'functions' maps names to
+        FunctionRecord objects (serialize with default=record_to_json)
     """
     with open(file_path, 'r', encoding='utf-8') as f:
         code = f.read()
     
     try:
-        tree = ast.parse(code)
+        tree = parse(code, file_path)
         visitor = ComplexityVisitor()
         visitor.visit(tree)
         
@@ -191,8 +280,8 @@ def analyze_file(file_path: str) -> Dict[str, Any]:
         }
         
         for func in visitor.functions.values():
-            time_complexity = func['time_complexity']
-            space_complexity = func['space_complexity']
+            time_complexity = func.time_complexity
+            space_complexity = func.space_complexity
             
             # Update overall complexities (take the "worst" one)
             if time_complexity in complexities:
@@ -239,7 +328,7 @@ def main():
     # Save to a JSON file with the same name but .complexity.json extension
     output_path = f"{file_path}.complexity.json"
     with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(analysis, f, indent=2)
+        json.dump(analysis, f, indent=2, default=record_to_json)
     
     print(f"Analysis complete. Results saved to {output_path}")
     
@@ -251,9 +340,9 @@ def main():
     
     for name, func in analysis['functions'].items():
         print(f"\n{name}:")
-        print(f"  Time Complexity: {func['time_complexity']}")
-        print(f"  Space Complexity: {func['space_complexity']}")
-        print(f"  Lines: {func['line_start']}-{func['line_end']}")
+        print(f"  Time Complexity: {func.time_complexity}")
+        print(f"  Space Complexity: {func.space_complexity}")
+        print(f"  Lines: {func.line_start}-{func.line_end}")
 
 
 if __name__ == "__main__":
@@ -2,15 +2,58 @@
 import sys
 import json
 import ast
+import gc
+import inspect
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Any, Optional
 
-# Add debug log to help troubleshoot
-print("Python complexity analyzer starting...")
-sys.stderr.write("Debug: Script called with arguments: {}\n".format(sys.argv))
+from ast_traversal import IterativeNodeVisitor, parse
 
-class ComplexityVisitor(ast.NodeVisitor):
+# Files with at least this many lines are split into top-level chunks and
+# analyzed in a process pool. Override with CODIZER_PARALLEL_THRESHOLD.
+PARALLEL_THRESHOLD_LINES = int(os.environ.get("CODIZER_PARALLEL_THRESHOLD", "20000"))
+
+# Results for unchanged files come from the analysis cache shared with the
+# backend, when the backend sources sit next to the extension (the backend
+# itself loads this module with its own analyzer package already imported)
+if "analyzer" not in sys.modules:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "python_backend"))
+try:
+    from analyzer.analysis_cache import AnalysisCache, content_hash, source_version
+    analysis_cache = AnalysisCache()
+    ANALYZER_VERSION = source_version(os.path.abspath(__file__), inspect.getfile(IterativeNodeVisitor))
+except ImportError:
+    analysis_cache = None
+
+def complexity_rank(label: str) -> int:
+    """
+    Order big-O labels so they can be compared: O(1) < O(log n) < O(n) <
+    O(n log n) < O(n²) < ... < O(2^n) < O(n!). Unknown labels rank as O(1).
+    """
+    label = label.strip()
+    if not (label.startswith("O(") and label.endswith(")")):
+        return 0
+    inner = label[2:-1]
+    if "!" in inner:
+        return 1001
+    if re.search(r"\d\^", inner):
+        return 1000
+    
+    logs = len(re.findall(r"log", inner))
+    inner = re.sub(r"log\s*\w*", "", inner)
+    degree = 0
+    for _, power, superscript in re.findall(r"([a-z])(?:\^(\d+)|([²³]))?", inner):
+        if power:
+            degree += int(power)
+        elif superscript:
+            degree += 2 if superscript == "²" else 3
+        else:
+            degree += 1
+    return degree * 2 + min(logs, 1)
+
+class ComplexityVisitor(IterativeNodeVisitor):
     """AST visitor that analyzes code complexity in Python files."""
     
     def __init__(self):
@@ -18,6 +61,12 @@ class ComplexityVisitor(ast.NodeVisitor):
         self.classes = {}
         self.current_function = None
         self.current_class = None
+        # Qualified-name prefix of the enclosing classes and functions, as in
+        # __qualname__: "Outer." inside a class, "f.<locals>." inside a function
+        self.scope_prefix = ""
+        # Function keys per class, in insertion order, so class methods can be
+        # listed without rescanning every function seen so far
+        self.functions_by_class = {}
     
     def visit_FunctionDef(self, node):
         prev_function = self.current_function
@@ -49,8 +98,10 @@ class ComplexityVisitor(ast.NodeVisitor):
         time_complexity = self.infer_time_complexity(node, source_lines)
         space_complexity = self.infer_space_complexity(node, source_lines)
         
-        full_name = f"{self.current_class}.{node.name}" if self.current_class else node.name
+        full_name = f"{self.scope_prefix}{node.name}"
         
+        if full_name not in self.functions:
+            self.functions_by_class.setdefault(self.current_class, []).append(full_name)
         self.functions[full_name] = {
             "name": node.name,
             "class": self.current_class,
@@ -64,9 +115,14 @@ class ComplexityVisitor(ast.NodeVisitor):
         }
         
         # Visit children
-        self.generic_visit(node)
+        prev_prefix = self.scope_prefix
+        self.scope_prefix = f"{full_name}.<locals>."
+        yield from self.generic_visit(node)
+        self.scope_prefix = prev_prefix
         self.current_function = prev_function
     
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
     def visit_ClassDef(self, node):
         prev_class = self.current_class
         self.current_class = node.name
@@ -80,13 +136,16 @@ class ComplexityVisitor(ast.NodeVisitor):
         }
         
         # Visit children
-        self.generic_visit(node)
+        prev_prefix = self.scope_prefix
+        self.scope_prefix = f"{prev_prefix}{node.name}."
+        yield from self.generic_visit(node)
+        self.scope_prefix = prev_prefix
         
         # Update class methods
         if self.current_class:
-            for func_name, func_data in self.functions.items():
-                if func_data["class"] == self.current_class:
-                    self.classes[self.current_class]["methods"].append(func_name)
+            self.classes[self.current_class]["methods"].extend(
+                self.functions_by_class.get(self.current_class, [])
+            )
         
         self.current_class = prev_class
     
@@ -172,39 +231,133 @@ class ComplexityVisitor(ast.NodeVisitor):
         else:
             return "O(1)"  # Default to constant space
 
-def analyze_file(file_path: str) -> Dict[str, Any]:
-    """Analyze Python file for complexity metrics."""
+# Physical lines as the tokenizer sees them (only \r\n, \r and \n end a line)
+SOURCE_LINE_RE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+$")
+
+def _first_line(stmt: ast.stmt) -> int:
+    """First line of a statement, including any decorators."""
+    return min([stmt.lineno] + [d.lineno for d in getattr(stmt, "decorator_list", [])])
+
+def split_top_level(tree: ast.Module, num_chunks: int) -> List[Tuple[int, int]]:
+    """Group top-level statements into contiguous (first, last) line ranges of similar size."""
+    total_lines = sum(stmt.end_lineno - _first_line(stmt) + 1 for stmt in tree.body)
+    target = max(1, total_lines // num_chunks)
+    
+    chunks = []
+    chunk_start = None
+    chunk_end = 0
+    chunk_lines = 0
+    for stmt in tree.body:
+        start = _first_line(stmt)
+        # Never cut between statements that share a line (a = 1; b = 2)
+        if chunk_start is not None and chunk_lines >= target and start > chunk_end:
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = None
+            chunk_lines = 0
+        if chunk_start is None:
+            chunk_start = start
+        chunk_end = stmt.end_lineno
+        chunk_lines += stmt.end_lineno - start + 1
+    if chunk_start is not None:
+        chunks.append((chunk_start, chunk_end))
+    return chunks
+
+def _analyze_chunk(chunk_source: str, first_line: int) -> Tuple[Dict, Dict]:
+    """Worker entry point: parse and visit one chunk of top-level statements."""
     global astroid_source
+    # Pad so that absolute line numbers index into the chunk's lines
+    astroid_source = [""] * (first_line - 1) + chunk_source.splitlines()
     
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
-            astroid_source = source_code.splitlines()
-        
-        # Parse the AST
-        tree = ast.parse(source_code)
+    # Leading newlines give the chunk its real line numbers without an extra tree walk
+    tree = parse("\n" * (first_line - 1) + chunk_source)
+    
+    visitor = ComplexityVisitor()
+    visitor.visit(tree)
+    return visitor.functions, visitor.classes
+
+def visit_parallel(source_code: str, tree: ast.Module, max_workers: Optional[int] = None) -> Tuple[Dict, Dict]:
+    """
+    Visit independent top-level chunks in a process pool and merge in source
+    order. Workers get source text rather than AST nodes, since re-parsing a
+    slice is cheaper than unpickling its tree.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    source_lines = SOURCE_LINE_RE.findall(source_code)
+    
+    functions = {}
+    classes = {}
+    # Forked workers inherit the parent's tree; freezing it keeps the
+    # garbage collector from rescanning those objects in every worker
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=gc.freeze) as pool:
+        futures = [
+            pool.submit(_analyze_chunk, "".join(source_lines[first - 1:last]), first)
+            for first, last in split_top_level(tree, max_workers)
+        ]
         
-        # Visit the AST
+        # Merging in submission order keeps the serial run's key order
+        for future in futures:
+            chunk_functions, chunk_classes = future.result()
+            functions.update(chunk_functions)
+            classes.update(chunk_classes)
+    return functions, classes
+
+def analyze_source(source_code: str, file_path: str, parallel_threshold: Optional[int] = None,
+                   max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """Analyze Python source for complexity metrics. Raises SyntaxError on invalid code."""
+    global astroid_source
+    
+    if parallel_threshold is None:
+        parallel_threshold = PARALLEL_THRESHOLD_LINES
+    
+    astroid_source = source_code.splitlines()
+    
+    # Parse the AST
+    tree = parse(source_code, file_path)
+    
+    # Visit the AST, splitting large modules across processes
+    if len(astroid_source) >= parallel_threshold and len(tree.body) > 1 and (max_workers or os.cpu_count() or 1) > 1:
+        functions, classes = visit_parallel(source_code, tree, max_workers)
+    else:
         visitor = ComplexityVisitor()
         visitor.visit(tree)
+        functions, classes = visitor.functions, visitor.classes
+    
+    # Get file-level metrics
+    lines_of_code = len(astroid_source)
+    
+    # Calculate average complexity
+    total_complexity = sum(f["cyclomatic_complexity"] for f in functions.values())
+    avg_complexity = total_complexity / len(functions) if functions else 0
+    
+    return {
+        "file_path": file_path,
+        "file_name": os.path.basename(file_path),
+        "lines_of_code": lines_of_code,
+        "num_functions": len(functions),
+        "num_classes": len(classes),
+        "avg_complexity": round(avg_complexity, 2),
+        "functions": functions,
+        "classes": classes,
+    }
+
+def analyze_file(file_path: str, parallel_threshold: Optional[int] = None,
+                 max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """Analyze Python file for complexity metrics, reusing the cached result if its contents are unchanged."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            source_code = f.read()
         
-        # Get file-level metrics
-        lines_of_code = len(astroid_source)
-        
-        # Calculate average complexity
-        total_complexity = sum(f["cyclomatic_complexity"] for f in visitor.functions.values())
-        avg_complexity = total_complexity / len(visitor.functions) if visitor.functions else 0
+        if analysis_cache is None:
+            return analyze_source(source_code, file_path, parallel_threshold, max_workers)
         
-        return {
-            "file_path": file_path,
-            "file_name": os.path.basename(file_path),
-            "lines_of_code": lines_of_code,
-            "num_functions": len(visitor.functions),
-            "num_classes": len(visitor.classes),
-            "avg_complexity": round(avg_complexity, 2),
-            "functions": visitor.functions,
-            "classes": visitor.classes,
-        }
+        key = ("visitor", os.path.abspath(file_path), content_hash(source_code), ANALYZER_VERSION)
+        results = analysis_cache.get(*key)
+        if results is None:
+            results = analyze_source(source_code, file_path, parallel_threshold, max_workers)
+            analysis_cache.put(*key, results)
+        else:
+            results["file_path"] = file_path
+        return results
     except Exception as e:
         return {
             "error": True,
@@ -220,6 +373,19 @@ def save_results(results: Dict[str, Any], file_path: str) -> str:
     return output_path
 
 def main():
+    # Add debug log to help troubleshoot (stderr, so the language server and
+    # worker processes that import this module and the JSON written to
+    # stdout are not affected)
+    sys.stderr.write("Python complexity analyzer starting...\n")
+    sys.stderr.write("Debug: Script called with arguments: {}\n".format(sys.argv))
+    
+    if len(sys.argv) > 1 and sys.argv[1] == "diff":
+        from complexity_diff import main as diff_main
+        sys.exit(diff_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "hotspots":
+        from complexity_hotspots import main as hotspots_main
+        sys.exit(hotspots_main(sys.argv[2:]))
+    
     if len(sys.argv) != 2:
         print("Usage: python analyze_complexity.py <python_file>")
         sys.exit(1)
@@ -0,0 +1,74 @@
+"""
+Recursion-free AST traversal for the analyzers.
+
+ast.NodeVisitor recurses once per tree level, so machine-generated code
+with deeply nested expressions (long operator chains, nested calls or
+literals) raises RecursionError long before the tree is large.
+IterativeNodeVisitor keeps an explicit stack instead. Its visit_* methods
+are generators: they run what comes before the children, then
+`yield from self.generic_visit(node)` has the children visited, then they
+run what comes after, so entry/exit bookkeeping such as nesting counters
+works as it does with NodeVisitor. A visit_* method that is not a
+generator does not descend, like a NodeVisitor method that never calls
+generic_visit.
+
+Sources nested too deeply for CPython's parser to build an AST at all are
+reported by parse() as a SyntaxError, which the analyzers already handle.
+"""
+import ast
+from typing import Any, Iterator, Optional
+
+
+class TooDeeplyNested(SyntaxError):
+    """Source nested more deeply than the parser can build an AST for."""
+
+
+def parse(source: str, filename: str = "<unknown>") -> ast.Module:
+    """ast.parse, raising TooDeeplyNested instead of RecursionError or MemoryError."""
+    try:
+        return ast.parse(source, filename)
+    except (RecursionError, MemoryError):
+        # The parser's own stack overflows (MemoryError), or building the
+        # Python AST objects hits the recursion limit (RecursionError)
+        raise TooDeeplyNested(f"{filename}: source is nested too deeply to parse") from None
+
+
+class IterativeNodeVisitor:
+    """ast.NodeVisitor with generator visit_* methods and no recursion; see the module docstring."""
+
+    def visit(self, node: ast.AST) -> None:
+        stack = [self._enter(node)]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+            else:
+                stack.append(self._enter(child))
+
+    def _enter(self, node: ast.AST) -> Iterator[ast.AST]:
+        method = getattr(self, "visit_" + node.__class__.__name__, self.generic_visit)
+        children = method(node)
+        return children if children is not None else iter(())
+
+    def generic_visit(self, node: ast.AST) -> Iterator[ast.AST]:
+        """Yield the node's children, in the order NodeVisitor visits them."""
+        yield from ast.iter_child_nodes(node)
+
+
+def same_tree(a: Optional[Any], b: Optional[Any]) -> bool:
+    """ast.dump(a) == ast.dump(b), without recursion: same node types and values, positions ignored."""
+    stack = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        if isinstance(x, ast.AST):
+            if type(x) is not type(y):
+                return False
+            stack.extend((getattr(x, field, None), getattr(y, field, None)) for field in x._fields)
+        elif isinstance(x, list):
+            if not isinstance(y, list) or len(x) != len(y):
+                return False
+            stack.extend(zip(x, y))
+        elif isinstance(y, (ast.AST, list)) or repr(x) != repr(y):
+            # ast.dump renders values with repr
+            return False
+    return True
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+Compare function complexity between two git revisions.
+
+Only Python files touched between the revisions are read (through git
+plumbing, without checking anything out), and only functions whose body
+changed are analyzed, so the cost follows the size of the diff.
+
+Usage: python analyze_complexity.py diff <base> [<head> [paths...]] [--threshold N] [--json]
+"""
+import argparse
+import ast
+import json
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import analyze_complexity
+from analyze_complexity import ComplexityVisitor, complexity_rank
+from ast_traversal import parse, same_tree
+
+
+def git(repo: str, *args: str, input_data: Optional[bytes] = None) -> bytes:
+    """Run a git command in repo and return its stdout."""
+    completed = subprocess.run(
+        ["git", *args], cwd=repo, input=input_data,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.decode("utf-8", "replace").strip())
+    return completed.stdout
+
+
+def changed_python_files(repo: str, base: str, head: str, paths: List[str]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """(base_path, head_path) pairs for .py files that differ; None on the side where the file is absent."""
+    output = git(repo, "diff-tree", "-r", "-M", "--name-status", "-z", base, head, "--", *paths)
+    fields = output.decode("utf-8").split("\0")
+
+    pairs = []
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        if status.startswith(("R", "C")):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            i += 3
+        else:
+            old_path = new_path = fields[i + 1]
+            i += 2
+
+        if status.startswith("A"):
+            old_path = None
+        elif status.startswith("D"):
+            new_path = None
+
+        if any(p and p.endswith(".py") for p in (old_path, new_path)):
+            pairs.append((old_path, new_path))
+    return pairs
+
+
+def read_blobs(repo: str, specs: List[str]) -> Dict[str, Optional[str]]:
+    """Read many `rev:path` blobs through a single `git cat-file --batch` process."""
+    if not specs:
+        return {}
+    output = git(repo, "cat-file", "--batch", input_data="".join(f"{s}\n" for s in specs).encode("utf-8"))
+
+    blobs = {}
+    offset = 0
+    for spec in specs:
+        header_end = output.index(b"\n", offset)
+        header = output[offset:header_end].split()
+        offset = header_end + 1
+        if header[-1] == b"missing":
+            blobs[spec] = None
+            continue
+        size = int(header[2])
+        blobs[spec] = output[offset:offset + size].decode("utf-8", "replace")
+        offset += size + 1
+    return blobs
+
+
+def collect_functions(tree: ast.Module) -> Dict[str, Tuple[ast.AST, Optional[str]]]:
+    """Map qualified name (Class.method, outer.<locals>.inner) to (node, enclosing class)."""
+    functions = {}
+    # (node, name prefix, enclosing class, qualified name if node is a function),
+    # taken in source order without recursion
+    stack = [(tree, "", None, None)]
+    while stack:
+        node, prefix, current_class, name = stack.pop()
+        if name is not None:
+            functions[name] = (node, current_class)
+        children = []
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                child_name = f"{prefix}{child.name}"
+                children.append((child, f"{child_name}.<locals>.", current_class, child_name))
+            elif isinstance(child, ast.ClassDef):
+                children.append((child, f"{prefix}{child.name}.", child.name, None))
+            else:
+                children.append((child, prefix, current_class, None))
+        stack.extend(reversed(children))
+    return functions
+
+
+def analyze_function(name: str, node: ast.AST, current_class: Optional[str], source_lines: List[str]) -> Optional[Dict]:
+    """Run ComplexityVisitor on the function node called name; None if the visitor did not record it."""
+    analyze_complexity.astroid_source = source_lines
+    visitor = ComplexityVisitor()
+    visitor.current_class = current_class
+    visitor.scope_prefix = name[:len(name) - len(node.name)]
+    visitor.visit(node)
+    return visitor.functions.get(name)
+
+
+def changed_functions(base_source: Optional[str], head_source: Optional[str]) -> List[Tuple[str, Optional[Dict], Optional[Dict]]]:
+    """(name, base_info, head_info) for every function added, removed or modified."""
+    sides = []
+    for source in (base_source, head_source):
+        if source is None:
+            sides.append(({}, []))
+            continue
+        try:
+            sides.append((collect_functions(parse(source)), source.splitlines()))
+        except SyntaxError:
+            sides.append(({}, []))
+    (base_functions, base_lines), (head_functions, head_lines) = sides
+
+    results = []
+    for name in list(base_functions) + [n for n in head_functions if n not in base_functions]:
+        base = base_functions.get(name)
+        head = head_functions.get(name)
+        # Positions are ignored, so moved-but-identical functions are skipped
+        if base and head and same_tree(base[0], head[0]):
+            continue
+        before = analyze_function(name, base[0], base[1], base_lines) if base else None
+        after = analyze_function(name, head[0], head[1], head_lines) if head else None
+        if before or after:
+            results.append((name, before, after))
+    return results
+
+
+def diff_revisions(repo: str, base: str, head: str, paths: List[str]) -> List[Dict]:
+    """Per-function complexity changes between two revisions."""
+    pairs = changed_python_files(repo, base, head, paths)
+    specs = [f"{base}:{old}" for old, _ in pairs if old] + [f"{head}:{new}" for _, new in pairs if new]
+    blobs = read_blobs(repo, specs)
+
+    report = []
+    for old_path, new_path in pairs:
+        base_source = blobs.get(f"{base}:{old_path}") if old_path else None
+        head_source = blobs.get(f"{head}:{new_path}") if new_path else None
+
+        for name, before, after in changed_functions(base_source, head_source):
+            before_time = before["time_complexity"] if before else None
+            after_time = after["time_complexity"] if after else None
+            delta = 0
+            if before and after:
+                delta = complexity_rank(after_time) - complexity_rank(before_time)
+
+            if not before:
+                change = "added"
+            elif not after:
+                change = "removed"
+            elif delta > 0:
+                change = "regression"
+            elif delta < 0:
+                change = "improvement"
+            else:
+                change = "unchanged"
+
+            report.append({
+                "path": new_path or old_path,
+                "function": name,
+                "lineno": (after or before)["lineno"],
+                "change": change,
+                "rank_delta": delta,
+                "base_time_complexity": before_time,
+                "head_time_complexity": after_time,
+                "base_cyclomatic_complexity": before["cyclomatic_complexity"] if before else None,
+                "head_cyclomatic_complexity": after["cyclomatic_complexity"] if after else None,
+            })
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="analyze_complexity.py diff",
+        description="Report per-function complexity changes between two git revisions."
+    )
+    parser.add_argument("base", help="Base revision (e.g. origin/main)")
+    parser.add_argument("head", nargs="?", default="HEAD", help="Head revision (default: HEAD)")
+    parser.add_argument("paths", nargs="*", help="Limit the diff to these paths (relative to the repository root)")
+    parser.add_argument("--repo", default=".", help="Path inside the git repository")
+    parser.add_argument("--threshold", type=int, default=0,
+                        help="Complexity steps a function may grow before failing (default: 0)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        repo = git(args.repo, "rev-parse", "--show-toplevel").decode("utf-8").strip()
+        report = diff_revisions(repo, args.base, args.head, args.paths)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    failures = [r for r in report if r["change"] == "regression" and r["rank_delta"] > args.threshold]
+
+    if args.json:
+        print(json.dumps({"functions": report, "failed": bool(failures)}, indent=2))
+    else:
+        for r in report:
+            if r["change"] == "unchanged":
+                continue
+            marker = "!!" if r in failures else "  "
+            print(f"{marker} {r['change']:<12} {r['path']}:{r['lineno']} {r['function']}  "
+                  f"{r['base_time_complexity'] or '-'} -> {r['head_time_complexity'] or '-'}")
+        print(f"{len(report)} changed functions, {len(failures)} regressions above threshold {args.threshold}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
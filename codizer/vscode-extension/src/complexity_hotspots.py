@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+Rank functions for optimization by combining profiles with static complexity.
+
+Reads one or more cProfile/pstats dumps, joins each profiled function to the
+function analyzed at the same file and line, and scores it as
+
+    score = cumulative_time * complexity_weight * log2(2 + calls)
+
+where complexity_weight grows with the static time complexity class. A
+hot O(n²) function called a million times therefore outranks an O(n³)
+function that ran once.
+
+Usage: python analyze_complexity.py hotspots <profile> [<profile> ...] [--top N] [--json]
+"""
+import argparse
+import json
+import math
+import os
+import pstats
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from analyze_complexity import analyze_file, complexity_rank
+
+# Ranks above this (exponential, factorial) are weighted like a high polynomial
+# so a single label cannot swamp the observed timings
+MAX_WEIGHTED_RANK = 12
+
+
+def complexity_weight(label: str) -> float:
+    """1 for O(1), 2 for O(n), 3 for O(n²), ... capped at MAX_WEIGHTED_RANK."""
+    return 1 + min(complexity_rank(label), MAX_WEIGHTED_RANK) / 2
+
+
+def load_profiles(paths: List[str]) -> Dict[Tuple[str, int, str], Tuple[int, int, float, float]]:
+    """Merge pstats dumps into {(file, line, name): (primitive_calls, calls, tottime, cumtime)}."""
+    stats = pstats.Stats(paths[0])
+    for path in paths[1:]:
+        stats.add(path)
+    return {key: value[:4] for key, value in stats.stats.items()}
+
+
+def remap(filename: str, path_map: List[Tuple[str, str]]) -> str:
+    """Rewrite production paths (e.g. /srv/app/) to local ones."""
+    for old, new in path_map:
+        if filename.startswith(old):
+            return new + filename[len(old):]
+    return filename
+
+
+class FunctionLocator:
+    """Find the analyzed function that a profile entry's (file, line) belongs to."""
+
+    def __init__(self):
+        self._files = {}
+
+    def _spans(self, filename: str) -> List[Tuple[int, int, str, Dict]]:
+        if filename not in self._files:
+            spans = []
+            if os.path.isfile(filename):
+                with open(filename, "r", encoding="utf-8", errors="replace") as f:
+                    lines = f.read().splitlines()
+                analysis = analyze_file(filename)
+                for name, info in analysis.get("functions", {}).items():
+                    # Profiles report the first decorator line of decorated functions
+                    start = info["lineno"]
+                    while start > 1 and lines[start - 2].lstrip().startswith("@"):
+                        start -= 1
+                    spans.append((start, info["end_lineno"], name, info))
+            self._files[filename] = spans
+        return self._files[filename]
+
+    def locate(self, filename: str, lineno: int) -> Optional[Tuple[str, Dict]]:
+        """Innermost analyzed function whose span contains lineno."""
+        best = None
+        for start, end, name, info in self._spans(filename):
+            if start <= lineno <= end and (best is None or start >= best[0]):
+                best = (start, name, info)
+        return (best[1], best[2]) if best else None
+
+
+def rank_hotspots(profile_paths: List[str], path_map: Optional[List[Tuple[str, str]]] = None) -> List[Dict]:
+    """Join profile entries to analyzed functions and sort by hotspot score."""
+    path_map = path_map or []
+    locator = FunctionLocator()
+    hotspots = []
+
+    for (filename, lineno, funcname), (primitive_calls, calls, tottime, cumtime) in load_profiles(profile_paths).items():
+        # Built-ins are reported as ('~', 0, '<built-in ...>')
+        if filename == "~" or lineno == 0:
+            continue
+        local_file = remap(filename, path_map)
+        located = locator.locate(local_file, lineno)
+        if located is None:
+            continue
+        name, info = located
+        # Comprehensions, generator expressions and lambdas get their own
+        # profile entries; their time is already in the enclosing function
+        if funcname != info["name"]:
+            continue
+
+        weight = complexity_weight(info["time_complexity"])
+        hotspots.append({
+            "function": name,
+            "file": local_file,
+            "lineno": info["lineno"],
+            "time_complexity": info["time_complexity"],
+            "space_complexity": info["space_complexity"],
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "total_time": tottime,
+            "cumulative_time": cumtime,
+            "score": cumtime * weight * math.log2(2 + calls),
+        })
+
+    hotspots.sort(key=lambda h: h["score"], reverse=True)
+    return hotspots
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="analyze_complexity.py hotspots",
+        description="Rank functions by profiled time weighted by static complexity."
+    )
+    parser.add_argument("profiles", nargs="+", help="cProfile/pstats dump files")
+    parser.add_argument("--top", type=int, default=20, help="Number of hotspots to show (default: 20)")
+    parser.add_argument("--path-map", action="append", default=[], metavar="OLD=NEW",
+                        help="Rewrite profiled path prefix OLD to local prefix NEW (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    path_map = []
+    for mapping in args.path_map:
+        old, sep, new = mapping.partition("=")
+        if not sep:
+            parser.error(f"--path-map expects OLD=NEW, got {mapping!r}")
+        path_map.append((old, new))
+
+    try:
+        hotspots = rank_hotspots(args.profiles, path_map)[:args.top]
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Error reading profiles: {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(hotspots, indent=2))
+        return 0
+
+    print(f"{'#':>3}  {'score':>10}  {'calls':>9}  {'cumtime':>9}  {'time':<10} function")
+    for position, h in enumerate(hotspots, 1):
+        print(f"{position:>3}  {h['score']:>10.3f}  {h['calls']:>9}  {h['cumulative_time']:>9.4f}  "
+              f"{h['time_complexity']:<10} {h['function']} ({h['file']}:{h['lineno']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import * as vscode from 'vscode';
 import * as path from 'path';
 import * as fs from 'fs';
-import * as cp from 'child_process';
+import { LanguageClient, LanguageClientOptions, ServerOptions, TransportKind } from 'vscode-languageclient/node';
 
 let statusBarItem: vscode.StatusBarItem;
 let outputChannel: vscode.OutputChannel;
@@ -9,6 +9,7 @@ let extensionContext: vscode.ExtensionContext;
 let decorationTypes: Map<string, vscode.TextEditorDecorationType> = new Map();
 let inlineDecorations: vscode.DecorationOptions[] = [];
 let throttleTimer: NodeJS.Timeout | null = null;
+let languageClient: Promise<LanguageClient> | null = null;
 
 export function activate(context: vscode.ExtensionContext) {
     console.log('Code Complexity Analyzer is now active!');
@@ -285,16 +286,11 @@ async function analyzeCurrentFile() {
         return;
     }
 
-    // Save the document if needed
-    if (document.isDirty) {
-        await document.save();
-    }
-
     const filePath = document.uri.fsPath;
     outputChannel.appendLine(`Analyzing file: ${filePath}`);
 
     try {
-        const results = await runPythonAnalysis(filePath);
+        const results = await requestAnalysis(document);
         if (results.error) {
             vscode.window.showErrorMessage(`Error analyzing file: ${results.message}`);
             outputChannel.appendLine(`Error: ${results.message}`);
@@ -346,54 +342,42 @@ interface AnalysisResult {
     };
 }
 
-// Execute the Python script to analyze complexity
-async function runPythonAnalysis(filePath: string): Promise<AnalysisResult> {
-    return new Promise((resolve, reject) => {
-        // Get Python path from configuration
+// Start the backend's language server on first use; one process then serves
+// every analysis, working on the editor's text rather than the saved file
+function getLanguageClient(): Promise<LanguageClient> {
+    if (!languageClient) {
         const pythonPath = vscode.workspace.getConfiguration('complexityAnalyzer').get<string>('pythonPath') || 'python';
-        
-        // Path to the analysis script
-        const scriptPath = path.join(__dirname, '..', 'src', 'analyze_complexity.py');
-        
-        let stdout = '';
-        let stderr = '';
-        
-        // Execute using spawn from child_process
-        const childProcess = cp.spawn(
-            pythonPath, 
-            [scriptPath, filePath],
-            { shell: true }
-        );
-        
-        childProcess.stdout.on('data', (data: Buffer) => {
-            stdout += data.toString();
-        });
-        
-        childProcess.stderr.on('data', (data: Buffer) => {
-            stderr += data.toString();
-        });
-        
-        childProcess.on('close', (code: number) => {
-            if (code !== 0) {
-                outputChannel.appendLine(`Python process exited with code ${code}`);
-                outputChannel.appendLine(`Error: ${stderr}`);
-                reject(new Error(stderr || `Process exited with code ${code}`));
-                return;
-            }
-            
-            try {
-                const results = JSON.parse(stdout);
-                resolve(results);
-            } catch (err: any) {
-                outputChannel.appendLine(`Error parsing JSON: ${err}`);
-                outputChannel.appendLine(`Raw output: ${stdout}`);
-                reject(new Error('Failed to parse analysis results'));
-            }
-        });
-        
-        childProcess.on('error', (err: Error) => {
-            reject(err);
+        const pythonBackendPath = path.join(extensionContext.extensionPath, '..', 'python_backend');
+
+        const serverOptions: ServerOptions = {
+            command: pythonPath,
+            args: ['-m', 'analyzer.lsp_server'],
+            transport: TransportKind.stdio,
+            options: { cwd: pythonBackendPath }
+        };
+
+        const clientOptions: LanguageClientOptions = {
+            documentSelector: [
+                { scheme: 'file', language: 'python' },
+                { scheme: 'untitled', language: 'python' }
+            ]
+        };
+
+        const client = new LanguageClient('complexityAnalyzer', 'Code Complexity Analyzer Server', serverOptions, clientOptions);
+        languageClient = client.start().then(() => client, (err) => {
+            // Try again on the next analysis, e.g. once pythonPath is fixed
+            languageClient = null;
+            throw err;
         });
+    }
+    return languageClient;
+}
+
+// Per-function metrics for a document from the language server
+async function requestAnalysis(document: vscode.TextDocument): Promise<AnalysisResult> {
+    const client = await getLanguageClient();
+    return client.sendRequest<AnalysisResult>('codizer/fileMetrics', {
+        textDocument: { uri: document.uri.toString() }
     });
 }
 
@@ -420,7 +404,7 @@ async function showComplexityDetails() {
             const rawData = fs.readFileSync(tempFile, 'utf8');
             results = JSON.parse(rawData);
         } else {
-            results = await runPythonAnalysis(filePath);
+            results = await requestAnalysis(document);
         }
     } catch (err) {
         vscode.window.showErrorMessage(`Error retrieving analysis results: ${err}`);
@@ -582,7 +566,7 @@ function getWebviewContent(results: AnalysisResult, document: vscode.TextDocumen
     `;
 }
 
-export function deactivate() {
+export function deactivate(): Thenable<void> | undefined {
     // Clean up resources
     if (statusBarItem) {
         statusBarItem.dispose();
@@ -590,4 +574,6 @@ export function deactivate() {
     if (outputChannel) {
         outputChannel.dispose();
     }
+    // Stops the language server process, if it was started
+    return languageClient?.then((client) => client.stop());
 } 
\ No newline at end of file
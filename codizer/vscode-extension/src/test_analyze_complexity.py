@@ -0,0 +1,90 @@
+"""Tests for the ComplexityVisitor analysis. Run with: python -m unittest discover -s vscode-extension/src"""
+import ast
+import os
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+import analyze_complexity
+from analyze_complexity import analyze_file, analyze_source, split_top_level
+
+MODULE = textwrap.dedent("""
+    import functools
+
+    def scan(xs):
+        for x in xs:
+            print(x)
+
+    @functools.lru_cache()
+    def pairs(xs):
+        return [(a, b) for a in xs for b in xs]
+
+    class Grid:
+        def cells(self, rows):
+            for row in rows:
+                for cell in row:
+                    yield cell
+
+    a = 1; b = 2
+    c = 3
+    """).lstrip()
+
+
+class ParallelAnalysisTests(unittest.TestCase):
+    def test_chunks_cover_top_level_statements(self):
+        tree = ast.parse(MODULE)
+        chunks = split_top_level(tree, 4)
+        self.assertEqual(chunks[0][0], 1)
+        self.assertEqual(chunks[-1][1], tree.body[-1].end_lineno)
+        # Chunks are in order, and statements sharing a line (a = 1; b = 2) are never split
+        for (_, last), (first, _) in zip(chunks, chunks[1:]):
+            self.assertGreater(first, last)
+        # Decorators stay with their function
+        self.assertNotIn(8, [first for first, _ in chunks])
+
+    def test_parallel_matches_serial(self):
+        serial = analyze_source(MODULE, "module.py", parallel_threshold=10 ** 9)
+        for source in (MODULE, MODULE.replace("\n", "\r\n")):
+            with self.subTest(crlf="\r\n" in source):
+                parallel = analyze_source(source, "module.py", parallel_threshold=1, max_workers=3)
+                self.assertEqual(parallel, serial)
+                self.assertEqual(list(parallel["functions"]), list(serial["functions"]))
+
+
+@unittest.skipIf(analyze_complexity.analysis_cache is None, "backend sources not available")
+class AnalysisCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.path = os.path.join(self.dir, "module.py")
+        with open(self.path, "w") as f:
+            f.write(MODULE)
+        cache = analyze_complexity.AnalysisCache(os.path.join(self.dir, "cache.sqlite3"))
+        patcher = mock.patch.object(analyze_complexity, "analysis_cache", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_file_is_a_lookup(self):
+        first = analyze_file(self.path)
+        with mock.patch.object(analyze_complexity, "analyze_source") as analyze:
+            self.assertEqual(analyze_file(self.path), first)
+        analyze.assert_not_called()
+
+    def test_hit_reports_the_path_asked_for(self):
+        analyze_file(self.path)
+        relative = os.path.relpath(self.path)
+        self.assertEqual(analyze_file(relative)["file_path"], relative)
+
+    def test_edit_misses(self):
+        analyze_file(self.path)
+        with open(self.path, "a") as f:
+            f.write("d = 4\n")
+        with mock.patch.object(analyze_complexity, "analyze_source", return_value={}) as analyze:
+            analyze_file(self.path)
+        analyze.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
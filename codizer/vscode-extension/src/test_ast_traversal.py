@@ -0,0 +1,109 @@
+"""Tests for the recursion-free AST traversal. Run with: python -m unittest discover -s vscode-extension/src"""
+import ast
+import textwrap
+import unittest
+
+from analyze_complexity import analyze_source
+from ast_traversal import IterativeNodeVisitor, TooDeeplyNested, parse, same_tree
+from complexity_diff import collect_functions
+
+MODULE = textwrap.dedent("""
+    class Grid:
+        def cells(self, rows):
+            def flat(row):
+                return [cell for cell in row]
+            for row in rows:
+                yield from flat(row)
+
+    def total(xs):
+        return sum(x * 2 for x in xs)
+    """).lstrip()
+
+# An operator/attribute chain nested too deeply for ast.NodeVisitor and ast.dump
+DEEP = "def chain(x):\n    return " + " + ".join(["x.a"] * 2800) + "\n"
+
+
+class RecordingVisitor(ast.NodeVisitor):
+    def __init__(self):
+        self.names = []
+
+    def generic_visit(self, node):
+        self.names.append(type(node).__name__)
+        super().generic_visit(node)
+
+
+class IterativeRecordingVisitor(IterativeNodeVisitor):
+    def __init__(self):
+        self.names = []
+        self.depth = 0
+        self.max_depth = 0
+
+    def generic_visit(self, node):
+        self.names.append(type(node).__name__)
+        yield from super().generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        yield from self.generic_visit(node)
+        self.depth -= 1
+
+    def visit_Constant(self, node):
+        # Not a generator: the node is not descended into (it has no children anyway)
+        self.names.append("Constant")
+
+
+class IterativeNodeVisitorTests(unittest.TestCase):
+    def test_same_order_as_node_visitor(self):
+        tree = ast.parse(MODULE + "y = 1\n")
+        recursive, iterative = RecordingVisitor(), IterativeRecordingVisitor()
+        recursive.visit(tree)
+        iterative.visit(tree)
+        self.assertEqual(iterative.names, recursive.names)
+        # Code after yield from runs once the children are done
+        self.assertEqual((iterative.depth, iterative.max_depth), (0, 2))
+
+    def test_deep_tree(self):
+        visitor = IterativeRecordingVisitor()
+        visitor.visit(parse(DEEP))
+        self.assertEqual(visitor.names.count("Attribute"), 2800)
+
+
+class ParseTests(unittest.TestCase):
+    def test_too_deeply_nested(self):
+        with self.assertRaises(TooDeeplyNested) as caught:
+            parse("-" * 100000 + "1", "deep.py")
+        self.assertIsInstance(caught.exception, SyntaxError)
+        self.assertIn("deep.py", str(caught.exception))
+
+    def test_deep_chain_is_analyzed(self):
+        result = analyze_source(DEEP, "deep.py")
+        self.assertEqual(result["functions"]["chain"]["end_lineno"], 2)
+
+
+class SameTreeTests(unittest.TestCase):
+    def test_matches_ast_dump(self):
+        sources = ["x = 1", "x = 1.0", "x = True", "x  =  1\n", "y = 1", "f(a, b)", "f(b, a)", "f(a)", "f(*a)"]
+        for a in sources:
+            for b in sources:
+                with self.subTest(a=a, b=b):
+                    x, y = ast.parse(a), ast.parse(b)
+                    self.assertEqual(same_tree(x, y), ast.dump(x) == ast.dump(y))
+
+    def test_positions_are_ignored(self):
+        self.assertTrue(same_tree(ast.parse("x = 1"), ast.parse("\n\nx = 1")))
+
+    def test_deep_trees(self):
+        self.assertTrue(same_tree(parse(DEEP), parse(DEEP)))
+        self.assertFalse(same_tree(parse(DEEP), parse(DEEP.replace("x.a\n", "x.b\n"))))
+
+
+class CollectFunctionsTests(unittest.TestCase):
+    def test_source_order(self):
+        functions = collect_functions(ast.parse(MODULE))
+        self.assertEqual(list(functions), ["Grid.cells", "Grid.cells.<locals>.flat", "total"])
+        self.assertEqual(functions["Grid.cells.<locals>.flat"][1], "Grid")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests for the git diff mode. Run with: python -m unittest discover -s vscode-extension/src"""
+import os
+import tempfile
+import textwrap
+import unittest
+
+from complexity_diff import diff_revisions, git
+
+BASE = """
+def scan(xs):
+    for x in xs:
+        print(x)
+
+async def fetch(client, urls):
+    return await client.get(urls[0])
+"""
+
+HEAD = """
+def scan(xs):
+    for a in xs:
+        for b in xs:
+            print(a, b)
+
+async def fetch(client, urls):
+    for url in urls:
+        await client.get(url)
+
+async def poll(client):
+    return await client.get("/")
+"""
+
+
+class DiffRevisionsTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.repo = tmp.name
+        git(self.repo, "init", "-q")
+        self.base = self.commit(BASE)
+        self.head = self.commit(HEAD)
+
+    def commit(self, source: str) -> str:
+        with open(os.path.join(self.repo, "app.py"), "w") as f:
+            f.write(textwrap.dedent(source).lstrip())
+        git(self.repo, "add", "app.py")
+        git(self.repo, "-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "-m", "change")
+        return git(self.repo, "rev-parse", "HEAD").decode("utf-8").strip()
+
+    def test_changed_functions(self):
+        report = diff_revisions(self.repo, self.base, self.head, [])
+        self.assertEqual(
+            [(r["function"], r["change"], r["base_time_complexity"], r["head_time_complexity"]) for r in report],
+            [
+                ("scan", "regression", "O(n)", "O(n²)"),
+                # Coroutines are analyzed like functions
+                ("fetch", "regression", "O(1)", "O(n)"),
+                ("poll", "added", None, "O(1)"),
+            ],
+        )
+
+    def test_reverse_diff(self):
+        report = diff_revisions(self.repo, self.head, self.base, [])
+        self.assertEqual(
+            [(r["function"], r["change"]) for r in report],
+            [("scan", "improvement"), ("fetch", "improvement"), ("poll", "removed")],
+        )
+
+    def test_unchanged_revisions(self):
+        self.assertEqual(diff_revisions(self.repo, self.head, self.head, []), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
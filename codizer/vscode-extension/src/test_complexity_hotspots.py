@@ -0,0 +1,68 @@
+"""Tests for the profile hotspot ranking. Run with: python -m unittest discover -s vscode-extension/src"""
+import asyncio
+import cProfile
+import importlib.util
+import os
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+import analyze_complexity
+from complexity_hotspots import FunctionLocator, rank_hotspots
+
+MODULE = """
+import asyncio
+
+def pairs(xs):
+    total = 0
+    for a in xs:
+        for b in xs:
+            total += a * b
+    return total
+
+async def gather_pairs(xs):
+    await asyncio.sleep(0)
+    return pairs(xs)
+"""
+
+
+class HotspotTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.path = os.path.join(self.dir, "workload.py")
+        with open(self.path, "w") as f:
+            f.write(textwrap.dedent(MODULE).lstrip())
+        # Keep test files out of the shared analysis cache
+        patcher = mock.patch.object(analyze_complexity, "analysis_cache", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def profile(self) -> str:
+        spec = importlib.util.spec_from_file_location("workload", self.path)
+        workload = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(workload)
+
+        profiler = cProfile.Profile()
+        profiler.runcall(asyncio.run, workload.gather_pairs(list(range(200))))
+        dump = os.path.join(self.dir, "workload.prof")
+        profiler.dump_stats(dump)
+        return dump
+
+    def test_coroutines_are_located(self):
+        located = FunctionLocator().locate(self.path, 11)
+        self.assertEqual(located[0], "gather_pairs")
+
+    def test_rank_hotspots(self):
+        hotspots = {h["function"]: h for h in rank_hotspots([self.profile()]) if h["file"] == self.path}
+        self.assertEqual(set(hotspots), {"pairs", "gather_pairs"})
+        self.assertEqual(hotspots["pairs"]["time_complexity"], "O(n²)")
+        self.assertEqual(hotspots["gather_pairs"]["time_complexity"], "O(1)")
+        # The quadratic function the coroutine waits on ranks first
+        self.assertGreater(hotspots["pairs"]["score"], hotspots["gather_pairs"]["score"])
+
+
+if __name__ == "__main__":
+    unittest.main()
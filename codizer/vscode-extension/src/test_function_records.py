@@ -0,0 +1,110 @@
+"""Tests for the column-wise records of vscode-extension/analyze_complexity.py. Run with: python -m unittest discover -s vscode-extension/src"""
+import importlib.util
+import json
+import os
+import tempfile
+import textwrap
+import unittest
+
+# The script beside src/ shares its module name with src/analyze_complexity.py
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "analyze_complexity.py")
+spec = importlib.util.spec_from_file_location("extension_analyze_complexity", SCRIPT)
+script = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(script)
+
+MODULE = textwrap.dedent("""
+    def pairs(xs):
+        def key(x):
+            return [y for y in x]
+        for a in xs:
+            if a:
+                for b in xs:
+                    print(key(a), b)
+
+    class Tree:
+        def walk(self, node):
+            while node:
+                node = self.walk(node.left)
+    """).lstrip()
+
+
+class RecordTableTests(unittest.TestCase):
+    def test_rows(self):
+        table = script.RecordTable(("line",), ("name",))
+        table.append(0, line=1, name="f")
+        table.append(1, line=2, name="g")
+        table.append(0, line=3, name="f")
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.rows(0), [0, 2])
+        self.assertEqual(table.rows_since(0, 1), [2])
+        self.assertEqual(table.rows(2), [])
+        self.assertEqual(table.row(1), {"line": 2, "name": "g"})
+        # Appending regroups the rows
+        table.append(2, line=4, name="h")
+        self.assertEqual(table.rows(2), [3])
+
+
+class FunctionRecordTests(unittest.TestCase):
+    def analyze(self, source):
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+            f.write(source)
+        self.addCleanup(os.remove, f.name)
+        return script.analyze_file(f.name)
+
+    def test_json_shape(self):
+        result = json.loads(json.dumps(self.analyze(MODULE), default=script.record_to_json))
+        functions = result["functions"]
+        self.assertEqual(list(functions), ["key", "pairs", "walk"])
+        self.assertEqual(functions["pairs"], {
+            "name": "pairs",
+            "line_start": 1,
+            "line_end": 7,
+            "loops": [{"line": 4, "depth": 1, "nested_in": 0}, {"line": 6, "depth": 2, "nested_in": 1}],
+            "calls": [{"line": 7, "name": "print"}, {"line": 7, "name": "key"}],
+            "conditionals": [{"line": 5, "depth": 1}],
+            "time_complexity": "O(n²)",
+            "space_complexity": "O(n)",
+            "has_recursion": False,
+            "is_async": False,
+            "awaits": [],
+        })
+        # A nested function's records are its own
+        self.assertEqual(functions["key"]["loops"], [{"line": 3, "depth": 1, "nested_in": None, "type": "comprehension"}])
+        self.assertEqual(functions["key"]["time_complexity"], "O(n)")
+        self.assertTrue(functions["walk"]["has_recursion"])
+        self.assertEqual(result["overall_time_complexity"], "O(2^n)")
+
+    def test_coroutines(self):
+        functions = self.analyze(textwrap.dedent("""
+            async def fetch_all(client, urls):
+                first = await client.get(urls[0])
+                async for page in client.pages():
+                    for url in urls:
+                        await client.get(url)
+
+                def later():
+                    for url in urls:
+                        print(url)
+            """).lstrip())["functions"]
+        fetch_all = functions["fetch_all"].to_json()
+        self.assertTrue(fetch_all["is_async"])
+        self.assertEqual(fetch_all["awaits"], [{"line": 2, "loop_depth": 0}, {"line": 5, "loop_depth": 2}])
+        # async for counts as a loop
+        self.assertEqual(fetch_all["time_complexity"], "O(n²)")
+        # Loops around a nested definition do not run its body
+        later = functions["later"].to_json()
+        self.assertFalse(later["is_async"])
+        self.assertEqual(later["loops"], [{"line": 8, "depth": 1, "nested_in": 0}])
+
+    def test_record_to_json_rejects_other_objects(self):
+        with self.assertRaises(TypeError):
+            json.dumps(object(), default=script.record_to_json)
+
+    def test_syntax_error(self):
+        result = self.analyze("def broken(:\n")
+        self.assertIn("Syntax error", result["error"])
+        self.assertEqual(result["functions"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()